@@ -31,6 +31,7 @@ export function SearchAPI() {
   const searchFunction = new sst.aws.Function("SearchFunction", {
     handler: "functions/src/search_handler.lambda_handler",
     runtime: "python3.12",
+    copyFiles: [{ from: "packages/core/src", to: "core/src" }],  // functions.src.config.llm_config re-exports core.src.config.llm_config
     timeout: "30 seconds",
     memory: "1024 MB",  // Increased for 2x CPU power + faster execution
     provisionedConcurrency: 1,  // Pre-warm 1 instance to eliminate cold starts
@@ -46,6 +47,13 @@ export function SearchAPI() {
       // NO MODEL IDS HERE - llm_config.py is the single source of truth!
       CLAUDE_MAX_TOKENS: "1000",
       CLAUDE_TEMPERATURE: "0",
+      EXPANSION_ENGINE: process.env.EXPANSION_ENGINE || "search",  // "search" (FT.SEARCH) | "sets" (cls:* member sets)
+      GROUPING_ENGINE: process.env.GROUPING_ENGINE || "python",  // "python" | "aggregate" (FT.AGGREGATE GROUPBY family_key)
+      LLM_CASCADE_ENABLED: process.env.LLM_CASCADE_ENABLED || "false",  // Opt-in: Nova Micro → Haiku → Sonnet 4, escalating on low confidence
+      LLM_CASCADE_BUDGET_MS: "4000",  // Per-request parse deadline (also capped to leave LLM_PARSE_RESERVE_MS of Lambda time)
+      LLM_HEDGE_ENABLED: process.env.LLM_HEDGE_ENABLED || "false",  // Opt-in: re-send slow Converse calls to the same model
+      LLM_HEDGE_MAX_RATE: "0.05",  // Hedged (duplicated) Converse calls: at most 5% extra
+      BEDROCK_READ_TIMEOUT: "10",  // Seconds; retries (adaptive mode) stay inside the 30s Lambda timeout
     },
     permissions: [
       {
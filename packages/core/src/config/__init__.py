@@ -3,24 +3,17 @@ DAW Configuration Module
 Centralized configuration for Lambda functions and Fargate jobs
 """
 
-from .practice_config import (
-    PracticeConfig,
-    get_default_config,
-    get_practice_config_for_clinic,
-    PriorityLevel,
-    TimeThresholds,
-    ProximityThresholds,
-    CandidateLimits,
-    AttendanceThreshold,
-    StrategyThresholds,
-)
 from .llm_config import (
-    MODEL_CONFIG,
-    DEFAULT_MODEL,
-    validate_model_id,
+    LLMModel,
+    DEFAULT_LLM_MODEL,
     get_llm_config,
-    get_model_config,
-    get_available_models
+    call_claude_converse,
+    generate_embedding,
+    estimate_cost,
+    get_model_info,
+    get_client_stats,
+    prewarm_bedrock_clients,
+    set_embedding_cache
 )
 from .secrets import (
     get_redis_password,
@@ -32,23 +25,17 @@ from .secrets import (
 )
 
 __all__ = [
-    # Practice config
-    "PracticeConfig",
-    "get_default_config",
-    "get_practice_config_for_clinic",
-    "PriorityLevel",
-    "TimeThresholds",
-    "ProximityThresholds",
-    "CandidateLimits",
-    "AttendanceThreshold",
-    "StrategyThresholds",
     # LLM config
-    "MODEL_CONFIG",
-    "DEFAULT_MODEL",
-    "validate_model_id",
+    "LLMModel",
+    "DEFAULT_LLM_MODEL",
     "get_llm_config",
-    "get_model_config",
-    "get_available_models",
+    "call_claude_converse",
+    "generate_embedding",
+    "estimate_cost",
+    "get_model_info",
+    "get_client_stats",
+    "prewarm_bedrock_clients",
+    "set_embedding_cache",
     # Secrets management
     "get_redis_password",
     "get_db_credentials",
@@ -9,15 +9,97 @@ CRITICAL RULES:
 2. NEVER use invoke_model() - it bypasses prompt caching
 3. ALWAYS return latency metrics and token usage
 4. NEVER hard-code model IDs - import from this module
+5. ALWAYS obtain AWS clients via get_bedrock_client() - NEVER call boto3.client(...) directly
+
+Bedrock / SageMaker clients are cached per (service, region) for the life of
+a warm container: building one resolves credentials and endpoints and sets
+up an HTTP connection pool, which costs tens of milliseconds per call.
+
+Environment Variables:
+    BEDROCK_MAX_POOL_CONNECTIONS: HTTP connections per client (default: 16)
+    BEDROCK_CONNECT_TIMEOUT: Connect timeout in seconds (default: 2)
+    BEDROCK_READ_TIMEOUT: Read timeout in seconds (default: 10)
+    BEDROCK_MAX_ATTEMPTS: Total attempts per call, retries included (default: 3)
+    BEDROCK_RETRY_MODE: botocore retry mode (default: adaptive)
+    BEDROCK_TCP_KEEPALIVE: Enable TCP keepalive on pooled sockets (default: true)
+    PROMPT_CACHE_ENABLED: Send prompt cache points to models that support them,
+        for prefixes long enough to be cached (default: true)
+    LLM_CASCADE_ENABLED: Route structured-output calls through the model cascade (default: false)
+    LLM_CASCADE_MODELS: Comma-separated model IDs, cheapest/fastest first
+        (default: Nova Micro, Claude Haiku, Claude Sonnet 4)
+    LLM_CASCADE_MIN_CONFIDENCE: Lowest reported confidence a tier may answer with (default: 0.7)
+    LLM_CASCADE_BUDGET_MS: Latency budget for the whole cascade (default: 4000); a
+        per-request deadline passed to call_llm_cascade() can shorten it
+    LLM_HEDGE_ENABLED: Hedge slow Converse calls with a second request (default: false)
+    LLM_HEDGE_PERCENTILE: Latency percentile after which a hedge is sent (default: 95)
+    LLM_HEDGE_MIN_SAMPLES: Latencies needed before the percentile is used (default: 20)
+    LLM_HEDGE_DEFAULT_DELAY_MS: Hedge delay until then (default: 2000)
+    LLM_HEDGE_MIN_DELAY_MS: Lower bound on the hedge delay (default: 250)
+    LLM_HEDGE_MAX_RATE: Hedges allowed per call, i.e. extra-call budget (default: 0.05)
+    LLM_HEDGE_CROSS_MODEL: Hedge with HEDGE_MODEL_MAP's model instead of the same model (default: false)
+    LLM_HEDGE_MODEL: Hedge every call with this model ID (implies cross-model hedging)
+
+generate_embedding() serves vectors from an embedding cache when the caller
+injects one with set_embedding_cache() (the Lambda functions plug in
+functions/src/cache/embedding_cache.py); this module does not depend on it.
 """
 
+import json
 import os
-from typing import Dict, Any, Optional, List
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Callable, Dict, Any, Optional, List, Tuple
 from enum import Enum
 
 # Global inference configuration
 BEDROCK_REGION = os.environ.get("BEDROCK_REGION", "us-east-1")
 
+# Shared botocore settings for every cached AWS client
+AWS_CLIENT_CONFIG = {
+    "max_pool_connections": int(os.environ.get("BEDROCK_MAX_POOL_CONNECTIONS", "16")),
+    "connect_timeout": float(os.environ.get("BEDROCK_CONNECT_TIMEOUT", "2")),
+    "read_timeout": float(os.environ.get("BEDROCK_READ_TIMEOUT", "10")),
+    "max_attempts": int(os.environ.get("BEDROCK_MAX_ATTEMPTS", "3")),
+    "retry_mode": os.environ.get("BEDROCK_RETRY_MODE", "adaptive"),
+    "tcp_keepalive": os.environ.get("BEDROCK_TCP_KEEPALIVE", "true").lower() == "true",
+}
+
+# Bedrock prompt caching: a cachePoint block after a static prompt prefix
+# lets later calls read that prefix from cache (billed at the cached rate).
+# Models without prompt caching reject the block, so it is stripped for them.
+# A cache point is also only honoured once the prefix before it reaches the
+# model's minimum size, so shorter prefixes get no cache point either.
+# NOTE: DEFAULT_LLM_MODEL (Claude 3 Haiku) has no prompt caching - on the default
+# route no cache point is sent; caching takes effect once BEDROCK_INFERENCE_PROFILE
+# (or a cascade / hedge tier) selects a listed model and the prefix is long enough.
+PROMPT_CACHE_ENABLED = os.environ.get("PROMPT_CACHE_ENABLED", "true").lower() == "true"
+CACHE_POINT = {"cachePoint": {"type": "default"}}
+# Model ID marker -> minimum tokens before a cache point
+PROMPT_CACHE_MIN_TOKENS = {
+    "claude-sonnet-4": 1024,
+    "claude-opus-4": 1024,
+    "claude-3-7-sonnet": 1024,
+    "claude-3-5-haiku": 2048,
+    "nova-micro": 1000,
+    "nova-lite": 1000,
+    "nova-pro": 1000,
+}
+# Rough English-text ratio used to estimate prefix tokens without a tokenizer
+PROMPT_CACHE_CHARS_PER_TOKEN = 4
+# Cache writes are billed at a premium over regular input tokens
+CACHE_WRITE_PRICE_MULTIPLIER = 1.25
+
+# (service, region) -> client, created once per warm container
+_CLIENTS: Dict[Tuple[str, str], Any] = {}
+_CLIENTS_LOCK = threading.Lock()
+_CLIENT_STATS = {
+    "clients_created": 0,
+    "construction_ms": 0.0,
+}
+
 # Use cross-region inference for better availability
 BEDROCK_INFERENCE_PROFILE = os.environ.get(
     "BEDROCK_INFERENCE_PROFILE",
@@ -74,6 +156,85 @@ CLAUDE_CONFIG = {
     "top_p": float(os.environ.get("CLAUDE_TOP_P", "1.0")),
 }
 
+# Model cascade: try the cheapest/fastest tier first and escalate only when
+# its JSON does not parse or its self-reported confidence is too low
+LLM_CASCADE_CONFIG = {
+    "enabled": os.environ.get("LLM_CASCADE_ENABLED", "false").lower() == "true",
+    "models": [
+        model_id.strip() for model_id in os.environ.get(
+            "LLM_CASCADE_MODELS",
+            ",".join([
+                LLMModel.NOVA_MICRO.value,
+                LLMModel.CLAUDE_HAIKU_3_5.value,
+                LLMModel.CLAUDE_SONNET_4.value,
+            ])
+        ).split(",") if model_id.strip()
+    ],
+    "min_confidence": float(os.environ.get("LLM_CASCADE_MIN_CONFIDENCE", "0.7")),
+    "budget_ms": float(os.environ.get("LLM_CASCADE_BUDGET_MS", "4000")),
+}
+
+class LLMDeadlineExceeded(TimeoutError):
+    """No model produced a usable reply before the request's LLM deadline."""
+
+
+# Cascade tiers run here so the deadline can stop waiting on a slow tier
+_CASCADE_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="llm-cascade")
+_CASCADE_STATS_LOCK = threading.Lock()
+_CASCADE_STATS: Dict[str, Any] = {
+    "requests": 0,
+    "answered_by": {},  # model_id -> count
+    "escalations": {},  # outcome that caused an escalation -> count
+    "budget_exhausted": 0,
+    "fallbacks": 0,
+    "abandoned_calls": 0,
+    "abandoned_cost": 0.0,
+}
+
+# Hedged requests: when a call has not answered (or, streamed, started
+# answering) within the model's recent latency percentile, the same request
+# is sent again and the first to answer wins. The hedge goes to the same
+# model unless cross-model hedging is opted into (a different model's parse
+# is then a possible answer, so it becomes part of get_llm_route_id). Hedges
+# are paid for out of a budget that grows by max_rate per call, so at most
+# that fraction of calls is duplicated.
+LLM_HEDGE_CONFIG = {
+    "enabled": os.environ.get("LLM_HEDGE_ENABLED", "false").lower() == "true",
+    "percentile": float(os.environ.get("LLM_HEDGE_PERCENTILE", "95")),
+    "min_samples": int(os.environ.get("LLM_HEDGE_MIN_SAMPLES", "20")),
+    "default_delay_ms": float(os.environ.get("LLM_HEDGE_DEFAULT_DELAY_MS", "2000")),
+    "min_delay_ms": float(os.environ.get("LLM_HEDGE_MIN_DELAY_MS", "250")),
+    "max_rate": float(os.environ.get("LLM_HEDGE_MAX_RATE", "0.05")),
+    "cross_model": os.environ.get("LLM_HEDGE_CROSS_MODEL", "false").lower() == "true",
+    "model": os.environ.get("LLM_HEDGE_MODEL", ""),
+}
+# Cross-model hedging only: primary -> hedge (a comparable model on a
+# different inference profile)
+HEDGE_MODEL_MAP = {
+    LLMModel.NOVA_MICRO.value: LLMModel.NOVA_LITE.value,
+    LLMModel.NOVA_LITE.value: LLMModel.NOVA_MICRO.value,
+    LLMModel.NOVA_PRO.value: LLMModel.CLAUDE_HAIKU_3_5.value,
+    LLMModel.CLAUDE_HAIKU_3_5.value: LLMModel.NOVA_LITE.value,
+    LLMModel.CLAUDE_SONNET_3_5.value: LLMModel.CLAUDE_SONNET_4.value,
+    LLMModel.CLAUDE_SONNET_4.value: LLMModel.CLAUDE_SONNET_3_5.value,
+}
+HEDGE_LATENCY_WINDOW = 200  # Recent latencies kept per (model, streamed)
+HEDGE_BUDGET_BURST = 2.0  # Most hedges that can be saved up
+
+_HEDGE_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+_HEDGE_LOCK = threading.Lock()
+_HEDGE_LATENCIES: Dict[Tuple[str, bool], deque] = {}
+_HEDGE_STATE = {"budget": 0.0}
+_HEDGE_STATS: Dict[str, Any] = {
+    "calls": 0,
+    "hedges_sent": 0,
+    "rate_limited": 0,
+    "primary_won": 0,
+    "hedge_won": 0,
+    "wasted_input_tokens": 0,
+    "wasted_output_tokens": 0,
+}
+
 # Titan Embeddings configuration  
 TITAN_CONFIG = {
     "region": BEDROCK_REGION,
@@ -94,6 +255,9 @@ SAPBERT_CONFIG = {
 # Embedding model selection
 EMBEDDING_MODEL_TYPE = os.environ.get("EMBEDDING_MODEL", "titan")  # or "sapbert"
 
+# Injected by set_embedding_cache(); None = every call goes to Bedrock
+_EMBEDDING_CACHE: Optional[Any] = None
+
 
 def get_llm_config() -> Dict[str, Any]:
     """
@@ -118,18 +282,70 @@ def get_embedding_config() -> Dict[str, Any]:
         return TITAN_CONFIG.copy()
 
 
-def get_bedrock_client(service: str = "bedrock-runtime"):
+def _build_client_config():
+    from botocore.config import Config
+    return Config(
+        max_pool_connections=AWS_CLIENT_CONFIG["max_pool_connections"],
+        connect_timeout=AWS_CLIENT_CONFIG["connect_timeout"],
+        read_timeout=AWS_CLIENT_CONFIG["read_timeout"],
+        retries={
+            "max_attempts": AWS_CLIENT_CONFIG["max_attempts"],
+            "mode": AWS_CLIENT_CONFIG["retry_mode"],
+        },
+        tcp_keepalive=AWS_CLIENT_CONFIG["tcp_keepalive"],
+    )
+
+
+def get_aws_client(service: str, region: Optional[str] = None) -> Tuple[Any, float]:
+    """
+    Get the cached client for an AWS service and region
+
+    Clients are thread-safe and shared by every request in the container;
+    only the first call per (service, region) builds one.
+
+    Args:
+        service: AWS service name (bedrock-runtime, sagemaker-runtime, etc.)
+        region: AWS region (default: BEDROCK_REGION)
+
+    Returns:
+        (client, construction_ms) - construction_ms is 0.0 when cached
+    """
+    key = (service, region or BEDROCK_REGION)
+    client = _CLIENTS.get(key)
+    if client is not None:
+        return client, 0.0
+
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is not None:
+            return client, 0.0
+
+        import boto3
+
+        start_time = time.perf_counter()
+        # A private session: the default one is not safe to build clients from concurrently
+        client = boto3.session.Session().client(key[0], region_name=key[1], config=_build_client_config())
+        construction_ms = round((time.perf_counter() - start_time) * 1000, 2)
+
+        _CLIENTS[key] = client
+        _CLIENT_STATS["clients_created"] += 1
+        _CLIENT_STATS["construction_ms"] += construction_ms
+        print(f"[BEDROCK] Created {key[0]} client ({key[1]}) in {construction_ms}ms")
+        return client, construction_ms
+
+
+def get_bedrock_client(service: str = "bedrock-runtime", region: Optional[str] = None):
     """
     Get configured Bedrock client
     
     Args:
         service: AWS service name (bedrock-runtime, bedrock, etc.)
+        region: AWS region (default: BEDROCK_REGION)
     
     Returns:
-        Configured boto3 client
+        Cached boto3 client (created on first use)
     """
-    import boto3
-    return boto3.client(service, region_name=BEDROCK_REGION)
+    return get_aws_client(service, region)[0]
 
 
 def get_sagemaker_client():
@@ -137,20 +353,122 @@ def get_sagemaker_client():
     Get configured SageMaker Runtime client
     
     Returns:
-        Configured boto3 SageMaker Runtime client
+        Cached boto3 SageMaker Runtime client (created on first use)
     """
-    import boto3
-    return boto3.client(
-        "sagemaker-runtime",
-        region_name=SAPBERT_CONFIG["region"]
-    )
+    return get_aws_client("sagemaker-runtime", SAPBERT_CONFIG["region"])[0]
+
+
+def prewarm_bedrock_clients(services: Tuple[str, ...] = ("bedrock-runtime",)) -> Dict[str, float]:
+    """
+    Build the clients a handler needs during Lambda init (outside the billed request)
+
+    Args:
+        services: Services to build clients for in BEDROCK_REGION
+
+    Returns:
+        Dict of service -> construction_ms (0.0 if already cached)
+    """
+    timings = {}
+    for service in services:
+        try:
+            timings[service] = get_aws_client(service)[1]
+        except Exception as e:
+            # The first request retries (and surfaces) the failure
+            print(f"[WARNING] Could not pre-warm {service} client: {e}")
+    return timings
+
+
+def get_client_stats() -> Dict[str, Any]:
+    """
+    Snapshot the process-wide client registry
+
+    Returns:
+        Dict with clients_cached, clients_created and construction_ms
+    """
+    with _CLIENTS_LOCK:
+        return {
+            "clients_cached": len(_CLIENTS),
+            "clients_created": _CLIENT_STATS["clients_created"],
+            "construction_ms": round(_CLIENT_STATS["construction_ms"], 2),
+        }
+
+
+def prompt_cache_min_tokens(model_id: str) -> Optional[int]:
+    """Minimum cacheable prefix for a model / inference profile (None = no prompt caching)."""
+    model_id = model_id.lower()
+    for marker, min_tokens in PROMPT_CACHE_MIN_TOKENS.items():
+        if marker in model_id:
+            return min_tokens
+    return None
+
+
+def supports_prompt_caching(model_id: str) -> bool:
+    """True if Bedrock accepts cache points for this model / inference profile."""
+    return prompt_cache_min_tokens(model_id) is not None
+
+
+def estimate_cache_prefix_tokens(
+    system_prompts: Optional[List[Dict[str, Any]]],
+    messages: Optional[List[Dict[str, Any]]] = None,
+) -> int:
+    """
+    Estimate the tokens before the last cache point of a Converse request
+    
+    Text blocks are read in request order (system prompts, then message
+    content) and counted at PROMPT_CACHE_CHARS_PER_TOKEN.
+    
+    Args:
+        system_prompts: System prompt blocks
+        messages: Messages whose content may also hold cache points
+    
+    Returns:
+        Estimated prefix tokens (0 when there is no cache point)
+    """
+    blocks: List[Dict[str, Any]] = list(system_prompts or [])
+    for message in messages or []:
+        if isinstance(message.get("content"), list):
+            blocks.extend(message["content"])
+    
+    chars = 0
+    prefix_chars = 0
+    for block in blocks:
+        if "cachePoint" in block:
+            prefix_chars = chars
+        else:
+            chars += len(block.get("text") or "")
+    return prefix_chars // PROMPT_CACHE_CHARS_PER_TOKEN
+
+
+def prompt_cache_eligible(
+    model_id: str,
+    system_prompts: Optional[List[Dict[str, Any]]],
+    messages: Optional[List[Dict[str, Any]]] = None,
+) -> bool:
+    """
+    True if a request's cache points would be sent and honoured
+    
+    Requires PROMPT_CACHE_ENABLED, a model with prompt caching and an
+    estimated prefix of at least the model's minimum cacheable size.
+    """
+    if not PROMPT_CACHE_ENABLED:
+        return False
+    min_tokens = prompt_cache_min_tokens(model_id)
+    if min_tokens is None:
+        return False
+    return estimate_cache_prefix_tokens(system_prompts, messages) >= min_tokens
+
+
+def _strip_cache_points(blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [block for block in blocks if "cachePoint" not in block]
 
 
 def call_claude_converse(
     messages: List[Dict[str, Any]],
-    system_prompts: Optional[List[Dict[str, str]]] = None,
+    system_prompts: Optional[List[Dict[str, Any]]] = None,
     max_tokens: Optional[int] = None,
     temperature: Optional[float] = None,
+    model_id: Optional[str] = None,
+    hedge: Optional[bool] = None,
 ) -> Dict[str, Any]:
     """
     Call Claude using Converse API with proper metrics tracking
@@ -173,19 +491,34 @@ def call_claude_converse(
         # Test Nova Lite (fastest, cheapest)
         DEFAULT_LLM_MODEL = LLMModel.NOVA_LITE
     
+    Prompt caching: put CACHE_POINT after the static part of the system
+    prompts (or of a message's content); everything before it is cached by
+    Bedrock. Cache points are dropped for models without prompt caching and
+    when PROMPT_CACHE_ENABLED is false, and for a prefix estimated shorter
+    than the model's minimum (PROMPT_CACHE_MIN_TOKENS, 1,024 tokens for most
+    Claude models). metadata['prompt_cache_eligible'] says whether one was sent.
+    
+    Hedging (LLM_HEDGE_CONFIG, off by default): if no response arrives within
+    the model's recent latency percentile, the request is sent again - to the
+    same model, or with cross-model hedging to its HEDGE_MODEL_MAP model - and
+    the first successful response wins; the result then carries a 'hedge'
+    block. At most max_rate of calls are hedged.
+    
     Args:
         messages: List of message dicts with 'role' and 'content'
-        system_prompts: Optional list of system prompt dicts
+        system_prompts: Optional list of system prompt blocks ({'text': ...} or CACHE_POINT)
         max_tokens: Override default max_tokens
         temperature: Override default temperature
+        model_id: Override the configured model (e.g. a cascade tier)
+        hedge: Force hedging on / off (default: LLM_HEDGE_CONFIG['enabled'])
     
     Returns:
         Dict containing:
         - success: bool
         - content: str (response text)
-        - usage: dict (inputTokens, outputTokens)
+        - usage: dict (inputTokens, outputTokens, cacheReadInputTokens, cacheWriteInputTokens)
         - model: str (model ID used)
-        - metadata: dict with tokens and latency
+        - metadata: dict with tokens (uncached input, output, cache read / write) and latency
         - latency_ms: int (milliseconds)
     
     Example:
@@ -205,11 +538,611 @@ def call_claude_converse(
             print(f"Latency: {response['latency_ms']}ms")
         ```
     """
-    import time
+    request = {
+        'messages': messages,
+        'system_prompts': system_prompts,
+        'max_tokens': max_tokens,
+        'temperature': temperature,
+    }
+    model_id = model_id or get_llm_config()["model_id"]
+    hedge_model = _hedge_model_for(model_id, hedge)
+    if hedge_model is None:
+        return _converse_once(**request, model_id=model_id)
+    return _call_hedged(_converse_once, request, model_id, hedge_model)
+
+
+def _converse_once(
+    messages: List[Dict[str, Any]],
+    system_prompts: Optional[List[Dict[str, Any]]],
+    max_tokens: Optional[int],
+    temperature: Optional[float],
+    model_id: str,
+) -> Dict[str, Any]:
+    client, client_ms = get_aws_client("bedrock-runtime")
+    config = get_llm_config()
+    config["model_id"] = model_id
+    request_params = _build_converse_request(config, messages, system_prompts, max_tokens, temperature)
     
-    client = get_bedrock_client()
+    try:
+        start_time = time.time()
+        
+        # Call Converse API (enables prompt caching)
+        response = client.converse(**request_params)
+        
+        end_time = time.time()
+        latency_ms = int((end_time - start_time) * 1000)
+        
+        # Extract content
+        content = response['output']['message']['content'][0]['text']
+        
+        return _converse_result(
+            config, content, response.get('usage', {}), response.get('metrics', {}), latency_ms, client_ms,
+            _has_cache_point(request_params),
+        )
+        
+    except Exception as e:
+        return _converse_error(config, e, client_ms)
+
+
+def call_claude_converse_stream(
+    messages: List[Dict[str, Any]],
+    system_prompts: Optional[List[Dict[str, Any]]] = None,
+    max_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+    model_id: Optional[str] = None,
+    on_text: Optional[Callable[[str], None]] = None,
+    hedge: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """
+    Streaming variant of call_claude_converse (ConverseStream API)
+    
+    Same request (cache points included) and same return shape; on_text is
+    called with each text delta as it arrives, so callers can act on the
+    start of the output while the model is still generating the rest.
+    
+    Hedging works on time to first token: the stream that emits first wins
+    and only its deltas reach on_text. If that stream then fails, the other
+    call's result is returned (its deltas are not replayed).
+    
+    Args:
+        messages: List of message dicts with 'role' and 'content'
+        system_prompts: Optional list of system prompt blocks ({'text': ...} or CACHE_POINT)
+        max_tokens: Override default max_tokens
+        temperature: Override default temperature
+        model_id: Override the configured model (e.g. a cascade tier)
+        on_text: Called with every text delta (exceptions are logged, not raised)
+        hedge: Force hedging on / off (default: LLM_HEDGE_CONFIG['enabled'])
+    
+    Returns:
+        Same dict as call_claude_converse, with metadata.first_token_ms
+        (client-side time to the first text delta)
+    """
+    request = {
+        'messages': messages,
+        'system_prompts': system_prompts,
+        'max_tokens': max_tokens,
+        'temperature': temperature,
+    }
+    model_id = model_id or get_llm_config()["model_id"]
+    hedge_model = _hedge_model_for(model_id, hedge)
+    if hedge_model is None:
+        return _converse_stream_once(**request, model_id=model_id, on_text=on_text)
+    return _call_hedged(_converse_stream_once, request, model_id, hedge_model, stream=True, on_text=on_text)
+
+
+def _converse_stream_once(
+    messages: List[Dict[str, Any]],
+    system_prompts: Optional[List[Dict[str, Any]]],
+    max_tokens: Optional[int],
+    temperature: Optional[float],
+    model_id: str,
+    on_text: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    client, client_ms = get_aws_client("bedrock-runtime")
     config = get_llm_config()
+    config["model_id"] = model_id
+    request_params = _build_converse_request(config, messages, system_prompts, max_tokens, temperature)
     
+    try:
+        start_time = time.time()
+        response = client.converse_stream(**request_params)
+        
+        chunks: List[str] = []
+        first_token_ms = None
+        usage: Dict[str, Any] = {}
+        metrics: Dict[str, Any] = {}
+        for event in response['stream']:
+            if 'contentBlockDelta' in event:
+                text = event['contentBlockDelta'].get('delta', {}).get('text')
+                if not text:
+                    continue
+                if first_token_ms is None:
+                    first_token_ms = int((time.time() - start_time) * 1000)
+                chunks.append(text)
+                if on_text is not None:
+                    try:
+                        on_text(text)
+                    except Exception as e:
+                        print(f"[WARNING] Stream callback failed: {e}")
+            elif 'metadata' in event:
+                usage = event['metadata'].get('usage', {})
+                metrics = event['metadata'].get('metrics', {})
+        
+        latency_ms = int((time.time() - start_time) * 1000)
+        result = _converse_result(
+            config, ''.join(chunks), usage, metrics, latency_ms, client_ms, _has_cache_point(request_params)
+        )
+        result['metadata']['first_token_ms'] = first_token_ms
+        return result
+        
+    except Exception as e:
+        return _converse_error(config, e, client_ms)
+
+
+def _hedge_model_for(model_id: str, hedge: Optional[bool]) -> Optional[str]:
+    if not (LLM_HEDGE_CONFIG["enabled"] if hedge is None else hedge):
+        return None
+    if LLM_HEDGE_CONFIG["model"]:
+        return LLM_HEDGE_CONFIG["model"]
+    if LLM_HEDGE_CONFIG["cross_model"]:
+        return HEDGE_MODEL_MAP.get(model_id, model_id)
+    return model_id
+
+
+def get_hedge_delay_ms(model_id: str, stream: bool = False) -> float:
+    """
+    How long to wait for model_id before hedging
+    
+    The LLM_HEDGE_PERCENTILE of its recent latencies (time to first token when
+    streamed), or LLM_HEDGE_DEFAULT_DELAY_MS until there are enough samples.
+    """
+    with _HEDGE_LOCK:
+        samples = sorted(_HEDGE_LATENCIES.get((model_id, stream), ()))
+    if len(samples) < LLM_HEDGE_CONFIG["min_samples"]:
+        return LLM_HEDGE_CONFIG["default_delay_ms"]
+    index = min(len(samples) - 1, int(len(samples) * LLM_HEDGE_CONFIG["percentile"] / 100))
+    return max(LLM_HEDGE_CONFIG["min_delay_ms"], samples[index])
+
+
+def _succeeded(future: Future) -> bool:
+    return future.exception() is None and bool(future.result().get('success'))
+
+
+def _record_hedge_latency(model_id: str, stream: bool, future: Future) -> None:
+    if not _succeeded(future):
+        return
+    result = future.result()
+    metadata = result.get('metadata', {})
+    latency_ms = metadata.get('first_token_ms') if stream else metadata.get('client_latency_ms')
+    if latency_ms is None:
+        return
+    with _HEDGE_LOCK:
+        _HEDGE_LATENCIES.setdefault((model_id, stream), deque(maxlen=HEDGE_LATENCY_WINDOW)).append(latency_ms)
+
+
+def _record_wasted(future: Future) -> None:
+    # The losing call still runs to completion and is billed
+    if future.exception() is not None:
+        return
+    metadata = future.result().get('metadata', {})
+    with _HEDGE_LOCK:
+        _HEDGE_STATS["wasted_input_tokens"] += metadata.get('input_tokens', 0) + \
+            metadata.get('cache_read_tokens', 0) + metadata.get('cache_write_tokens', 0)
+        _HEDGE_STATS["wasted_output_tokens"] += metadata.get('output_tokens', 0)
+
+
+def _call_hedged(
+    call: Callable[..., Dict[str, Any]],
+    request: Dict[str, Any],
+    model_id: str,
+    hedge_model: str,
+    stream: bool = False,
+    on_text: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """Run call on model_id, hedged with hedge_model; see call_claude_converse."""
+    with _HEDGE_LOCK:
+        _HEDGE_STATS["calls"] += 1
+        _HEDGE_STATE["budget"] = min(HEDGE_BUDGET_BURST, _HEDGE_STATE["budget"] + LLM_HEDGE_CONFIG["max_rate"])
+    
+    lock = threading.Lock()
+    changed = threading.Event()
+    state: Dict[str, Optional[str]] = {"winner": None}
+    futures: Dict[str, Future] = {}
+    
+    def forward(role: str) -> Callable[[str], None]:
+        # First stream to emit wins; the other's deltas are dropped
+        def on_delta(text: str) -> None:
+            with lock:
+                if state["winner"] is None:
+                    state["winner"] = role
+                    changed.set()
+                mine = state["winner"] == role
+            if mine and on_text is not None:
+                on_text(text)
+        return on_delta
+    
+    def submit(role: str, role_model: str) -> None:
+        kwargs = {**request, 'model_id': role_model}
+        if stream:
+            kwargs['on_text'] = forward(role)
+        future = _HEDGE_EXECUTOR.submit(call, **kwargs)
+        future.add_done_callback(lambda done: _record_hedge_latency(role_model, stream, done))
+        future.add_done_callback(lambda done: changed.set())
+        futures[role] = future
+    
+    def pick_winner() -> Optional[str]:
+        with lock:
+            if state["winner"] is None:
+                for role in ('primary', 'hedge'):
+                    future = futures.get(role)
+                    if future is not None and future.done() and _succeeded(future):
+                        state["winner"] = role
+                        break
+            return state["winner"]
+    
+    delay_ms = get_hedge_delay_ms(model_id, stream)
+    hedge_info: Dict[str, Any] = {
+        'delay_ms': round(delay_ms, 2),
+        'sent': False,
+        'rate_limited': False,
+        'model': hedge_model,
+        'winner': 'primary',
+    }
+    submit('primary', model_id)
+    hedge_at = time.perf_counter() + delay_ms / 1000
+    
+    while True:
+        changed.clear()
+        winner = pick_winner()
+        if winner is not None:
+            break
+        if all(future.done() for future in futures.values()):
+            winner = 'primary'  # Every call failed: report the primary's error
+            break
+        if 'hedge' in futures or hedge_info['rate_limited']:
+            changed.wait()
+            continue
+        remaining = hedge_at - time.perf_counter()
+        if remaining > 0:
+            changed.wait(remaining)
+            continue
+        with _HEDGE_LOCK:
+            allowed = _HEDGE_STATE["budget"] >= 1.0
+            if allowed:
+                _HEDGE_STATE["budget"] -= 1.0
+                _HEDGE_STATS["hedges_sent"] += 1
+            else:
+                _HEDGE_STATS["rate_limited"] += 1
+        if allowed:
+            print(f"[LLM_HEDGE] {model_id} silent after {delay_ms:.0f}ms, hedging with {hedge_model}")
+            hedge_info['sent'] = True
+            submit('hedge', hedge_model)
+        else:
+            hedge_info['rate_limited'] = True
+    
+    result = futures[winner].result()
+    other = futures.get('hedge' if winner == 'primary' else 'primary')
+    if not result.get('success') and other is not None:
+        # A stream can win on its first delta and still fail; fall back to the other call
+        other_result = other.result()
+        if other_result.get('success'):
+            print(f"[LLM_HEDGE] {winner} call failed after winning ({result.get('error')}), using the other call")
+            winner = 'hedge' if winner == 'primary' else 'primary'
+            result = other_result
+    if hedge_info['sent']:
+        hedge_info['winner'] = winner
+        loser = futures['primary' if winner == 'hedge' else 'hedge']
+        loser.add_done_callback(_record_wasted)
+        with _HEDGE_LOCK:
+            _HEDGE_STATS["hedge_won" if winner == 'hedge' else "primary_won"] += 1
+    return {**result, 'hedge': hedge_info}
+
+
+def get_hedge_stats() -> Dict[str, Any]:
+    """
+    Container-lifetime hedging counters
+    
+    Returns:
+        Dict with calls, hedges_sent, rate_limited, primary_won, hedge_won,
+        wasted_input_tokens / wasted_output_tokens (billed to the losing call)
+        and hedge_rate (hedges_sent / calls)
+    """
+    with _HEDGE_LOCK:
+        stats = dict(_HEDGE_STATS)
+    stats["hedge_rate"] = round(stats["hedges_sent"] / stats["calls"], 4) if stats["calls"] else 0.0
+    return stats
+
+
+def _route_model_id(model_id: str) -> str:
+    # A cross-model hedge can answer too, so it is part of the route
+    hedge_model = _hedge_model_for(model_id, None)
+    return model_id if hedge_model in (None, model_id) else f"{model_id}~{hedge_model}"
+
+
+def get_llm_route_id() -> str:
+    """Identifies what answers call_llm_cascade (cache / coalescing key for LLM output)."""
+    if not LLM_CASCADE_CONFIG["enabled"]:
+        return _route_model_id(get_llm_config()["model_id"])
+    models = '>'.join(_route_model_id(model_id) for model_id in LLM_CASCADE_CONFIG['models'])
+    return f"cascade:{models}@{LLM_CASCADE_CONFIG['min_confidence']}"
+
+
+def model_from_id(model_id: str) -> Optional[LLMModel]:
+    """LLMModel for a model ID (None for IDs outside the enum)."""
+    for model in LLMModel:
+        if model.value == model_id:
+            return model
+    return None
+
+
+def _cascade_outcome(response: Dict[str, Any], min_confidence: float) -> Tuple[str, Optional[float]]:
+    """(outcome, confidence) - outcome is accepted | low_confidence | parse_error | error."""
+    if not response.get('success'):
+        return 'error', None
+    try:
+        parsed = json.loads(response.get('content') or '')
+    except ValueError:
+        return 'parse_error', None
+    if not isinstance(parsed, dict):
+        return 'parse_error', None
+    try:
+        confidence = float(parsed.get('confidence'))
+    except (TypeError, ValueError):
+        confidence = None  # Missing confidence counts as low
+    if confidence is None or confidence < min_confidence:
+        return 'low_confidence', confidence
+    return 'accepted', confidence
+
+
+def _cascade_attempt(
+    model_id: str,
+    response: Dict[str, Any],
+    outcome: str,
+    confidence: Optional[float],
+    latency_ms: float,
+) -> Dict[str, Any]:
+    metadata = response.get('metadata', {})
+    model = model_from_id(response.get('model') or model_id)  # The hedge model if it won
+    return {
+        'model': model_id,
+        'hedge': response.get('hedge'),
+        'outcome': outcome,
+        'confidence': confidence,
+        'latency_ms': round(latency_ms, 2),
+        'input_tokens': metadata.get('input_tokens', 0),
+        'output_tokens': metadata.get('output_tokens', 0),
+        'cost': estimate_cost(
+            input_tokens=metadata.get('input_tokens', 0),
+            output_tokens=metadata.get('output_tokens', 0),
+            model=model,
+            cache_read_tokens=metadata.get('cache_read_tokens', 0),
+            cache_write_tokens=metadata.get('cache_write_tokens', 0),
+        )['total'] if model else None,
+    }
+
+
+def _record_abandoned_tier(model_id: str, tier_start: float, future: Future) -> None:
+    # An abandoned tier still runs to completion and is billed
+    if future.exception() is not None:
+        return
+    response = future.result()
+    attempt = _cascade_attempt(model_id, response, 'abandoned', None, (time.perf_counter() - tier_start) * 1000)
+    with _CASCADE_STATS_LOCK:
+        _CASCADE_STATS["abandoned_calls"] += 1
+        _CASCADE_STATS["abandoned_cost"] += attempt['cost'] or 0.0
+    print(f"[LLM_CASCADE] Abandoned tier {model_id} finished after {attempt['latency_ms']}ms, "
+          f"cost ${attempt['cost'] or 0.0:.6f}")
+
+
+def call_llm_cascade(
+    messages: List[Dict[str, Any]],
+    system_prompts: Optional[List[Dict[str, Any]]] = None,
+    max_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+    stream: bool = False,
+    on_text: Optional[Callable[[str, str], None]] = None,
+    models: Optional[List[str]] = None,
+    min_confidence: Optional[float] = None,
+    budget_ms: Optional[float] = None,
+    deadline: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Call the model cascade for a JSON reply with a "confidence" field
+    
+    Tiers (LLM_CASCADE_CONFIG['models']) are tried in order; a tier answers
+    when its reply parses as a JSON object with confidence >= min_confidence,
+    otherwise the next tier is tried. If no tier gets there, the
+    highest-confidence parsed reply answers.
+    
+    The cascade is bounded by budget_ms, cut short by the caller's deadline.
+    Every tier is waited on for the remaining time only. When time runs out
+    the running tier is abandoned (its cost is added to the container's
+    cascade stats once it finishes) and the best usable reply so far is
+    returned - or, without one, an error with error_type
+    'LLMDeadlineExceeded'. If every tier failed with time to spare, the
+    single configured model (get_llm_config) is tried once within the same
+    deadline.
+    
+    Args:
+        messages / system_prompts / max_tokens / temperature: As call_claude_converse
+        stream: Use ConverseStream for every tier
+        on_text: Streaming only - called with (model_id, delta); a new model_id
+            means the previous tier's reply was escalated
+        models: Override the tiers
+        min_confidence: Override LLM_CASCADE_CONFIG['min_confidence']
+        budget_ms: Override LLM_CASCADE_CONFIG['budget_ms']
+        deadline: time.perf_counter() value by which the request needs its
+            parse (e.g. derived from the Lambda's remaining time)
+    
+    Returns:
+        The answering tier's call_claude_converse result, plus 'cascade':
+        - tier / model: index of the answering attempt and its model
+        - attempts: per tier tried - model, outcome (accepted | low_confidence |
+          parse_error | error | timeout), confidence, latency_ms, tokens, cost;
+          fallback=True for the single-model call
+        - cost_estimate: total over every attempt (escalations are billed too;
+          abandoned tiers are counted in get_cascade_stats)
+        - elapsed_ms, budget_ms (effective, after the deadline),
+          budget_exhausted, fallback
+    """
+    models = models or LLM_CASCADE_CONFIG["models"]
+    min_confidence = LLM_CASCADE_CONFIG["min_confidence"] if min_confidence is None else min_confidence
+    budget_ms = LLM_CASCADE_CONFIG["budget_ms"] if budget_ms is None else budget_ms
+    
+    start_time = time.perf_counter()
+    end_time = start_time + budget_ms / 1000
+    if deadline is not None:
+        end_time = min(end_time, deadline)
+    budget_ms = round(max(0.0, end_time - start_time) * 1000, 2)
+    
+    attempts: List[Dict[str, Any]] = []
+    best: Optional[Tuple[Tuple[int, float], int, Dict[str, Any]]] = None  # (rank, attempt, response)
+    last_error = None
+    budget_exhausted = False
+    
+    def call_tier(model_id: str, abandoned: threading.Event) -> Future:
+        kwargs: Dict[str, Any] = {
+            'messages': messages,
+            'system_prompts': system_prompts,
+            'max_tokens': max_tokens,
+            'temperature': temperature,
+            'model_id': model_id,
+        }
+        if stream:
+            if on_text is not None:
+                def tier_text(text: str) -> None:
+                    if not abandoned.is_set():
+                        on_text(model_id, text)
+                kwargs['on_text'] = tier_text
+            return _CASCADE_EXECUTOR.submit(call_claude_converse_stream, **kwargs)
+        return _CASCADE_EXECUTOR.submit(call_claude_converse, **kwargs)
+    
+    def add_attempt(model_id: str, response: Dict[str, Any], tier_start: float, **flags: Any) -> str:
+        nonlocal best, last_error
+        outcome, confidence = _cascade_outcome(response, min_confidence)
+        attempts.append({
+            **_cascade_attempt(model_id, response, outcome, confidence, (time.perf_counter() - tier_start) * 1000),
+            **flags,
+        })
+        if outcome == 'error':
+            last_error = response.get('error')
+        else:
+            rank = (1 if confidence is not None else 0, confidence or 0.0)
+            if best is None or rank >= best[0]:
+                best = (rank, len(attempts) - 1, response)
+        return outcome
+    
+    def run_tier(model_id: str, **flags: Any) -> Optional[str]:
+        """Outcome of the tier, or None if the deadline passed first (the tier is abandoned)."""
+        nonlocal budget_exhausted
+        remaining_s = end_time - time.perf_counter()
+        if remaining_s <= 0:
+            budget_exhausted = True
+            return None
+        
+        abandoned = threading.Event()
+        tier_start = time.perf_counter()
+        future = call_tier(model_id, abandoned)
+        try:
+            response = future.result(timeout=remaining_s)
+        except FuturesTimeoutError:
+            abandoned.set()
+            budget_exhausted = True
+            attempts.append({
+                'model': model_id,
+                'outcome': 'timeout',
+                'confidence': None,
+                'latency_ms': round((time.perf_counter() - tier_start) * 1000, 2),
+                **flags,
+            })
+            future.add_done_callback(lambda done: _record_abandoned_tier(model_id, tier_start, done))
+            return None
+        return add_attempt(model_id, response, tier_start, **flags)
+    
+    for model_id in models:
+        outcome = run_tier(model_id)
+        if outcome is None or outcome == 'accepted':
+            break
+    
+    fallback = False
+    fallback_model = get_llm_config()["model_id"]
+    if best is None and not budget_exhausted and fallback_model not in {attempt['model'] for attempt in attempts}:
+        # Every tier failed outright: one try on the single-model route, same deadline
+        fallback = True
+        print(f"[LLM_CASCADE] No tier produced a reply, falling back to {fallback_model}")
+        run_tier(fallback_model, fallback=True)
+    
+    elapsed_ms = round((time.perf_counter() - start_time) * 1000, 2)
+    cascade = {
+        'tier': best[1] if best else None,
+        'model': best[2]['model'] if best else None,
+        'attempts': attempts,
+        'cost_estimate': sum(attempt.get('cost') or 0.0 for attempt in attempts),
+        'elapsed_ms': elapsed_ms,
+        'budget_ms': budget_ms,
+        'budget_exhausted': budget_exhausted,
+        'fallback': fallback,
+    }
+    _record_cascade(cascade)
+    print(f"[LLM_CASCADE] {json.dumps({key: cascade[key] for key in ('tier', 'model', 'elapsed_ms', 'budget_exhausted', 'fallback')})} "
+          f"outcomes={[(attempt['model'], attempt['outcome'], attempt['confidence']) for attempt in attempts]}")
+    
+    if best is None:
+        if budget_exhausted:
+            error: Exception = LLMDeadlineExceeded(f"No usable LLM reply within the {budget_ms}ms deadline")
+        else:
+            error = RuntimeError(last_error or "LLM cascade has no tiers")
+        result = _converse_error({"model_id": models[0] if models else None}, error, 0.0)
+        result['cascade'] = cascade
+        return result
+    return {**best[2], 'cascade': cascade}
+
+
+def _record_cascade(cascade: Dict[str, Any]) -> None:
+    with _CASCADE_STATS_LOCK:
+        _CASCADE_STATS["requests"] += 1
+        if cascade["model"]:
+            answered_by = _CASCADE_STATS["answered_by"]
+            answered_by[cascade["model"]] = answered_by.get(cascade["model"], 0) + 1
+        for attempt_index, attempt in enumerate(cascade["attempts"]):
+            if attempt_index != cascade["tier"]:
+                escalations = _CASCADE_STATS["escalations"]
+                escalations[attempt["outcome"]] = escalations.get(attempt["outcome"], 0) + 1
+        if cascade["budget_exhausted"]:
+            _CASCADE_STATS["budget_exhausted"] += 1
+        if cascade["fallback"]:
+            _CASCADE_STATS["fallbacks"] += 1
+
+
+def get_cascade_stats() -> Dict[str, Any]:
+    """
+    Container-lifetime cascade counters (which tier answers, why tiers escalate)
+    
+    Returns:
+        Dict with requests, answered_by, escalations, budget_exhausted,
+        fallbacks (single-model calls after every tier failed) and
+        abandoned_calls / abandoned_cost (tiers cut off by the deadline, billed
+        after their request was answered)
+    """
+    with _CASCADE_STATS_LOCK:
+        return {
+            "requests": _CASCADE_STATS["requests"],
+            "answered_by": dict(_CASCADE_STATS["answered_by"]),
+            "escalations": dict(_CASCADE_STATS["escalations"]),
+            "budget_exhausted": _CASCADE_STATS["budget_exhausted"],
+            "fallbacks": _CASCADE_STATS["fallbacks"],
+            "abandoned_calls": _CASCADE_STATS["abandoned_calls"],
+            "abandoned_cost": round(_CASCADE_STATS["abandoned_cost"], 8),
+        }
+
+
+def _build_converse_request(
+    config: Dict[str, Any],
+    messages: List[Dict[str, Any]],
+    system_prompts: Optional[List[Dict[str, Any]]],
+    max_tokens: Optional[int],
+    temperature: Optional[float],
+) -> Dict[str, Any]:
     # Build inference config
     inference_config = {
         "maxTokens": max_tokens or config["max_tokens"],
@@ -217,6 +1150,14 @@ def call_claude_converse(
         "topP": config["top_p"],
     }
     
+    if not prompt_cache_eligible(config["model_id"], system_prompts, messages):
+        messages = [
+            {**message, "content": _strip_cache_points(message["content"])}
+            if isinstance(message.get("content"), list) else message
+            for message in messages
+        ]
+        system_prompts = _strip_cache_points(system_prompts) if system_prompts else system_prompts
+    
     # Prepare request
     request_params = {
         "modelId": config["model_id"],
@@ -226,59 +1167,88 @@ def call_claude_converse(
     
     if system_prompts:
         request_params["system"] = system_prompts
+    return request_params
+
+
+def _has_cache_point(request_params: Dict[str, Any]) -> bool:
+    blocks = list(request_params.get("system") or [])
+    for message in request_params["messages"]:
+        if isinstance(message.get("content"), list):
+            blocks.extend(message["content"])
+    return any("cachePoint" in block for block in blocks)
+
+
+def _converse_result(
+    config: Dict[str, Any],
+    content: str,
+    usage: Dict[str, Any],
+    metrics: Dict[str, Any],
+    latency_ms: int,
+    client_ms: float,
+    prompt_cache_eligible: bool = False,
+) -> Dict[str, Any]:
+    # Extract latency from ConverseMetrics
+    # AWS returns 'latencyMs' which is Bedrock's internal measurement
+    # This is more accurate than client-side timing (excludes network overhead)
+    bedrock_latency_ms = metrics.get('latencyMs', latency_ms)  # Fallback to client-side if not available
     
-    try:
-        start_time = time.time()
-        
-        # Call Converse API (enables prompt caching)
-        response = client.converse(**request_params)
-        
-        end_time = time.time()
-        latency_ms = int((end_time - start_time) * 1000)
-        
-        # Extract content
-        content = response['output']['message']['content'][0]['text']
-        
-        # Extract usage metrics
-        usage = response.get('usage', {})
-        
-        # Extract latency from ConverseMetrics
-        # AWS returns 'latencyMs' which is Bedrock's internal measurement
-        # This is more accurate than client-side timing (excludes network overhead)
-        metrics = response.get('metrics', {})
-        bedrock_latency_ms = metrics.get('latencyMs', latency_ms)  # Fallback to client-side if not available
-        
-        return {
-            'success': True,
-            'content': content,
-            'usage': usage,
-            'model': config["model_id"],
-            'metadata': {
-                'input_tokens': usage.get('inputTokens', 0),
-                'output_tokens': usage.get('outputTokens', 0),
-                'latency_ms': bedrock_latency_ms,  # Use Bedrock's metric (inference only)
-                'client_latency_ms': latency_ms,  # Keep client-side for debugging
-            },
-            'latency_ms': bedrock_latency_ms,  # Top-level uses Bedrock's metric
-        }
-        
-    except Exception as e:
-        return {
-            'success': False,
-            'error': str(e),
-            'model': config["model_id"],
-            'metadata': {
-                'input_tokens': 0,
-                'output_tokens': 0,
-                'latency_ms': 0,
-            }
+    return {
+        'success': True,
+        'content': content,
+        'usage': usage,
+        'model': config["model_id"],
+        'metadata': {
+            'input_tokens': usage.get('inputTokens', 0),  # Excludes cache read / write tokens
+            'output_tokens': usage.get('outputTokens', 0),
+            'cache_read_tokens': usage.get('cacheReadInputTokens', 0),
+            'cache_write_tokens': usage.get('cacheWriteInputTokens', 0),
+            'prompt_cache_eligible': prompt_cache_eligible,  # A cache point was sent
+            'latency_ms': bedrock_latency_ms,  # Use Bedrock's metric (inference only)
+            'client_latency_ms': latency_ms,  # Keep client-side for debugging
+            'client_ms': client_ms,  # Client construction (0 when cached)
+        },
+        'latency_ms': bedrock_latency_ms,  # Top-level uses Bedrock's metric
+    }
+
+
+def _converse_error(config: Dict[str, Any], error: Exception, client_ms: float) -> Dict[str, Any]:
+    return {
+        'success': False,
+        'error': str(error),
+        'error_type': type(error).__name__,
+        'model': config["model_id"],
+        'metadata': {
+            'input_tokens': 0,
+            'output_tokens': 0,
+            'cache_read_tokens': 0,
+            'cache_write_tokens': 0,
+            'latency_ms': 0,
+            'client_ms': client_ms,
         }
+    }
+
+
+def set_embedding_cache(cache: Optional[Any]) -> None:
+    """
+    Plug an embedding cache in under generate_embedding() (None = uncached)
+    
+    Args:
+        cache: Object with build_embedding_cache_key(model_id, dimensions,
+               normalize, text), get_cached_embedding(key) -> (vector, tier)
+               and store_embedding(key, vector), e.g. the
+               functions/src/cache/embedding_cache.py module
+    """
+    global _EMBEDDING_CACHE
+    _EMBEDDING_CACHE = cache
 
 
 def generate_embedding(text: str) -> Dict[str, Any]:
     """
     Generate embedding using configured embedding model
     
+    Vectors are served from the injected embedding cache (set_embedding_cache)
+    when possible; Bedrock is only called on a miss.
+    
     Args:
         text: Input text to embed
     
@@ -288,6 +1258,10 @@ def generate_embedding(text: str) -> Dict[str, Any]:
         - embedding: List[float] (vector)
         - model: str
         - dimensions: int
+        - cached: bool (True if served from cache)
+        - cache_tier: 'memory' | 'redis' | None
+        - latency_ms: float (cache lookup or Bedrock call time)
+        - client_ms: float (Bedrock client construction, 0 when cached)
     """
     config = get_embedding_config()
     
@@ -299,7 +1273,27 @@ def generate_embedding(text: str) -> Dict[str, Any]:
         # Titan embeddings
         import json
         
-        client = get_bedrock_client()
+        start_time = time.time()
+        cache = _EMBEDDING_CACHE
+        cache_key = None
+        cached_vector, cache_tier = None, None
+        if cache is not None:
+            cache_key = cache.build_embedding_cache_key(config["model_id"], config["dimensions"], True, text)
+            cached_vector, cache_tier = cache.get_cached_embedding(cache_key)
+        
+        if cached_vector is not None:
+            return {
+                'success': True,
+                'embedding': cached_vector,
+                'model': config["model_id"],
+                'dimensions': config["dimensions"],
+                'cached': True,
+                'cache_tier': cache_tier,
+                'latency_ms': round((time.time() - start_time) * 1000, 2),
+                'client_ms': 0.0
+            }
+        
+        client, client_ms = get_aws_client("bedrock-runtime")
         
         try:
             body = json.dumps({
@@ -308,6 +1302,7 @@ def generate_embedding(text: str) -> Dict[str, Any]:
                 "normalize": True
             })
             
+            bedrock_start = time.time()
             response = client.invoke_model(
                 modelId=config["model_id"],
                 body=body,
@@ -316,12 +1311,20 @@ def generate_embedding(text: str) -> Dict[str, Any]:
             )
             
             result = json.loads(response['body'].read())
+            bedrock_latency_ms = round((time.time() - bedrock_start) * 1000, 2)
+            
+            if cache is not None:
+                cache.store_embedding(cache_key, result['embedding'])
             
             return {
                 'success': True,
                 'embedding': result['embedding'],
                 'model': config["model_id"],
-                'dimensions': config["dimensions"]
+                'dimensions': config["dimensions"],
+                'cached': False,
+                'cache_tier': None,
+                'latency_ms': bedrock_latency_ms,
+                'client_ms': client_ms
             }
             
         except Exception as e:
@@ -432,26 +1435,40 @@ def get_model_info(model: LLMModel) -> Dict[str, Any]:
     })
 
 
-def estimate_cost(input_tokens: int, output_tokens: int, model: Optional[LLMModel] = None, cache_hit_rate: float = 0.0) -> Dict[str, float]:
+def estimate_cost(
+    input_tokens: int,
+    output_tokens: int,
+    model: Optional[LLMModel] = None,
+    cache_read_tokens: int = 0,
+    cache_write_tokens: int = 0,
+) -> Dict[str, float]:
     """
     Estimate cost for a query based on token usage
     
+    Token counts are the ones Converse reports: input_tokens excludes the
+    prompt-cache tokens, which are billed separately (reads at the cached
+    rate, writes at CACHE_WRITE_PRICE_MULTIPLIER x the input rate).
+    
     Args:
-        input_tokens: Number of input tokens
+        input_tokens: Uncached input tokens (usage.inputTokens)
         output_tokens: Number of output tokens
         model: LLMModel to calculate for (defaults to DEFAULT_LLM_MODEL)
-        cache_hit_rate: Fraction of input tokens that hit cache (0.0-1.0)
+        cache_read_tokens: Input tokens read from the prompt cache (usage.cacheReadInputTokens)
+        cache_write_tokens: Input tokens written to the prompt cache (usage.cacheWriteInputTokens)
     
     Returns:
         Dict with cost breakdown
     
     Example:
         ```python
+        response = call_claude_converse(messages=[...], system_prompts=[...])
+        metadata = response['metadata']
         cost = estimate_cost(
-            input_tokens=245,
-            output_tokens=89,
+            input_tokens=metadata['input_tokens'],
+            output_tokens=metadata['output_tokens'],
             model=LLMModel.CLAUDE_SONNET_4,
-            cache_hit_rate=0.5  # 50% cache hits
+            cache_read_tokens=metadata['cache_read_tokens'],
+            cache_write_tokens=metadata['cache_write_tokens']
         )
         
         print(f"Total cost: ${cost['total']:.6f}")
@@ -464,19 +1481,25 @@ def estimate_cost(input_tokens: int, output_tokens: int, model: Optional[LLMMode
         model = DEFAULT_LLM_MODEL
     
     info = get_model_info(model)
+    input_price = info['input_price_per_1m']
     
     # Calculate input cost with caching
-    if info['prompt_caching'] and cache_hit_rate > 0:
-        cached_tokens = int(input_tokens * cache_hit_rate)
-        uncached_tokens = input_tokens - cached_tokens
-        input_cost = (
-            (uncached_tokens * info['input_price_per_1m'] / 1_000_000) +
-            (cached_tokens * info['cached_price_per_1m'] / 1_000_000)
+    input_cost = input_tokens * input_price / 1_000_000
+    cache_savings = 0.0
+    if info['prompt_caching'] and (cache_read_tokens or cache_write_tokens):
+        cached_price = info['cached_price_per_1m']
+        write_price = input_price * CACHE_WRITE_PRICE_MULTIPLIER
+        input_cost += (
+            (cache_read_tokens * cached_price / 1_000_000) +
+            (cache_write_tokens * write_price / 1_000_000)
         )
-        cache_savings = cached_tokens * (info['input_price_per_1m'] - info['cached_price_per_1m']) / 1_000_000
+        # Versus sending the same prefix uncached (a write costs more than it saves)
+        cache_savings = (
+            cache_read_tokens * (input_price - cached_price) -
+            cache_write_tokens * (write_price - input_price)
+        ) / 1_000_000
     else:
-        input_cost = input_tokens * info['input_price_per_1m'] / 1_000_000
-        cache_savings = 0.0
+        input_cost += (cache_read_tokens + cache_write_tokens) * input_price / 1_000_000
     
     # Calculate output cost
     output_cost = output_tokens * info['output_price_per_1m'] / 1_000_000
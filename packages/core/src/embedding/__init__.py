@@ -21,7 +21,7 @@ Usage:
 import os
 from typing import Optional
 
-from .base import EmbeddingModel
+from .base import EmbeddingModel, set_embedding_cache
 from .titan import TitanEmbedding
 from .sapbert import SapBERTEmbedding
 
@@ -29,6 +29,7 @@ from .sapbert import SapBERTEmbedding
 # Export public API
 __all__ = [
     "EmbeddingModel",
+    "set_embedding_cache",
     "TitanEmbedding", 
     "SapBERTEmbedding",
     "get_embedding_model",
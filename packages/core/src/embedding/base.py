@@ -5,8 +5,46 @@ allowing for easy swapping between different models (Titan, SapBERT, etc.)
 via environment variables.
 """
 
+import functools
 from abc import ABC, abstractmethod
-from typing import List, Union
+from typing import Any, Callable, List, Optional, Union
+
+# Injected by set_embedding_cache(); None = embed() always calls the model
+_EMBEDDING_CACHE: Optional[Any] = None
+
+
+def set_embedding_cache(cache: Optional[Any]) -> None:
+    """Plug an embedding cache in under every EmbeddingModel.embed() (None = uncached).
+    
+    Args:
+        cache: Object with build_embedding_cache_key(model_id, dimensions,
+            normalize, text), get_cached_embedding(key) -> (vector, tier) and
+            store_embedding(key, vector), e.g. the Lambda functions'
+            cache/embedding_cache.py module
+    """
+    global _EMBEDDING_CACHE
+    _EMBEDDING_CACHE = cache
+
+
+def _with_embedding_cache(embed: Callable) -> Callable:
+    """Wrap a subclass embed() so repeated texts are served from the embedding cache."""
+    
+    @functools.wraps(embed)
+    def cached_embed(self, text: str) -> List[float]:
+        cache = _EMBEDDING_CACHE
+        if cache is None:
+            return embed(self, text)
+        
+        key = cache.build_embedding_cache_key(self.model_name, self.dimension, self.normalize, text)
+        vector, _ = cache.get_cached_embedding(key)
+        if vector is not None:
+            return vector
+        
+        vector = embed(self, text)
+        cache.store_embedding(key, vector)
+        return vector
+    
+    return cached_embed
 
 
 class EmbeddingModel(ABC):
@@ -14,8 +52,20 @@ class EmbeddingModel(ABC):
     
     All embedding models must implement this interface to ensure
     consistency and swappability.
+    
+    Every subclass embed() is transparently served from the embedding cache
+    injected with set_embedding_cache(), keyed on model_name, dimension,
+    normalize and the input text.
     """
     
+    # Whether vectors are L2-normalized (part of the embedding cache key)
+    normalize: bool = True
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "embed" in cls.__dict__ and not getattr(cls.__dict__["embed"], "__isabstractmethod__", False):
+            cls.embed = _with_embedding_cache(cls.__dict__["embed"])
+    
     @property
     @abstractmethod
     def dimension(self) -> int:
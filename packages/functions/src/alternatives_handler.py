@@ -8,10 +8,15 @@ CRITICAL: Uses centralized configuration for all AWS services
 """
 
 import json
-import os
 from typing import Dict, Any, List
 from datetime import datetime
-import boto3
+
+from functions.src.config.redis_config import (
+    diff_pool_stats,
+    get_pool_stats,
+    get_redis_client,
+)
+from functions.src.redis_reply import decode_search_reply
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -45,10 +50,11 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
         # Track timing
         start_time = datetime.now()
+        redis_pool_start = get_pool_stats()
         
         # Step 1: Get selected drug from Redis
         redis_start = datetime.now()
-        selected_drug = get_drug_from_redis(ndc)
+        selected_drug = get_drug_from_redis(ndc, redis_client=get_redis_client())
         redis_time = (datetime.now() - redis_start).total_seconds() * 1000
         
         if not selected_drug['success']:
@@ -62,7 +68,11 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
         # Step 2: Find all drugs with same GCN_SEQNO
         alternatives_start = datetime.now()
-        alternatives = find_alternatives_by_gcn(gcn_seqno, exclude_ndc=ndc)
+        alternatives = find_alternatives_by_gcn(
+            gcn_seqno,
+            exclude_ndc=ndc,
+            redis_client=get_redis_client(decode_responses=True)
+        )
         alternatives_time = (datetime.now() - alternatives_start).total_seconds() * 1000
         
         if not alternatives['success']:
@@ -77,6 +87,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
         # Calculate total time
         total_time = (datetime.now() - start_time).total_seconds() * 1000
+        redis_connections = diff_pool_stats(redis_pool_start)
         
         # Build response
         return {
@@ -104,7 +115,9 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'metrics': {
                     'total_latency_ms': round(total_time, 2),
                     'redis_lookup_ms': round(redis_time, 2),
-                    'alternatives_search_ms': round(alternatives_time, 2)
+                    'alternatives_search_ms': round(alternatives_time, 2),
+                    'redis_connections_opened': redis_connections['connections_opened'],
+                    'redis_connections_reused': redis_connections['connections_reused']
                 },
                 'timestamp': datetime.now().isoformat()
             })
@@ -115,36 +128,19 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return error_response(500, f"Internal server error: {str(e)}")
 
 
-def get_drug_from_redis(ndc: str) -> Dict[str, Any]:
+def get_drug_from_redis(ndc: str, redis_client: Any = None) -> Dict[str, Any]:
     """
     Get drug by NDC from Redis
     
     Args:
         ndc: 11-digit NDC code
+        redis_client: Shared pooled client (defaults to get_redis_client())
     
     Returns:
         Dict with success, drug data
     """
-    import redis
-    
     try:
-        # Connect to Redis
-        redis_host = os.environ.get('REDIS_HOST', '10.0.11.153')
-        redis_port = int(os.environ.get('REDIS_PORT', 6379))
-        redis_password = os.environ.get('REDIS_PASSWORD')
-        
-        if not redis_password:
-            return {
-                'success': False,
-                'error': 'REDIS_PASSWORD environment variable not set'
-            }
-        
-        client = redis.Redis(
-            host=redis_host,
-            port=redis_port,
-            password=redis_password,
-            decode_responses=False  # Binary data (embeddings)
-        )
+        client = redis_client or get_redis_client()
         
         # Get drug from hash (exclude embedding field)
         key = f"drug:{ndc}"
@@ -177,37 +173,24 @@ def get_drug_from_redis(ndc: str) -> Dict[str, Any]:
         }
 
 
-def find_alternatives_by_gcn(gcn_seqno: str, exclude_ndc: str = None) -> Dict[str, Any]:
+def find_alternatives_by_gcn(
+    gcn_seqno: str,
+    exclude_ndc: str = None,
+    redis_client: Any = None
+) -> Dict[str, Any]:
     """
     Find all drugs with same GCN_SEQNO (therapeutic equivalents)
     
     Args:
         gcn_seqno: Generic Code Number to search for
         exclude_ndc: NDC to exclude from results (the selected drug)
+        redis_client: Shared pooled client with decode_responses=True
     
     Returns:
         Dict with success, drugs list
     """
-    import redis
-    
     try:
-        # Connect to Redis
-        redis_host = os.environ.get('REDIS_HOST', '10.0.11.153')
-        redis_port = int(os.environ.get('REDIS_PORT', 6379))
-        redis_password = os.environ.get('REDIS_PASSWORD')
-        
-        if not redis_password:
-            return {
-                'success': False,
-                'error': 'REDIS_PASSWORD environment variable not set'
-            }
-        
-        client = redis.Redis(
-            host=redis_host,
-            port=redis_port,
-            password=redis_password,
-            decode_responses=True
-        )
+        client = redis_client or get_redis_client(decode_responses=True)
         
         # Search by GCN_SEQNO
         # Query: @gcn_seqno:[{gcn} {gcn}] (exact match)
@@ -234,27 +217,10 @@ def find_alternatives_by_gcn(gcn_seqno: str, exclude_ndc: str = None) -> Dict[st
             'DIALECT', '2'
         )
         
-        # Parse results
-        total_results = results[0]
-        drugs = []
-        
-        for i in range(1, len(results), 2):
-            if i + 1 < len(results):
-                key = results[i]
-                fields = results[i + 1]
-                
-                drug = {}
-                for j in range(0, len(fields), 2):
-                    if j + 1 < len(fields):
-                        field_name = fields[j]
-                        field_value = fields[j + 1]
-                        drug[field_name] = field_value
-                
-                # Exclude the selected drug itself
-                if exclude_ndc and drug.get('ndc') == exclude_ndc:
-                    continue
-                
-                drugs.append(drug)
+        # Parse results (excluding the selected drug itself)
+        total_results, drugs = decode_search_reply(results)
+        if exclude_ndc:
+            drugs = [drug for drug in drugs if drug.get('ndc') != exclude_ndc]
         
         return {
             'success': True,
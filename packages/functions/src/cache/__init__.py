@@ -0,0 +1,8 @@
+"""
+In-container caching utilities.
+
+Caches in this package live for the lifetime of a warm Lambda container and
+are shared by every request that container serves.
+"""
+
+from .lru import LRUCache  # noqa: F401
@@ -0,0 +1,155 @@
+"""
+Two-tier content-addressed cache for query embeddings.
+
+The same drug names ("atorvastatin", "lisinopril") are embedded thousands of
+times a day. Vectors are cached by (model id, dimensions, normalize flag,
+text) as float32 bytes in an in-process LRU, with Redis as a shared second
+tier, and plugged in transparently under generate_embedding(). packages/core
+does not import this module: callers inject it there with
+set_embedding_cache() (config.llm_config and embedding.base).
+
+Redis layout:
+    emb:<sha256(model_id|dimensions|normalize|text)>  (STRING, float32 bytes, TTL)
+
+Environment Variables:
+    EMBEDDING_CACHE_ENABLED: Enable the cache (default: true)
+    EMBEDDING_CACHE_SIZE: In-process LRU entries (default: 4096)
+    EMBEDDING_CACHE_TTL_SECONDS: Redis entry lifetime (default: 2592000 = 30 days)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .lru import LRUCache
+
+EMBEDDING_CACHE_ENABLED = os.environ.get('EMBEDDING_CACHE_ENABLED', 'true').lower() == 'true'
+EMBEDDING_CACHE_TTL_SECONDS = int(os.environ.get('EMBEDDING_CACHE_TTL_SECONDS', '2592000'))
+EMBEDDING_CACHE_KEY_PREFIX = 'emb:'
+
+_MEMORY_CACHE = LRUCache(maxsize=int(os.environ.get('EMBEDDING_CACHE_SIZE', '4096')))
+
+# Shared-tier counters (the LRU keeps its own hit/miss/eviction counts)
+_STATS_LOCK = threading.Lock()
+_STATS = {
+    'redis_hits': 0,
+    'misses': 0,
+}
+
+# Optional shared tier; a zero-arg callable returning a Redis client
+_REDIS_CLIENT_FACTORY: Optional[Callable[[], Any]] = None
+
+
+def configure_embedding_cache(redis_client_factory: Optional[Callable[[], Any]] = None) -> None:
+    """
+    Attach (or detach) the shared Redis tier.
+
+    Args:
+        redis_client_factory: Zero-arg callable returning a Redis client
+                              (e.g. redis_config.get_redis_client); None = memory only
+    """
+    global _REDIS_CLIENT_FACTORY
+    _REDIS_CLIENT_FACTORY = redis_client_factory
+
+
+def build_embedding_cache_key(model_id: str, dimensions: int, normalize: bool, text: str) -> str:
+    """
+    Build the content-addressed cache key for an embedding.
+
+    Returns:
+        Redis/LRU key, e.g. "emb:3f1c..."
+    """
+    material = f"{model_id}|{dimensions}|{int(bool(normalize))}|{text}"
+    return EMBEDDING_CACHE_KEY_PREFIX + hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def _to_bytes(vector: List[float]) -> bytes:
+    return array('f', vector).tobytes()
+
+
+def _from_bytes(raw: bytes) -> List[float]:
+    vector = array('f')
+    vector.frombytes(raw)
+    return vector.tolist()
+
+
+def _count(stat: str) -> None:
+    with _STATS_LOCK:
+        _STATS[stat] += 1
+
+
+def _redis_client() -> Any:
+    if _REDIS_CLIENT_FACTORY is None:
+        return None
+    try:
+        return _REDIS_CLIENT_FACTORY()
+    except Exception as e:
+        print(f"[WARNING] Embedding cache Redis tier unavailable: {e}")
+        return None
+
+
+def get_cached_embedding(key: str) -> Tuple[Optional[List[float]], Optional[str]]:
+    """
+    Look up an embedding (LRU first, then Redis).
+
+    Returns:
+        (vector or None, tier) where tier is 'memory', 'redis' or None
+    """
+    if not EMBEDDING_CACHE_ENABLED:
+        return None, None
+
+    raw = _MEMORY_CACHE.get(key)
+    if raw is not None:
+        return _from_bytes(raw), 'memory'
+
+    client = _redis_client()
+    if client is not None:
+        try:
+            raw = client.get(key)
+            if raw:
+                _MEMORY_CACHE.set(key, raw)
+                _count('redis_hits')
+                return _from_bytes(raw), 'redis'
+        except Exception as e:
+            print(f"[WARNING] Embedding cache lookup failed: {e}")
+
+    _count('misses')
+    return None, None
+
+
+def store_embedding(key: str, vector: List[float]) -> None:
+    """Store an embedding in both tiers (Redis failures are non-fatal)."""
+    if not EMBEDDING_CACHE_ENABLED or not vector:
+        return
+
+    raw = _to_bytes(vector)
+    _MEMORY_CACHE.set(key, raw)
+
+    client = _redis_client()
+    if client is not None:
+        try:
+            client.set(key, raw, ex=EMBEDDING_CACHE_TTL_SECONDS)
+        except Exception as e:
+            print(f"[WARNING] Embedding cache store failed: {e}")
+
+
+def get_embedding_cache_stats() -> Dict[str, int]:
+    """Return hit/miss/eviction counters for this process."""
+    memory = _MEMORY_CACHE.stats()
+    with _STATS_LOCK:
+        return {
+            'memory_hits': memory['hits'],
+            'redis_hits': _STATS['redis_hits'],
+            'misses': _STATS['misses'],
+            'evictions': memory['evictions'],
+            'size': memory['size'],
+        }
+
+
+def clear_embedding_cache() -> None:
+    """Drop the in-process tier (Redis entries expire via TTL)."""
+    _MEMORY_CACHE.clear()
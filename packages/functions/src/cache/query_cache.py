@@ -0,0 +1,182 @@
+"""
+Two-tier cache for LLM query parsing (expand_query_with_claude).
+
+Claude runs at temperature=0.0, so the parse for a given query, prompt
+version, model and set of spelling hints is deterministic. Parses are cached in an in-process LRU
+(per warm container) backed by a shared Redis hash per entry with a TTL, so
+repeated prescriber searches never hit Bedrock twice.
+
+Redis layout:
+    llm:parse:<prompt_version>:<model_id>:<hints digest>:<sha256(normalized query)>  (HASH)
+        query       normalized query text
+        response    JSON-encoded parse response
+        created_at  ISO timestamp
+
+Environment Variables:
+    LLM_CACHE_ENABLED: Enable the cache (default: true)
+    LLM_CACHE_SIZE: In-process LRU entries (default: 2048)
+    LLM_CACHE_TTL_SECONDS: Redis entry lifetime (default: 604800 = 7 days)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from .lru import LRUCache
+
+LLM_CACHE_ENABLED = os.environ.get('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+LLM_CACHE_TTL_SECONDS = int(os.environ.get('LLM_CACHE_TTL_SECONDS', '604800'))
+LLM_CACHE_KEY_PREFIX = 'llm:parse:'
+NO_HINTS_DIGEST = 'nohints'
+
+_MEMORY_CACHE = LRUCache(
+    maxsize=int(os.environ.get('LLM_CACHE_SIZE', '2048')),
+    ttl_seconds=LLM_CACHE_TTL_SECONDS
+)
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so trivially different queries share an entry."""
+    return re.sub(r'\s+', ' ', (query or '')).strip().lower()
+
+
+def hints_digest(spelling_hints: Optional[Dict[str, str]]) -> str:
+    """
+    Short digest of the speller hints that went into the prompt.
+
+    The hints depend on the container's speller vocabulary, so two containers
+    can build different prompts for the same query; the digest keeps their
+    parses apart.
+    """
+    if not spelling_hints:
+        return NO_HINTS_DIGEST
+    encoded = json.dumps(sorted(spelling_hints.items()), separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:16]
+
+
+def build_cache_key(
+    query: str,
+    prompt_version: str,
+    model_id: str,
+    spelling_hints: Optional[Dict[str, str]] = None
+) -> str:
+    """Build the Redis key (also used as the LRU key) for a query parse."""
+    digest = hashlib.sha256(normalize_query(query).encode('utf-8')).hexdigest()
+    return f"{LLM_CACHE_KEY_PREFIX}{prompt_version}:{model_id}:{hints_digest(spelling_hints)}:{digest}"
+
+
+def get_cached_parse(
+    query: str,
+    prompt_version: str,
+    model_id: str,
+    redis_client: Any = None,
+    spelling_hints: Optional[Dict[str, str]] = None
+) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Look up a cached parse (LRU first, then Redis).
+
+    Returns:
+        (cached_response or None, cache_info) where cache_info has
+        hit, tier ('memory' | 'redis' | None) and lookup_ms
+    """
+    start = time.perf_counter()
+    cache_info: Dict[str, Any] = {'hit': False, 'tier': None, 'lookup_ms': 0.0}
+
+    if not LLM_CACHE_ENABLED:
+        return None, cache_info
+
+    key = build_cache_key(query, prompt_version, model_id, spelling_hints)
+    cached = _MEMORY_CACHE.get(key)
+
+    if cached is not None:
+        cache_info['hit'] = True
+        cache_info['tier'] = 'memory'
+    elif redis_client is not None:
+        try:
+            raw = redis_client.hget(key, 'response')
+            if raw:
+                cached = json.loads(raw)
+                _MEMORY_CACHE.set(key, cached)
+                cache_info['hit'] = True
+                cache_info['tier'] = 'redis'
+        except Exception as e:
+            print(f"[WARNING] LLM cache lookup failed: {e}")
+
+    cache_info['lookup_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    return cached, cache_info
+
+
+def store_cached_parse(
+    query: str,
+    prompt_version: str,
+    model_id: str,
+    response: Dict[str, Any],
+    redis_client: Any = None,
+    spelling_hints: Optional[Dict[str, str]] = None
+) -> None:
+    """Store a successful parse in both tiers (Redis failures are non-fatal)."""
+    if not LLM_CACHE_ENABLED:
+        return
+
+    key = build_cache_key(query, prompt_version, model_id, spelling_hints)
+    _MEMORY_CACHE.set(key, response)
+
+    if redis_client is None:
+        return
+
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(key, mapping={
+            'query': normalize_query(query),
+            'response': json.dumps(response),
+            'created_at': datetime.now().isoformat()
+        })
+        pipe.expire(key, LLM_CACHE_TTL_SECONDS)
+        pipe.execute()
+    except Exception as e:
+        print(f"[WARNING] LLM cache store failed: {e}")
+
+
+def invalidate_query_cache(redis_client: Any = None, prompt_version: Optional[str] = None) -> int:
+    """
+    Bulk-invalidate cached parses, e.g. after build_medical_search_prompts changes.
+
+    Prompt edits already change MEDICAL_SEARCH_PROMPT_VERSION (so old entries
+    stop matching); this removes them eagerly instead of waiting for the TTL.
+
+    Args:
+        redis_client: Client for the shared tier (None clears only this container)
+        prompt_version: Only drop entries for this version (None = all versions)
+
+    Returns:
+        Number of Redis keys deleted
+    """
+    _MEMORY_CACHE.clear()
+
+    if redis_client is None:
+        return 0
+
+    pattern = f"{LLM_CACHE_KEY_PREFIX}{prompt_version + ':' if prompt_version else ''}*"
+    deleted = 0
+    batch = []
+    for key in redis_client.scan_iter(match=pattern, count=1000):
+        batch.append(key)
+        if len(batch) >= 1000:
+            deleted += redis_client.delete(*batch)
+            batch = []
+    if batch:
+        deleted += redis_client.delete(*batch)
+
+    print(f"[LLM-CACHE] Invalidated {deleted} cached parses matching {pattern}")
+    return deleted
+
+
+def get_query_cache_stats() -> Dict[str, int]:
+    """Return in-process LRU counters for this container."""
+    return _MEMORY_CACHE.stats()
@@ -0,0 +1,244 @@
+"""
+Full-response cache for POST /search.
+
+A search response is a deterministic function of (query, user filters,
+max_results, prompt version, model, index contents). Responses are stored
+in Redis as zlib-compressed JSON under a canonical hash of those inputs plus
+the index generation - a counter the loaders bump on every reload - so a
+reload retires every older entry without a scan.
+
+Misses are coalesced: the first request takes a short SET NX lock and runs
+the pipeline; identical requests arriving meanwhile poll for its result
+instead of running the pipeline again.
+
+Redis layout:
+    index:generation                          (STRING counter, bump_index_generation() by loaders)
+    search:resp:<generation>:<sha256(inputs)>  (STRING, zlib JSON body, TTL)
+    search:resp:<generation>:<sha256>:lock     (STRING, SET NX PX)
+
+Environment Variables:
+    RESPONSE_CACHE_ENABLED: Enable the cache (default: true)
+    RESPONSE_CACHE_TTL_SECONDS: Entry lifetime (default: 3600)
+    RESPONSE_CACHE_LOCK_MS: Coalescing lock lifetime (default: 10000)
+    RESPONSE_CACHE_WAIT_MS: Max time a coalesced request polls (default: 8000)
+    INDEX_GENERATION_REFRESH_SECONDS: Re-read index:generation after (default: 5)
+    RESPONSE_CACHE_INFO_REFRESH_SECONDS: Re-read Redis INFO stats after (default: 60)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .query_cache import normalize_query
+
+RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+RESPONSE_CACHE_TTL_SECONDS = int(os.environ.get('RESPONSE_CACHE_TTL_SECONDS', '3600'))
+RESPONSE_CACHE_LOCK_MS = int(os.environ.get('RESPONSE_CACHE_LOCK_MS', '10000'))
+RESPONSE_CACHE_WAIT_MS = int(os.environ.get('RESPONSE_CACHE_WAIT_MS', '8000'))
+RESPONSE_CACHE_POLL_MS = 25
+INDEX_GENERATION_REFRESH_SECONDS = float(os.environ.get('INDEX_GENERATION_REFRESH_SECONDS', '5'))
+RESPONSE_CACHE_INFO_REFRESH_SECONDS = float(os.environ.get('RESPONSE_CACHE_INFO_REFRESH_SECONDS', '60'))
+
+INDEX_GENERATION_KEY = 'index:generation'
+RESPONSE_CACHE_KEY_PREFIX = 'search:resp:'
+
+_LOCK = threading.Lock()
+_STATS = {
+    'hits': 0,
+    'misses': 0,
+    'coalesced': 0,
+    'stores': 0,
+    'bytes_stored': 0,
+    'errors': 0,
+}
+_GENERATION: Dict[str, Any] = {'value': None, 'read_at': 0.0}
+_REDIS_INFO: Dict[str, Any] = {'value': None, 'read_at': 0.0}
+
+
+def _increment(stat: str, amount: int = 1) -> None:
+    with _LOCK:
+        _STATS[stat] += amount
+
+
+def get_index_generation(redis_client: Any) -> int:
+    """Current index generation (re-read from Redis at most every few seconds)."""
+    now = time.monotonic()
+    if _GENERATION['value'] is not None and now - _GENERATION['read_at'] < INDEX_GENERATION_REFRESH_SECONDS:
+        return _GENERATION['value']
+
+    raw = redis_client.get(INDEX_GENERATION_KEY)
+    generation = int(raw) if raw else 0
+    _GENERATION['value'] = generation
+    _GENERATION['read_at'] = now
+    return generation
+
+
+def build_response_cache_key(
+    query: str,
+    filters: Optional[Dict[str, Any]],
+    max_results: int,
+    prompt_version: str,
+    model_id: str,
+    generation: int,
+    extra: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Build the cache key from a canonical hash of every input that shapes the response.
+
+    Args:
+        extra: Other result-affecting settings (e.g. expansion engine)
+    """
+    canonical = json.dumps({
+        'query': normalize_query(query),
+        'filters': filters or {},
+        'max_results': max_results,
+        'prompt_version': prompt_version,
+        'model_id': model_id,
+        'extra': extra or {},
+    }, sort_keys=True, separators=(',', ':'), default=str)
+    digest = hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    return f"{RESPONSE_CACHE_KEY_PREFIX}{generation}:{digest}"
+
+
+def _load(redis_client: Any, key: str) -> Tuple[Optional[str], int]:
+    raw = redis_client.get(key)
+    if not raw:
+        return None, 0
+    return zlib.decompress(raw).decode('utf-8'), len(raw)
+
+
+def _store(redis_client: Any, key: str, body: str) -> int:
+    payload = zlib.compress(body.encode('utf-8'), 6)
+    redis_client.set(key, payload, ex=RESPONSE_CACHE_TTL_SECONDS)
+    _increment('stores')
+    _increment('bytes_stored', len(payload))
+    return len(payload)
+
+
+def get_or_compute_response(
+    redis_client: Any,
+    key: str,
+    compute: Callable[[], Dict[str, Any]]
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Serve an API Gateway response from the cache, or compute it once.
+
+    Args:
+        redis_client: Pooled Redis client
+        key: Key from build_response_cache_key()
+        compute: Runs the search pipeline; returns an API Gateway response.
+                 Only statusCode 200 responses are cached.
+
+    Returns:
+        (response, cache_info) where cache_info has hit, coalesced,
+        lookup_ms and bytes (compressed size stored or read)
+    """
+    cache_info: Dict[str, Any] = {'hit': False, 'coalesced': False, 'lookup_ms': 0.0, 'bytes': 0}
+
+    if not RESPONSE_CACHE_ENABLED:
+        return compute(), cache_info
+
+    start = time.perf_counter()
+    try:
+        body, size = _load(redis_client, key)
+    except Exception as e:
+        print(f"[WARNING] Response cache lookup failed: {e}")
+        _increment('errors')
+        return compute(), cache_info
+
+    if body is None:
+        # Coalesce: only the lock holder runs the pipeline
+        lock_key = f"{key}:lock"
+        try:
+            acquired = bool(redis_client.set(lock_key, b'1', nx=True, px=RESPONSE_CACHE_LOCK_MS))
+        except Exception as e:
+            print(f"[WARNING] Response cache lock failed: {e}")
+            acquired = True  # Proceed uncoalesced
+
+        if not acquired:
+            deadline = start + RESPONSE_CACHE_WAIT_MS / 1000
+            while body is None and time.perf_counter() < deadline:
+                time.sleep(RESPONSE_CACHE_POLL_MS / 1000)
+                try:
+                    body, size = _load(redis_client, key)
+                    if body is None and not redis_client.exists(lock_key):
+                        break  # Holder finished without caching (e.g. error response)
+                except Exception:
+                    break
+            if body is not None:
+                cache_info['coalesced'] = True
+                _increment('coalesced')
+
+        if body is None:
+            _increment('misses')
+            cache_info['lookup_ms'] = round((time.perf_counter() - start) * 1000, 2)
+            try:
+                response = compute()
+                if response.get('statusCode') == 200 and isinstance(response.get('body'), str):
+                    try:
+                        cache_info['bytes'] = _store(redis_client, key, response['body'])
+                    except Exception as e:
+                        print(f"[WARNING] Response cache store failed: {e}")
+                        _increment('errors')
+                return response, cache_info
+            finally:
+                if acquired:
+                    try:
+                        redis_client.delete(lock_key)
+                    except Exception:
+                        pass
+
+    _increment('hits')
+    cache_info['hit'] = True
+    cache_info['bytes'] = size
+    cache_info['lookup_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'body': body
+    }, cache_info
+
+
+def get_response_cache_stats(redis_client: Any = None) -> Dict[str, Any]:
+    """
+    Return this container's counters (hit ratio, bytes stored) and, if a
+    client is given, Redis-wide evicted/expired key counts from INFO stats
+    (re-read at most every RESPONSE_CACHE_INFO_REFRESH_SECONDS).
+    """
+    with _LOCK:
+        stats: Dict[str, Any] = dict(_STATS)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+
+    if redis_client is not None:
+        now = time.monotonic()
+        if _REDIS_INFO['value'] is None or now - _REDIS_INFO['read_at'] >= RESPONSE_CACHE_INFO_REFRESH_SECONDS:
+            try:
+                info = redis_client.info('stats')
+                _REDIS_INFO['value'] = {
+                    'evicted_keys': info.get('evicted_keys', 0),
+                    'expired_keys': info.get('expired_keys', 0),
+                }
+            except Exception as e:
+                print(f"[WARNING] Response cache INFO failed: {e}")
+            _REDIS_INFO['read_at'] = now
+        if _REDIS_INFO['value'] is not None:
+            stats.update(_REDIS_INFO['value'])
+    return stats
+
+
+def bump_index_generation(redis_client: Any) -> int:
+    """INCR index:generation (call after every index reload); returns the new value."""
+    generation = int(redis_client.incr(INDEX_GENERATION_KEY))
+    _GENERATION['value'] = generation
+    _GENERATION['read_at'] = time.monotonic()
+    return generation
@@ -0,0 +1,145 @@
+"""
+Single-flight coalescing of identical in-flight calls.
+
+When several requests served by the same warm container need the same
+expensive result at the same time (an order-set screen firing "amoxicillin"
+a dozen times), only the first caller runs the computation; the others wait
+for it and receive the same result object. Nothing is kept once the call
+completes - caching is the job of the LRU / Redis tiers - so this only
+removes duplicate concurrent work.
+
+Results are shared, not copied: callers must treat them as read-only.
+
+Two flavours are provided:
+- SingleFlight.do():        thread-based, for the Lambda handler and its
+                            fan-out executor
+- SingleFlight.do_async():  asyncio-based, for a long-running ASGI
+                            deployment (one event loop per group)
+
+Environment Variables:
+    SINGLE_FLIGHT_ENABLED: Coalesce identical in-flight calls (default: true)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+SINGLE_FLIGHT_ENABLED = os.environ.get('SINGLE_FLIGHT_ENABLED', 'true').lower() == 'true'
+
+
+class _Call:
+    """One in-flight computation and the callers waiting on it."""
+
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Per-key coalescing of concurrent calls.
+
+    Args:
+        name: Stage name reported in stats (e.g. 'llm_parse')
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async_calls: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Tuple[Any, bool]:
+        """
+        Run fn(*args, **kwargs) unless an identical call is already in flight.
+
+        Returns:
+            (result, shared) - shared is True when this caller waited on
+            another caller's computation. Exceptions raised by the leader
+            are re-raised in every waiter.
+        """
+        if not SINGLE_FLIGHT_ENABLED:
+            return fn(*args, **kwargs), False
+
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Async variant of do(): awaits fn() unless an identical call is in flight.
+
+        Args:
+            fn: Zero-argument coroutine factory (only called by the leader)
+        """
+        if not SINGLE_FLIGHT_ENABLED:
+            return await fn(), False
+
+        future = self._async_calls.get(key)
+        if future is not None:
+            with self._lock:
+                self.coalesced += 1
+            # shield: a cancelled waiter must not cancel the leader's call
+            return await asyncio.shield(future), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._async_calls[key] = future
+        with self._lock:
+            self.executions += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody was waiting
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            self._async_calls.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Container-lifetime executions vs coalesced callers."""
+        with self._lock:
+            return {
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls) + len(self._async_calls),
+            }
@@ -9,7 +9,14 @@ from .llm_config import (
     call_claude_converse,
     generate_embedding,
     estimate_cost,
-    get_model_info
+    get_model_info,
+    get_client_stats,
+    prewarm_bedrock_clients
+)
+from .redis_config import (
+    get_redis_client,
+    get_pool_stats,
+    diff_pool_stats
 )
 
 __all__ = [
@@ -18,5 +25,10 @@ __all__ = [
     "call_claude_converse",
     "generate_embedding",
     "estimate_cost",
-    "get_model_info"
+    "get_model_info",
+    "get_client_stats",
+    "prewarm_bedrock_clients",
+    "get_redis_client",
+    "get_pool_stats",
+    "diff_pool_stats"
 ]
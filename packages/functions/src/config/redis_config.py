@@ -0,0 +1,195 @@
+"""
+Redis Configuration Module
+
+Centralized, process-wide Redis connection pooling for Lambda handlers.
+
+A pool is created once per warm Lambda container (per decode mode) and
+shared by every search, detail and alternatives code path, so a request
+no longer pays a TCP connect + AUTH handshake per helper function.
+
+CRITICAL RULES:
+1. ALWAYS obtain clients via get_redis_client() - NEVER call redis.Redis(...) directly
+2. Pass the client down to helpers instead of reconnecting inside them
+3. Use get_pool_stats() snapshots to report connections opened vs reused
+
+Environment Variables:
+    REDIS_HOST: Redis hostname (default: 10.0.11.153)
+    REDIS_PORT: Redis port (default: 6379)
+    REDIS_PASSWORD: Redis AUTH password (required)
+    REDIS_POOL_MAX_CONNECTIONS: Max pooled connections per decode mode (default: 16)
+    REDIS_POOL_TIMEOUT: Seconds to wait for a free pooled connection (default: 5)
+    REDIS_SOCKET_KEEPALIVE: Enable TCP keepalive on pooled sockets (default: true)
+    REDIS_HEALTH_CHECK_INTERVAL: Seconds idle before a PING health check (default: 30)
+    REDIS_SOCKET_TIMEOUT: Socket read/write timeout in seconds (default: 5)
+    REDIS_SOCKET_CONNECT_TIMEOUT: Socket connect timeout in seconds (default: 2)
+"""
+
+import os
+import threading
+from typing import Any, Dict
+
+import redis
+
+# Redis connection configuration
+REDIS_CONFIG = {
+    "host": os.environ.get("REDIS_HOST", "10.0.11.153"),
+    "port": int(os.environ.get("REDIS_PORT", "6379")),
+    "password": os.environ.get("REDIS_PASSWORD"),
+    "max_connections": int(os.environ.get("REDIS_POOL_MAX_CONNECTIONS", "16")),
+    "pool_timeout": float(os.environ.get("REDIS_POOL_TIMEOUT", "5")),
+    "socket_keepalive": os.environ.get("REDIS_SOCKET_KEEPALIVE", "true").lower() == "true",
+    "health_check_interval": int(os.environ.get("REDIS_HEALTH_CHECK_INTERVAL", "30")),
+    "socket_timeout": float(os.environ.get("REDIS_SOCKET_TIMEOUT", "5")),
+    "socket_connect_timeout": float(os.environ.get("REDIS_SOCKET_CONNECT_TIMEOUT", "2")),
+}
+
+# Process-wide counters (shared across pools, guarded by _STATS_LOCK)
+_STATS_LOCK = threading.Lock()
+_STATS = {
+    "connections_opened": 0,
+    "connections_checked_out": 0,
+}
+
+# One pool per decode mode, created lazily and reused for the container lifetime
+_POOLS: Dict[bool, "TrackedConnectionPool"] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _increment(stat: str) -> None:
+    with _STATS_LOCK:
+        _STATS[stat] += 1
+
+
+class TrackedConnection(redis.Connection):
+    """Connection that counts real socket handshakes (connect + AUTH)."""
+
+    def on_connect(self) -> None:
+        super().on_connect()
+        _increment("connections_opened")
+
+
+class TrackedConnectionPool(redis.BlockingConnectionPool):
+    """Blocking pool that counts connection checkouts.
+
+    Blocking (rather than raising) when exhausted keeps concurrent
+    fan-out callers safe under a bounded max_connections.
+    """
+
+    def get_connection(self, command_name, *keys, **options):
+        connection = super().get_connection(command_name, *keys, **options)
+        _increment("connections_checked_out")
+        return connection
+
+
+def get_redis_config() -> Dict[str, Any]:
+    """
+    Get Redis connection configuration
+
+    Returns:
+        Dict with host, port, pool and socket settings (password omitted)
+    """
+    config = REDIS_CONFIG.copy()
+    config.pop("password", None)
+    return config
+
+
+def get_redis_pool(decode_responses: bool = False) -> TrackedConnectionPool:
+    """
+    Get the process-wide connection pool for the given decode mode
+
+    Args:
+        decode_responses: True to decode replies to str (no binary embeddings)
+
+    Returns:
+        Shared TrackedConnectionPool (created on first use)
+
+    Raises:
+        RuntimeError: If REDIS_PASSWORD is not configured
+    """
+    pool = _POOLS.get(decode_responses)
+    if pool is not None:
+        return pool
+
+    with _POOLS_LOCK:
+        pool = _POOLS.get(decode_responses)
+        if pool is not None:
+            return pool
+
+        password = REDIS_CONFIG["password"] or os.environ.get("REDIS_PASSWORD")
+        if not password:
+            raise RuntimeError("REDIS_PASSWORD environment variable not set")
+
+        pool = TrackedConnectionPool(
+            connection_class=TrackedConnection,
+            max_connections=REDIS_CONFIG["max_connections"],
+            timeout=REDIS_CONFIG["pool_timeout"],
+            host=REDIS_CONFIG["host"],
+            port=REDIS_CONFIG["port"],
+            password=password,
+            decode_responses=decode_responses,
+            socket_keepalive=REDIS_CONFIG["socket_keepalive"],
+            health_check_interval=REDIS_CONFIG["health_check_interval"],
+            socket_timeout=REDIS_CONFIG["socket_timeout"],
+            socket_connect_timeout=REDIS_CONFIG["socket_connect_timeout"],
+        )
+        _POOLS[decode_responses] = pool
+        print(f"[REDIS] Created connection pool (decode_responses={decode_responses}, "
+              f"max_connections={REDIS_CONFIG['max_connections']})")
+        return pool
+
+
+def get_redis_client(decode_responses: bool = False) -> redis.Redis:
+    """
+    Get a Redis client backed by the shared process-wide pool
+
+    Clients are cheap wrappers; the pooled sockets are what get reused.
+
+    Args:
+        decode_responses: True to decode replies to str
+
+    Returns:
+        redis.Redis bound to the shared pool
+
+    Raises:
+        RuntimeError: If REDIS_PASSWORD is not configured
+
+    Example:
+        ```python
+        from functions.src.config.redis_config import get_redis_client
+
+        client = get_redis_client()
+        client.execute_command('FT.SEARCH', 'drugs_idx', '*', 'LIMIT', '0', '1')
+        ```
+    """
+    return redis.Redis(connection_pool=get_redis_pool(decode_responses))
+
+
+def get_pool_stats() -> Dict[str, int]:
+    """
+    Snapshot the process-wide connection counters
+
+    Returns:
+        Dict with connections_opened and connections_checked_out
+    """
+    with _STATS_LOCK:
+        return dict(_STATS)
+
+
+def diff_pool_stats(before: Dict[str, int]) -> Dict[str, int]:
+    """
+    Report connections opened vs reused since a previous snapshot
+
+    Args:
+        before: Snapshot returned by get_pool_stats()
+
+    Returns:
+        Dict with connections_opened, connections_reused, checkouts
+    """
+    after = get_pool_stats()
+    opened = after["connections_opened"] - before.get("connections_opened", 0)
+    checkouts = after["connections_checked_out"] - before.get("connections_checked_out", 0)
+    return {
+        "connections_opened": opened,
+        "connections_reused": max(0, checkouts - opened),
+        "checkouts": checkouts,
+    }
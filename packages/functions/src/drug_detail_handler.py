@@ -8,10 +8,15 @@ CRITICAL: Uses centralized configuration for all AWS services
 """
 
 import json
-import os
 from typing import Dict, Any
 from datetime import datetime
 
+from functions.src.config.redis_config import (
+    diff_pool_stats,
+    get_pool_stats,
+    get_redis_client,
+)
+
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
@@ -41,10 +46,11 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
         # Track timing
         start_time = datetime.now()
+        redis_pool_start = get_pool_stats()
         
         # Step 1: Get drug from Redis
         redis_start = datetime.now()
-        drug_result = get_drug_from_redis(ndc)
+        drug_result = get_drug_from_redis(ndc, redis_client=get_redis_client())
         redis_time = (datetime.now() - redis_start).total_seconds() * 1000
         
         if not drug_result['success']:
@@ -58,7 +64,11 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         alternatives_count = 0
         
         if gcn_seqno:
-            alt_count = count_alternatives(gcn_seqno, exclude_ndc=ndc)
+            alt_count = count_alternatives(
+                gcn_seqno,
+                exclude_ndc=ndc,
+                redis_client=get_redis_client(decode_responses=True)
+            )
             alternatives_count = alt_count.get('count', 0)
         
         alternatives_time = (datetime.now() - alternatives_start).total_seconds() * 1000
@@ -71,6 +81,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
         # Calculate total time
         total_time = (datetime.now() - start_time).total_seconds() * 1000
+        redis_connections = diff_pool_stats(redis_pool_start)
         
         # Build comprehensive response
         return {
@@ -111,7 +122,9 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'total_latency_ms': round(total_time, 2),
                     'redis_lookup_ms': round(redis_time, 2),
                     'alternatives_count_ms': round(alternatives_time, 2),
-                    'aurora_enrichment_ms': round(aurora_time, 2)
+                    'aurora_enrichment_ms': round(aurora_time, 2),
+                    'redis_connections_opened': redis_connections['connections_opened'],
+                    'redis_connections_reused': redis_connections['connections_reused']
                 },
                 'timestamp': datetime.now().isoformat()
             })
@@ -122,36 +135,19 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return error_response(500, f"Internal server error: {str(e)}")
 
 
-def get_drug_from_redis(ndc: str) -> Dict[str, Any]:
+def get_drug_from_redis(ndc: str, redis_client: Any = None) -> Dict[str, Any]:
     """
     Get drug by NDC from Redis
     
     Args:
         ndc: 11-digit NDC code
+        redis_client: Shared pooled client (defaults to get_redis_client())
     
     Returns:
         Dict with success, drug data
     """
-    import redis
-    
     try:
-        # Connect to Redis
-        redis_host = os.environ.get('REDIS_HOST', '10.0.11.153')
-        redis_port = int(os.environ.get('REDIS_PORT', 6379))
-        redis_password = os.environ.get('REDIS_PASSWORD')
-        
-        if not redis_password:
-            return {
-                'success': False,
-                'error': 'REDIS_PASSWORD environment variable not set'
-            }
-        
-        client = redis.Redis(
-            host=redis_host,
-            port=redis_port,
-            password=redis_password,
-            decode_responses=False  # Binary data (embeddings)
-        )
+        client = redis_client or get_redis_client()
         
         # Get drug from hash (exclude embedding field - it's binary)
         key = f"drug:{ndc}"
@@ -194,34 +190,24 @@ def get_drug_from_redis(ndc: str) -> Dict[str, Any]:
         }
 
 
-def count_alternatives(gcn_seqno: str, exclude_ndc: str = None) -> Dict[str, Any]:
+def count_alternatives(
+    gcn_seqno: str,
+    exclude_ndc: str = None,
+    redis_client: Any = None
+) -> Dict[str, Any]:
     """
     Count drugs with same GCN_SEQNO (therapeutic equivalents)
     
     Args:
         gcn_seqno: Generic Code Number to search for
         exclude_ndc: NDC to exclude from count (the selected drug)
+        redis_client: Shared pooled client with decode_responses=True
     
     Returns:
         Dict with count
     """
-    import redis
-    
     try:
-        # Connect to Redis
-        redis_host = os.environ.get('REDIS_HOST', '10.0.11.153')
-        redis_port = int(os.environ.get('REDIS_PORT', 6379))
-        redis_password = os.environ.get('REDIS_PASSWORD')
-        
-        if not redis_password:
-            return {'count': 0, 'error': 'REDIS_PASSWORD not set'}
-        
-        client = redis.Redis(
-            host=redis_host,
-            port=redis_port,
-            password=redis_password,
-            decode_responses=True
-        )
+        client = redis_client or get_redis_client(decode_responses=True)
         
         # Search by GCN_SEQNO
         query = f"@gcn_seqno:[{gcn_seqno} {gcn_seqno}]"
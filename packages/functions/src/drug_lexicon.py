@@ -0,0 +1,374 @@
+"""
+Drug Lexicon - Deterministic Query Fast Path
+
+Many prescriber queries are just a drug name ("crestor"), a drug name with
+strength and form ("lisinopril 10 mg tablet") or an NDC. These resolve
+without an LLM: the lexicon of brand, generic and drug class names from the
+index plus the strength / dosage-form patterns used by redis_hybrid_search
+are enough to build the structured query locally.
+
+The load-time derivations (compounding-base flag, strength tokens, family
+fields, class-map tokens) live here too, so the production loader and the
+search path compute them the same way.
+
+Redis layout (written by scripts/2025-11-20_production_load_full.py):
+    lexicon:brand_name     (SET, lowercase brand names)
+    lexicon:generic_name   (SET, lowercase generic names)
+    lexicon:drug_class     (SET, lowercase drug classes, '_' -> ' ')
+    tcmap:<generation>     (HASH, drug/condition token -> "class|class|...",
+                            versioned with index:generation)
+    cls:<generation>:dc|tc:<CLASS>  (SET, NDCs per class, same versioning)
+
+Environment Variables:
+    QUERY_FAST_PATH_ENABLED: Enable the local classifier (default: true)
+    DRUG_LEXICON_TTL_SECONDS: Reload the lexicon after this long (default: 3600)
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+QUERY_FAST_PATH_ENABLED = os.environ.get('QUERY_FAST_PATH_ENABLED', 'true').lower() == 'true'
+DRUG_LEXICON_TTL_SECONDS = float(os.environ.get('DRUG_LEXICON_TTL_SECONDS', '3600'))
+
+LEXICON_KEY_PREFIX = 'lexicon:'
+LEXICON_FIELDS = ('brand_name', 'generic_name', 'drug_class')
+
+# Shared with redis_hybrid_search (strength post-filter + lexical gate)
+STRENGTH_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(mg|mcg|g|ml|%|unit)', re.IGNORECASE)
+UNITLESS_NUMBER_PATTERN = re.compile(r'\b(\d+(?:\.\d+)?)\b')
+DOSAGE_FORM_TERMS = {
+    'cream', 'gel', 'tablet', 'capsule', 'injection', 'liquid', 'solution',
+    'powder', 'patch', 'spray', 'inhaler', 'vial', 'ampule', 'suppository',
+    'lotion', 'ointment', 'drops', 'syrup', 'suspension', 'pellet',
+    'syringe', 'cartridge', 'injectable'  # Additional injectable terms
+}
+UNIT_TERMS = {'mg', 'mcg', 'g', 'ml', 'unit', 'units', '%'}
+
+# Strength components of a product name; combination products list several
+# numbers before one unit ("EZETIMIBE-SIMVASTATIN 10-40 MG TABLET")
+STRENGTH_COMPONENT_PATTERN = re.compile(
+    r'(?<![\d.,])(\d+(?:,\d{3})*(?:\.\d+)?(?:\s*-\s*\d+(?:,\d{3})*(?:\.\d+)?)*)\s*(mg|mcg|g|ml|%|unit)',
+    re.IGNORECASE
+)
+
+# Compounding bases and non-drug catalog entries (not prescribable). The loader
+# flags matches as is_compounding_base=true and searches exclude them in Redis;
+# search_handler only applies the pattern itself on indexes without the flag.
+COMPOUNDING_BASE_PATTERNS = [
+    r'BASE[_\s]*NO\.',        # GEL_BASE_NO.30, CREAM_BASE_NO.52, etc. (with _ or space)
+    r'^MENTHOL$',             # Pure menthol (not menthol combinations)
+    r'^CAMPHOR$',             # Pure camphor
+    r'^GELFILM$',             # Generic gel film
+    r'^POLYDIMETHYLSILOXANES$',  # Generic silicone base
+    r'DIAPER.*DISPOSABLE',    # Medical supplies, not drugs
+    r'^HYPROMELLOSE$',        # Generic cellulose derivative (binder/filler)
+    r'VEHICLE[_\s]',          # VEHICLE_CREAM_BASE, VEHICLE_GEL, etc.
+]
+COMPOUNDING_BASE_PATTERN = re.compile('|'.join(f'(?:{pattern})' for pattern in COMPOUNDING_BASE_PATTERNS))
+
+# Result-grouping fields: the loader precomputes family_key /
+# family_display_name / strength_label with these; search_handler derives
+# them on indexes built before the fields existed
+FAMILY_NAME_STRENGTH_PATTERN = re.compile(r'\s+\d+(\.\d+)?\s*(MG|MCG|G|ML|%|UNIT).*$', re.IGNORECASE)
+STRENGTH_LABEL_PATTERN = re.compile(r'(\d+(?:\.\d+)?\s*(?:MG|MCG|G|ML|%|UNIT))', re.IGNORECASE)
+
+# Therapeutic-class map: token -> most common therapeutic classes of the
+# drugs named by / indicated for it (read by redis_filter_only_search)
+CLASS_MAP_KEY_PREFIX = 'tcmap:'
+CLASS_MAP_SEPARATOR = '|'
+# Class-membership NDC sets: cls:<generation>:dc:<DRUG_CLASS> / cls:<generation>:tc:<THERAPEUTIC_CLASS>
+CLASS_SET_KEY_PREFIX = 'cls:'
+CLASS_MAP_MIN_TOKEN_LENGTH = 3
+# Words that would map to almost every class
+CLASS_MAP_STOP_WORDS = {
+    'and', 'the', 'for', 'with', 'without', 'due', 'other', 'type', 'acute',
+    'chronic', 'disease', 'disorder', 'disorders', 'syndrome', 'prevention',
+    'treatment', 'infection', 'infections', 'associated', 'adjunct', 'therapy'
+} | DOSAGE_FORM_TERMS | UNIT_TERMS
+
+# 11-digit NDC, with or without the 5-4-2 / 4-4-2 / 5-3-2 dashes
+NDC_PATTERN = re.compile(r'^(?:\d{11}|\d{4,5}-\d{3,4}-\d{1,2})$')
+
+# Longest lexicon phrase (in words) tried when covering the query
+MAX_PHRASE_WORDS = 4
+
+_LOCK = threading.Lock()
+_LEXICON: Optional[FrozenSet[str]] = None
+_LEXICON_LOADED_AT = 0.0
+
+
+def normalize_lexicon_entry(value: Any) -> str:
+    """Lowercase, map drug_class underscores to spaces and collapse whitespace."""
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', errors='ignore')
+    return re.sub(r'\s+', ' ', str(value or '').replace('_', ' ')).strip().lower()
+
+
+def get_drug_lexicon(redis_client: Any) -> FrozenSet[str]:
+    """
+    Get the drug-name lexicon (loaded once per container, refreshed after the TTL)
+
+    Args:
+        redis_client: Redis client used to read the lexicon sets
+
+    Returns:
+        Frozen set of normalized brand, generic and drug class names
+        (empty if the loader has not materialized the lexicon yet)
+    """
+    global _LEXICON, _LEXICON_LOADED_AT
+
+    if _LEXICON is not None and time.monotonic() - _LEXICON_LOADED_AT < DRUG_LEXICON_TTL_SECONDS:
+        return _LEXICON
+
+    with _LOCK:
+        if _LEXICON is not None and time.monotonic() - _LEXICON_LOADED_AT < DRUG_LEXICON_TTL_SECONDS:
+            return _LEXICON
+
+        start = time.perf_counter()
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for field in LEXICON_FIELDS:
+                pipe.smembers(f"{LEXICON_KEY_PREFIX}{field}")
+            members = pipe.execute()
+        except Exception as e:
+            print(f"[WARNING] Drug lexicon unavailable: {e}")
+            return _LEXICON or frozenset()
+
+        lexicon = set()
+        for field_members in members:
+            for member in field_members or ():
+                entry = normalize_lexicon_entry(member)
+                if entry:
+                    lexicon.add(entry)
+
+        _LEXICON = frozenset(lexicon)
+        _LEXICON_LOADED_AT = time.monotonic()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"[LEXICON] Loaded {len(_LEXICON)} drug names in {elapsed_ms:.1f}ms")
+        return _LEXICON
+
+
+def class_map_tokens(value: Any) -> List[str]:
+    """
+    Tokens a name or indication is stored under in the therapeutic-class map
+    (the whole normalized phrase plus its significant words)
+    
+    Examples:
+        "ROSUVASTATIN_CALCIUM" → ["rosuvastatin calcium", "rosuvastatin", "calcium"]
+        "Type 2 Diabetes Mellitus" → ["type 2 diabetes mellitus", "diabetes", "mellitus"]
+    """
+    phrase = normalize_lexicon_entry(value)
+    if not phrase:
+        return []
+    tokens = [phrase]
+    for word in re.findall(r'[a-z][a-z0-9]*', phrase):
+        if (len(word) >= CLASS_MAP_MIN_TOKEN_LENGTH and word not in CLASS_MAP_STOP_WORDS
+                and word not in tokens):
+            tokens.append(word)
+    return tokens
+
+
+def is_compounding_base(drug_class: Any, drug_name: Any) -> bool:
+    """True if the drug_class or drug_name is a compounding base / non-drug item."""
+    return any(
+        COMPOUNDING_BASE_PATTERN.search(str(value or '').upper())
+        for value in (drug_class, drug_name)
+    )
+
+
+def format_strength_number(number: Any) -> str:
+    """Canonical strength number ("12.50" -> "12.5", "1,000" -> "1000")."""
+    text = ('%f' % float(str(number).replace(',', ''))).rstrip('0').rstrip('.')
+    return text or '0'
+
+
+def parse_strength_components(text: str) -> List[Tuple[str, str]]:
+    """
+    Parse every (number, UNIT) strength component out of a product name
+    
+    "CRESTOR 10 MG TABLET" -> [('10', 'MG')];
+    "LOSARTAN-HCTZ 50-12.5 MG TABLET" -> [('50', 'MG'), ('12.5', 'MG')]
+    """
+    components: List[Tuple[str, str]] = []
+    for match in STRENGTH_COMPONENT_PATTERN.finditer(text or ''):
+        unit = match.group(2).upper()
+        for number in re.split(r'\s*-\s*', match.group(1)):
+            component = (format_strength_number(number), unit)
+            if component not in components:
+                components.append(component)
+    return components
+
+
+def strength_tokens(components: List[Tuple[str, Optional[str]]]) -> List[str]:
+    """
+    TAG tokens for strength components: "<number><UNIT>" plus the bare
+    number, so unit-qualified ("12.5MG") and unitless ("12.5") queries are
+    both single tag lookups.
+    """
+    tokens: List[str] = []
+    for number, unit in components:
+        for token in (f"{number}{unit}" if unit else None, number):
+            if token and token not in tokens:
+                tokens.append(token)
+    return tokens
+
+
+def build_family_key(doc: Dict[str, Any]) -> str:
+    """
+    Group key separating brand families from generic families.
+    
+    Brand drugs group by brand name (all CRESTOR strengths, repackagers
+    included); generics group by drug_class (ingredient), NOT by GCN, which
+    would split by strength. The loader stores it as family_key.
+    """
+    if str(doc.get('is_generic', 'true')).lower() == 'false':
+        return f"brand:{doc.get('brand_name', '').strip()}"
+    drug_class = doc.get('drug_class', '').strip()
+    if drug_class:
+        return f"generic:{drug_class}"
+    # Fallback: use generic_name
+    return f"generic:{doc.get('generic_name', '').strip() or doc.get('drug_name', '').strip() or doc.get('ndc')}"
+
+
+def build_family_display_name(doc: Dict[str, Any]) -> str:
+    """Family display name: brand name, or the ingredient without strength/form details."""
+    brand_name = doc.get('brand_name', '').strip()
+    if str(doc.get('is_generic', 'true')).lower() == 'false' and brand_name:
+        return brand_name
+    # For generics, use drug_class (ingredient name) for display
+    display_name = doc.get('drug_class', '') or doc.get('generic_name', '') or doc.get('drug_name', '')
+    if display_name:
+        # Extract just the drug name part (before dosage info)
+        display_name = FAMILY_NAME_STRENGTH_PATTERN.sub('', display_name).strip() or display_name
+    return display_name
+
+
+def build_strength_label(drug_name: str) -> str:
+    """First strength in a product name ("CRESTOR 10 MG TABLET" → "10 MG")."""
+    match = STRENGTH_LABEL_PATTERN.search(drug_name or '')
+    return match.group(1).strip() if match else ''
+
+
+def _format_strength(number: str, unit: Optional[str]) -> str:
+    return f"{number}{unit.lower()}" if unit else number
+
+
+def _cover_with_lexicon(words: List[str], lexicon: FrozenSet[str]) -> Optional[List[str]]:
+    """Cover every word with lexicon phrases (longest match first), or None."""
+    names: List[str] = []
+    i = 0
+    while i < len(words):
+        for width in range(min(MAX_PHRASE_WORDS, len(words) - i), 0, -1):
+            phrase = ' '.join(words[i:i + width])
+            if phrase in lexicon:
+                names.append(phrase)
+                i += width
+                break
+        else:
+            return None
+    return names
+
+
+def classify_query(query: str, lexicon: FrozenSet[str], speller: Any = None) -> Optional[Dict[str, Any]]:
+    """
+    Resolve a query to the structured search parameters without an LLM
+
+    Handles NDCs and queries made only of known drug names (after local
+    spelling correction) plus an optional strength and dosage form. Anything
+    else (conditions, descriptive text) returns None so the caller falls
+    back to Claude.
+
+    Args:
+        query: Raw user query
+        lexicon: Lexicon from get_drug_lexicon()
+        speller: Optional spelling.DrugSpeller for typo correction
+
+    Returns:
+        Structured dict (search_text, search_terms, filters, corrections,
+        confidence) matching expand_query_with_claude, or None
+    """
+    text = re.sub(r'\s+', ' ', (query or '')).strip().lower()
+    if not text:
+        return None
+
+    if NDC_PATTERN.match(text):
+        ndc = text.replace('-', '')
+        if len(ndc) == 11:
+            return {
+                'search_text': ndc,
+                'search_terms': [ndc],
+                'filters': {'ndc': ndc},
+                'corrections': [],
+                'confidence': 1.0
+            }
+        return None
+
+    if not lexicon:
+        return None
+
+    filters: Dict[str, Any] = {}
+
+    # Strength ("10 mg", "0.5%") - at most one
+    strength_matches = list(STRENGTH_PATTERN.finditer(text))
+    if len(strength_matches) > 1:
+        return None
+    if strength_matches:
+        match = strength_matches[0]
+        filters['strength'] = _format_strength(match.group(1), match.group(2))
+        text = f"{text[:match.start()]} {text[match.end():]}"
+
+    words: List[str] = []
+    for token in re.findall(r"[a-z0-9\-\+%\.]+", text):
+        token = token.strip('.')
+        if not token:
+            continue
+
+        singular = token[:-1] if token.endswith('s') else token
+        if token in DOSAGE_FORM_TERMS or singular in DOSAGE_FORM_TERMS:
+            if 'dosage_form' in filters:
+                return None
+            filters['dosage_form'] = token if token in DOSAGE_FORM_TERMS else singular
+            continue
+
+        if UNITLESS_NUMBER_PATTERN.fullmatch(token):
+            # "testosterone 12.5" - unitless strength, any unit
+            if 'strength' in filters:
+                return None
+            filters['strength'] = token
+            continue
+
+        if token in UNIT_TERMS:
+            return None
+
+        words.append(token)
+
+    if not words:
+        return None
+
+    corrections: List[str] = []
+    names = _cover_with_lexicon(words, lexicon)
+    if names is None and speller is not None:
+        # Retry with typos fixed ("crester 10mg" → "crestor")
+        fixes = speller.correct_terms(words)
+        if fixes:
+            names = _cover_with_lexicon([fixes.get(word, word) for word in words], lexicon)
+            corrections = [f"{wrong} → {right}" for wrong, right in fixes.items()]
+    if names is None:
+        return None
+
+    search_terms: List[str] = []
+    for name in names:
+        for term in name.split():
+            if term not in search_terms:
+                search_terms.append(term)
+
+    return {
+        'search_text': ' '.join(names),
+        'search_terms': search_terms,
+        'filters': filters,
+        'corrections': corrections,
+        'confidence': 0.9 if corrections else 1.0
+    }
@@ -10,6 +10,16 @@ Features:
 - Incremental sync support
 - CloudWatch metrics
 
+Legacy loader: documents are written as RedisJSON with the original flat
+schema. The load-time fields that search_handler's prefilters and grouping
+rely on (strength_tokens, is_compounding_base, family_key /
+family_display_name / strength_label) are only written by scripts/2025-11-20_production_load_full.py, which builds the
+HASH-based drugs_idx. search_handler checks the index schema
+(get_index_attributes) before using them and falls back to in-process
+filtering / grouping when they are missing. The class sets and class map the
+script writes per index generation are copied forward when this loader
+publishes a new generation.
+
 Environment Variables:
     DB_HOST: Aurora MySQL hostname
     DB_PORT: Aurora MySQL port (default: 3306)
@@ -31,6 +41,9 @@ import redis
 from typing import List, Dict, Any
 from datetime import datetime
 
+from functions.src.cache.response_cache import INDEX_GENERATION_KEY
+from functions.src.index_generation import copy_versioned_keys, publish_index_generation
+
 # Embedding generation (inline for Lambda simplicity)
 def get_embedding_model():
     """Return a simple embedding model wrapper for Bedrock Titan."""
@@ -477,6 +490,20 @@ def lambda_handler(event, context):
         traceback.print_exc()
         
     finally:
+        # Retire cached /search responses built from the previous index contents.
+        # This loader doesn't rebuild the class sets / class map (drug_class is
+        # not loaded), so the new generation carries the current ones forward.
+        if total_success > 0:
+            try:
+                current_generation = int(redis_conn.get(INDEX_GENERATION_KEY) or 0)
+                generation = publish_index_generation(
+                    redis_conn,
+                    lambda next_generation: copy_versioned_keys(redis_conn, current_generation, next_generation)
+                )
+                print(f"\n🔄 Index generation bumped to {generation}")
+            except Exception as e:
+                print(f"\n⚠️  Failed to bump index generation: {e}")
+        
         # Close connections
         if db_conn:
             db_conn.close()
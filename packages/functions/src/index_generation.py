@@ -0,0 +1,116 @@
+"""
+Index Generation Publishing
+
+Artifacts derived from the loaded index (therapeutic-class map, class
+membership sets) are versioned by index:generation, so a reload swaps them
+atomically: a loader writes them under the next generation, then bumps the
+counter. Every loader publishes through publish_index_generation(), so no
+generation is ever live without its artifacts.
+
+Redis layout:
+    index:generation                           (STRING counter)
+    tcmap:<generation>                         (HASH, see drug_lexicon)
+    cls:<generation>:dc:<DRUG_CLASS>           (SET of NDCs)
+    cls:<generation>:tc:<THERAPEUTIC_CLASS>    (SET of NDCs)
+
+Older generations' artifacts are expired (not deleted) once the new
+generation is live, since containers re-read the generation within seconds.
+"""
+
+from typing import Any, Callable, Iterator
+
+from functions.src.cache.response_cache import INDEX_GENERATION_KEY, bump_index_generation
+from functions.src.drug_lexicon import CLASS_MAP_KEY_PREFIX, CLASS_SET_KEY_PREFIX
+
+VERSIONED_KEY_RETIRE_SECONDS = 3600
+SCAN_COUNT = 1000
+
+
+def _class_set_keys(redis_client: Any, generation: int) -> Iterator[str]:
+    for key in redis_client.scan_iter(match=f"{CLASS_SET_KEY_PREFIX}{generation}:*", count=SCAN_COUNT):
+        yield key.decode('utf-8') if isinstance(key, bytes) else key
+
+
+def publish_index_generation(redis_client: Any, write_versioned: Callable[[int], None]) -> int:
+    """
+    Write the versioned artifacts for the next generation, then make it live
+
+    Args:
+        redis_client: Redis client
+        write_versioned: Writes tcmap / cls keys under the generation it is given
+
+    Returns:
+        The published generation (artifacts are moved to it if another
+        loader bumped the counter meanwhile)
+    """
+    next_generation = int(redis_client.get(INDEX_GENERATION_KEY) or 0) + 1
+    write_versioned(next_generation)
+
+    generation = bump_index_generation(redis_client)
+    if generation != next_generation:
+        rename_versioned_keys(redis_client, next_generation, generation)
+    retire_versioned_keys(redis_client, generation)
+    return generation
+
+
+def copy_versioned_keys(redis_client: Any, from_generation: int, to_generation: int) -> int:
+    """
+    Copy a generation's class map and class sets to another generation
+
+    For loaders that reload documents without rebuilding the class-derived
+    artifacts: the new generation keeps serving the previous ones.
+
+    Returns:
+        Number of keys copied (0 when the source generation has none)
+    """
+    copies = [(f"{CLASS_MAP_KEY_PREFIX}{from_generation}", f"{CLASS_MAP_KEY_PREFIX}{to_generation}")]
+    from_prefix = f"{CLASS_SET_KEY_PREFIX}{from_generation}:"
+    to_prefix = f"{CLASS_SET_KEY_PREFIX}{to_generation}:"
+    for key in _class_set_keys(redis_client, from_generation):
+        copies.append((key, to_prefix + key[len(from_prefix):]))
+
+    copied = 0
+    pipe = redis_client.pipeline(transaction=False)
+    for i, (source, destination) in enumerate(copies, 1):
+        pipe.copy(source, destination, replace=True)
+        if i % SCAN_COUNT == 0:
+            copied += sum(1 for result in pipe.execute() if result)
+    copied += sum(1 for result in pipe.execute() if result)
+    return copied
+
+
+def rename_versioned_keys(redis_client: Any, from_generation: int, to_generation: int) -> None:
+    """Move a load's class map and class sets to the generation that was actually published."""
+    from_prefix = f"{CLASS_SET_KEY_PREFIX}{from_generation}:"
+    to_prefix = f"{CLASS_SET_KEY_PREFIX}{to_generation}:"
+    if redis_client.exists(f"{CLASS_MAP_KEY_PREFIX}{from_generation}"):
+        redis_client.rename(f"{CLASS_MAP_KEY_PREFIX}{from_generation}", f"{CLASS_MAP_KEY_PREFIX}{to_generation}")
+    for key in list(_class_set_keys(redis_client, from_generation)):
+        redis_client.rename(key, to_prefix + key[len(from_prefix):])
+
+
+def retire_versioned_keys(redis_client: Any, generation: int) -> int:
+    """
+    Expire class maps and class sets of other generations (and the
+    pre-generation cls:dc: / cls:tc: sets) after VERSIONED_KEY_RETIRE_SECONDS
+
+    Returns:
+        Number of keys given an expiry
+    """
+    current_map = f"{CLASS_MAP_KEY_PREFIX}{generation}"
+    current_sets = f"{CLASS_SET_KEY_PREFIX}{generation}:"
+    retired = 0
+    pipe = redis_client.pipeline(transaction=False)
+    for prefix in (CLASS_MAP_KEY_PREFIX, CLASS_SET_KEY_PREFIX):
+        for key in redis_client.scan_iter(match=f"{prefix}*", count=SCAN_COUNT):
+            key = key.decode('utf-8') if isinstance(key, bytes) else key
+            if key == current_map or key.startswith(current_sets):
+                continue
+            pipe.expire(key, VERSIONED_KEY_RETIRE_SECONDS, nx=True)
+            retired += 1
+            if retired % SCAN_COUNT == 0:
+                pipe.execute()
+    pipe.execute()
+    if retired:
+        print(f"[INDEX] Retiring {retired} older class map / class set key(s) in {VERSIONED_KEY_RETIRE_SECONDS}s")
+    return retired
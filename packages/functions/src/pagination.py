@@ -0,0 +1,110 @@
+"""
+Cursor Pagination for /search
+
+A search page is built from three ordered document streams - the KNN
+candidates (by score), the drug_class expansion and the therapeutic_class
+expansion (both by NDC) - grouped into drug families. Instead of
+over-fetching every stream and slicing the grouped list, each page reads
+one window per stream and the response carries an opaque cursor with:
+
+- per-stream offsets: where the next page resumes each stream. A stream
+  resumes at its first document whose family did not make it onto the
+  page, so nothing is skipped; documents of families already returned are
+  dropped when they are read again.
+- the drug / therapeutic classes to expand (fixed by the first page, so
+  every page reads the same expansion streams)
+- the family keys already returned (a family is never repeated on a later
+  page)
+- for multi-drug searches, whose pages are cut from one bounded grouped
+  list, just the number of groups already returned (group_offset)
+- a fingerprint of the request and the index generation: a cursor is only
+  valid for the same query, filters, page size and index contents.
+
+The cursor is zlib-compressed JSON, base64url encoded. It is not signed:
+tampering can only produce a different page of the same public index.
+
+Environment Variables:
+    SEARCH_MAX_KNN_CANDIDATES: KNN candidates reachable by paging (default: 300)
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import os
+import zlib
+from typing import Any, Dict, Optional
+
+SEARCH_MAX_KNN_CANDIDATES = int(os.environ.get('SEARCH_MAX_KNN_CANDIDATES', '300'))
+
+CURSOR_VERSION = 1
+STREAMS = ('knn', 'drug_class', 'therapeutic_class')
+
+
+class InvalidCursorError(ValueError):
+    """Cursor is malformed, or belongs to another request / index generation."""
+
+
+def request_fingerprint(query: str, filters: Optional[Dict[str, Any]], max_results: int,
+                        settings: Optional[Dict[str, Any]] = None) -> str:
+    """Short hash binding a cursor to the request that produced it."""
+    canonical = json.dumps({
+        'query': query,
+        'filters': filters or {},
+        'max_results': max_results,
+        'settings': settings or {},
+    }, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def first_page(fingerprint: str, generation: int) -> Dict[str, Any]:
+    """Page state for a request without a cursor."""
+    return {
+        'v': CURSOR_VERSION,
+        'fp': fingerprint,
+        'gen': generation,
+        'offsets': {stream: 0 for stream in STREAMS},
+        'exhausted': [],
+        'classes': None,  # Set by the first page: {'drug_class': [...], 'therapeutic_class': [...]}
+        'families': [],
+        'group_offset': 0,  # Multi-drug searches: groups already returned
+    }
+
+
+def encode_cursor(page: Dict[str, Any]) -> str:
+    """Opaque cursor string for a page state."""
+    payload = json.dumps(page, sort_keys=True, separators=(',', ':'))
+    return base64.urlsafe_b64encode(zlib.compress(payload.encode('utf-8'), 9)).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, fingerprint: str, generation: int) -> Dict[str, Any]:
+    """
+    Page state from a cursor returned by an earlier page
+
+    Raises:
+        InvalidCursorError: malformed cursor, different request, or the
+            index was reloaded since (offsets would point into other data)
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        page = json.loads(zlib.decompress(base64.urlsafe_b64decode(padded.encode('ascii'))))
+    except (ValueError, TypeError, UnicodeError, binascii.Error, zlib.error) as e:
+        raise InvalidCursorError(f"Malformed cursor: {e}") from e
+
+    if not isinstance(page, dict) or page.get('v') != CURSOR_VERSION:
+        raise InvalidCursorError("Unsupported cursor version")
+    if page.get('fp') != fingerprint:
+        raise InvalidCursorError("Cursor does not belong to this query")
+    if page.get('gen') != generation:
+        raise InvalidCursorError("Cursor expired (index was reloaded)")
+    offsets = page.get('offsets')
+    if not isinstance(offsets, dict) or any(
+        not isinstance(offsets.get(stream), int) or offsets[stream] < 0 for stream in STREAMS
+    ):
+        raise InvalidCursorError("Malformed cursor offsets")
+    if not isinstance(page.get('families'), list):
+        raise InvalidCursorError("Malformed cursor families")
+    group_offset = page.setdefault('group_offset', 0)
+    if not isinstance(group_offset, int) or group_offset < 0:
+        raise InvalidCursorError("Malformed cursor group offset")
+    return page
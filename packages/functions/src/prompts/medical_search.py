@@ -8,7 +8,10 @@ search parameters (search_text, filters, corrections, confidence).
 
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+from functions.src.config.llm_config import CACHE_POINT
 
 MEDICAL_SEARCH_SYSTEM_PROMPT = """You are a medical search query processor for an e-prescribing drug database.
 
@@ -51,11 +54,8 @@ COMMON INDICATIONS:
 
 COMMON MISSPELLINGS:
 - "cholestrl" → cholesterol
-- "metformen" → metformin
 - "diabetis" → diabetes
-- "atorvastain" → atorvastatin
-- "lisinipril" → lisinopril
-- "aspirn" → aspirin
+- Drug-name typos are corrected by the search system; apply any SPELLING HINTS given with the query
 
 EMBEDDING TEXT RULES:
 CRITICAL: Embedding text should contain ONLY actual drug names and active pharmaceutical ingredients.
@@ -99,26 +99,50 @@ Parse this query and return structured search parameters.
 Respond with a single JSON object that exactly matches the specified schema.
 Do NOT include markdown fences, commentary, or additional text."""
 
+# Fingerprint of the prompt text. Any edit to the prompts changes it, which
+# automatically retires cached parses produced by the previous prompt.
+MEDICAL_SEARCH_PROMPT_VERSION = hashlib.sha256(
+    (MEDICAL_SEARCH_SYSTEM_PROMPT + MEDICAL_SEARCH_USER_TEMPLATE).encode("utf-8")
+).hexdigest()[:12]
+
 
-def build_medical_search_prompts(query: str) -> Tuple[List[Dict[str, object]], List[Dict[str, object]]]:
+def build_medical_search_prompts(
+    query: str,
+    spelling_hints: Optional[Dict[str, str]] = None,
+) -> Tuple[List[Dict[str, object]], List[Dict[str, object]]]:
     """
     Build the system and user prompt payloads for the medical search parser.
 
+    Args:
+        query: Raw user query
+        spelling_hints: Optional {misspelled: corrected} drug-name fixes from
+            the local speller, appended to the user message
+
     Returns:
-        (system_messages, user_messages)
+        (system_messages, user_messages) - the static system prompt is
+        followed by a cache point; per-query text only goes in the user message
     """
     system_messages: List[Dict[str, object]] = [
         {
             "text": MEDICAL_SEARCH_SYSTEM_PROMPT,
-        }
+        },
+        # Identical for every query, so marked as a cacheable prefix; the
+        # cache point is only sent when the prefix is long enough for the
+        # model (see prompt_cache_eligible in llm_config)
+        CACHE_POINT,
     ]
 
+    user_text = MEDICAL_SEARCH_USER_TEMPLATE.format(query=query)
+    if spelling_hints:
+        hints = ", ".join(f'"{wrong}" → {right}' for wrong, right in spelling_hints.items())
+        user_text += f"\n\nSPELLING HINTS (verified against the drug database): {hints}"
+
     user_messages: List[Dict[str, object]] = [
         {
             "role": "user",
             "content": [
                 {
-                    "text": MEDICAL_SEARCH_USER_TEMPLATE.format(query=query),
+                    "text": user_text,
                 }
             ],
         }
@@ -0,0 +1,170 @@
+"""
+FT.SEARCH / FT.AGGREGATE Reply Decoder
+
+One decoder for every RediSearch reply the handlers read, replacing the
+field-pair loops that were copy-pasted per call site.
+
+- Field names are decoded once per process and interned (every reply
+  repeats the same RETURN list), so each document only decodes its values.
+- One pass per document: all values are decoded with a single .decode()
+  call and zipped straight into the result dict with the cached names.
+- Accepts RESP2 replies ([total, id, [k, v, ...], ...], bytes or str, as
+  produced by the pure-Python or hiredis parsers) and RESP3 map replies
+  ({total_results, results: [{id, extra_attributes}, ...]}).
+
+Documents are returned as plain dicts: the search pipeline annotates them
+in place and json.dumps serializes them directly, so a record type would
+have to be materialized back into a dict for every result anyway.
+"""
+
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+# Raw field-name tuple (as it appears in a reply) -> interned str names
+_FIELD_NAMES: Dict[Tuple[Any, ...], Tuple[str, ...]] = {}
+# Documents missing optional fields produce other tuples; keep the cache bounded
+_MAX_FIELD_NAME_TUPLES = 1024
+
+# Joins a document's values so they are decoded with one .decode() call;
+# a value containing it just falls back to per-value decoding
+_VALUE_SEPARATOR = b'\x1f'
+
+
+def _field_names(raw_names: Tuple[Any, ...]) -> Tuple[str, ...]:
+    names = _FIELD_NAMES.get(raw_names)
+    if names is None:
+        names = tuple(
+            sys.intern(name.decode('utf-8') if isinstance(name, bytes) else str(name))
+            for name in raw_names
+        )
+        if len(_FIELD_NAMES) < _MAX_FIELD_NAME_TUPLES:
+            _FIELD_NAMES[raw_names] = names
+    return names
+
+
+def _decode_values(values: List[Any]) -> List[Any]:
+    if type(values[0]) is bytes:
+        try:
+            decoded = _VALUE_SEPARATOR.join(values).decode('utf-8').split('\x1f')
+            if len(decoded) == len(values):
+                return decoded
+        except TypeError:
+            pass  # Mixed bytes / non-bytes values
+    elif all(type(value) is str for value in values):
+        return values
+    return [value.decode('utf-8') if type(value) is bytes else value for value in values]
+
+
+def decode_document(fields: Any) -> Dict[str, Any]:
+    """
+    Decode one document's fields into a dict
+
+    Args:
+        fields: RESP2 flat [name, value, ...] list or RESP3 attribute map
+
+    Returns:
+        Dict of field name -> str value (non-bytes values passed through)
+    """
+    if not fields:
+        return {}
+
+    if isinstance(fields, dict):
+        raw_names = tuple(fields.keys())
+        values = list(fields.values())
+    else:
+        raw_names = tuple(fields[0::2])
+        values = fields[1::2]
+        if len(values) < len(raw_names):  # Dangling name without a value
+            raw_names = raw_names[:len(values)]
+
+    if not values:
+        return {}
+    return dict(zip(_field_names(raw_names), _decode_values(values)))
+
+
+def _resp3_get(reply: Dict[Any, Any], key: str) -> Any:
+    value = reply.get(key)
+    if value is None:
+        value = reply.get(key.encode('utf-8'))
+    return value
+
+
+def decode_search_reply(reply: Any, with_ids: bool = False) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Decode a full FT.SEARCH reply
+
+    Args:
+        reply: Raw execute_command('FT.SEARCH', ...) result (RESP2 or RESP3)
+        with_ids: Also set each document's Redis key under '_id'
+
+    Returns:
+        (total_results, documents)
+    """
+    if not reply:
+        return 0, []
+
+    if isinstance(reply, dict):
+        total = int(_resp3_get(reply, 'total_results') or 0)
+        documents = []
+        for result in _resp3_get(reply, 'results') or []:
+            document = decode_document(_resp3_get(result, 'extra_attributes') or {})
+            if with_ids:
+                document['_id'] = _decode_id(_resp3_get(result, 'id'))
+            documents.append(document)
+        return total, documents
+
+    total = int(reply[0])
+    # [total, id1, fields1, id2, fields2, ...]; a trailing id without fields is ignored
+    end = len(reply) - 1
+    if with_ids:
+        documents = []
+        for i in range(1, end, 2):
+            document = decode_document(reply[i + 1])
+            document['_id'] = _decode_id(reply[i])
+            documents.append(document)
+        return total, documents
+
+    return total, [decode_document(reply[i + 1]) for i in range(1, end, 2)]
+
+
+def _decode_id(raw: Optional[Any]) -> Optional[str]:
+    return raw.decode('utf-8') if isinstance(raw, bytes) else raw
+
+
+def _decode_nested(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    if isinstance(value, (list, tuple)):
+        return [_decode_nested(item) for item in value]
+    return value
+
+
+def decode_aggregate_reply(reply: Any) -> List[Dict[str, Any]]:
+    """
+    Decode an FT.AGGREGATE reply into one dict per row
+
+    Reducer outputs that are lists (REDUCE TOLIST) are decoded element-wise.
+
+    Args:
+        reply: Raw execute_command('FT.AGGREGATE', ...) result (RESP2 or RESP3)
+
+    Returns:
+        Rows in reply order
+    """
+    if not reply:
+        return []
+
+    if isinstance(reply, dict):
+        rows = [_resp3_get(result, 'extra_attributes') or {} for result in _resp3_get(reply, 'results') or []]
+    else:
+        rows = reply[1:]  # [num_rows, [k, v, ...], ...]
+
+    decoded = []
+    for row in rows:
+        if isinstance(row, dict):
+            row = [item for pair in row.items() for item in pair]
+        decoded.append({
+            _field_names((name,))[0]: _decode_nested(value)
+            for name, value in zip(row[0::2], row[1::2])
+        })
+    return decoded
@@ -2,7 +2,7 @@
 Drug Search Handler - POST /search
 
 Implements natural language drug search with:
-1. Claude Sonnet 4 preprocessing (query expansion)
+1. Claude Sonnet 4 preprocessing (query expansion), skipped for exact NDC/drug-name queries
 2. Bedrock Titan embeddings
 3. Redis hybrid search (vector + filters)
 4. Aurora enrichment
@@ -13,36 +13,334 @@ CRITICAL: Uses centralized llm_config.py for all LLM calls
 import json
 import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures import wait as futures_wait
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
 # Centralized LLM configuration
 from functions.src.config.llm_config import (
+    LLM_CASCADE_CONFIG,
+    LLMDeadlineExceeded,
     call_claude_converse,
+    call_claude_converse_stream,
+    call_llm_cascade,
     estimate_cost,
     generate_embedding,
+    get_cascade_stats,
+    get_client_stats,
+    get_hedge_stats,
+    get_llm_route_id,
+    model_from_id,
+    prewarm_bedrock_clients,
 )
-from functions.src.prompts import build_medical_search_prompts
+from functions.src.config.redis_config import (
+    diff_pool_stats,
+    get_pool_stats,
+    get_redis_client,
+)
+from functions.src.cache import LRUCache
+from functions.src.cache.embedding_cache import configure_embedding_cache
+from functions.src.cache.query_cache import get_cached_parse, normalize_query, store_cached_parse
+from functions.src.cache.response_cache import (
+    build_response_cache_key,
+    get_index_generation,
+    get_or_compute_response,
+    get_response_cache_stats,
+)
+from functions.src.cache.single_flight import SingleFlight
+from functions.src.prompts import MEDICAL_SEARCH_PROMPT_VERSION, build_medical_search_prompts
+from functions.src.drug_lexicon import (
+    CLASS_MAP_KEY_PREFIX,
+    CLASS_MAP_SEPARATOR,
+    CLASS_SET_KEY_PREFIX,
+    DOSAGE_FORM_TERMS,
+    QUERY_FAST_PATH_ENABLED,
+    STRENGTH_PATTERN,
+    UNIT_TERMS,
+    UNITLESS_NUMBER_PATTERN,
+    build_family_display_name,
+    build_family_key,
+    build_strength_label,
+    classify_query,
+    format_strength_number,
+    get_drug_lexicon,
+    is_compounding_base,
+    normalize_lexicon_entry,
+    parse_strength_components,
+    strength_tokens,
+)
+from functions.src.spelling import get_drug_speller
+from functions.src.pagination import (
+    SEARCH_MAX_KNN_CANDIDATES,
+    STREAMS as PAGINATION_STREAMS,
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    first_page,
+    request_fingerprint,
+)
+from functions.src.redis_reply import decode_aggregate_reply, decode_search_reply
+from functions.src.streaming_json import IncrementalObjectParser
+from functions.src.term_matcher import document_corpus, get_term_matcher, public_document
 
 # Redis index configuration
 # Set to 'drugs_test_idx' for testing, 'drugs_idx' for production
 REDIS_INDEX_NAME = os.environ.get('REDIS_INDEX_NAME', 'drugs_idx')  # Default to production index
 
+# Class expansion engine: 'search' (FT.SEARCH) or 'sets' (precomputed
+# cls:<generation>:dc:/tc: NDC sets written by the loader)
+EXPANSION_ENGINE = os.environ.get('EXPANSION_ENGINE', 'search').lower()
+CLASS_SET_KINDS = {
+    'drug_class': 'dc',
+    'therapeutic_class': 'tc',
+}
+SETS_EXPANSION_FILTERED_CHUNK = int(os.environ.get('SETS_EXPANSION_FILTERED_CHUNK', '500'))
+# Pagination: variants fetched to complete a page's families (all pages) and
+# extra stream windows read to fill a page whose windows only held families
+# returned earlier
+PAGE_FAMILY_VARIANT_LIMIT = int(os.environ.get('PAGE_FAMILY_VARIANT_LIMIT', '500'))
+PAGE_FILL_MAX_ROUNDS = int(os.environ.get('PAGE_FILL_MAX_ROUNDS', '3'))
+# search_method of expansion documents -> pagination stream (KNN otherwise)
+EXPANSION_STREAMS = {
+    'drug_class_filter': 'drug_class',
+    'therapeutic_class_filter': 'therapeutic_class',
+}
+
+# Result grouping engine: 'python' (group fetched documents) or 'aggregate'
+# (therapeutic_class expansion grouped server-side by FT.AGGREGATE GROUPBY
+# @family_key). Default for requests that don't pass grouping_engine.
+GROUPING_ENGINE = os.environ.get('GROUPING_ENGINE', 'python').lower()
+GROUPING_ENGINES = ('python', 'aggregate')
+# Per-document fields packed into each REDUCE TOLIST variant entry
+AGGREGATE_VARIANT_FIELDS = (
+    'ndc', 'drug_name', 'dosage_form', 'strength_label',
+    'manufacturer_name', 'is_generic', 'dea_schedule'
+)
+# Per-family fields (REDUCE FIRST_VALUE of the lowest-NDC document)
+AGGREGATE_FAMILY_FIELDS = ('family_display_name', 'brand_name', 'drug_class', 'gcn_seqno', 'indication_key')
+AGGREGATE_VARIANT_SEPARATOR = '|~|'
+
+# Strength filtering: prefilter KNN / expansion queries on the loader's
+# strength_tokens TAG field when the index has it (the drug_name post-filter
+# still runs, and is the only filter on indexes built before the field existed)
+STRENGTH_PREFILTER_ENABLED = os.environ.get('STRENGTH_PREFILTER_ENABLED', 'true').lower() == 'true'
+INDEX_SCHEMA_TTL_SECONDS = float(os.environ.get('INDEX_SCHEMA_TTL_SECONDS', '300'))
+_INDEX_ATTRIBUTES: Dict[str, Any] = {'fields': None, 'read_at': 0.0}
+
+# Loader-computed TAG; every query excludes flagged compounding bases
+COMPOUNDING_BASE_FIELD = 'is_compounding_base'
+
+# Therapeutic classes too broad/vague to expand by (group unrelated drugs)
+THERAPEUTIC_CLASS_BLACKLIST = {
+    'Bulk Chemicals',           # Too broad - groups unrelated drugs
+    'Miscellaneous',            # Too vague
+    'Uncategorized',            # No clinical meaning
+    'Not Specified',            # No clinical meaning
+}
+
+# Multi-drug fan-out configuration (bounded concurrency + per-stage deadlines)
+MULTI_DRUG_MAX_WORKERS = int(os.environ.get('MULTI_DRUG_MAX_WORKERS', '5'))
+MULTI_DRUG_EMBEDDING_DEADLINE_MS = float(os.environ.get('MULTI_DRUG_EMBEDDING_DEADLINE_MS', '3000'))
+MULTI_DRUG_KNN_DEADLINE_MS = float(os.environ.get('MULTI_DRUG_KNN_DEADLINE_MS', '2000'))
+
+# Created once per warm container; sized so a pipelined KNN batch can still
+# run while straggling embedding calls occupy the other workers (nothing
+# else is submitted to it - early retrieval has _EARLY_EXECUTOR)
+_FANOUT_EXECUTOR = ThreadPoolExecutor(
+    max_workers=MULTI_DRUG_MAX_WORKERS + 1,
+    thread_name_prefix='search-fanout'
+)
+
+# Speculative embedding of the raw query, overlapped with the LLM call
+SPECULATIVE_EMBEDDING_ENABLED = os.environ.get('SPECULATIVE_EMBEDDING_ENABLED', 'true').lower() == 'true'
+SPECULATIVE_EMBEDDING_TIMEOUT_MS = float(os.environ.get('SPECULATIVE_EMBEDDING_TIMEOUT_MS', '3000'))
+
+# Stream the LLM parse (ConverseStream) and start embedding + KNN as soon as
+# search_text / filters are complete, while corrections / confidence stream
+LLM_STREAMING_ENABLED = os.environ.get('LLM_STREAMING_ENABLED', 'true').lower() == 'true'
+# Lambda time kept for retrieval when capping a request's LLM parse deadline
+LLM_PARSE_RESERVE_MS = float(os.environ.get('LLM_PARSE_RESERVE_MS', '5000'))
+EARLY_RETRIEVAL_TIMEOUT_MS = float(os.environ.get('EARLY_RETRIEVAL_TIMEOUT_MS', '5000'))
+# Speculative embedding, early embedding and early search (at most one each
+# per request) get their own pool, so they never wait behind - or hold up -
+# the multi-drug fan-out and its KNN deadline on _FANOUT_EXECUTOR
+EARLY_RETRIEVAL_MAX_WORKERS = int(os.environ.get('EARLY_RETRIEVAL_MAX_WORKERS', '3'))
+_EARLY_EXECUTOR = ThreadPoolExecutor(
+    max_workers=EARLY_RETRIEVAL_MAX_WORKERS,
+    thread_name_prefix='search-early'
+)
+
+# Coalesce identical in-flight stage calls across concurrent requests in
+# this container (results are shared read-only, never mutated downstream)
+_PARSE_FLIGHT = SingleFlight('llm_parse')
+_EMBEDDING_FLIGHT = SingleFlight('embedding')
+_SEARCH_FLIGHT = SingleFlight('hybrid_search')
+
+# Share cached query embeddings across containers via Redis (second tier)
+configure_embedding_cache(redis_client_factory=get_redis_client)
+
+# Build the Bedrock client during Lambda init instead of on the first request
+BEDROCK_CLIENT_PREWARM_ENABLED = os.environ.get('BEDROCK_CLIENT_PREWARM_ENABLED', 'true').lower() == 'true'
+if BEDROCK_CLIENT_PREWARM_ENABLED:
+    prewarm_bedrock_clients()
+
+# Indication strings only change on reload, so keep them per container
+# (keyed by index generation; see fetch_indications)
+_INDICATION_CACHE = LRUCache(
+    maxsize=int(os.environ.get('INDICATION_CACHE_SIZE', '4096')),
+    ttl_seconds=float(os.environ.get('INDICATION_CACHE_TTL_SECONDS', '3600'))
+)
+
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Main Lambda handler for drug search endpoint
     
+    Serves the full response from the response cache when possible
+    (keyed on query, filters, max_results, prompt version, model and index
+    generation); misses run execute_search() once per burst of identical
+    requests. See execute_search() for the request/response format.
+    """
+    request_start = datetime.now()
+    try:
+        body = json.loads(event.get('body', '{}'))
+        query = body.get('query')
+        user_filters = body.get('filters', {}) or {}
+        if not isinstance(user_filters, dict):
+            user_filters = {}
+        max_results = body.get('max_results', 20)
+        
+        # Invalid requests are rejected (uncached) by execute_search
+        if not query or max_results > 100:
+            return execute_search(event, context)
+        
+        redis_client = get_redis_client()
+        cache_key = build_response_cache_key(
+            query,
+            user_filters,
+            max_results,
+            MEDICAL_SEARCH_PROMPT_VERSION,
+            get_llm_route_id(),
+            get_index_generation(redis_client),
+            extra={
+                'expansion_engine': EXPANSION_ENGINE,
+                'grouping_engine': str(body.get('grouping_engine') or GROUPING_ENGINE).lower(),
+                'cursor': body.get('cursor')
+            }
+        )
+    except Exception as e:
+        print(f"[WARNING] Response cache unavailable: {e}")
+        return execute_search(event, context)
+    
+    response, cache_info = get_or_compute_response(
+        redis_client,
+        cache_key,
+        lambda: execute_search(event, context)
+    )
+    
+    if response.get('statusCode') != 200:
+        return response
+    
+    # Stamp per-request cache metrics onto the (possibly cached) body
+    try:
+        response_body = json.loads(response['body'])
+        metrics = response_body.setdefault('metrics', {})
+        if cache_info['hit']:
+            response_body.setdefault('query_info', {})['original'] = query
+            strip_request_metrics(metrics)
+            metrics['total_latency_ms'] = round((datetime.now() - request_start).total_seconds() * 1000, 2)
+            response_body['timestamp'] = datetime.now().isoformat()
+        metrics['cache_hit'] = cache_info['hit']
+        cache_stats = get_response_cache_stats(redis_client)
+        metrics['response_cache'] = {
+            **cache_info,
+            # This container, except evicted / expired keys (Redis-wide)
+            'hit_ratio': cache_stats['hit_ratio'],
+            'bytes_stored': cache_stats['bytes_stored'],
+            'evicted_keys': cache_stats.get('evicted_keys'),
+            'expired_keys': cache_stats.get('expired_keys')
+        }
+        response['body'] = json.dumps(response_body)
+    except (ValueError, TypeError) as e:
+        print(f"[WARNING] Could not annotate cached response: {e}")
+    
+    return response
+
+
+def strip_request_metrics(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Zero the per-request work of a response served from the response cache
+    
+    A cached body carries the LLM tokens, cost and embedding / Redis timings
+    of the request that computed it; none of that was spent on a hit.
+    
+    Args:
+        metrics: 'metrics' block of a cached response body (modified in place)
+    
+    Returns:
+        The same dict
+    """
+    llm = metrics.get('llm')
+    if isinstance(llm, dict):
+        llm.update({
+            'latency_ms': 0.0,
+            'input_tokens': 0,
+            'output_tokens': 0,
+            'path': 'response_cache',
+            'cost_estimate': 0.0,
+            'cache': None,
+            'client_ms': 0.0,
+            'time_to_first_field_ms': None,
+            'streaming': False,
+            'cascade': None,
+            'hedge': None
+        })
+        if isinstance(llm.get('prompt_cache'), dict):
+            llm['prompt_cache'].update({'read_tokens': 0, 'write_tokens': 0, 'savings': 0.0})
+    embedding = metrics.get('embedding')
+    if isinstance(embedding, dict):
+        embedding.update({
+            'latency_ms': 0.0,
+            'cached': False,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'bedrock_latency_ms': 0.0,
+            'client_ms': 0.0,
+            'speculation': None
+        })
+    redis_metrics = metrics.get('redis')
+    if isinstance(redis_metrics, dict):
+        redis_metrics.update({
+            'latency_ms': 0.0,
+            'connections_opened': 0,
+            'connections_reused': 0,
+            'page_fill_rounds': 0
+        })
+    single_flight = metrics.get('single_flight')
+    if isinstance(single_flight, dict):
+        single_flight.update({'llm_parse': False, 'embeddings': 0, 'hybrid_search': False})
+    return metrics
+
+
+def execute_search(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Run the full search pipeline (uncached)
+    
     Args:
         event: API Gateway event with body containing:
             - query: str (natural language search)
             - filters: dict (optional, e.g., is_generic, dea_schedule)
-            - max_results: int (optional, default 20)
+            - max_results: int (optional, default 20) - groups per page
+            - cursor: str (optional) - next_cursor of the previous page
         context: Lambda context
     
     Returns:
         API Gateway response with:
             - results: list of drugs
+            - next_cursor: cursor for the next page (null on the last page)
             - metadata: search metrics
             - query_info: original + expanded query
     """
@@ -54,6 +352,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if not isinstance(user_filters, dict):
             user_filters = {}
         max_results = body.get('max_results', 20)
+        grouping_engine = str(body.get('grouping_engine') or GROUPING_ENGINE).lower()
         
         # Validate
         if not query:
@@ -62,44 +361,94 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if max_results > 100:
             return error_response(400, "max_results cannot exceed 100")
         
+        if grouping_engine not in GROUPING_ENGINES:
+            return error_response(400, f"grouping_engine must be one of: {', '.join(GROUPING_ENGINES)}")
+        
         # Track overall timing
         start_time = datetime.now()
+        redis_pool_start = get_pool_stats()
         
-        # Step 1: Claude preprocessing (structured query parsing)
-        claude_result = expand_query_with_claude(query)
+        # Shared pooled client (created once per warm container)
+        redis_client = get_redis_client()
+        
+        # Pagination: a cursor is only valid for the same request and index generation
+        fingerprint = request_fingerprint(
+            normalize_query(query), user_filters, max_results,
+            settings={'expansion_engine': EXPANSION_ENGINE, 'grouping_engine': grouping_engine}
+        )
+        generation = get_index_generation(redis_client)
+        cursor = body.get('cursor')
+        if cursor:
+            try:
+                page = decode_cursor(str(cursor), fingerprint, generation)
+            except InvalidCursorError as e:
+                return error_response(400, f"Invalid cursor: {e}")
+        else:
+            page = first_page(fingerprint, generation)
+        
+        # Step 1: Structured query parsing
+        # Exact NDC / drug-name queries resolve locally; everything else goes to Claude
+        spelling_corrections = correct_query_spelling(query, redis_client=redis_client)
+        claude_result = parse_query_locally(query, redis_client=redis_client)
+        speculative_text = None
+        speculative_future = None
+        # Retrieval started from the streamed parse: (text, future) / (key, future)
+        early: Dict[str, Any] = {'embedding': None, 'search': None}
+        if claude_result is None:
+            # Speculatively embed the normalized raw query while Claude runs;
+            # most single-drug parses return it unchanged (modulo case/whitespace)
+            if SPECULATIVE_EMBEDDING_ENABLED:
+                speculative_text = normalize_query(query)
+                speculative_future = _EARLY_EXECUTOR.submit(timed_embedding, speculative_text)
+            
+            def start_early_retrieval(fields: Dict[str, Any]) -> None:
+                # Streamed parse: search_text is enough to embed, filters to search
+                partial = {
+                    'search_text': str(fields.get('search_text') or '').strip(),
+                    'filters': fields.get('filters'),
+                    'search_terms': fields.get('search_terms')
+                }
+                if not partial['search_text']:
+                    return
+                partial_inputs = derive_search_inputs(query, partial, None, user_filters, spelling_corrections)
+                text = choose_embedding_text(partial_inputs['expanded_query'], speculative_text)
+                if early['embedding'] is None and text != speculative_text:
+                    early['embedding'] = (text, _EARLY_EXECUTOR.submit(timed_embedding, text))
+                if early['search'] is None and 'filters' in fields and len(partial_inputs['drug_terms']) < 3:
+                    early['search'] = (
+                        retrieval_key(partial_inputs, text),
+                        _EARLY_EXECUTOR.submit(
+                            early_retrieval, text, partial_inputs, max_results,
+                            redis_client, grouping_engine, page
+                        )
+                    )
+            
+            claude_result = coalesced_parse(
+                query,
+                redis_client=redis_client,
+                spelling_hints=spelling_corrections,
+                on_fields=start_early_retrieval if LLM_STREAMING_ENABLED else None,
+                deadline=parse_deadline(context)
+            )
         # Use Bedrock's internal latency metric (not client-side timing)
         claude_time = claude_result.get('latency_ms', 0)
         
         if not claude_result['success']:
+            if claude_result.get('error_type') == LLMDeadlineExceeded.__name__:
+                return error_response(504, f"Claude preprocessing timed out: {claude_result.get('error')}")
             return error_response(500, f"Claude preprocessing failed: {claude_result.get('error')}")
         
         structured_query = claude_result.get('structured', {})
         claude_metrics = claude_result['metadata']
-        expanded_query = structured_query.get('search_text') or claude_result.get('content') or query
-        claude_filters = structured_query.get('filters', {}) or {}
-        if not isinstance(claude_filters, dict):
-            claude_filters = {}
-        claude_terms = structured_query.get('search_terms')
-        if not claude_terms:
-            claude_terms = extract_search_terms(expanded_query)
-        
-        # Extract original query terms for lexical filtering (prioritize literal matches)
-        original_terms = extract_search_terms(query)
-        
-        # Decide which terms to use for lexical matching:
-        # ALWAYS use Claude's extracted terms if they're actual drug names
-        # Claude now extracts ONLY drug names, never descriptive words or conditions
-        corrections = structured_query.get('corrections', [])
-        if corrections and len(claude_terms) <= len(original_terms) + 2:
-            # Spelling correction case (e.g., "crester" → "crestor")
-            exact_match_terms = claude_terms
-        elif claude_terms and expanded_query != query:
-            # Claude extracted/transformed the query to actual drug names
-            # Use Claude's terms for better matching
-            exact_match_terms = claude_terms
-        else:
-            # Fallback to original terms (rare case)
-            exact_match_terms = original_terms
+        search_inputs = derive_search_inputs(
+            query, structured_query, claude_result.get('content'), user_filters, spelling_corrections
+        )
+        expanded_query = search_inputs['expanded_query']
+        claude_filters = search_inputs['claude_filters']
+        claude_terms = search_inputs['claude_terms']
+        original_terms = search_inputs['original_terms']
+        exact_match_terms = search_inputs['exact_match_terms']
+        merged_filters = search_inputs['merged_filters']
         
         # Step 2: Use VECTOR SEARCH + EXPANSION for ALL queries
         # Now that Claude extracts clean drug names for all query types,
@@ -108,16 +457,31 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         # 2. Drug class expansion (pharmacological equivalents)
         # 3. Therapeutic class expansion (therapeutic alternatives)
         redis_start = datetime.now()
-        merged_filters = merge_filters(user_filters, claude_filters)
         
         print(f"[SEARCH] Using vector search + expansion approach")
         
         # Initialize embedding_result for metrics
         embedding_result = None
+        embedding_cache_hits = 0
+        embedding_cache_misses = 0
+        embedding_bedrock_ms = 0.0
+        embedding_client_ms = 0.0
+        embeddings_coalesced = 0
+        page_fill_rounds = 0
+        speculation = {
+            'attempted': speculative_future is not None,
+            'hit': False,
+            'saved_ms': 0.0  # Critical-path time saved by overlapping with the LLM call
+        }
+        streaming = {
+            'early_embedding': early['embedding'] is not None,  # Started on a complete search_text
+            'early_search': early['search'] is not None,  # Started on complete search_text + filters
+            'early_search_hit': False  # Early search matched the final parse and was used
+        }
         
         # MULTI-DRUG SEARCH: If Claude extracted multiple drugs (e.g., "atorvastatin rosuvastatin simvastatin"),
         # search for each drug individually and combine results for better accuracy
-        drug_terms = [term for term in claude_terms if len(term) > 3]  # Filter out short words
+        drug_terms = search_inputs['drug_terms']
         
         if len(drug_terms) >= 3:
             # Multiple drugs detected - search each individually for better accuracy
@@ -126,27 +490,50 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             # 2. Combine all vector results
             # 3. Do ONE expansion pass on the combined results
             print(f"[SEARCH] Multi-drug search detected: {len(drug_terms)} drugs")
+            for future in (speculative_future, *(started[1] for started in early.values() if started)):
+                if future is not None:
+                    future.cancel()  # Single-query vectors / searches are not used per drug
             embedding_start = datetime.now()
             
             # PHASE 1: Vector search for each drug (NO expansion yet)
+            # Embeddings run concurrently (bounded pool + stage deadline), then all
+            # KNN queries go out as one pipelined batch. Results are consumed in
+            # drug_terms order so NDC dedup matches the serial behaviour.
             all_vector_results = []
             seen_ndcs = set()
             
-            for drug_term in drug_terms:
-                # Generate embedding for this specific drug
-                drug_embedding_result = generate_embedding(drug_term)
+            term_embedding_results = embed_terms_concurrently(
+                drug_terms,
+                deadline_ms=MULTI_DRUG_EMBEDDING_DEADLINE_MS
+            )
+            
+            term_embeddings = []
+            for drug_term, drug_embedding_result in term_embedding_results:
                 if not drug_embedding_result['success']:
                     print(f"[WARNING] Failed to generate embedding for '{drug_term}': {drug_embedding_result.get('error')}")
                     continue
-                
-                # Do VECTOR-ONLY search (no expansion)
-                drug_search = redis_vector_only_search(
-                    embedding=drug_embedding_result['embedding'],
-                    original_terms=[drug_term],
-                    filters=merged_filters,
-                    limit=20  # Get top 20 per drug
-                )
-                
+                if drug_embedding_result.get('coalesced'):
+                    embeddings_coalesced += 1
+                if drug_embedding_result.get('cached'):
+                    embedding_cache_hits += 1
+                else:
+                    embedding_cache_misses += 1
+                    # Terms are embedded concurrently, so the slowest call bounds the stage
+                    embedding_bedrock_ms = max(embedding_bedrock_ms, drug_embedding_result.get('latency_ms', 0.0))
+                    embedding_client_ms = max(embedding_client_ms, drug_embedding_result.get('client_ms', 0.0))
+                term_embeddings.append((drug_term, drug_embedding_result['embedding']))
+            
+            # Do VECTOR-ONLY search (no expansion), top 20 per drug
+            drug_searches = redis_vector_only_search_batch(
+                term_embeddings,
+                filters=merged_filters,
+                limit=20,
+                redis_client=redis_client,
+                deadline_ms=MULTI_DRUG_KNN_DEADLINE_MS
+            )
+            
+            knn_timed_out = any(drug_search.get('timed_out') for drug_search in drug_searches)
+            for (drug_term, _), drug_search in zip(term_embeddings, drug_searches):
                 if drug_search['success']:
                     # Add unique results (deduplicate by NDC)
                     for result in drug_search['raw_results']:
@@ -166,33 +553,30 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 initial_drugs=all_vector_results,
                 original_terms=exact_match_terms,
                 claude_terms=claude_terms,
-                filters=merged_filters
+                filters=merged_filters,
+                redis_client=redis_client
             )
             expansion_time = (datetime.now() - expansion_start).total_seconds() * 1000
             
-            print(f"[SEARCH] Phase 2 complete: {len(all_raw_results)} total results after expansion")
-            
             all_expansion_debug = all_raw_results.get('expansion_debug', {}) if isinstance(all_raw_results, dict) else {}
+            all_expansion_debug['multi_drug_fanout'] = {
+                'terms': len(drug_terms),
+                'embedded': len(term_embeddings),
+                'embedding_terms_dropped': len(drug_terms) - len(term_embedding_results),
+                'knn_timed_out': knn_timed_out  # Empty per-term results were a deadline, not "no matches"
+            }
             
             # Extract raw results if wrapped in dict
             if isinstance(all_raw_results, dict) and 'raw_results' in all_raw_results:
                 all_raw_results = all_raw_results['raw_results']
             
+            print(f"[SEARCH] Phase 2 complete: {len(all_raw_results)} total results after expansion")
+            
             embedding_time = (datetime.now() - embedding_start).total_seconds() * 1000
             redis_time = (datetime.now() - redis_start).total_seconds() * 1000
             
             # Now group the combined results
             print(f"[SEARCH] Combined {len(all_raw_results)} unique results from {len(drug_terms)} drug searches")
-            import redis as redis_module
-            redis_host = os.environ.get('REDIS_HOST', '10.0.11.153')
-            redis_port = int(os.environ.get('REDIS_PORT', 6379))
-            redis_password = os.environ.get('REDIS_PASSWORD')
-            redis_client = redis_module.Redis(
-                host=redis_host,
-                port=redis_port,
-                password=redis_password,
-                decode_responses=False
-            )
             
             grouped_results = group_search_results(
                 drugs=all_raw_results,
@@ -202,31 +586,114 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 redis_client=redis_client
             )
             
+            grouped_results, next_page = slice_group_page(grouped_results, page, max_results)
+            page_families = {group['group_id'] for group in grouped_results}
+            
             search_results = {
                 'success': True,
                 'groups': grouped_results,
-                'raw_results': all_raw_results,
+                'raw_results': [drug for drug in all_raw_results if document_family_key(drug) in page_families],
+                'next_page': next_page,
                 'expansion_debug': all_expansion_debug
             }
             
         else:
             # Single drug or simple query - use original approach
             embedding_start = datetime.now()
-            embedding_result = generate_embedding(expanded_query)
+            embedding_result = None
+            search_results = None
+            embedding_text = choose_embedding_text(expanded_query, speculative_text)
+            if early['search'] is not None:
+                early_key, early_future = early['search']
+                if early_key == retrieval_key(search_inputs, embedding_text):
+                    try:
+                        early_embedding, early_search = early_future.result(timeout=EARLY_RETRIEVAL_TIMEOUT_MS / 1000)
+                        if early_embedding['success'] and early_search is not None and early_search['success']:
+                            embedding_result, search_results = early_embedding, early_search
+                            streaming['early_search_hit'] = True
+                            print(f"[SEARCH] Early retrieval reused (started before the parse finished)")
+                    except FuturesTimeoutError:
+                        print(f"[WARNING] Early retrieval timed out, searching again")
+                else:
+                    early_future.cancel()
+            
+            if embedding_result is None and early['embedding'] is not None and early['embedding'][0] == embedding_text:
+                try:
+                    early_embedding, _ = early['embedding'][1].result(timeout=EARLY_RETRIEVAL_TIMEOUT_MS / 1000)
+                    if early_embedding['success']:
+                        embedding_result = early_embedding
+                except FuturesTimeoutError:
+                    print(f"[WARNING] Early embedding timed out, generating a fresh one")
+            
+            if embedding_result is None and speculative_future is not None and embedding_text == speculative_text:
+                try:
+                    speculative_result, speculative_ms = speculative_future.result(
+                        timeout=SPECULATIVE_EMBEDDING_TIMEOUT_MS / 1000
+                    )
+                    if speculative_result['success']:
+                        embedding_result = speculative_result
+                        waited_ms = (datetime.now() - embedding_start).total_seconds() * 1000
+                        speculation['hit'] = True
+                        speculation['saved_ms'] = round(max(0.0, speculative_ms - waited_ms), 2)
+                        print(f"[SEARCH] Speculative embedding reused (saved {speculation['saved_ms']}ms)")
+                except FuturesTimeoutError:
+                    print(f"[WARNING] Speculative embedding timed out, generating a fresh one")
+            
+            if embedding_result is None:
+                embedding_result = coalesced_embedding(expanded_query)
             embedding_time = (datetime.now() - embedding_start).total_seconds() * 1000
             
             if not embedding_result['success']:
                 return error_response(500, f"Embedding generation failed: {embedding_result.get('error')}")
             
             embedding = embedding_result['embedding']
+            if embedding_result.get('coalesced'):
+                embeddings_coalesced = 1
+            if embedding_result.get('cached'):
+                embedding_cache_hits = 1
+            else:
+                embedding_cache_misses = 1
+                embedding_bedrock_ms = embedding_result.get('latency_ms', 0.0)
+                embedding_client_ms = embedding_result.get('client_ms', 0.0)
+            
+            if search_results is None:
+                search_results = coalesced_hybrid_search(
+                    embedding=embedding,
+                    original_terms=exact_match_terms,
+                    claude_terms=claude_terms,
+                    filters=merged_filters,
+                    limit=max_results,  # One window per stream; later pages read on
+                    redis_client=redis_client,
+                    grouping_engine=grouping_engine,
+                    page=page
+                )
             
-            search_results = redis_hybrid_search(
-                embedding=embedding,
-                original_terms=exact_match_terms,
-                claude_terms=claude_terms,
-                filters=merged_filters,
-                limit=max_results * 3
-            )
+            # Windows holding only families returned earlier leave the page
+            # short: read the next windows (bounded) before returning it
+            while (search_results['success'] and search_results.get('next_page')
+                   and len(search_results['groups']) < max_results
+                   and page_fill_rounds < PAGE_FILL_MAX_ROUNDS):
+                more_results = coalesced_hybrid_search(
+                    embedding=embedding,
+                    original_terms=exact_match_terms,
+                    claude_terms=claude_terms,
+                    filters=merged_filters,
+                    limit=max_results,
+                    redis_client=redis_client,
+                    grouping_engine=grouping_engine,
+                    page=search_results['next_page'],
+                    max_groups=max_results - len(search_results['groups'])
+                )
+                if not more_results['success']:
+                    break
+                page_fill_rounds += 1
+                # Shared (coalesced) results are read-only: build a new dict
+                search_results = {
+                    **search_results,
+                    'groups': search_results['groups'] + more_results['groups'],
+                    'raw_results': search_results['raw_results'] + more_results['raw_results'],
+                    'next_page': more_results['next_page']
+                }
             redis_time = (datetime.now() - redis_start).total_seconds() * 1000
         
         if not search_results['success']:
@@ -236,21 +703,26 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         raw_results = search_results['raw_results']
         expansion_debug = search_results.get('expansion_debug', {})  # Get expansion debug info
         
-        # Limit grouped results to requested max_results
-        if len(grouped_results) > max_results:
-            grouped_results = grouped_results[:max_results]
+        next_page = search_results.get('next_page')
         
         # Step 4: Aurora enrichment (if needed)
         # TODO: Implement Aurora enrichment for additional drug details
         
         # Calculate total time
         total_time = (datetime.now() - start_time).total_seconds() * 1000
+        redis_connections = diff_pool_stats(redis_pool_start)
         
         # Calculate costs
         claude_cost = estimate_cost(
             input_tokens=claude_metrics['input_tokens'],
-            output_tokens=claude_metrics['output_tokens']
+            output_tokens=claude_metrics['output_tokens'],
+            model=model_from_id(claude_result.get('model') or ''),
+            cache_read_tokens=claude_metrics.get('cache_read_tokens', 0),
+            cache_write_tokens=claude_metrics.get('cache_write_tokens', 0)
         )
+        cascade = claude_result.get('cascade')
+        # Escalated tiers are billed too
+        llm_cost = cascade['cost_estimate'] if cascade else claude_cost['total']
         
         query_info = {
             'original': query,
@@ -263,6 +735,8 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'merged': merged_filters,
                 'applied': search_results.get('applied_filters')
             },
+            'parse_path': claude_result.get('parse_path'),  # fast_path | cache | llm
+            'spelling_corrections': spelling_corrections,  # Local speller (misspelled → corrected)
             'claude': {
                 'corrections': structured_query.get('corrections', []),
                 'confidence': structured_query.get('confidence'),
@@ -283,9 +757,10 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'body': json.dumps({
                 'success': True,
                 'results': grouped_results,
-                'raw_results': raw_results,
+                'raw_results': [public_document(drug) for drug in raw_results],
                 'total_results': len(grouped_results),
                 'raw_results_count': len(raw_results),
+                'next_cursor': encode_cursor(next_page) if next_page else None,
                 'query_info': query_info,
                 'expansion_debug': expansion_debug,  # Add expansion debug info
                 'message': search_results.get('message'),
@@ -296,17 +771,52 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                         'input_tokens': claude_metrics['input_tokens'],
                         'output_tokens': claude_metrics['output_tokens'],
                         'model': claude_result['model'],
-                        'cost_estimate': claude_cost['total']
+                        'path': claude_result.get('parse_path'),
+                        'cost_estimate': llm_cost,
+                        'cache': claude_result.get('cache'),
+                        'prompt_cache': {
+                            # Bedrock prompt cache (static system prompt prefix); eligible=False
+                            # when no cache point was sent (model without prompt caching,
+                            # or a prefix below the model's minimum cacheable size)
+                            'eligible': claude_metrics.get('prompt_cache_eligible', False),
+                            'read_tokens': claude_metrics.get('cache_read_tokens', 0),
+                            'write_tokens': claude_metrics.get('cache_write_tokens', 0),
+                            'savings': round(claude_cost['cache_savings'], 8)
+                        },
+                        'client_ms': claude_metrics.get('client_ms', 0.0),  # Bedrock client construction (0 when reused)
+                        'time_to_first_field_ms': claude_metrics.get('time_to_first_field_ms'),  # search_text usable
+                        'streaming': streaming,
+                        'cascade': cascade,  # Tier that answered + every attempt (None on fast path / cache hit)
+                        'hedge': claude_result.get('hedge')  # Answering call: hedge sent / winner
                     },
                     'embedding': {
                         'latency_ms': round(embedding_time, 2),  # Titan embedding time (client-side, includes network)
                         'model': embedding_result['model'] if embedding_result else 'N/A',
-                        'dimensions': embedding_result['dimensions'] if embedding_result else 0
+                        'dimensions': embedding_result['dimensions'] if embedding_result else 0,
+                        'cached': embedding_cache_misses == 0 and embedding_cache_hits > 0,  # Every vector came from cache
+                        'cache_hits': embedding_cache_hits,
+                        'cache_misses': embedding_cache_misses,
+                        'bedrock_latency_ms': round(embedding_bedrock_ms, 2),  # Titan time for generated (non-cached) vectors
+                        'client_ms': round(embedding_client_ms, 2),  # Bedrock client construction (0 when reused)
+                        'speculation': speculation
                     },
                     'redis': {
                         'latency_ms': round(redis_time, 2),  # Redis query time (VPC-local, accurate)
-                        'results_count': search_results.get('raw_total', len(raw_results))
-                    }
+                        'results_count': search_results.get('raw_total', len(raw_results)),
+                        'connections_opened': redis_connections['connections_opened'],
+                        'connections_reused': redis_connections['connections_reused'],
+                        'page_fill_rounds': page_fill_rounds
+                    },
+                    'single_flight': {
+                        # Stages this request got from an identical in-flight call
+                        'llm_parse': bool(claude_result.get('coalesced')),
+                        'embeddings': embeddings_coalesced,
+                        'hybrid_search': bool(search_results.get('coalesced')),
+                        'container': get_single_flight_stats()
+                    },
+                    'bedrock_clients': get_client_stats(),  # Container-wide: clients built and time spent
+                    'llm_cascade': get_cascade_stats(),  # Container-wide: answering tiers, escalation reasons
+                    'llm_hedge': get_hedge_stats()  # Container-wide: hedge rate, winners, wasted tokens
                 },
                 'timestamp': datetime.now().isoformat()
             })
@@ -317,19 +827,118 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return error_response(500, f"Internal server error: {str(e)}")
 
 
-def expand_query_with_claude(query: str) -> Dict[str, Any]:
+def parse_query_locally(query: str, redis_client: Any = None) -> Optional[Dict[str, Any]]:
     """
-    Use Claude to parse the query into structured search parameters.
+    Deterministic fast path: resolve NDC and exact drug-name queries without Bedrock.
+    
+    Returns a response shaped like expand_query_with_claude (zero tokens,
+    parse_path='fast_path'), or None when the query needs the LLM.
+    """
+    if not QUERY_FAST_PATH_ENABLED:
+        return None
+    
+    start = datetime.now()
+    try:
+        client = redis_client or get_redis_client()
+        lexicon = get_drug_lexicon(client)
+        structured = classify_query(query, lexicon, speller=get_drug_speller(client, fallback_names=lexicon))
+    except Exception as e:
+        print(f"[WARNING] Local query classifier failed, using Claude: {e}")
+        return None
+    
+    if structured is None:
+        return None
+    
+    latency_ms = round((datetime.now() - start).total_seconds() * 1000, 2)
+    print(f"[SEARCH] Fast path: '{query}' → '{structured['search_text']}' filters={structured['filters']}")
+    
+    return {
+        'success': True,
+        'content': json.dumps(structured),
+        'structured': structured,
+        'model': 'local-lexicon',
+        'metadata': {
+            'input_tokens': 0,
+            'output_tokens': 0,
+            'latency_ms': latency_ms
+        },
+        'latency_ms': latency_ms,
+        'parse_path': 'fast_path'
+    }
+
+
+def correct_query_spelling(query: str, redis_client: Any = None) -> Dict[str, str]:
     """
-    system_prompts, user_messages = build_medical_search_prompts(query)
+    Correct drug-name typos in the query with the in-process speller.
     
-    response = call_claude_converse(
-        messages=user_messages,
-        system_prompts=system_prompts,
-        max_tokens=400,
-        temperature=0.0
+    Returns:
+        {misspelled: corrected} (empty if nothing changed or no vocabulary)
+    """
+    try:
+        client = redis_client or get_redis_client()
+        speller = get_drug_speller(client, fallback_names=get_drug_lexicon(client))
+        if speller is None:
+            return {}
+        corrections = speller.correct_terms(extract_search_terms(query))
+    except Exception as e:
+        print(f"[WARNING] Local spelling correction failed: {e}")
+        return {}
+    
+    if corrections:
+        print(f"[SEARCH] Spelling corrections: {corrections}")
+    return corrections
+
+
+def expand_query_with_claude(
+    query: str,
+    redis_client: Any = None,
+    spelling_hints: Optional[Dict[str, str]] = None,
+    on_fields: Optional[Any] = None,
+    deadline: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Use Claude to parse the query into structured search parameters.
+    
+    Parses are deterministic (temperature=0.0), so they are served from the
+    two-tier query cache when possible; the response carries a 'cache' block
+    (hit, tier, lookup_ms) either way. Local speller corrections are passed
+    to the prompt as hints instead of relying on the model to fix typos.
+    
+    With LLM_STREAMING_ENABLED the reply is streamed and on_fields(fields)
+    is called with the top-level JSON fields completed so far each time one
+    completes (not called on cache hits). metadata.time_to_first_field_ms
+    is the time until search_text was usable. deadline (time.perf_counter())
+    bounds the model cascade; see call_parse_model().
+    """
+    model_id = get_llm_route_id()
+    cached, cache_info = get_cached_parse(
+        query, MEDICAL_SEARCH_PROMPT_VERSION, model_id, redis_client, spelling_hints=spelling_hints
     )
     
+    if cached is not None:
+        # Cache hit: no Bedrock call, so no tokens billed for this request
+        response = dict(cached)
+        response['metadata'] = {
+            **cached.get('metadata', {}),
+            'input_tokens': 0,
+            'output_tokens': 0,
+            'cache_read_tokens': 0,
+            'cache_write_tokens': 0,
+            'latency_ms': cache_info['lookup_ms'],
+            'client_ms': 0.0,
+            'time_to_first_field_ms': cache_info['lookup_ms'],
+        }
+        response['latency_ms'] = cache_info['lookup_ms']
+        response['cache'] = cache_info
+        response['parse_path'] = 'cache'
+        return response
+    
+    system_prompts, user_messages = build_medical_search_prompts(query, spelling_hints=spelling_hints)
+    
+    response = call_parse_model(system_prompts, user_messages, on_fields=on_fields, deadline=deadline)
+    response['cache'] = cache_info
+    response['parse_path'] = 'llm'
+    
     if not response.get('success'):
         return response
     
@@ -357,94 +966,190 @@ def expand_query_with_claude(query: str) -> Dict[str, Any]:
         structured['search_terms'] = extract_search_terms(structured['search_text'])
     
     response['structured'] = structured
+    
+    # Only cache clean parses so a malformed reply is retried next time
+    if 'parse_warning' not in response:
+        store_cached_parse(
+            query,
+            MEDICAL_SEARCH_PROMPT_VERSION,
+            model_id,
+            {key: value for key, value in response.items() if key not in ('cache', 'parse_path', 'cascade', 'hedge')},
+            redis_client,
+            spelling_hints=spelling_hints
+        )
+    
     return response
 
 
-def parse_redis_document(fields: List) -> Dict[str, Any]:
-    """Parse Redis FT.SEARCH result document into a dictionary"""
-    drug: Dict[str, Any] = {}
+def call_parse_model(
+    system_prompts: List[Dict[str, Any]],
+    user_messages: List[Dict[str, Any]],
+    on_fields: Optional[Any] = None,
+    deadline: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Run the parse on the model cascade (or the single configured model).
     
-    for j in range(0, len(fields), 2):
-        if j + 1 >= len(fields):
-            continue
-        field_name = fields[j].decode('utf-8') if isinstance(fields[j], bytes) else fields[j]
-        field_value = fields[j + 1]
-        
-        if isinstance(field_value, bytes):
-            value = field_value.decode('utf-8')
-        else:
-            value = field_value
-        
-        drug[field_name] = value
+    With LLM_STREAMING_ENABLED every tier is streamed and JSON fields are
+    reported to on_fields as they complete (an escalated tier starts over
+    with a fresh parser).
+    
+    The cascade returns by deadline (time.perf_counter(), see
+    parse_deadline()) with its best usable reply or an LLMDeadlineExceeded
+    error. The single-model route is bounded by the Bedrock client's read
+    timeout instead.
+    
+    Returns the LLM result with metadata.time_to_first_field_ms: time until
+    search_text was usable (the whole call when not streaming; None if it
+    never completed).
+    """
+    parsers: Dict[Optional[str], IncrementalObjectParser] = {}
+    start = time.perf_counter()
+    first_field_ms: List[float] = []
+    
+    def on_model_text(model_id: Optional[str], text: str) -> None:
+        parser = parsers.setdefault(model_id, IncrementalObjectParser())
+        if not parser.feed(text):
+            return
+        if not first_field_ms and 'search_text' in parser.fields:
+            first_field_ms.append(round((time.perf_counter() - start) * 1000, 2))
+        if on_fields is not None:
+            on_fields(dict(parser.fields))
     
-    return drug
+    request = {
+        'messages': user_messages,
+        'system_prompts': system_prompts,
+        'max_tokens': 400,
+        'temperature': 0.0
+    }
+    if LLM_CASCADE_CONFIG['enabled']:
+        response = call_llm_cascade(
+            **request, stream=LLM_STREAMING_ENABLED, on_text=on_model_text, deadline=deadline
+        )
+    elif LLM_STREAMING_ENABLED:
+        response = call_claude_converse_stream(**request, on_text=lambda text: on_model_text(None, text))
+    else:
+        response = call_claude_converse(**request)
+    
+    if LLM_STREAMING_ENABLED:
+        response['metadata']['time_to_first_field_ms'] = first_field_ms[0] if first_field_ms else None
+    else:
+        # Nothing is usable before the full reply
+        response['metadata']['time_to_first_field_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    return response
+
+
+def parse_deadline(context: Any) -> float:
+    """
+    Deadline (time.perf_counter()) for this request's LLM parse
+    
+    LLM_CASCADE_CONFIG['budget_ms'] from now, cut short so that
+    LLM_PARSE_RESERVE_MS of the Lambda's remaining time is left for retrieval.
+    """
+    budget_ms = LLM_CASCADE_CONFIG['budget_ms']
+    get_remaining_ms = getattr(context, 'get_remaining_time_in_millis', None)
+    if callable(get_remaining_ms):
+        budget_ms = min(budget_ms, get_remaining_ms() - LLM_PARSE_RESERVE_MS)
+    return time.perf_counter() + max(budget_ms, 0.0) / 1000
+
+
+def lookup_therapeutic_class_map(client: Any, terms: List[str]) -> Dict[str, Optional[List[str]]]:
+    """
+    Therapeutic classes of drug / condition terms from the loader's token map
+    
+    One HMGET on tcmap:<index generation>, so the map always matches the
+    loaded index. Terms the map doesn't know (or every term, when the
+    current generation has no map) come back as None.
+    
+    Returns:
+        {term: [therapeutic_class, ...] or None}
+    """
+    terms = list(dict.fromkeys(term for term in terms if term))
+    if not terms:
+        return {}
+    
+    try:
+        map_key = f"{CLASS_MAP_KEY_PREFIX}{get_index_generation(client)}"
+        values = client.hmget(map_key, [normalize_lexicon_entry(term) for term in terms])
+    except Exception as e:
+        print(f"[WARNING] Therapeutic class map lookup failed: {e}")
+        return {term: None for term in terms}
+    
+    class_map: Dict[str, Optional[List[str]]] = {}
+    for term, value in zip(terms, values):
+        if value is None:
+            class_map[term] = None
+            continue
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        class_map[term] = [tc for tc in value.split(CLASS_MAP_SEPARATOR) if tc]
+    return class_map
 
 
 def redis_filter_only_search(
     claude_terms: List[str],
     filters: Optional[Dict[str, Any]],
-    limit: int = 20
+    limit: int = 20,
+    redis_client: Any = None
 ) -> Dict[str, Any]:
     """
     Execute filter-only search in Redis (no vector search).
     Used for condition searches where Claude expands to drug names.
     
     Strategy:
-    1. Find drugs matching Claude's expanded terms
-    2. Extract their therapeutic classes
+    1. Look up the therapeutic classes of Claude's drug / condition terms in
+       the loader's token map (one HMGET)
+    2. Drug names missing from the map: find sample drugs matching them and
+       take their therapeutic classes (one pipelined round trip)
     3. Return ALL drugs in those therapeutic classes
     
     Much faster than vector search for condition queries!
     """
-    import redis
-    
     try:
-        redis_host = os.environ.get('REDIS_HOST', '10.0.11.153')
-        redis_port = int(os.environ.get('REDIS_PORT', 6379))
-        redis_password = os.environ.get('REDIS_PASSWORD')
+        client = redis_client or get_redis_client()
         
-        if not redis_password:
-            return {
-                'success': False,
-                'error': 'REDIS_PASSWORD environment variable not set'
-            }
-        
-        client = redis.Redis(
-            host=redis_host,
-            port=redis_port,
-            password=redis_password,
-            decode_responses=False
-        )
-        
-        # Step 1: Find sample drugs matching Claude's terms to get therapeutic classes
-        # FILTER OUT condition words - only search for actual drug names
+        # Step 1: Therapeutic classes of Claude's terms. Condition words are
+        # only resolved through the map (sample drugs can't be found by them)
         condition_words = {'cholesterol', 'hyperlipidemia', 'dyslipidemia', 'hypertension', 
                           'diabetes', 'pressure', 'blood', 'high', 'low', 'pain', 'for', 
                           'drugs', 'medication', 'treatment'}
-        drug_name_terms = [term for term in claude_terms if term.lower() not in condition_words]
+        filler_words = {'pressure', 'blood', 'high', 'low', 'for', 'drugs', 'medication', 'treatment'}
+        drug_name_terms = [term for term in claude_terms if term.lower() not in condition_words][:8]  # Up to 8 drug names
+        condition_terms = [
+            term for term in claude_terms
+            if term.lower() in condition_words and term.lower() not in filler_words
+        ]
         
         therapeutic_classes = set()
-        for term in drug_name_terms[:8]:  # Search up to 8 drug names
-            # Search for drugs matching this term
-            sample_query = f"(@drug_name:{term}* | @brand_name:{term}* | @generic_name:{term}*)"
-            
-            results = client.execute_command(
-                'FT.SEARCH', REDIS_INDEX_NAME,
-                sample_query,
-                'RETURN', '2', 'therapeutic_class', 'therapeutic_class',
-                'LIMIT', '0', '10'
-            )
+        class_map = lookup_therapeutic_class_map(client, drug_name_terms + condition_terms)
+        for classes in class_map.values():
+            therapeutic_classes.update(classes or ())
+        mapped_terms = [term for term, classes in class_map.items() if classes is not None]
+        unmapped_terms = [term for term in drug_name_terms if class_map.get(term) is None]
+        
+        if unmapped_terms:
+            pipe = client.pipeline(transaction=False)
+            for term in unmapped_terms:
+                # Search for drugs matching this term
+                sample_query = f"(@drug_name:{term}* | @brand_name:{term}* | @generic_name:{term}*)"
+                pipe.execute_command(
+                    'FT.SEARCH', REDIS_INDEX_NAME,
+                    sample_query,
+                    'RETURN', '1', 'therapeutic_class',
+                    'LIMIT', '0', '10'
+                )
             
-            if len(results) > 1:
-                for i in range(1, len(results), 2):
-                    if i + 1 < len(results):
-                        drug_data = results[i + 1]
-                        if isinstance(drug_data, list):
-                            for j in range(0, len(drug_data), 2):
-                                if drug_data[j] == b'therapeutic_class':
-                                    tc = drug_data[j + 1].decode('utf-8') if isinstance(drug_data[j + 1], bytes) else drug_data[j + 1]
-                                    if tc:
-                                        therapeutic_classes.add(tc)
+            for term, results in zip(unmapped_terms, pipe.execute(raise_on_error=False)):
+                if isinstance(results, Exception):
+                    print(f"[WARNING] Sample search for '{term}' failed: {results}")
+                    continue
+                _, sample_drugs = decode_search_reply(results)
+                for sample_drug in sample_drugs:
+                    tc = sample_drug.get('therapeutic_class')
+                    if tc:
+                        therapeutic_classes.add(tc)
+        print(f"[FILTER-ONLY] Class map resolved {len(mapped_terms)}/{len(class_map)} terms, "
+              f"{len(unmapped_terms)} sampled")
         
         if not therapeutic_classes:
             return {
@@ -459,7 +1164,7 @@ def redis_filter_only_search(
             }
         
         # Step 2: Search for ALL drugs in those therapeutic classes using TAG filter
-        filter_clause, applied_filters = build_filter_clause(filters or {})
+        filter_clause, applied_filters = build_filter_clause(filters or {}, get_index_attributes(client))
         
         # Build TAG query for therapeutic classes
         tc_filter_parts = []
@@ -483,7 +1188,8 @@ def redis_filter_only_search(
             'ndc', 'drug_name', 'brand_name', 'generic_name',
             'is_generic', 'dosage_form', 'dea_schedule', 'gcn_seqno',
             'indication', 'drug_class', 'therapeutic_class', 'manufacturer_name',
-            'indication_key'  # For Option A separate indication store
+            'indication_key',  # For Option A separate indication store
+            'family_key', 'family_display_name', 'strength_label'  # Precomputed by the loader
         ]
         
         return_clause = []
@@ -499,21 +1205,13 @@ def redis_filter_only_search(
             'DIALECT', '2'
         )
         
-        total_results = results[0] if len(results) > 0 else 0
-        drugs = []
+        total_results, drugs = decode_search_reply(results)
         
-        for i in range(1, len(results), 2):
-            if i + 1 >= len(results):
-                break
-            
-            doc_data = results[i + 1]
-            drug = parse_redis_document(doc_data)
-            
+        for drug in drugs:
             # No similarity score for filter-only searches
             drug['similarity_score'] = None
             drug['similarity_score_pct'] = None
             drug['search_method'] = 'filter'  # Mark as filter-based
-            drugs.append(drug)
         
         # Group results
         grouped_results = group_search_results(
@@ -532,6 +1230,10 @@ def redis_filter_only_search(
             'applied_filters': applied_filters,
             'text_terms': claude_terms,
             'redis_query': f"Filter by therapeutic classes: {len(therapeutic_classes)} found",
+            'class_map': {
+                'mapped_terms': mapped_terms,
+                'sampled_terms': unmapped_terms
+            },
             'message': None
         }
         
@@ -549,7 +1251,11 @@ def redis_hybrid_search(
     original_terms: Optional[List[str]],
     claude_terms: Optional[List[str]],
     filters: Optional[Dict[str, Any]],
-    limit: int = 20
+    limit: int = 20,
+    redis_client: Any = None,
+    grouping_engine: str = 'python',
+    page: Optional[Dict[str, Any]] = None,
+    max_groups: Optional[int] = None
 ) -> Dict[str, Any]:
     """
     Execute hybrid search in Redis (vector + filters + lexical gating).
@@ -557,86 +1263,45 @@ def redis_hybrid_search(
     Args:
         original_terms: User's actual query terms (for exact match detection)
         claude_terms: Claude's corrected/expanded terms (for therapeutic class filtering)
+        limit: KNN candidates (expansions read 2x); with page, the page size -
+            each stream reads one window of `limit` documents
+        redis_client: Shared pooled client (defaults to get_redis_client())
+        grouping_engine: 'python' or 'aggregate' (therapeutic_class expansion
+            grouped by FT.AGGREGATE; falls back to 'python' when the index or
+            active post-filters don't allow it). Groups are identical either
+            way; 'aggregate' leaves those documents out of raw_results.
+        page: Page state (functions.src.pagination). When given, returns at
+            most max_groups (default `limit`) groups, each with all of its
+            variants, plus next_page - the state for the following page
+            (None on the last page).
     """
-    import redis
     import numpy as np
     
     try:
-        redis_host = os.environ.get('REDIS_HOST', '10.0.11.153')
-        redis_port = int(os.environ.get('REDIS_PORT', 6379))
-        redis_password = os.environ.get('REDIS_PASSWORD')
-        
-        if not redis_password:
-            return {
-                'success': False,
-                'error': 'REDIS_PASSWORD environment variable not set'
-            }
-        
-        client = redis.Redis(
-            host=redis_host,
-            port=redis_port,
-            password=redis_password,
-            decode_responses=False
-        )
+        client = redis_client or get_redis_client()
         
         # Normalize both original and claude terms
         _, normalized_original = build_text_clause(original_terms or [])
         _, normalized_claude = build_text_clause(claude_terms or [])
-        filter_clause, applied_filters = build_filter_clause(filters or {})
+        filter_clause, applied_filters = build_filter_clause(filters or {}, get_index_attributes(client))
         
         # Build lexical filter for exact matches (CRITICAL FIX for crestor → cortisone bug)
         # This ensures drugs matching the search term lexically are always included
         # CRITICAL: Exclude dosage form terms - they should only match via dosage_form TAG field
-        DOSAGE_FORM_TERMS = {
-            'cream', 'gel', 'tablet', 'capsule', 'injection', 'liquid', 'solution',
-            'powder', 'patch', 'spray', 'inhaler', 'vial', 'ampule', 'suppository',
-            'lotion', 'ointment', 'drops', 'syrup', 'suspension', 'pellet',
-            'syringe', 'cartridge', 'injectable'  # Additional injectable terms
-        }
+        # NOTE: DOSAGE_FORM_TERMS, UNIT_TERMS and the strength patterns live in
+        # drug_lexicon (shared with the local query classifier)
         
-        # Extract strength filter from Claude (prioritize Claude's extraction)
-        import re
-        strength_pattern = re.compile(r'(\d+(?:\.\d+)?)\s*(mg|mcg|g|ml|%|unit)', re.IGNORECASE)
-        unitless_number_pattern = re.compile(r'\b(\d+(?:\.\d+)?)\b')
-        strength_values = []  # Store original (number, unit) pairs for post-filter
+        # Extract strength filter from Claude (prioritize Claude's extraction);
+        # original (number, unit) pairs, also used by the post-filter
+        strength_values = parse_strength_filter(filters)
         drug_name_terms = []
         
-        # Get strength from Claude's filters
-        strength = filters.get('strength') if filters else None
-        if strength:
-            # Parse Claude's strength format (e.g., "200mg", "10 mg", "0.5%")
-            strength_str = str(strength).strip()
-            strength_match = strength_pattern.search(strength_str)
-            if strength_match:
-                number = strength_match.group(1)
-                unit = strength_match.group(2).upper()
-                
-                # Store original values for post-filter ONLY
-                # Don't use strength in lexical filter because:
-                # 1. Wildcards don't handle spaces well ("*2.5*MG*" won't match "2.5 MG")
-                # 2. Decimals with periods cause Redis query syntax issues
-                # 3. Post-filter regex handles all edge cases correctly
-                strength_values.append((number, unit))
-                print(f"[SEARCH] Will post-filter by strength: {number} {unit}")
-            else:
-                # Claude extracted a number without a unit (e.g., "12.5")
-                # This happens when drug name is misspelled and Claude lacks context
-                # Check if it's a valid number that could be a strength
-                try:
-                    num_value = float(strength_str)
-                    if 0.001 <= num_value <= 10000:
-                        # Treat as unitless strength
-                        strength_values.append((strength_str, None))
-                        print(f"[SEARCH] Will post-filter by unitless strength: {strength_str} (Claude extracted without unit)")
-                except ValueError:
-                    pass
-        
         # FALLBACK: If Claude didn't extract strength, check for unitless numbers in original query
         # e.g., "testosterone 12.5" → match any unit (12.5 MG, 12.5%, etc.)
         if not strength_values and normalized_original:
             for term in normalized_original:
                 # Check if this is a decimal/number that could be a strength
-                if unitless_number_pattern.fullmatch(term):
+                if UNITLESS_NUMBER_PATTERN.fullmatch(term):
                     # Only consider it if it looks like a reasonable strength value
                     # (between 0.001 and 10000, to avoid matching years, counts, etc.)
                     try:
@@ -648,6 +1313,14 @@ def redis_hybrid_search(
                     except ValueError:
                         pass
         
+        strength_clause, strength_query_tokens = build_strength_clause(strength_values, get_index_attributes(client))
+        strength_prefilter = strength_clause is not None
+        if strength_prefilter:
+            # Same clause gates the KNN prefilter and both expansion queries
+            filter_clause = f"{filter_clause} {strength_clause}" if filter_clause else strength_clause
+            applied_filters['strength_tokens'] = strength_query_tokens
+            print(f"[SEARCH] Strength prefilter: {strength_clause}")
+        
         # Process normalized terms for drug names (skip dosage form terms and unit terms)
         if normalized_original:
             for term in normalized_original:
@@ -659,11 +1332,11 @@ def redis_hybrid_search(
                     continue
                 
                 # Skip unit-only terms (mg, mcg, etc.)
-                if term.lower() in ['mg', 'mcg', 'g', 'ml', 'unit', 'units', '%']:
+                if term.lower() in UNIT_TERMS:
                     continue
                 
                 # Skip pure numbers (they're likely part of strength)
-                if term.isdigit():
+                if UNITLESS_NUMBER_PATTERN.fullmatch(term):
                     continue
                 
                 # This is a drug name term - save it
@@ -687,8 +1360,8 @@ def redis_hybrid_search(
             drug_name_clause = '(' + ' | '.join(drug_name_clause_parts) + ')'
             lexical_parts.append(drug_name_clause)
         
-        # NOTE: Strength filtering is done in post-filter only (after expansions)
-        # Not in lexical filter because wildcards don't handle spaces/decimals well
+        # NOTE: Strength is matched on the strength_tokens TAG field (in filter_clause
+        # when the index has it), never lexically: wildcards don't handle spaces/decimals
         
         # Combine filters
         filter_parts = []
@@ -712,7 +1385,11 @@ def redis_hybrid_search(
             # No filters: match all
             filter_str = "*"
         
-        query = f"{filter_str}=>[KNN {limit} @embedding $vec AS score]"
+        # Paged: this page's KNN window is [knn_offset, knn_k) of the top-k by score
+        knn_offset = page['offsets']['knn'] if page else 0
+        knn_k = min(knn_offset + limit, SEARCH_MAX_KNN_CANDIDATES) if page else limit
+        knn_window = knn_k - knn_offset
+        query = f"{filter_str}=>[KNN {knn_k} @embedding $vec AS score]"
         
         embedding_bytes = np.array(embedding, dtype=np.float32).tobytes()
         
@@ -720,67 +1397,39 @@ def redis_hybrid_search(
             'ndc', 'drug_name', 'brand_name', 'generic_name',
             'is_generic', 'dosage_form', 'dea_schedule', 'gcn_seqno',
             'indication', 'drug_class', 'therapeutic_class', 'manufacturer_name', 'score',
-            'indication_key'  # For Option A separate indication store
+            'indication_key',  # For Option A separate indication store
+            'family_key', 'family_display_name', 'strength_label'  # Precomputed by the loader
         ]
+        if strength_prefilter:
+            return_fields.append('strength_tokens')  # Checked in-process by the sets engine
         
         return_clause: List[str] = []
         for field in return_fields:
             return_clause.extend([field, field])
         
-        results = client.execute_command(
-            'FT.SEARCH', REDIS_INDEX_NAME,
-            query,
-            'PARAMS', '2', 'vec', embedding_bytes,
-            'RETURN', str(len(return_clause)), *return_clause,
-            'SORTBY', 'score', 'ASC',
-            'LIMIT', '0', str(limit),
-            'DIALECT', '2'
-        )
-        
-        total_results = results[0]
-        drugs: List[Dict[str, Any]] = []
-        
-        for i in range(1, len(results), 2):
-            if i + 1 >= len(results):
-                break
-            fields = results[i + 1]
-            drug: Dict[str, Any] = {}
-            
-            for j in range(0, len(fields), 2):
-                if j + 1 >= len(fields):
-                    continue
-                field_name = fields[j].decode('utf-8')
-                field_value = fields[j + 1]
-                
-                if isinstance(field_value, bytes):
-                    value = field_value.decode('utf-8')
-                else:
-                    value = field_value
-                
-                drug[field_name] = value
-            
-            raw_score = drug.pop('score', None)
-            if isinstance(raw_score, bytes):
-                raw_score = raw_score.decode('utf-8')
-            
-            similarity = None
-            if raw_score is not None:
-                try:
-                    distance = float(raw_score)
-                    similarity = max(0.0, min(1.0, 1.0 - distance))
-                except (ValueError, TypeError):
-                    similarity = None
-            
-            if similarity is not None:
-                drug['similarity_score'] = similarity
-                drug['similarity_score_pct'] = round(similarity * 100, 2)
-            else:
-                drug['similarity_score'] = None
-                drug['similarity_score_pct'] = None
-            
-            drug['search_method'] = 'vector'  # Mark as vector-based
-            
-            drugs.append(drug)
+        if knn_window > 0 and not (page and 'knn' in page['exhausted']):
+            results = client.execute_command(
+                'FT.SEARCH', REDIS_INDEX_NAME,
+                query,
+                'PARAMS', '2', 'vec', embedding_bytes,
+                'RETURN', str(len(return_clause)), *return_clause,
+                'SORTBY', 'score', 'ASC',
+                'LIMIT', str(knn_offset), str(knn_window),
+                'DIALECT', '2'
+            )
+            total_results, drugs = decode_search_reply(results)
+        else:
+            total_results, drugs = 0, []
+        score_vector_results(drugs)
+        
+        # Stream position of every document this page read (ndc -> position)
+        positions: Dict[str, int] = {drug.get('ndc'): position for position, drug in enumerate(drugs, knn_offset)}
+        stream_windows: Dict[str, Dict[str, Any]] = {
+            'knn': {
+                'window_end': knn_offset + len(drugs),
+                'exhausted': len(drugs) < knn_window or knn_k >= SEARCH_MAX_KNN_CANDIDATES
+            }
+        }
         
         # CRITICAL FIX: If we found exact matches, expand by BOTH:
         # 1. drug_class (pharmacologic equivalents - same ingredient)
@@ -795,16 +1444,11 @@ def redis_hybrid_search(
             'initial_drug_count': len(drugs)
         }
         
+        exact_matcher = get_term_matcher(original_terms)
         for drug in drugs:
             # Check if this is an exact match
-            corpus = " ".join([
-                str(drug.get('drug_name', '')).lower(),
-                str(drug.get('brand_name', '')).lower(),
-                str(drug.get('generic_name', '')).lower()
-            ])
-            
             # Check against original terms
-            is_exact = any(term and term.lower() in corpus for term in (original_terms or []))
+            is_exact = exact_matcher.matches(document_corpus(drug))
             
             if is_exact:
                 dc = drug.get('drug_class', '').strip()
@@ -814,85 +1458,18 @@ def redis_hybrid_search(
                 if tc:
                     therapeutic_classes_to_expand.add(tc)
         
+        # Later pages expand the classes found by the first page
+        if page and page.get('classes') is not None:
+            drug_classes_to_expand = set(page['classes']['drug_class'])
+            therapeutic_classes_to_expand = set(page['classes']['therapeutic_class'])
+        
         # Update debug info (will be updated later with filtered therapeutic classes)
         expansion_debug['drug_classes_found'] = list(drug_classes_to_expand)
         expansion_debug['therapeutic_classes_found_raw'] = list(therapeutic_classes_to_expand)
         
-        # STEP 1: Expand by drug_class (pharmacologic equivalents)
-        if drug_classes_to_expand:
-            print(f"[SEARCH] Found {len(drug_classes_to_expand)} drug classes to expand")
-            
-            # Build TEXT filter query for drug classes (drug_class is TEXT field in production)
-            dc_filter_parts = []
-            for dc in drug_classes_to_expand:
-                # For TEXT fields, wrap in quotes and escape internal quotes
-                dc_quoted = f'"{dc}"'
-                dc_filter_parts.append(dc_quoted)
-            
-            # drug_class is a TEXT field in production, use TEXT syntax
-            tc_query = f"@drug_class:({' | '.join(dc_filter_parts)})"
-            
-            # Add any existing filters
-            if filter_clause:
-                tc_query = f"({filter_clause}) {tc_query}"
-            
-            print(f"[SEARCH] Expanding with drug_class query: {tc_query}")
-            
-            # Execute drug_class expansion query
-            dc_results = client.execute_command(
-                'FT.SEARCH', REDIS_INDEX_NAME,
-                tc_query,
-                'RETURN', str(len(return_clause)), *return_clause,
-                'LIMIT', '0', str(limit * 2),  # Get more alternatives
-                'DIALECT', '2'
-            )
-            
-            # Parse additional results
-            existing_ndcs = {d.get('ndc') for d in drugs}
-            
-            for i in range(1, len(dc_results), 2):
-                if i + 1 >= len(dc_results):
-                    break
-                fields = dc_results[i + 1]
-                drug: Dict[str, Any] = {}
-                
-                for j in range(0, len(fields), 2):
-                    if j + 1 >= len(fields):
-                        continue
-                    field_name = fields[j].decode('utf-8')
-                    field_value = fields[j + 1]
-                    
-                    if isinstance(field_value, bytes):
-                        value = field_value.decode('utf-8')
-                    else:
-                        value = field_value
-                    
-                    drug[field_name] = value
-                
-                # Skip if already in results
-                if drug.get('ndc') in existing_ndcs:
-                    continue
-                
-                # Mark as drug_class filter (pharmacologic equivalent)
-                drug['similarity_score'] = None
-                drug['similarity_score_pct'] = None
-                drug['search_method'] = 'drug_class_filter'
-                
-                drugs.append(drug)
-                existing_ndcs.add(drug.get('ndc'))
-            
-            print(f"[SEARCH] Total drugs after drug_class expansion: {len(drugs)}")
-        
-        # STEP 2: Expand by therapeutic_class (therapeutic alternatives)
+        # STEP 1 + 2: Expand by drug_class (pharmacologic equivalents) and
+        # therapeutic_class (therapeutic alternatives) in one pipelined round trip
         # CRITICAL: Filter out meaningless therapeutic classes
-        THERAPEUTIC_CLASS_BLACKLIST = {
-            'Bulk Chemicals',           # Too broad - groups unrelated drugs
-            'Miscellaneous',            # Too vague
-            'Uncategorized',            # No clinical meaning
-            'Not Specified',            # No clinical meaning
-        }
-        
-        # Remove blacklisted classes
         therapeutic_classes_filtered = {
             tc for tc in therapeutic_classes_to_expand 
             if tc not in THERAPEUTIC_CLASS_BLACKLIST
@@ -903,139 +1480,169 @@ def redis_hybrid_search(
             print(f"[SEARCH] Filtered out blacklisted therapeutic classes: {blacklisted}")
         
         expansion_debug['therapeutic_classes_found_filtered'] = list(therapeutic_classes_filtered)
+        if page and page.get('classes') is None:
+            page = {**page, 'classes': {
+                'drug_class': sorted(drug_classes_to_expand),
+                'therapeutic_class': sorted(therapeutic_classes_filtered)
+            }}
+        
+        # Class streams this request reads (paged: not yet exhausted)
+        expand_drug_classes = drug_classes_to_expand
+        expand_therapeutic_classes = therapeutic_classes_filtered
+        if page:
+            if 'drug_class' in page['exhausted']:
+                expand_drug_classes = set()
+            if 'therapeutic_class' in page['exhausted']:
+                expand_therapeutic_classes = set()
         
+        if drug_classes_to_expand:
+            print(f"[SEARCH] Found {len(drug_classes_to_expand)} drug classes to expand")
         if therapeutic_classes_filtered:
             print(f"[SEARCH] Found {len(therapeutic_classes_filtered)} valid therapeutic classes to expand")
-            
-            # Build TAG filter query for therapeutic classes
-            tc_filter_parts = []
-            for tc in therapeutic_classes_filtered:
-                # Escape special characters for Redis TAG syntax
-                tc_escaped = tc.replace(' ', '\\ ').replace('-', '\\-').replace('(', '\\(').replace(')', '\\)')
-                tc_filter_parts.append(tc_escaped)
-            
-            tc_query = f"@therapeutic_class:{{{' | '.join(tc_filter_parts)}}}"
-            
-            # Add any existing filters
-            if filter_clause:
-                tc_query = f"({filter_clause}) {tc_query}"
-            
-            print(f"[SEARCH] Expanding with therapeutic_class query: {tc_query}")
-            
-            # Execute therapeutic_class expansion query
-            tc_results = client.execute_command(
-                'FT.SEARCH', REDIS_INDEX_NAME,
-                tc_query,
-                'RETURN', str(len(return_clause)), *return_clause,
-                'LIMIT', '0', str(limit * 2),  # Get therapeutic alternatives
-                'DIALECT', '2'
+        
+        # Server-side grouping needs the loader's family fields, and no Python
+        # post-filter left to apply to the expansion documents
+        index_attributes = get_index_attributes(client)
+        use_aggregate = (
+            grouping_engine == 'aggregate'
+            and EXPANSION_ENGINE == 'search'
+            and 'family_key' in index_attributes
+            and COMPOUNDING_BASE_FIELD in index_attributes
+            and (not strength_values or strength_prefilter)
+        )
+        expansion_debug['grouping_engine'] = 'aggregate' if use_aggregate else 'python'
+        
+        # Paged: one window per class stream; otherwise get more alternatives
+        expansion_limit = limit if page else limit * 2
+        expansion_offsets = page['offsets'] if page else None
+        existing_ndcs = {d.get('ndc') for d in drugs}
+        expansion_drugs, expansion_debug['expansion_queries'] = run_class_expansion(
+            client,
+            drug_classes=expand_drug_classes,
+            therapeutic_classes=set() if use_aggregate else expand_therapeutic_classes,
+            filter_clause=filter_clause,
+            applied_filters=applied_filters,
+            return_clause=return_clause,
+            limit=expansion_limit,
+            existing_ndcs=existing_ndcs,
+            offsets=expansion_offsets,
+            positions=positions
+        )
+        drugs.extend(expansion_drugs)
+        
+        # Family-grouped therapeutic alternatives (not part of raw_results)
+        aggregated_drugs: List[Dict[str, Any]] = []
+        if use_aggregate and expand_therapeutic_classes:
+            aggregated_drugs, aggregate_debug = aggregate_therapeutic_class_families(
+                client,
+                therapeutic_classes=expand_therapeutic_classes,
+                filter_clause=filter_clause,
+                limit=expansion_limit,
+                existing_ndcs=existing_ndcs,
+                offset=expansion_offsets['therapeutic_class'] if page else 0,
+                positions=positions
             )
-            
-            # Parse additional results
-            existing_ndcs = {d.get('ndc') for d in drugs}
-            
-            for i in range(1, len(tc_results), 2):
-                if i + 1 >= len(tc_results):
-                    break
-                fields = tc_results[i + 1]
-                drug: Dict[str, Any] = {}
-                
-                for j in range(0, len(fields), 2):
-                    if j + 1 >= len(fields):
-                        continue
-                    field_name = fields[j].decode('utf-8')
-                    field_value = fields[j + 1]
-                    
-                    if isinstance(field_value, bytes):
-                        value = field_value.decode('utf-8')
-                    else:
-                        value = field_value
-                    
-                    drug[field_name] = value
-                
-                # Skip if already in results
-                if drug.get('ndc') in existing_ndcs:
-                    continue
-                
-                # Mark as therapeutic_class filter (therapeutic alternative)
-                drug['similarity_score'] = None
-                drug['similarity_score_pct'] = None
-                drug['search_method'] = 'therapeutic_class_filter'
-                
-                drugs.append(drug)
-                existing_ndcs.add(drug.get('ndc'))
-            
-            print(f"[SEARCH] Total drugs after therapeutic_class expansion: {len(drugs)}")
+            expansion_debug['expansion_queries']['therapeutic_class'] = aggregate_debug
+        
+        for stream in ('drug_class', 'therapeutic_class'):
+            query_debug = expansion_debug['expansion_queries'].get(stream)
+            if query_debug:
+                stream_windows[stream] = {
+                    'window_end': query_debug['window_end'],
+                    'exhausted': query_debug['exhausted']
+                }
+            elif page:
+                # Nothing to expand (no classes, or read to the end)
+                stream_windows[stream] = {'window_end': page['offsets'][stream], 'exhausted': True}
+        
+        # Paged: families returned by earlier pages are not repeated
+        if page and page['families']:
+            seen_families = set(page['families'])
+            drugs = [drug for drug in drugs if document_family_key(drug) not in seen_families]
+            aggregated_drugs = [drug for drug in aggregated_drugs if document_family_key(drug) not in seen_families]
+        
+        if drug_classes_to_expand or therapeutic_classes_filtered:
+            print(f"[SEARCH] Total drugs after class expansion: {len(drugs)}")
         
         # POST-FILTER: Apply strength filter to all results (after expansions)
-        # If user specified a strength (e.g., "200mg"), filter out drugs that don't have that strength
+        # With the prefilter every document already matches; without it (older
+        # index) this is the only strength filter. Combination products match
+        # on any component ("50-12.5 MG" matches 12.5 MG).
         if strength_values:
-            print(f"[SEARCH] Applying post-expansion strength filter: {len(strength_values)} patterns")
-            
-            # Build regex patterns from original (number, unit) pairs
-            strength_patterns = []
-            for number, unit in strength_values:
-                if unit is None:
-                    # Unitless strength (e.g., "12.5") - match any unit
-                    # CRITICAL: Use negative lookbehind/lookahead to prevent matching inside larger numbers
-                    # Match: "12.5 MG" ✓, but NOT "112.5 MG" ✗
-                    # Pattern: (?<!\d)12\.5(?!\d)\s*[A-Z%]
-                    strength_patterns.append(re.compile(rf'(?<!\d){re.escape(number)}(?!\d)\s*[A-Z%]', re.IGNORECASE))
+            wanted_tokens = set(strength_query_tokens)
+            filtered_drugs = []
+            for drug in drugs:
+                indexed_tokens = drug.get('strength_tokens')
+                if indexed_tokens:
+                    drug_tokens = set(indexed_tokens.split(','))
                 else:
-                    # Specific unit (e.g., "12.5 mg") - match that unit only
-                    # Match: "12.5 MG", "12.5MG", "12.5 MG/ML", etc.
-                    # Also use negative lookbehind/lookahead for consistency
-                    strength_patterns.append(re.compile(rf'(?<!\d){re.escape(number)}(?!\d)\s*{re.escape(unit)}', re.IGNORECASE))
-            
-            if strength_patterns:
-                filtered_drugs = []
-                for drug in drugs:
-                    drug_name = str(drug.get('drug_name', '')).upper()
-                    # Keep drug if its name matches ANY of the strength patterns
-                    if any(pattern.search(drug_name) for pattern in strength_patterns):
-                        filtered_drugs.append(drug)
-                
-                print(f"[SEARCH] Strength post-filter: {len(drugs)} → {len(filtered_drugs)} drugs")
-                drugs = filtered_drugs
-        
-        # POST-FILTER: Remove generic compounding bases and formulation components
-        # These are not prescribable drugs, they're ingredients/bases for compounding
-        generic_base_patterns = [
-            r'BASE[_\s]*NO\.',        # GEL_BASE_NO.30, CREAM_BASE_NO.52, etc. (with _ or space)
-            r'^MENTHOL$',             # Pure menthol (not menthol combinations)
-            r'^CAMPHOR$',             # Pure camphor
-            r'^GELFILM$',             # Generic gel film
-            r'^POLYDIMETHYLSILOXANES$',  # Generic silicone base
-            r'DIAPER.*DISPOSABLE',    # Medical supplies, not drugs
-            r'^HYPROMELLOSE$',        # Generic cellulose derivative (binder/filler)
-            r'VEHICLE[_\s]',          # VEHICLE_CREAM_BASE, VEHICLE_GEL, etc.
-        ]
-        
-        filtered_drugs = []
-        for drug in drugs:
-            drug_class = str(drug.get('drug_class', '')).upper()
-            drug_name = str(drug.get('drug_name', '')).upper()
-            
-            # Skip if this is a generic base/formulation component
-            is_generic_base = any(
-                re.search(pattern, drug_class) or re.search(pattern, drug_name)
-                for pattern in generic_base_patterns
-            )
-            
-            if not is_generic_base:
-                filtered_drugs.append(drug)
-        
-        if len(filtered_drugs) < len(drugs):
-            print(f"[SEARCH] Filtered out generic bases: {len(drugs)} → {len(filtered_drugs)} drugs")
+                    drug_tokens = set(strength_tokens(parse_strength_components(drug.get('drug_name', ''))))
+                # Keep drug if it has ANY of the requested strengths
+                if wanted_tokens & drug_tokens:
+                    filtered_drugs.append(drug)
+            
+            expansion_debug['strength_filter'] = {
+                'tokens': strength_query_tokens,
+                'prefilter': strength_prefilter,
+                'fetched': len(drugs),  # Documents read from Redis (KNN + expansions)
+                'returned': len(filtered_drugs)  # Documents left after the post-filter
+            }
+            print(f"[SEARCH] Strength post-filter: {len(drugs)} → {len(filtered_drugs)} drugs "
+                  f"(prefilter={'on' if strength_prefilter else 'off'})")
             drugs = filtered_drugs
         
+        # POST-FILTER (older indexes only): remove compounding bases and
+        # formulation components; indexes with is_compounding_base exclude
+        # them in the queries themselves (see build_filter_clause)
+        if COMPOUNDING_BASE_FIELD not in get_index_attributes(client):
+            filtered_drugs = [
+                drug for drug in drugs
+                if not is_compounding_base(drug.get('drug_class'), drug.get('drug_name'))
+            ]
+            if len(filtered_drugs) < len(drugs):
+                print(f"[SEARCH] Filtered out generic bases: {len(drugs)} → {len(filtered_drugs)} drugs")
+                drugs = filtered_drugs
+        
         grouped_results = group_search_results(
-            drugs=drugs,
+            drugs=drugs + aggregated_drugs,
             original_terms=normalized_original,  # For exact match detection
             claude_terms=normalized_claude,      # For therapeutic class filtering
             redis_client=client,  # For fetching indications
             filters=filters or {}
         )
+        next_page = None
+        if page:
+            grouped_results, next_page = build_next_page(
+                page, grouped_results, drugs + aggregated_drugs, positions, stream_windows, max_groups or limit
+            )
+            page_families = {group['group_id'] for group in grouped_results}
+            drugs = [drug for drug in drugs if document_family_key(drug) in page_families]
+            aggregated_drugs = [drug for drug in aggregated_drugs if document_family_key(drug) in page_families]
+            
+            # A family is returned once, so it must carry every variant now -
+            # including those later stream windows would have read
+            family_variants = fetch_family_variants(
+                client, page_families, filter_clause, return_clause,
+                {drug.get('ndc') for drug in drugs + aggregated_drugs}
+            )
+            if family_variants:
+                # Variants go last so each group keeps the match type and
+                # attribution of the document build_next_page grouped it by
+                grouped_results = group_search_results(
+                    drugs=drugs + aggregated_drugs + family_variants,
+                    original_terms=normalized_original,
+                    claude_terms=normalized_claude,
+                    redis_client=client,
+                    filters=filters or {}
+                )
+                drugs = drugs + family_variants
+            expansion_debug['pagination'] = {
+                'offsets': page['offsets'],
+                'next_offsets': next_page['offsets'] if next_page else None,
+                'knn_k': knn_k,
+                'family_variants_added': len(family_variants)
+            }
+        
         message = None
         if not grouped_results:
             message = "No results found for the provided criteria."
@@ -1057,6 +1664,7 @@ def redis_hybrid_search(
             'text_terms': normalized_original,  # Show original terms
             'redis_query': query,
             'message': message,
+            'next_page': next_page,
             'expansion_debug': expansion_debug  # Add debug info
         }
     
@@ -1070,137 +1678,134 @@ def redis_hybrid_search(
         }
 
 
+def build_vector_only_command(
+    embedding: List[float],
+    original_terms: Optional[List[str]],
+    filters: Optional[Dict[str, Any]],
+    limit: int = 20,
+    index_attributes: frozenset = frozenset()
+) -> List[Any]:
+    """
+    Build the FT.SEARCH command for a vector-only KNN query (NO expansion).
+    Shared by the single-query and pipelined batch code paths.
+    """
+    import numpy as np
+    
+    # Build filter clause (plus the strength prefilter, as in redis_hybrid_search)
+    filter_clause, _ = build_filter_clause(filters or {}, index_attributes)
+    strength_clause, _ = build_strength_clause(parse_strength_filter(filters), index_attributes)
+    if strength_clause:
+        filter_clause = f"{filter_clause} {strength_clause}" if filter_clause else strength_clause
+    _, normalized_terms = build_text_clause(original_terms or [])
+    
+    # Build lexical filter for drug names
+    lexical_parts = []
+    drug_name_clause_parts = []
+    
+    for term in normalized_terms:
+        if not term or len(term) <= 2:
+            continue
+        drug_name_clause_parts.append(f"@drug_name:{term}*")
+        drug_name_clause_parts.append(f"@brand_name:{term}*")
+        drug_name_clause_parts.append(f"@generic_name:{term}*")
+    
+    if drug_name_clause_parts:
+        drug_name_clause = '(' + ' | '.join(drug_name_clause_parts) + ')'
+        lexical_parts.append(drug_name_clause)
+    
+    # Combine filters
+    filter_parts = []
+    if filter_clause:
+        filter_parts.append(filter_clause)
+    if lexical_parts:
+        filter_parts.extend(lexical_parts)
+    
+    if len(filter_parts) > 1:
+        filter_str = '(' + ' '.join(filter_parts) + ')'
+    elif len(filter_parts) == 1:
+        filter_str = filter_parts[0]
+    else:
+        filter_str = "*"
+    
+    query = f"{filter_str}=>[KNN {limit} @embedding $vec AS score]"
+    embedding_bytes = np.array(embedding, dtype=np.float32).tobytes()
+    
+    return_fields = [
+        'ndc', 'drug_name', 'brand_name', 'generic_name',
+        'is_generic', 'dosage_form', 'dea_schedule', 'gcn_seqno',
+        'indication', 'drug_class', 'therapeutic_class', 'manufacturer_name', 'score',
+        'indication_key',
+        'family_key', 'family_display_name', 'strength_label'  # Precomputed by the loader
+    ]
+    
+    return_clause: List[str] = []
+    for field in return_fields:
+        return_clause.extend([field, field])
+    
+    return [
+        'FT.SEARCH', REDIS_INDEX_NAME,
+        query,
+        'PARAMS', '2', 'vec', embedding_bytes,
+        'RETURN', str(len(return_clause)), *return_clause,
+        'SORTBY', 'score', 'ASC',
+        'LIMIT', '0', str(limit),
+        'DIALECT', '2'
+    ]
+
+
+def parse_vector_search_results(results: List[Any]) -> List[Dict[str, Any]]:
+    """Parse a KNN FT.SEARCH reply into drug dicts with similarity scores"""
+    _, drugs = decode_search_reply(results)
+    return score_vector_results(drugs)
+
+
+def score_vector_results(drugs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Convert each decoded KNN result's cosine distance ('score') into similarity fields (in place)"""
+    for drug in drugs:
+        raw_score = drug.pop('score', None)
+        
+        similarity = None
+        if raw_score is not None:
+            try:
+                distance = float(raw_score)
+                similarity = max(0.0, min(1.0, 1.0 - distance))
+            except (ValueError, TypeError):
+                similarity = None
+        
+        if similarity is not None:
+            drug['similarity_score'] = similarity
+            drug['similarity_score_pct'] = round(similarity * 100, 2)
+        else:
+            drug['similarity_score'] = None
+            drug['similarity_score_pct'] = None
+        
+        drug['search_method'] = 'vector'
+    
+    return drugs
+
+
 def redis_vector_only_search(
     embedding: List[float],
     original_terms: Optional[List[str]],
     filters: Optional[Dict[str, Any]],
-    limit: int = 20
+    limit: int = 20,
+    redis_client: Any = None
 ) -> Dict[str, Any]:
     """
     Execute vector-only search in Redis (NO expansion).
     Returns just the KNN vector search results.
     """
-    import redis
-    import numpy as np
-    
     try:
-        redis_host = os.environ.get('REDIS_HOST', '10.0.11.153')
-        redis_port = int(os.environ.get('REDIS_PORT', 6379))
-        redis_password = os.environ.get('REDIS_PASSWORD')
-        
-        if not redis_password:
-            return {'success': False, 'error': 'REDIS_PASSWORD not set', 'raw_results': []}
-        
-        client = redis.Redis(
-            host=redis_host,
-            port=redis_port,
-            password=redis_password,
-            decode_responses=False
-        )
-        
-        # Build filter clause
-        filter_clause, applied_filters = build_filter_clause(filters or {})
-        _, normalized_terms = build_text_clause(original_terms or [])
+        client = redis_client or get_redis_client()
         
-        # Build lexical filter for drug names
-        lexical_parts = []
-        drug_name_clause_parts = []
-        
-        for term in normalized_terms:
-            if not term or len(term) <= 2:
-                continue
-            drug_name_clause_parts.append(f"@drug_name:{term}*")
-            drug_name_clause_parts.append(f"@brand_name:{term}*")
-            drug_name_clause_parts.append(f"@generic_name:{term}*")
-        
-        if drug_name_clause_parts:
-            drug_name_clause = '(' + ' | '.join(drug_name_clause_parts) + ')'
-            lexical_parts.append(drug_name_clause)
-        
-        # Combine filters
-        filter_parts = []
-        if filter_clause:
-            filter_parts.append(filter_clause)
-        if lexical_parts:
-            filter_parts.extend(lexical_parts)
-        
-        if len(filter_parts) > 1:
-            filter_str = '(' + ' '.join(filter_parts) + ')'
-        elif len(filter_parts) == 1:
-            filter_str = filter_parts[0]
-        else:
-            filter_str = "*"
-        
-        query = f"{filter_str}=>[KNN {limit} @embedding $vec AS score]"
-        embedding_bytes = np.array(embedding, dtype=np.float32).tobytes()
-        
-        return_fields = [
-            'ndc', 'drug_name', 'brand_name', 'generic_name',
-            'is_generic', 'dosage_form', 'dea_schedule', 'gcn_seqno',
-            'indication', 'drug_class', 'therapeutic_class', 'manufacturer_name', 'score',
-            'indication_key'
-        ]
-        
-        return_clause: List[str] = []
-        for field in return_fields:
-            return_clause.extend([field, field])
-        
-        results = client.execute_command(
-            'FT.SEARCH', REDIS_INDEX_NAME,
-            query,
-            'PARAMS', '2', 'vec', embedding_bytes,
-            'RETURN', str(len(return_clause)), *return_clause,
-            'SORTBY', 'score', 'ASC',
-            'LIMIT', '0', str(limit),
-            'DIALECT', '2'
+        command = build_vector_only_command(
+            embedding, original_terms, filters, limit, index_attributes=get_index_attributes(client)
         )
-        
-        drugs: List[Dict[str, Any]] = []
-        
-        for i in range(1, len(results), 2):
-            if i + 1 >= len(results):
-                break
-            fields = results[i + 1]
-            drug: Dict[str, Any] = {}
-            
-            for j in range(0, len(fields), 2):
-                if j + 1 >= len(fields):
-                    continue
-                field_name = fields[j].decode('utf-8')
-                field_value = fields[j + 1]
-                
-                if isinstance(field_value, bytes):
-                    value = field_value.decode('utf-8')
-                else:
-                    value = field_value
-                
-                drug[field_name] = value
-            
-            raw_score = drug.pop('score', None)
-            if isinstance(raw_score, bytes):
-                raw_score = raw_score.decode('utf-8')
-            
-            similarity = None
-            if raw_score is not None:
-                try:
-                    distance = float(raw_score)
-                    similarity = max(0.0, min(1.0, 1.0 - distance))
-                except (ValueError, TypeError):
-                    similarity = None
-            
-            if similarity is not None:
-                drug['similarity_score'] = similarity
-                drug['similarity_score_pct'] = round(similarity * 100, 2)
-            else:
-                drug['similarity_score'] = None
-                drug['similarity_score_pct'] = None
-            
-            drug['search_method'] = 'vector'
-            drugs.append(drug)
+        results = client.execute_command(*command)
         
         return {
             'success': True,
-            'raw_results': drugs
+            'raw_results': parse_vector_search_results(results)
         }
     
     except Exception as e:
@@ -1212,45 +1817,265 @@ def redis_vector_only_search(
         }
 
 
+def redis_vector_only_search_batch(
+    term_embeddings: List[Tuple[str, List[float]]],
+    filters: Optional[Dict[str, Any]],
+    limit: int = 20,
+    redis_client: Any = None,
+    deadline_ms: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Execute several vector-only KNN searches as ONE pipelined round trip.
+    
+    Args:
+        term_embeddings: Ordered (term, embedding) pairs; each term is also
+                         the lexical gate for its own query
+        deadline_ms: Max time to wait for the pipeline reply (None = no limit)
+    
+    Returns:
+        One result dict per input pair, in input order (same shape as
+        redis_vector_only_search); when the deadline is hit every entry
+        carries timed_out=True so callers can tell it from "no matches"
+    """
+    if not term_embeddings:
+        return []
+    
+    try:
+        client = redis_client or get_redis_client()
+        pipe = client.pipeline(transaction=False)
+        index_attributes = get_index_attributes(client)
+        
+        for term, embedding in term_embeddings:
+            pipe.execute_command(*build_vector_only_command(
+                embedding, [term], filters, limit, index_attributes=index_attributes
+            ))
+        
+        if deadline_ms is None:
+            replies = pipe.execute(raise_on_error=False)
+        else:
+            future = _FANOUT_EXECUTOR.submit(pipe.execute, raise_on_error=False)
+            replies = future.result(timeout=deadline_ms / 1000)
+    
+    except FuturesTimeoutError:
+        print(f"[WARNING] Pipelined KNN batch exceeded {deadline_ms}ms deadline")
+        return [
+            {'success': False, 'error': 'KNN deadline exceeded', 'timed_out': True, 'raw_results': []}
+            for _ in term_embeddings
+        ]
+    except Exception as e:
+        print(f"Redis vector batch search error: {str(e)}")
+        return [
+            {'success': False, 'error': str(e), 'raw_results': []}
+            for _ in term_embeddings
+        ]
+    
+    batch_results: List[Dict[str, Any]] = []
+    for (term, _), reply in zip(term_embeddings, replies):
+        if isinstance(reply, Exception):
+            print(f"Redis vector search error for '{term}': {str(reply)}")
+            batch_results.append({'success': False, 'error': str(reply), 'raw_results': []})
+            continue
+        batch_results.append({
+            'success': True,
+            'raw_results': parse_vector_search_results(reply)
+        })
+    
+    return batch_results
+
+
+def _share(flight: SingleFlight, key: Any, fn: Any, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+    """Run fn through a single-flight group; waiters get a copy flagged 'coalesced'."""
+    result, shared = flight.do(key, fn, *args, **kwargs)
+    if shared and isinstance(result, dict):
+        return {**result, 'coalesced': True}
+    return result
+
+
+def coalesced_parse(
+    query: str,
+    redis_client: Any = None,
+    spelling_hints: Optional[Dict[str, str]] = None,
+    on_fields: Optional[Any] = None,
+    deadline: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    expand_query_with_claude(), coalesced with identical in-flight parses.
+    
+    on_fields and deadline only apply to the request that runs the parse;
+    waiters get the finished result.
+    """
+    key = (
+        normalize_query(query),
+        MEDICAL_SEARCH_PROMPT_VERSION,
+        get_llm_route_id(),
+        tuple(sorted((spelling_hints or {}).items()))
+    )
+    return _share(
+        _PARSE_FLIGHT, key, expand_query_with_claude,
+        query, redis_client=redis_client, spelling_hints=spelling_hints, on_fields=on_fields, deadline=deadline
+    )
+
+
+def coalesced_embedding(text: str) -> Dict[str, Any]:
+    """generate_embedding(), coalesced with identical in-flight embeddings."""
+    return _share(_EMBEDDING_FLIGHT, text, generate_embedding, text)
+
+
+def coalesced_hybrid_search(
+    embedding: List[float],
+    original_terms: Optional[List[str]],
+    claude_terms: Optional[List[str]],
+    filters: Optional[Dict[str, Any]],
+    limit: int = 20,
+    redis_client: Any = None,
+    grouping_engine: str = 'python',
+    page: Optional[Dict[str, Any]] = None,
+    max_groups: Optional[int] = None
+) -> Dict[str, Any]:
+    """redis_hybrid_search(), coalesced with identical in-flight searches."""
+    key = (
+        tuple(embedding),
+        tuple(original_terms or ()),
+        tuple(claude_terms or ()),
+        json.dumps(filters or {}, sort_keys=True, default=str),
+        limit,
+        grouping_engine,
+        json.dumps(page, sort_keys=True) if page else None,
+        max_groups
+    )
+    return _share(
+        _SEARCH_FLIGHT, key, redis_hybrid_search,
+        embedding=embedding,
+        original_terms=original_terms,
+        claude_terms=claude_terms,
+        filters=filters,
+        limit=limit,
+        redis_client=redis_client,
+        grouping_engine=grouping_engine,
+        page=page,
+        max_groups=max_groups
+    )
+
+
+def get_single_flight_stats() -> Dict[str, Dict[str, Any]]:
+    """Container-lifetime executions / coalesced callers per stage."""
+    return {flight.name: flight.stats() for flight in (_PARSE_FLIGHT, _EMBEDDING_FLIGHT, _SEARCH_FLIGHT)}
+
+
+def timed_embedding(text: str) -> Tuple[Dict[str, Any], float]:
+    """Generate an embedding and return it with its wall-clock duration (ms)."""
+    start = datetime.now()
+    result = coalesced_embedding(text)
+    return result, (datetime.now() - start).total_seconds() * 1000
+
+
+def choose_embedding_text(expanded_query: str, speculative_text: Optional[str]) -> str:
+    """Text to embed: the speculative raw-query text when the parse kept it (modulo case/whitespace)."""
+    if speculative_text is not None and normalize_query(expanded_query) == speculative_text:
+        return speculative_text
+    return expanded_query
+
+
+def retrieval_key(inputs: Dict[str, Any], embedding_text: str) -> Tuple[Any, ...]:
+    """Everything the single-query search depends on (early vs final parse check)."""
+    return (
+        embedding_text,
+        tuple(inputs['exact_match_terms']),
+        tuple(inputs['claude_terms']),
+        json.dumps(inputs['merged_filters'], sort_keys=True, default=str)
+    )
+
+
+def early_retrieval(
+    embedding_text: str,
+    inputs: Dict[str, Any],
+    limit: int,
+    redis_client: Any,
+    grouping_engine: str,
+    page: Dict[str, Any]
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Embedding + first hybrid search window, run while the parse still streams.
+    
+    Returns:
+        (embedding_result, search_results) - search_results is None if the
+        embedding failed
+    """
+    embedding_result = coalesced_embedding(embedding_text)
+    if not embedding_result['success']:
+        return embedding_result, None
+    return embedding_result, coalesced_hybrid_search(
+        embedding=embedding_result['embedding'],
+        original_terms=inputs['exact_match_terms'],
+        claude_terms=inputs['claude_terms'],
+        filters=inputs['merged_filters'],
+        limit=limit,
+        redis_client=redis_client,
+        grouping_engine=grouping_engine,
+        page=page
+    )
+
+
+def embed_terms_concurrently(
+    terms: List[str],
+    deadline_ms: Optional[float] = None
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Generate embeddings for several terms in parallel on the fan-out pool.
+    
+    Args:
+        terms: Terms to embed (order is preserved in the output)
+        deadline_ms: Stage deadline; terms still pending afterwards are dropped
+    
+    Returns:
+        Ordered (term, embedding_result) pairs for every term that finished
+        before the deadline (failed embeddings are included with success=False)
+    """
+    futures = [_FANOUT_EXECUTOR.submit(coalesced_embedding, term) for term in terms]
+    timeout = deadline_ms / 1000 if deadline_ms is not None else None
+    done, not_done = futures_wait(futures, timeout=timeout)
+    
+    if not_done:
+        print(f"[WARNING] Embedding stage deadline ({deadline_ms}ms) hit: "
+              f"{len(not_done)}/{len(terms)} terms dropped")
+    
+    ordered: List[Tuple[str, Dict[str, Any]]] = []
+    for term, future in zip(terms, futures):
+        if future not in done:
+            continue
+        try:
+            ordered.append((term, future.result()))
+        except Exception as e:
+            ordered.append((term, {'success': False, 'error': str(e)}))
+    
+    return ordered
+
+
 def perform_drug_expansion(
     initial_drugs: List[Dict[str, Any]],
     original_terms: List[str],
     claude_terms: List[str],
-    filters: Optional[Dict[str, Any]]
-) -> List[Dict[str, Any]]:
+    filters: Optional[Dict[str, Any]],
+    redis_client: Any = None
+) -> Any:
     """
     Perform drug_class and therapeutic_class expansion on initial drug results.
-    """
-    import redis
     
+    Returns:
+        {'raw_results': [...], 'expansion_debug': {...}} (the initial drugs
+        list unchanged if expansion fails)
+    """
     try:
-        redis_host = os.environ.get('REDIS_HOST', '10.0.11.153')
-        redis_port = int(os.environ.get('REDIS_PORT', 6379))
-        redis_password = os.environ.get('REDIS_PASSWORD')
-        
-        if not redis_password:
-            return initial_drugs
-        
-        client = redis.Redis(
-            host=redis_host,
-            port=redis_port,
-            password=redis_password,
-            decode_responses=False
-        )
+        client = redis_client or get_redis_client()
         
         drugs = list(initial_drugs)  # Copy
         drug_classes_to_expand = set()
         therapeutic_classes_to_expand = set()
         
         # Find drug_class and therapeutic_class from initial results
+        exact_matcher = get_term_matcher(original_terms)
         for drug in initial_drugs:
-            corpus = " ".join([
-                str(drug.get('drug_name', '')).lower(),
-                str(drug.get('brand_name', '')).lower(),
-                str(drug.get('generic_name', '')).lower()
-            ])
-            
-            is_exact = any(term and term.lower() in corpus for term in (original_terms or []))
+            is_exact = exact_matcher.matches(document_corpus(drug))
             
             if is_exact:
                 dc = drug.get('drug_class', '').strip()
@@ -1262,132 +2087,561 @@ def perform_drug_expansion(
         
         print(f"[EXPANSION] Found {len(drug_classes_to_expand)} drug classes, {len(therapeutic_classes_to_expand)} therapeutic classes")
         
-        filter_clause, _ = build_filter_clause(filters or {})
+        filter_clause, applied_filters = build_filter_clause(filters or {}, get_index_attributes(client))
         
         return_fields = [
             'ndc', 'drug_name', 'brand_name', 'generic_name',
             'is_generic', 'dosage_form', 'dea_schedule', 'gcn_seqno',
             'indication', 'drug_class', 'therapeutic_class', 'manufacturer_name',
-            'indication_key'
+            'indication_key',
+            'family_key', 'family_display_name', 'strength_label'  # Precomputed by the loader
         ]
         
         return_clause: List[str] = []
         for field in return_fields:
             return_clause.extend([field, field])
         
-        existing_ndcs = {d.get('ndc') for d in drugs}
+        # STEP 1 + 2: drug_class and therapeutic_class (with blacklist), one round trip
+        therapeutic_classes_filtered = {
+            tc for tc in therapeutic_classes_to_expand 
+            if tc not in THERAPEUTIC_CLASS_BLACKLIST
+        }
         
-        # STEP 1: Expand by drug_class
-        if drug_classes_to_expand:
-            dc_filter_parts = [f'"{dc}"' for dc in drug_classes_to_expand]
-            tc_query = f"@drug_class:({' | '.join(dc_filter_parts)})"
-            
-            if filter_clause:
-                tc_query = f"({filter_clause}) {tc_query}"
-            
-            dc_results = client.execute_command(
-                'FT.SEARCH', REDIS_INDEX_NAME,
-                tc_query,
-                'RETURN', str(len(return_clause)), *return_clause,
-                'LIMIT', '0', '100',
-                'DIALECT', '2'
-            )
-            
-            for i in range(1, len(dc_results), 2):
-                if i + 1 >= len(dc_results):
-                    break
-                fields = dc_results[i + 1]
-                drug: Dict[str, Any] = {}
-                
-                for j in range(0, len(fields), 2):
-                    if j + 1 >= len(fields):
-                        continue
-                    field_name = fields[j].decode('utf-8')
-                    field_value = fields[j + 1]
-                    
-                    if isinstance(field_value, bytes):
-                        value = field_value.decode('utf-8')
-                    else:
-                        value = field_value
-                    
-                    drug[field_name] = value
-                
+        expansion_drugs, expansion_queries = run_class_expansion(
+            client,
+            drug_classes=drug_classes_to_expand,
+            therapeutic_classes=therapeutic_classes_filtered,
+            filter_clause=filter_clause,
+            applied_filters=applied_filters,
+            return_clause=return_clause,
+            limit=100,
+            existing_ndcs={d.get('ndc') for d in drugs}
+        )
+        drugs.extend(expansion_drugs)
+        
+        expansion_debug = {
+            'drug_classes_found': list(drug_classes_to_expand),
+            'therapeutic_classes_found_raw': list(therapeutic_classes_to_expand),
+            'therapeutic_classes_found_filtered': list(therapeutic_classes_filtered),
+            'initial_drug_count': len(initial_drugs),
+            'expansion_queries': expansion_queries
+        }
+        
+        return {'raw_results': drugs, 'expansion_debug': expansion_debug}
+    
+    except Exception as e:
+        print(f"Expansion error: {str(e)}")
+        return initial_drugs
+
+
+def run_class_expansion(
+    client: Any,
+    drug_classes: Any,
+    therapeutic_classes: Any,
+    filter_clause: Optional[str],
+    applied_filters: Dict[str, Any],
+    return_clause: List[str],
+    limit: int,
+    existing_ndcs: set,
+    offsets: Optional[Dict[str, int]] = None,
+    positions: Optional[Dict[str, int]] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Expand by drug_class and therapeutic_class with the configured engine.
+    
+    EXPANSION_ENGINE='search' (default) runs FT.SEARCH queries;
+    'sets' reads the loader's precomputed cls:<generation>:dc:/tc: member sets,
+    falling back to FT.SEARCH when the current generation has none of them.
+    Both return (new_drugs, expansion_queries) and update existing_ndcs.
+    
+    Pagination: each class stream is read from offsets[debug key] (NDC
+    order), the stream position of every added drug is recorded in
+    positions (ndc -> position) and each query's debug entry reports
+    window_end / exhausted.
+    """
+    if EXPANSION_ENGINE == 'sets':
+        new_drugs, expansion_queries = run_class_expansion_sets(
+            client, drug_classes, therapeutic_classes,
+            applied_filters, return_clause, limit, existing_ndcs,
+            offsets=offsets, positions=positions
+        )
+        if not expansion_queries.get('sets_missing'):
+            return new_drugs, expansion_queries
+        new_drugs, search_queries = run_class_expansion_search(
+            client, drug_classes, therapeutic_classes,
+            filter_clause, return_clause, limit, existing_ndcs,
+            offsets=offsets, positions=positions
+        )
+        return new_drugs, {**search_queries, 'fallback_from': expansion_queries}
+    return run_class_expansion_search(
+        client, drug_classes, therapeutic_classes,
+        filter_clause, return_clause, limit, existing_ndcs,
+        offsets=offsets, positions=positions
+    )
+
+
+def run_class_expansion_search(
+    client: Any,
+    drug_classes: Any,
+    therapeutic_classes: Any,
+    filter_clause: Optional[str],
+    return_clause: List[str],
+    limit: int,
+    existing_ndcs: set,
+    offsets: Optional[Dict[str, int]] = None,
+    positions: Optional[Dict[str, int]] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Run the drug_class and therapeutic_class expansion searches in one pipeline.
+    
+    Both FT.SEARCH commands go out in a single round trip; replies are merged
+    drug_class first, then therapeutic_class, skipping NDCs already in
+    existing_ndcs (updated in place) - the same dedup order as running them
+    one after the other. Both are sorted by NDC so pages of a stream are stable.
+    
+    Returns:
+        (new_drugs, expansion_queries) where expansion_queries has per-query
+        query/returned/added/window_end/exhausted/parse_ms plus the shared
+        round_trip_ms
+    """
+    offsets = offsets or {}
+    queries: List[Tuple[str, str, str]] = []  # (debug key, search_method, query)
+    
+    if drug_classes:
+        # drug_class is a TEXT field in production, use TEXT syntax (quoted phrases)
+        dc_filter_parts = [f'"{dc}"' for dc in drug_classes]
+        dc_query = f"@drug_class:({' | '.join(dc_filter_parts)})"
+        if filter_clause:
+            dc_query = f"({filter_clause}) {dc_query}"
+        queries.append(('drug_class', 'drug_class_filter', dc_query))
+    
+    if therapeutic_classes:
+        # Escape special characters for Redis TAG syntax
+        tc_filter_parts = []
+        for tc in therapeutic_classes:
+            tc_escaped = tc.replace(' ', '\\ ').replace('-', '\\-').replace('(', '\\(').replace(')', '\\)')
+            tc_filter_parts.append(tc_escaped)
+        tc_query = f"@therapeutic_class:{{{' | '.join(tc_filter_parts)}}}"
+        if filter_clause:
+            tc_query = f"({filter_clause}) {tc_query}"
+        queries.append(('therapeutic_class', 'therapeutic_class_filter', tc_query))
+    
+    if not queries:
+        return [], {}
+    
+    pipe = client.pipeline(transaction=False)
+    for debug_key, _, query in queries:
+        print(f"[SEARCH] Expanding with query: {query}")
+        # NDC order: same documents and order as the sets engine and the
+        # FT.AGGREGATE grouping engine, and stable across pages
+        pipe.execute_command(
+            'FT.SEARCH', REDIS_INDEX_NAME,
+            query,
+            'RETURN', str(len(return_clause)), *return_clause,
+            'SORTBY', 'ndc', 'ASC',
+            'LIMIT', str(offsets.get(debug_key, 0)), str(limit),
+            'DIALECT', '2'
+        )
+    
+    round_trip_start = datetime.now()
+    replies = pipe.execute(raise_on_error=False)
+    round_trip_ms = (datetime.now() - round_trip_start).total_seconds() * 1000
+    
+    new_drugs: List[Dict[str, Any]] = []
+    expansion_queries: Dict[str, Any] = {'engine': 'search', 'round_trip_ms': round(round_trip_ms, 2)}
+    
+    for (debug_key, search_method, query), reply in zip(queries, replies):
+        parse_start = datetime.now()
+        offset = offsets.get(debug_key, 0)
+        query_debug: Dict[str, Any] = {'query': query, 'returned': 0, 'added': 0}
+        
+        if isinstance(reply, Exception):
+            print(f"[WARNING] {debug_key} expansion failed: {reply}")
+            query_debug['error'] = str(reply)
+            query_debug['window_end'] = offset
+            query_debug['exhausted'] = True  # Don't page into a failing query
+        else:
+            _, reply_drugs = decode_search_reply(reply)
+            query_debug['returned'] = len(reply_drugs)
+            query_debug['window_end'] = offset + len(reply_drugs)
+            query_debug['exhausted'] = len(reply_drugs) < limit
+            for position, drug in enumerate(reply_drugs, offset):
+                # Skip if already in results
                 if drug.get('ndc') in existing_ndcs:
                     continue
                 
                 drug['similarity_score'] = None
                 drug['similarity_score_pct'] = None
-                drug['search_method'] = 'drug_class_filter'
+                drug['search_method'] = search_method
                 
-                drugs.append(drug)
+                new_drugs.append(drug)
                 existing_ndcs.add(drug.get('ndc'))
+                if positions is not None:
+                    positions[drug.get('ndc')] = position
+                query_debug['added'] += 1
         
-        # STEP 2: Expand by therapeutic_class (with blacklist)
-        THERAPEUTIC_CLASS_BLACKLIST = {
-            'Bulk Chemicals',
-            'Miscellaneous',
-            'Uncategorized',
-            'Not Specified',
-        }
-        
-        therapeutic_classes_filtered = {
-            tc for tc in therapeutic_classes_to_expand 
-            if tc not in THERAPEUTIC_CLASS_BLACKLIST
-        }
-        
-        if therapeutic_classes_filtered:
-            tc_filter_parts = []
-            for tc in therapeutic_classes_filtered:
-                tc_escaped = tc.replace(' ', '\\ ').replace('-', '\\-').replace('(', '\\(').replace(')', '\\)')
-                tc_filter_parts.append(tc_escaped)
-            
-            tc_query = f"@therapeutic_class:{{{' | '.join(tc_filter_parts)}}}"
-            
-            if filter_clause:
-                tc_query = f"({filter_clause}) {tc_query}"
-            
-            tc_results = client.execute_command(
-                'FT.SEARCH', REDIS_INDEX_NAME,
-                tc_query,
-                'RETURN', str(len(return_clause)), *return_clause,
-                'LIMIT', '0', '100',
-                'DIALECT', '2'
-            )
-            
-            for i in range(1, len(tc_results), 2):
-                if i + 1 >= len(tc_results):
-                    break
-                fields = tc_results[i + 1]
+        query_debug['parse_ms'] = round((datetime.now() - parse_start).total_seconds() * 1000, 2)
+        expansion_queries[debug_key] = query_debug
+    
+    return new_drugs, expansion_queries
+
+
+def aggregate_therapeutic_class_families(
+    client: Any,
+    therapeutic_classes: Any,
+    filter_clause: Optional[str],
+    limit: int,
+    existing_ndcs: set,
+    offset: int = 0,
+    positions: Optional[Dict[str, int]] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Therapeutic-class expansion grouped server-side (FT.AGGREGATE GROUPBY @family_key).
+    
+    Takes the same documents as the FT.SEARCH expansion (`limit` by NDC from
+    `offset`, skipping existing_ndcs) and returns one row per family: the family
+    fields once, plus each variant's display fields packed by REDUCE TOLIST.
+    The rows are unpacked into minimal documents, family by family in
+    lowest-NDC order, which group_search_results() turns into exactly the
+    groups it builds from the full documents - without shipping every
+    document's family, class and indication fields.
+    
+    Every window document comes back (existing_ndcs are skipped while
+    unpacking), so stream positions are known for pagination.
+    
+    Returns:
+        (family_documents, debug) - existing_ndcs / positions are updated in place
+    """
+    tc_filter_parts = [
+        tc.replace(' ', '\\ ').replace('-', '\\-').replace('(', '\\(').replace(')', '\\)')
+        for tc in therapeutic_classes
+    ]
+    tc_query = f"@therapeutic_class:{{{' | '.join(tc_filter_parts)}}}"
+    if filter_clause:
+        tc_query = f"({filter_clause}) {tc_query}"
+    
+    load_fields = list(dict.fromkeys(AGGREGATE_VARIANT_FIELDS + AGGREGATE_FAMILY_FIELDS + ('family_key',)))
+    args: List[Any] = [
+        'FT.AGGREGATE', REDIS_INDEX_NAME, tc_query,
+        'LOAD', str(len(load_fields)), *[f'@{field}' for field in load_fields],
+        # Same window as FT.SEARCH ... SORTBY ndc LIMIT <offset> <limit>
+        'SORTBY', '2', '@ndc', 'ASC', 'MAX', str(offset + limit),
+        'LIMIT', str(offset), str(limit),
+    ]
+    
+    separator = AGGREGATE_VARIANT_SEPARATOR
+    variant_format = separator.join(['%s'] * len(AGGREGATE_VARIANT_FIELDS))
+    args += [
+        'APPLY', f"format(\"{variant_format}\", {', '.join(f'@{field}' for field in AGGREGATE_VARIANT_FIELDS)})",
+        'AS', 'variant',
+        'GROUPBY', '1', '@family_key',
+        'REDUCE', 'COUNT', '0', 'AS', 'variant_count',
+        'REDUCE', 'TOLIST', '1', '@variant', 'AS', 'variants',
+        'REDUCE', 'COUNT_DISTINCT', '1', '@dosage_form', 'AS', 'dosage_form_count',
+        'REDUCE', 'COUNT_DISTINCT', '1', '@manufacturer_name', 'AS', 'manufacturer_count',
+        'REDUCE', 'FIRST_VALUE', '4', '@ndc', 'BY', '@ndc', 'ASC', 'AS', 'first_ndc',
+    ]
+    for field in AGGREGATE_FAMILY_FIELDS:
+        args += ['REDUCE', 'FIRST_VALUE', '4', f'@{field}', 'BY', '@ndc', 'ASC', 'AS', field]
+    args += ['SORTBY', '2', '@first_ndc', 'ASC', 'MAX', str(limit), 'DIALECT', '2']
+    
+    debug: Dict[str, Any] = {'engine': 'aggregate', 'query': tc_query, 'groups': 0, 'returned': 0, 'added': 0}
+    print(f"[SEARCH] Aggregating families with query: {tc_query}")
+    round_trip_start = datetime.now()
+    try:
+        raw_reply = client.execute_command(*args)
+    except Exception as e:
+        print(f"[WARNING] therapeutic_class aggregation failed: {e}")
+        debug['error'] = str(e)
+        debug['window_end'] = offset
+        debug['exhausted'] = True
+        return [], debug
+    debug['round_trip_ms'] = round((datetime.now() - round_trip_start).total_seconds() * 1000, 2)
+    
+    parse_start = datetime.now()
+    rows = decode_aggregate_reply(raw_reply)
+    families: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]] = []
+    for row in rows:
+        packed_variants = row.get('variants') or []
+        if isinstance(packed_variants, str):
+            packed_variants = [packed_variants]
+        variants = []
+        for packed in packed_variants:
+            values = packed.split(separator)
+            variants.append({
+                field: value
+                for field, value in zip(AGGREGATE_VARIANT_FIELDS, values)
+                if value != '(null)'  # format() of a missing field
+            })
+        variants.sort(key=lambda variant: variant.get('ndc', ''))
+        families.append((row, variants))
+        debug['returned'] += len(variants)
+    
+    # Stream position of each window document (the window is in NDC order)
+    window_ndcs = sorted(variant.get('ndc', '') for _, variants in families for variant in variants)
+    window_positions = {ndc: position for position, ndc in enumerate(window_ndcs, offset)}
+    
+    family_documents: List[Dict[str, Any]] = []
+    for row, variants in families:
+        # A family whose first window document is already in the results has
+        # its group already; otherwise the first kept document creates it
+        kept = [doc for doc in variants if doc.get('ndc') not in existing_ndcs]
+        for position, doc in enumerate(kept):
+            doc['family_key'] = row.get('family_key')
+            if position == 0:
+                # Group-level fields are only read from a family's first document
+                doc.update({field: row[field] for field in AGGREGATE_FAMILY_FIELDS if row.get(field) is not None})
+            doc['similarity_score'] = None
+            doc['similarity_score_pct'] = None
+            doc['search_method'] = 'therapeutic_class_filter'
+            family_documents.append(doc)
+            existing_ndcs.add(doc.get('ndc'))
+            if positions is not None:
+                positions[doc.get('ndc')] = window_positions[doc.get('ndc')]
+        
+        debug['groups'] += 1
+        debug.setdefault('families', []).append({
+            'family_key': row.get('family_key'),
+            'variants': int(row.get('variant_count') or len(variants)),
+            'dosage_forms': int(row.get('dosage_form_count') or 0),
+            'manufacturers': int(row.get('manufacturer_count') or 0),
+        })
+    
+    debug['added'] = len(family_documents)
+    debug['window_end'] = offset + debug['returned']
+    debug['exhausted'] = debug['returned'] < limit
+    debug['parse_ms'] = round((datetime.now() - parse_start).total_seconds() * 1000, 2)
+    return family_documents, debug
+
+
+def run_class_expansion_sets(
+    client: Any,
+    drug_classes: Any,
+    therapeutic_classes: Any,
+    applied_filters: Dict[str, Any],
+    return_clause: List[str],
+    limit: int,
+    existing_ndcs: set,
+    offsets: Optional[Dict[str, int]] = None,
+    positions: Optional[Dict[str, int]] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Expand using the precomputed class-membership sets (no FT.SEARCH).
+    
+    Round trip 1: SUNION of cls:<generation>:dc:<DRUG_CLASS> and of
+    cls:<generation>:tc:<THERAPEUTIC_CLASS> (sets of the current index
+    generation, so they always match the loaded index). Then pipelined HMGET
+    of only the returned fields for unseen NDCs (in chunks, stopping once
+    `limit` drugs pass the applied filters, which are checked in-process, as
+    is the drug's class). Same dedup order as the search engine: drug_class
+    members first, then therapeutic_class. Stream positions (offsets /
+    positions / window_end) index the NDC-sorted member list.
+    
+    A failed reply only drops its own set or NDC (counted in 'errors'). When
+    none of the requested sets exists, nothing is fetched and the debug
+    entry carries sets_missing=True.
+    """
+    offsets = offsets or {}
+    return_fields = return_clause[::2]
+    fetch_fields = return_fields + [COMPOUNDING_BASE_FIELD]
+    generation = get_index_generation(client)
+    sources: List[Tuple[str, str, set, List[str]]] = []  # (debug key / class field, search_method, classes, set keys)
+    for debug_key, classes in (('drug_class', drug_classes), ('therapeutic_class', therapeutic_classes)):
+        if classes:
+            sources.append((debug_key, f"{debug_key}_filter", set(classes), [
+                class_set_key(debug_key, class_name, generation) for class_name in sorted(classes)
+            ]))
+    
+    if not sources:
+        return [], {}
+    
+    round_trip_start = datetime.now()
+    pipe = client.pipeline(transaction=False)
+    for _, _, _, keys in sources:
+        pipe.sunion(keys)
+        pipe.exists(*keys)
+    replies = pipe.execute(raise_on_error=False)
+    memberships = replies[0::2]
+    round_trips = 1
+    
+    new_drugs: List[Dict[str, Any]] = []
+    expansion_queries: Dict[str, Any] = {'engine': 'sets', 'generation': generation}
+    
+    if all(existing == 0 for existing in replies[1::2]):
+        # No set of this generation exists (e.g. published by a loader that
+        # doesn't build them): the caller falls back to FT.SEARCH
+        print(f"[WARNING] No class sets for generation {generation}, class expansion needs FT.SEARCH")
+        expansion_queries['sets_missing'] = True
+        return new_drugs, expansion_queries
+    
+    for (debug_key, search_method, classes, keys), members in zip(sources, memberships):
+        query_debug: Dict[str, Any] = {'keys': keys, 'members': 0, 'fetched': 0, 'added': 0, 'errors': 0}
+        if isinstance(members, Exception):
+            print(f"[WARNING] Class-set SUNION failed for {debug_key}: {members}")
+            query_debug['errors'] += 1
+            members = []
+        query_debug['members'] = len(members)
+        ordered_members = sorted(m.decode('utf-8') if isinstance(m, bytes) else m for m in members)
+        candidates = [
+            (position, ndc) for position, ndc in enumerate(ordered_members)
+            if position >= offsets.get(debug_key, 0) and ndc not in existing_ndcs
+        ]
+        window_end = len(ordered_members)
+        
+        # With filters most members may be rejected, so fetch in bigger chunks
+        chunk_size = max(limit, SETS_EXPANSION_FILTERED_CHUNK) if applied_filters else limit
+        added = 0
+        for chunk_start in range(0, len(candidates), chunk_size):
+            chunk = candidates[chunk_start:chunk_start + chunk_size]
+            pipe = client.pipeline(transaction=False)
+            for _, ndc in chunk:
+                pipe.hmget(f"drug:{ndc}", fetch_fields)
+            rows = pipe.execute(raise_on_error=False)
+            round_trips += 1
+            query_debug['fetched'] += len(chunk)
+            
+            for (position, ndc), row in zip(chunk, rows):
+                if isinstance(row, Exception):
+                    print(f"[WARNING] Class-set HMGET failed for drug:{ndc}: {row}")
+                    query_debug['errors'] += 1
+                    continue
                 drug: Dict[str, Any] = {}
-                
-                for j in range(0, len(fields), 2):
-                    if j + 1 >= len(fields):
+                for field, value in zip(fetch_fields, row):
+                    if value is None:
                         continue
-                    field_name = fields[j].decode('utf-8')
-                    field_value = fields[j + 1]
-                    
-                    if isinstance(field_value, bytes):
-                        value = field_value.decode('utf-8')
-                    else:
-                        value = field_value
-                    
-                    drug[field_name] = value
-                
-                if drug.get('ndc') in existing_ndcs:
+                    drug[field] = value.decode('utf-8') if isinstance(value, bytes) else value
+                if drug.pop(COMPOUNDING_BASE_FIELD, None) == 'true':
                     continue
+                if not drug or not drug_matches_filters(drug, applied_filters):
+                    continue
+                if (drug.get(debug_key) or '').strip() not in classes:
+                    continue  # Reclassified since the set was built
                 
+                drug.setdefault('ndc', ndc)
                 drug['similarity_score'] = None
                 drug['similarity_score_pct'] = None
-                drug['search_method'] = 'therapeutic_class_filter'
+                drug['search_method'] = search_method
                 
-                drugs.append(drug)
-                existing_ndcs.add(drug.get('ndc'))
+                new_drugs.append(drug)
+                existing_ndcs.add(ndc)
+                if positions is not None:
+                    positions[ndc] = position
+                added += 1
+                if added >= limit:
+                    window_end = position + 1
+                    break
+            if added >= limit:
+                break
         
-        return drugs
+        query_debug['added'] = added
+        query_debug['window_end'] = window_end
+        query_debug['exhausted'] = window_end >= len(ordered_members)
+        expansion_queries[debug_key] = query_debug
     
-    except Exception as e:
-        print(f"Expansion error: {str(e)}")
-        return initial_drugs
+    expansion_queries['round_trips'] = round_trips
+    expansion_queries['round_trip_ms'] = round((datetime.now() - round_trip_start).total_seconds() * 1000, 2)
+    return new_drugs, expansion_queries
+
+
+def class_set_key(class_field: str, class_name: str, generation: int) -> str:
+    """Key of the loader's NDC set for one drug_class / therapeutic_class in an index generation."""
+    return f"{CLASS_SET_KEY_PREFIX}{generation}:{CLASS_SET_KINDS[class_field]}:{class_name}"
+
+
+def drug_matches_filters(drug: Dict[str, Any], applied_filters: Dict[str, Any]) -> bool:
+    """
+    Check a drug hash against build_filter_clause()'s applied filters in-process.
+    
+    TAG filters match if the drug's value is one of the normalized values;
+    NUMERIC filters use the applied start/end range.
+    """
+    for field, expected in (applied_filters or {}).items():
+        value = drug.get(field)
+        if field in NUMERIC_FIELDS:
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                return False
+            if expected.get('start') not in (None, '-inf') and number < float(expected['start']):
+                return False
+            if expected.get('end') not in (None, '+inf') and number > float(expected['end']):
+                return False
+            continue
+        
+        if value is None:
+            return False
+        tags = {tag.strip() for tag in str(value).split(',')}
+        if field == 'is_generic':
+            tags = {tag.lower() for tag in tags}
+        elif field != 'ndc':
+            tags = {tag.upper() for tag in tags}
+        if not tags & set(expected):
+            return False
+    return True
+
+
+def derive_search_inputs(
+    query: str,
+    structured_query: Dict[str, Any],
+    raw_content: Optional[str],
+    user_filters: Dict[str, Any],
+    spelling_corrections: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Turn a (possibly partial) structured parse into the retrieval inputs.
+    
+    Used on the final parse and, when the parse is streamed, on its first
+    fields to start retrieval early - so both derive identical inputs.
+    
+    Returns:
+        Dict with expanded_query (embedding text), claude_filters,
+        claude_terms, original_terms, exact_match_terms, merged_filters and
+        drug_terms (>= 3 means the multi-drug path)
+    """
+    expanded_query = structured_query.get('search_text') or raw_content or query
+    claude_filters = structured_query.get('filters', {}) or {}
+    if not isinstance(claude_filters, dict):
+        claude_filters = {}
+    claude_terms = structured_query.get('search_terms')
+    if not claude_terms:
+        claude_terms = extract_search_terms(expanded_query)
+    
+    # Extract original query terms for lexical filtering (prioritize literal matches)
+    original_terms = extract_search_terms(query)
+    
+    # Decide which terms to use for lexical matching:
+    # ALWAYS use Claude's extracted terms if they're actual drug names
+    # Claude now extracts ONLY drug names, never descriptive words or conditions
+    corrections = structured_query.get('corrections', [])
+    if corrections and len(claude_terms) <= len(original_terms) + 2:
+        # Spelling correction case (e.g., "crester" → "crestor")
+        exact_match_terms = claude_terms
+    elif claude_terms and expanded_query != query:
+        # Claude extracted/transformed the query to actual drug names
+        # Use Claude's terms for better matching
+        exact_match_terms = claude_terms
+    else:
+        # Fallback to original terms (rare case)
+        exact_match_terms = original_terms
+    
+    # Local speller fixes any drug-name typos the parse passed through
+    if spelling_corrections:
+        exact_match_terms = [spelling_corrections.get(term.lower(), term) for term in exact_match_terms]
+    
+    drug_terms = [
+        term for term in claude_terms
+        if len(term) > 3 and not UNITLESS_NUMBER_PATTERN.fullmatch(term)  # Filter out short words / strengths
+    ]
+    
+    return {
+        'expanded_query': expanded_query,
+        'claude_filters': claude_filters,
+        'claude_terms': claude_terms,
+        'original_terms': original_terms,
+        'exact_match_terms': exact_match_terms,
+        'merged_filters': merge_filters(user_filters, claude_filters),
+        'drug_terms': drug_terms
+    }
 
 
 def merge_filters(user_filters: Dict[str, Any], claude_filters: Dict[str, Any]) -> Dict[str, Any]:
@@ -1411,7 +2665,8 @@ def merge_filters(user_filters: Dict[str, Any], claude_filters: Dict[str, Any])
 def extract_search_terms(text: str, max_terms: int = 8) -> List[str]:
     if not text:
         return []
-    tokens = re.findall(r"[a-zA-Z0-9\-\+]+", text.lower())
+    # Decimals stay whole ("12.5"), so unitless strengths survive tokenization
+    tokens = re.findall(r"\d+\.\d+|[a-zA-Z0-9\-\+]+", text.lower())
     seen: List[str] = []
     for token in tokens:
         if token not in seen:
@@ -1470,7 +2725,21 @@ AUTO_APPLY_CLAUDE_FILTERS: set[str] = {
 NUMERIC_FIELDS = {'gcn_seqno'}
 
 
-def build_filter_clause(filters: Dict[str, Any]) -> Tuple[Optional[str], Dict[str, Any]]:
+def build_filter_clause(
+    filters: Dict[str, Any],
+    index_attributes: frozenset = frozenset()
+) -> Tuple[Optional[str], Dict[str, Any]]:
+    """
+    Build the TAG / NUMERIC filter clause for FT.SEARCH from merged filters.
+    
+    Args:
+        index_attributes: Fields of the search index (get_index_attributes);
+                          compounding bases are excluded in the query when
+                          it has is_compounding_base
+    
+    Returns:
+        (clause or None, applied filters as normalized values)
+    """
     clauses: List[str] = []
     applied: Dict[str, Any] = {}
     
@@ -1503,12 +2772,110 @@ def build_filter_clause(filters: Dict[str, Any]) -> Tuple[Optional[str], Dict[st
         else:
             continue
     
+    # Compounding bases never leave Redis (once the index has the flag)
+    if COMPOUNDING_BASE_FIELD in index_attributes:
+        clauses.append(f"(-@{COMPOUNDING_BASE_FIELD}:{{true}})")
+    
     if not clauses:
         return None, applied
     
     return " ".join(clauses), applied
 
 
+def parse_strength_filter(filters: Optional[Dict[str, Any]]) -> List[Tuple[str, Optional[str]]]:
+    """
+    Parse Claude's strength filter ("200mg", "10 mg", "0.5%", or a bare "12.5")
+    
+    Returns:
+        (number, unit) pairs - unit None matches any unit; empty when there
+        is no usable strength
+    """
+    strength = filters.get('strength') if filters else None
+    if not strength:
+        return []
+    
+    strength_str = str(strength).strip()
+    strength_match = STRENGTH_PATTERN.search(strength_str)
+    if strength_match:
+        number = strength_match.group(1)
+        unit = strength_match.group(2).upper()
+        print(f"[SEARCH] Will filter by strength: {number} {unit}")
+        return [(number, unit)]
+    
+    # Claude extracted a number without a unit (e.g., "12.5")
+    # This happens when drug name is misspelled and Claude lacks context
+    try:
+        num_value = float(strength_str)
+    except ValueError:
+        return []
+    if 0.001 <= num_value <= 10000:
+        print(f"[SEARCH] Will filter by unitless strength: {strength_str} (Claude extracted without unit)")
+        return [(strength_str, None)]
+    return []
+
+
+def build_strength_clause(
+    strength_values: List[Tuple[str, Optional[str]]],
+    index_attributes: frozenset = frozenset()
+) -> Tuple[Optional[str], List[str]]:
+    """
+    Build the strength_tokens TAG prefilter for parsed strengths.
+    
+    Tokens match the loader's: "12.5MG" (unit given) or "12.5" (any unit).
+    Strength is never matched lexically - wildcards don't handle spaces or
+    decimals - so without the field callers post-filter drug_name instead.
+    
+    Returns:
+        (clause or None when disabled / the index lacks strength_tokens, tokens)
+    """
+    tokens: List[str] = []
+    for number, unit in strength_values:
+        token = f"{format_strength_number(number)}{unit or ''}"
+        if token not in tokens:
+            tokens.append(token)
+    
+    if not (tokens and STRENGTH_PREFILTER_ENABLED and 'strength_tokens' in index_attributes):
+        return None, tokens
+    return f"@strength_tokens:{{{' | '.join(escape_tag_value(t) for t in tokens)}}}", tokens
+
+
+def escape_tag_value(value: str) -> str:
+    """Escape TAG query punctuation (e.g. "12.5MG" -> "12\\.5MG")."""
+    return re.sub(r'([^A-Za-z0-9_])', r'\\\1', value)
+
+
+def get_index_attributes(client: Any) -> frozenset:
+    """
+    Field names in the search index schema (FT.INFO, re-read every few minutes)
+    
+    Lets queries use fields added by newer loaders only once the index has them.
+    """
+    now = time.monotonic()
+    if _INDEX_ATTRIBUTES['fields'] is not None and now - _INDEX_ATTRIBUTES['read_at'] < INDEX_SCHEMA_TTL_SECONDS:
+        return _INDEX_ATTRIBUTES['fields']
+    
+    fields = set()
+    try:
+        info = client.execute_command('FT.INFO', REDIS_INDEX_NAME)
+        if isinstance(info, dict):
+            attributes = info.get('attributes', info.get(b'attributes')) or []
+        else:
+            pairs = dict(zip(info[0::2], info[1::2]))
+            attributes = pairs.get('attributes', pairs.get(b'attributes')) or []
+        for attribute in attributes:
+            if isinstance(attribute, dict):
+                attribute = [item for pair in attribute.items() for item in pair]
+            for name, value in zip(attribute[0::2], attribute[1::2]):
+                if name in ('attribute', b'attribute'):
+                    fields.add(value.decode('utf-8') if isinstance(value, bytes) else str(value))
+    except Exception as e:
+        print(f"[WARNING] FT.INFO {REDIS_INDEX_NAME} failed: {e}")
+    
+    _INDEX_ATTRIBUTES['fields'] = frozenset(fields)
+    _INDEX_ATTRIBUTES['read_at'] = now
+    return _INDEX_ATTRIBUTES['fields']
+
+
 def normalize_tag_values(field: str, value: Any) -> List[str]:
     if value is None:
         return []
@@ -1584,6 +2951,7 @@ def group_search_results(
     """
     groups: List[Dict[str, Any]] = []
     index: Dict[str, Dict[str, Any]] = {}
+    group_indication_keys: Dict[str, str] = {}
     lowered_original = [term.lower() for term in original_terms]
     lowered_claude = [term.lower() for term in claude_terms]
     
@@ -1597,50 +2965,23 @@ def group_search_results(
     # PASS 1: Find matches and their therapeutic classes
     # Include both exact matches (user's query) AND Claude's expansions (for condition searches)
     exact_match_therapeutic_classes = set()
+    # ORIGINAL terms find exact matches (user searched for this drug); CLAUDE
+    # terms cover condition searches (e.g., "high cholesterol" → "statin") so
+    # therapeutic class filtering works for condition-based queries
+    match_matcher = get_term_matcher(lowered_original, lowered_claude)
     for doc in drugs:
-        corpus = " ".join([
-            str(doc.get('drug_name', '')).lower(),
-            str(doc.get('brand_name', '')).lower(),
-            str(doc.get('generic_name', '')).lower()
-        ])
-        
-        # Check ORIGINAL terms for exact matches (user searched for this drug)
-        is_exact_match = any(token and token in corpus for token in lowered_original)
-        
-        # ALSO check CLAUDE terms for condition searches (e.g., "high cholesterol" → "statin")
-        # This allows therapeutic class filtering to work for condition-based queries
-        is_claude_match = any(token and token in corpus for token in lowered_claude)
-        
-        if is_exact_match or is_claude_match:
+        if match_matcher.matches(document_corpus(doc)):
             therapeutic_class = doc.get('therapeutic_class', '').strip()
             if therapeutic_class:
                 exact_match_therapeutic_classes.add(therapeutic_class)
     
     # PASS 2: Group drugs, filtering alternatives by therapeutic class
     for doc in drugs:
-        # Create composite key that separates brand families from generic families
-        brand_name = doc.get('brand_name', '').strip()
-        generic_name = doc.get('generic_name', '').strip()
-        drug_name = doc.get('drug_name', '').strip()
-        
         # Use the is_generic field from Redis to determine brand vs generic
-        is_generic_str = str(doc.get('is_generic', 'true')).lower()
-        is_branded_product = is_generic_str == 'false'
+        is_branded_product = str(doc.get('is_generic', 'true')).lower() == 'false'
         
-        if is_branded_product:
-            # Brand drugs: group by brand name (includes repackaged brands)
-            # e.g., all CRESTOR strengths together (5mg, 10mg, 20mg, 40mg)
-            group_key = f"brand:{brand_name}"
-        else:
-            # Generic drugs: group by drug_class (ingredient) to combine all strengths
-            # e.g., all rosuvastatin calcium together (5mg, 10mg, 20mg, 40mg)
-            # NOT by GCN (which would split by strength)
-            drug_class = doc.get('drug_class', '').strip()
-            if drug_class:
-                group_key = f"generic:{drug_class}"
-            else:
-                # Fallback: use generic_name
-                group_key = f"generic:{generic_name or drug_name or doc.get('ndc')}"
+        # Family key is precomputed by the loader (computed here for older indexes)
+        group_key = document_family_key(doc)
         
         if not group_key:
             continue
@@ -1672,32 +3013,13 @@ def group_search_results(
                 # Use actual Redis similarity score (not hardcoded)
                 similarity_score = doc.get('similarity_score_pct')
             
-            # Set display name based on whether it's brand or generic family
-            if is_branded_product and brand_name:
-                display_name = brand_name
-            else:
-                # For generics, use drug_class (ingredient name) for display
-                display_name = doc.get('drug_class', '') or doc.get('generic_name', '') or doc.get('drug_name', '')
-                # Clean up the display name (remove strength/form details for family name)
-                if display_name:
-                    # Extract just the drug name part (before dosage info)
-                    clean_name = re.sub(r'\s+\d+(\.\d+)?\s*(MG|MCG|G|ML|%|UNIT).*$', '', display_name, flags=re.IGNORECASE)
-                    display_name = clean_name.strip() or display_name
+            display_name = doc.get('family_display_name') or build_family_display_name(doc)
             
-            # Fetch indication from separate store (Option A optimization)
+            # Indication comes from the separate store (Option A optimization);
+            # keys are collected here and resolved in one batch after grouping
             indication_key = doc.get('indication_key', '')
-            indication = ''
-            indication_list = []
-            
-            if indication_key and redis_client:
-                try:
-                    indication_data = redis_client.get(f"indication:{indication_key}")
-                    if indication_data:
-                        indication = indication_data.decode('utf-8') if isinstance(indication_data, bytes) else indication_data
-                        indication_list = indication.split(' | ') if indication else []
-                        print(f"[INFO] Fetched {len(indication_list)} indications for {indication_key}")
-                except Exception as e:
-                    print(f"[WARNING] Failed to fetch indication for key {indication_key}: {e}")
+            if indication_key:
+                group_indication_keys[group_key] = indication_key
             
             group = {
                 'group_id': group_key,
@@ -1706,9 +3028,9 @@ def group_search_results(
                 'generic_name': doc.get('drug_class', ''),  # Use drug_class instead of generic_name
                 'is_generic': not is_branded_product,
                 'gcn_seqno': doc.get('gcn_seqno'),
-                'indication': indication,  # From separate store
-                'indication_list': indication_list,  # Split for frontend
-                'indication_count': len(indication_list),
+                'indication': '',  # From separate store (filled in below)
+                'indication_list': [],  # Split for frontend
+                'indication_count': 0,
                 'dosage_forms': set(),
                 'match_type': match_type,
                 'match_reason': match_reason,
@@ -1728,11 +3050,10 @@ def group_search_results(
         if doc.get('dosage_form'):
             group['dosage_forms'].add(doc['dosage_form'])
         
-        # Extract strength from drug_name for better variant organization
-        strength = ''
-        strength_match = re.search(r'(\d+(?:\.\d+)?\s*(?:MG|MCG|G|ML|%|UNIT))', doc.get('drug_name', ''), re.IGNORECASE)
-        if strength_match:
-            strength = strength_match.group(1).strip()
+        # Strength label for variant organization (precomputed by the loader)
+        strength = doc.get('strength_label')
+        if strength is None:
+            strength = build_strength_label(doc.get('drug_name', ''))
         
         group['variants'].append({
             'ndc': doc.get('ndc'),
@@ -1745,6 +3066,16 @@ def group_search_results(
             'dea_schedule': doc.get('dea_schedule')
         })
     
+    # PHASE 2: Resolve all distinct indication keys in one batch and attach
+    if group_indication_keys:
+        indications = fetch_indications(set(group_indication_keys.values()), redis_client)
+        for group in groups:
+            indication = indications.get(group_indication_keys.get(group['group_id'], ''), '')
+            indication_list = indication.split(' | ') if indication else []
+            group['indication'] = indication
+            group['indication_list'] = indication_list
+            group['indication_count'] = len(indication_list)
+    
     for group in groups:
         dosage_set = group.get('dosage_forms')
         if isinstance(dosage_set, set):
@@ -1804,6 +3135,179 @@ def group_search_results(
     return groups
 
 
+def fetch_family_variants(
+    client: Any,
+    families: Any,
+    filter_clause: Optional[str],
+    return_clause: List[str],
+    existing_ndcs: set
+) -> List[Dict[str, Any]]:
+    """
+    Remaining variants of the families on a page (one FT.SEARCH on the
+    loader's family_key TAG, same filters as the page's queries).
+    
+    Skipped on indexes without family_key: groups then only hold the
+    variants their page's stream windows read.
+    """
+    if not families or 'family_key' not in get_index_attributes(client):
+        return []
+    
+    family_query = f"@family_key:{{{' | '.join(escape_tag_value(family) for family in sorted(families))}}}"
+    if filter_clause:
+        family_query = f"({filter_clause}) {family_query}"
+    try:
+        results = client.execute_command(
+            'FT.SEARCH', REDIS_INDEX_NAME,
+            family_query,
+            'RETURN', str(len(return_clause)), *return_clause,
+            'SORTBY', 'ndc', 'ASC',
+            'LIMIT', '0', str(PAGE_FAMILY_VARIANT_LIMIT),
+            'DIALECT', '2'
+        )
+    except Exception as e:
+        print(f"[WARNING] Family variant fetch failed: {e}")
+        return []
+    
+    variants = []
+    for drug in decode_search_reply(results)[1]:
+        if drug.get('ndc') in existing_ndcs:
+            continue
+        drug['similarity_score'] = None
+        drug['similarity_score_pct'] = None
+        drug['search_method'] = 'family_variant'
+        variants.append(drug)
+    return variants
+
+
+def document_family_key(doc: Dict[str, Any]) -> str:
+    """Family (group) key of a document: precomputed by the loader, derived on older indexes."""
+    return doc.get('family_key') or build_family_key(doc)
+
+
+def slice_group_page(
+    groups: List[Dict[str, Any]],
+    page: Dict[str, Any],
+    page_size: int
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Cut one page of a multi-drug search's grouped results.
+    
+    Every page regroups the same bounded (20 KNN results per drug plus one
+    expansion pass), deterministic list, so the cursor only carries the
+    number of groups already returned - it does not grow with the pages.
+    
+    Returns:
+        (page_groups, next_page) - next_page is None after the last page
+    """
+    group_offset = page['group_offset']
+    page_groups = groups[group_offset:group_offset + page_size]
+    if group_offset + page_size >= len(groups):
+        return page_groups, None
+    return page_groups, {**page, 'group_offset': group_offset + page_size}
+
+
+def build_next_page(
+    page: Dict[str, Any],
+    groups: List[Dict[str, Any]],
+    docs: List[Dict[str, Any]],
+    positions: Dict[str, int],
+    stream_windows: Dict[str, Dict[str, Any]],
+    page_size: int
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Cut one page of groups and compute the state of the next page.
+    
+    Each stream resumes at its first document whose family is not on this
+    page (so those families are regrouped next time, nothing is lost), or
+    after this page's window when every family it read was returned.
+    
+    Args:
+        docs: Every document grouped for this page
+        positions: Stream position of each document (ndc -> position)
+        stream_windows: Per stream read: window_end and exhausted
+    
+    Returns:
+        (page_groups, next_page) - next_page is None after the last page
+    """
+    page_groups = groups[:page_size]
+    returned = {group['group_id'] for group in page_groups}
+    
+    pending: Dict[str, int] = {}
+    for doc in docs:
+        position = positions.get(doc.get('ndc'))
+        if position is None or document_family_key(doc) in returned:
+            continue
+        stream = EXPANSION_STREAMS.get(doc.get('search_method'), 'knn')
+        pending[stream] = min(position, pending.get(stream, position))
+    
+    offsets = dict(page['offsets'])
+    exhausted = set(page['exhausted'])
+    for stream, window in stream_windows.items():
+        if stream in pending:
+            offsets[stream] = pending[stream]
+        else:
+            offsets[stream] = window['window_end']
+            if window['exhausted']:
+                exhausted.add(stream)
+    
+    if exhausted.issuperset(PAGINATION_STREAMS):
+        return page_groups, None
+    return page_groups, {
+        **page,
+        'offsets': offsets,
+        'exhausted': sorted(exhausted),
+        'families': page['families'] + [group['group_id'] for group in page_groups]
+    }
+
+
+def fetch_indications(indication_keys: Any, redis_client: Any = None) -> Dict[str, str]:
+    """
+    Resolve indication strings for drug families (Option A separate store).
+    
+    Serves from the in-container LRU first (keyed by index generation, so a
+    reload retires every entry); remaining keys are fetched with a single
+    MGET. Only found indications are cached - a key missing now may be
+    written by the next load.
+    
+    Returns:
+        Dict of indication_key -> indication string ('' when unknown)
+    """
+    resolved: Dict[str, str] = {}
+    missing: List[str] = []
+    
+    generation = None
+    if redis_client:
+        try:
+            generation = get_index_generation(redis_client)
+        except Exception as e:
+            print(f"[WARNING] Index generation unavailable, indication cache bypassed: {e}")
+    
+    for key in indication_keys:
+        cached = _INDICATION_CACHE.get((generation, key)) if generation is not None else None
+        if cached is None:
+            missing.append(key)
+        else:
+            resolved[key] = cached
+    
+    cached_count = len(resolved)
+    fetched_hits = 0
+    if missing and redis_client:
+        try:
+            values = redis_client.mget([f"indication:{key}" for key in missing])
+            for key, value in zip(missing, values):
+                indication = value.decode('utf-8') if isinstance(value, bytes) else (value or '')
+                resolved[key] = indication
+                if indication:
+                    fetched_hits += 1
+                    if generation is not None:
+                        _INDICATION_CACHE.set((generation, key), indication)
+        except Exception as e:
+            print(f"[WARNING] Failed to fetch indications for {len(missing)} keys: {e}")
+    
+    print(f"[INFO] Indications: {cached_count} cached, {fetched_hits}/{len(missing)} found via MGET")
+    return resolved
+
+
 def classify_match_type(
     drug: Dict[str, Any],
     tokens: List[str],
@@ -1813,15 +3317,9 @@ def classify_match_type(
     if requested_ndc and ndc == requested_ndc:
         return "exact", "Matches requested NDC"
     
-    corpus = " ".join([
-        str(drug.get('drug_name', '')).lower(),
-        str(drug.get('brand_name', '')).lower(),
-        str(drug.get('generic_name', '')).lower()
-    ])
-    
-    for token in tokens:
-        if token and token in corpus:
-            return "exact", f"Name contains \"{token}\""
+    token = get_term_matcher(tokens).first_match(document_corpus(drug))
+    if token:
+        return "exact", f"Name contains \"{token}\""
     
     if not tokens:
         return "exact", "No lexical tokens provided"
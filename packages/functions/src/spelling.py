@@ -0,0 +1,234 @@
+"""
+Drug-Name Spelling Correction
+
+Symmetric-delete (SymSpell-style) index over every distinct brand, generic
+and drug_class token in the index, so typos like "crester" → "crestor" or
+"tastosterne" → "testosterone" are fixed in-process in microseconds instead
+of by the LLM.
+
+The vocabulary is written by scripts/2025-11-20_production_load_full.py as
+one compact artifact and the delete index is built once per warm container.
+
+Redis layout:
+    lexicon:vocab  (STRING, zlib-compressed JSON {"version": ..., "tokens": {token: doc_count}})
+
+Environment Variables:
+    SPELLING_CORRECTION_ENABLED: Enable local correction (default: true)
+    SPELLING_MAX_EDIT_DISTANCE: Largest edit distance corrected (default: 2)
+    SPELLING_PREFIX_LENGTH: Prefix indexed per token (default: 7)
+"""
+
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+SPELLING_CORRECTION_ENABLED = os.environ.get('SPELLING_CORRECTION_ENABLED', 'true').lower() == 'true'
+SPELLING_MAX_EDIT_DISTANCE = int(os.environ.get('SPELLING_MAX_EDIT_DISTANCE', '2'))
+SPELLING_PREFIX_LENGTH = int(os.environ.get('SPELLING_PREFIX_LENGTH', '7'))
+SPELLING_VOCAB_KEY = 'lexicon:vocab'
+
+# Shorter words are never corrected (too many accidental neighbours)
+MIN_CORRECTION_LENGTH = 5
+# Words at least this long may be corrected at distance 2
+MIN_DISTANCE_2_LENGTH = 8
+
+_LOCK = threading.Lock()
+_SPELLER: Optional['DrugSpeller'] = None
+
+
+def serialize_vocabulary(tokens: Dict[str, int], version: str = '') -> bytes:
+    """Encode a token → document-count map as the lexicon:vocab artifact."""
+    payload = json.dumps({'version': version, 'tokens': tokens}, separators=(',', ':'))
+    return zlib.compress(payload.encode('utf-8'), 9)
+
+
+def deserialize_vocabulary(raw: bytes) -> Dict[str, Any]:
+    """Decode a lexicon:vocab artifact (see serialize_vocabulary)."""
+    return json.loads(zlib.decompress(raw).decode('utf-8'))
+
+
+def edit_distance(source: str, target: str, max_distance: int) -> int:
+    """
+    Optimal string alignment distance (Damerau-Levenshtein with adjacent
+    transpositions), abandoned early once it must exceed max_distance
+
+    Returns:
+        Distance, or max_distance + 1 if larger
+    """
+    if abs(len(source) - len(target)) > max_distance:
+        return max_distance + 1
+
+    previous_previous: List[int] = []
+    previous = list(range(len(target) + 1))
+    for i in range(1, len(source) + 1):
+        current = [i] + [0] * len(target)
+        row_min = i
+        for j in range(1, len(target) + 1):
+            cost = 0 if source[i - 1] == target[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (i > 1 and j > 1 and source[i - 1] == target[j - 2]
+                    and source[i - 2] == target[j - 1]):
+                value = min(value, previous_previous[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+
+    distance = previous[len(target)]
+    return distance if distance <= max_distance else max_distance + 1
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """All strings reachable from word by up to max_distance deletions."""
+    results = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for item in frontier:
+            if len(item) <= 1:
+                continue
+            for i in range(len(item)):
+                next_frontier.add(item[:i] + item[i + 1:])
+        results |= next_frontier
+        frontier = next_frontier
+    return results
+
+
+class DrugSpeller:
+    """Symmetric-delete index over drug-name tokens."""
+
+    def __init__(
+        self,
+        tokens: Dict[str, int],
+        max_distance: int = SPELLING_MAX_EDIT_DISTANCE,
+        prefix_length: int = SPELLING_PREFIX_LENGTH,
+        version: str = ''
+    ):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.version = version
+        self.tokens = {token.lower(): count for token, count in tokens.items() if token}
+        self._index: Dict[str, List[str]] = {}
+
+        for token in self.tokens:
+            if len(token) < MIN_CORRECTION_LENGTH - max_distance:
+                continue
+            for deleted in _deletes(token[:prefix_length], max_distance):
+                self._index.setdefault(deleted, []).append(token)
+
+    @classmethod
+    def from_names(cls, names: Iterable[str], **kwargs) -> 'DrugSpeller':
+        """Build from whole drug names (e.g. the fast-path lexicon), counting tokens."""
+        tokens: Dict[str, int] = {}
+        for name in names:
+            for token in str(name).lower().split():
+                tokens[token] = tokens.get(token, 0) + 1
+        return cls(tokens, **kwargs)
+
+    def __contains__(self, word: str) -> bool:
+        return word.lower() in self.tokens
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def correct(self, word: str) -> Optional[str]:
+        """
+        Correct a single token
+
+        Returns:
+            Closest vocabulary token (ties broken by document count), the word
+            itself if it is already known, or None if nothing is close enough
+        """
+        word = (word or '').lower()
+        if not word:
+            return None
+        if word in self.tokens:
+            return word
+        if len(word) < MIN_CORRECTION_LENGTH or not word.isalpha():
+            return None
+
+        max_distance = self.max_distance if len(word) >= MIN_DISTANCE_2_LENGTH else min(1, self.max_distance)
+        best: Optional[str] = None
+        best_key = (max_distance + 1, 0)
+        seen: Set[str] = set()
+
+        for deleted in _deletes(word[:self.prefix_length], max_distance):
+            for candidate in self._index.get(deleted, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                distance = edit_distance(word, candidate, max_distance)
+                if distance > max_distance:
+                    continue
+                key = (distance, -self.tokens[candidate])
+                if key < best_key:
+                    best, best_key = candidate, key
+
+        return best
+
+    def correct_terms(self, terms: Iterable[str]) -> Dict[str, str]:
+        """
+        Correct each unknown term
+
+        Returns:
+            {misspelled: corrected} for the terms that changed
+        """
+        corrections: Dict[str, str] = {}
+        for term in terms:
+            term = (term or '').lower()
+            if not term or term in self.tokens or term in corrections:
+                continue
+            corrected = self.correct(term)
+            if corrected and corrected != term:
+                corrections[term] = corrected
+        return corrections
+
+
+def get_drug_speller(redis_client: Any, fallback_names: Iterable[str] = ()) -> Optional[DrugSpeller]:
+    """
+    Get the container-wide speller, building it on first use
+
+    Args:
+        redis_client: Client used to read the lexicon:vocab artifact
+        fallback_names: Names to index if the artifact has not been written
+                        (e.g. the drug_lexicon fast-path lexicon)
+
+    Returns:
+        DrugSpeller, or None if disabled or no vocabulary is available
+    """
+    global _SPELLER
+
+    if not SPELLING_CORRECTION_ENABLED:
+        return None
+    if _SPELLER is not None:
+        return _SPELLER
+
+    with _LOCK:
+        if _SPELLER is not None:
+            return _SPELLER
+
+        start = time.perf_counter()
+        speller: Optional[DrugSpeller] = None
+        try:
+            raw = redis_client.get(SPELLING_VOCAB_KEY)
+            if raw:
+                artifact = deserialize_vocabulary(raw)
+                speller = DrugSpeller(artifact.get('tokens') or {}, version=artifact.get('version', ''))
+        except Exception as e:
+            print(f"[WARNING] Spelling vocabulary unavailable: {e}")
+
+        if speller is None:
+            fallback_names = list(fallback_names)
+            if not fallback_names:
+                return None
+            speller = DrugSpeller.from_names(fallback_names, version='lexicon')
+
+        _SPELLER = speller
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"[SPELLING] Indexed {len(speller)} tokens ({len(speller._index)} deletes, "
+              f"version={speller.version or 'n/a'}) in {elapsed_ms:.1f}ms")
+        return _SPELLER
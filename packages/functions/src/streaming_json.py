@@ -0,0 +1,116 @@
+"""
+Incremental JSON Object Parser
+
+The query parser's reply is one JSON object whose first fields
+(search_text, filters) are what retrieval needs; corrections and
+confidence follow. With ConverseStream the text arrives in small deltas,
+so this parser reports each top-level field as soon as its value is
+complete instead of waiting for the closing brace.
+
+- feed() is given each delta and returns the fields completed by it.
+- A value is complete at the ',' or '}' that ends it (strings, numbers,
+  nested objects / arrays alike), so it is always valid JSON on its own.
+- Text before the first '{' (e.g. a markdown fence) is skipped.
+- A value that does not parse is skipped; the caller still runs json.loads
+  on the full reply, which stays the source of truth.
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+
+class IncrementalObjectParser:
+    """Reports the top-level fields of a streamed JSON object as they complete."""
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self._buffer = ''
+        self._pos = 0
+        self._phase = 'start'  # start | key | colon | value | done
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start = 0
+
+    @property
+    def done(self) -> bool:
+        return self._phase == 'done'
+
+    def feed(self, text: str) -> Dict[str, Any]:
+        """
+        Consume the next chunk of the reply
+
+        Returns:
+            Fields whose values were completed by this chunk (in order)
+        """
+        completed: Dict[str, Any] = {}
+        if self._phase == 'done' or not text:
+            return completed
+
+        self._buffer += text
+        buffer = self._buffer
+        for i in range(self._pos, len(buffer)):
+            char = buffer[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._key_start is not None:
+                        self._key = self._loads(buffer[self._key_start:i + 1])
+                        self._key_start = None
+                        self._phase = 'colon'
+                continue
+
+            if self._phase == 'start':
+                if char == '{':
+                    self._depth = 1
+                    self._phase = 'key'
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._phase == 'key' and self._depth == 1:
+                    self._key_start = i
+            elif self._phase == 'colon':
+                if char == ':':
+                    self._phase = 'value'
+                    self._value_start = i + 1
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    if self._phase == 'value':
+                        self._complete(buffer[self._value_start:i], completed)
+                    self._phase = 'done'
+                    self._pos = i + 1
+                    return completed
+            elif char == ',' and self._depth == 1 and self._phase == 'value':
+                self._complete(buffer[self._value_start:i], completed)
+                self._phase = 'key'
+
+        self._pos = len(buffer)
+        return completed
+
+    def _complete(self, raw_value: str, completed: Dict[str, Any]) -> None:
+        value = self._loads(raw_value)
+        if isinstance(self._key, str) and value is not _INVALID:
+            self.fields[self._key] = value
+            completed[self._key] = value
+        self._key = None
+
+    @staticmethod
+    def _loads(raw: str) -> Any:
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return _INVALID
+
+
+_INVALID = object()
@@ -0,0 +1,93 @@
+"""
+Lexical Term Matching
+
+The "is this an exact match" check runs at four stages of a search
+(hybrid search, drug expansion, grouping, match classification) over the
+same documents. This module makes each of them cheap:
+
+- document_corpus(): the lowercase "drug_name brand_name generic_name"
+  string is built once per decoded document and memoized on it under
+  MATCH_CORPUS_FIELD (stripped by public_document() before serialization).
+- TermMatcher: all query terms compiled into one multi-pattern matcher, so
+  each document is scanned once instead of once per term. The scan runs in
+  the C regex engine; a pure-Python Aho-Corasick automaton measured several
+  times slower than even the per-term `in` loop at these corpus sizes
+  (see scripts/benchmark_term_matcher.py).
+"""
+
+import re
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from functions.src.cache import LRUCache
+
+MATCH_CORPUS_FIELD = '_match_corpus'
+CORPUS_FIELDS = ('drug_name', 'brand_name', 'generic_name')
+
+# Term lists repeat across stages of a request (and across requests)
+_MATCHERS = LRUCache(maxsize=256)
+
+
+def document_corpus(drug: Dict[str, Any]) -> str:
+    """Lowercase match corpus of a document (computed once, memoized on it)."""
+    corpus = drug.get(MATCH_CORPUS_FIELD)
+    if corpus is None:
+        corpus = " ".join(str(drug.get(field, '')).lower() for field in CORPUS_FIELDS)
+        drug[MATCH_CORPUS_FIELD] = corpus
+    return corpus
+
+
+def public_document(drug: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a document without memoized private fields (for the response body)."""
+    if MATCH_CORPUS_FIELD not in drug:
+        return drug
+    return {key: value for key, value in drug.items() if key != MATCH_CORPUS_FIELD}
+
+
+class TermMatcher:
+    """
+    Substring matcher for a fixed list of terms (case-insensitive).
+
+    Equivalent to `any(term in corpus for term in terms)` /
+    "first term in list order contained in corpus", with one scan per text.
+
+    Args:
+        terms: Query terms; empty terms are ignored, order is kept
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        ordered = []
+        for term in terms:
+            term = (term or '').lower()
+            if term and term not in ordered:
+                ordered.append(term)
+        self.terms: Tuple[str, ...] = tuple(ordered)
+        self._pattern = re.compile(
+            '|'.join(re.escape(term) for term in sorted(self.terms, key=len, reverse=True))
+        ) if self.terms else None
+
+    def __bool__(self) -> bool:
+        return bool(self.terms)
+
+    def matches(self, text: str) -> bool:
+        """True if any term occurs in text."""
+        return self._pattern is not None and self._pattern.search(text) is not None
+
+    def first_match(self, text: str) -> Optional[str]:
+        """First term (in list order) that occurs in text, or None."""
+        if not self.matches(text):
+            return None
+        # Only matching documents pay for the ordered check
+        for term in self.terms:
+            if term in text:
+                return term
+        return None
+
+
+def get_term_matcher(*term_lists: Optional[Iterable[str]]) -> TermMatcher:
+    """Compiled matcher for the concatenated term lists (cached per term tuple)."""
+    key = tuple(term for terms in term_lists for term in (terms or ()))
+    matcher = _MATCHERS.get(key)
+    if matcher is None:
+        matcher = TermMatcher(key)
+        _MATCHERS.set(key, matcher)
+    return matcher
@@ -6,7 +6,11 @@ Features:
 - dosage_form as TAG (normalized: CREAM, GEL, TABLET)
 - drug_class as TEXT (ROSUVASTATIN_CALCIUM format for production compatibility)
 - therapeutic_class as TAG
+- is_compounding_base as TAG (bases / non-drug items excluded by every search)
+- strength_tokens (TAG) parsed from drug_name (strength prefilter)
+- family_key (TAG) / family_display_name / strength_label precomputed for grouping
 - indication stored separately by drug family (Option A - 80%+ memory savings)
+- drug/condition token → therapeutic class map (tcmap:<generation>) for filter-only search
 - Joins rdosed2 for human-readable dosage forms
 - Joins indication tables for complete medical data
 - Only loads active drugs (OBSDTEC = '0000-00-00')
@@ -19,18 +23,35 @@ import os
 import sys
 import json
 import time
-import re
+import zlib
 from datetime import datetime
 from typing import List, Dict, Any, Set
 
 # Add packages to path
 sys.path.insert(0, '/workspaces/DAW/packages/core/src')
+sys.path.insert(0, '/workspaces/DAW/packages')
 
 import boto3
 import mysql.connector
 import redis
 import numpy as np
 from config.secrets import get_db_credentials, get_redis_config
+from functions.src.drug_lexicon import (
+    CLASS_MAP_KEY_PREFIX,
+    CLASS_SET_KEY_PREFIX,
+    LEXICON_FIELDS,
+    LEXICON_KEY_PREFIX,
+    build_family_display_name,
+    build_family_key,
+    build_strength_label,
+    class_map_tokens,
+    is_compounding_base,
+    normalize_lexicon_entry,
+    parse_strength_components,
+    strength_tokens,
+)
+from functions.src.index_generation import publish_index_generation
+from functions.src.spelling import SPELLING_VOCAB_KEY
 
 # AWS clients
 bedrock_client = boto3.client('bedrock-runtime', region_name='us-east-1')
@@ -39,6 +60,7 @@ bedrock_client = boto3.client('bedrock-runtime', region_name='us-east-1')
 PROD_KEY_PREFIX = 'drug:'  # Production prefix
 PROD_INDEX_NAME = 'drugs_idx'  # Production index
 BATCH_SIZE = 1000  # Process in batches for progress reporting
+CLASS_MAP_MAX_CLASSES = 10  # Most common therapeutic classes kept per token
 
 def connect_to_aurora():
     """Connect to Aurora MySQL using secrets utility"""
@@ -91,6 +113,23 @@ def normalize_drug_class(raw_class: str) -> str:
     
     return raw_class.strip().upper().replace(' ', '_').replace('-', '_')
 
+def normalize_strength(drug_name: str, raw_strength: str) -> Dict[str, str]:
+    """
+    Parse strength into the strength_tokens field (search prefilters on it
+    instead of regex post-filtering drug_name)
+    
+    Examples:
+        "CRESTOR 10 MG TABLET" → tokens "10MG,10"
+        "LOSARTAN-HCTZ 50-12.5 MG" → tokens "50MG,50,12.5MG,12.5"
+    
+    Every component of a combination product is tokenized; STR is only used
+    when drug_name has no strength.
+    """
+    components = parse_strength_components(drug_name) or parse_strength_components(raw_strength)
+    if not components:
+        return {}  # Omit: no strength to prefilter on
+    return {'strength_tokens': ','.join(strength_tokens(components))}
+
 def generate_embedding(text: str) -> List[float]:
     """Generate embedding using Bedrock Titan"""
     body = json.dumps({
@@ -247,6 +286,13 @@ def clear_production_data(redis_client):
     
     print(f"   ✅ Deleted {deleted_count} old indication keys")
     
+    # Class-membership sets and class maps are per generation (retired after publish)
+    
+    # Delete drug-name lexicon (rebuilt from this load)
+    lexicon_keys = [f"{LEXICON_KEY_PREFIX}{field}" for field in LEXICON_FIELDS] + [SPELLING_VOCAB_KEY]
+    redis_client.delete(*lexicon_keys)
+    print(f"   ✅ Deleted drug-name lexicon keys")
+    
     # Drop existing index
     try:
         redis_client.execute_command('FT.DROPINDEX', PROD_INDEX_NAME)
@@ -278,13 +324,16 @@ def create_production_index(redis_client):
             'is_generic', 'TAG', 'SEPARATOR', ',',
             'is_active', 'TAG', 'SEPARATOR', ',',
             'dea_schedule', 'TAG', 'SEPARATOR', ',',
+            'is_compounding_base', 'TAG', 'SEPARATOR', ',',
             'gcn_seqno', 'NUMERIC', 'SORTABLE',
+            'strength_tokens', 'TAG', 'SEPARATOR', ',',
             'manufacturer_name', 'TEXT', 'WEIGHT', '1',
             'embedding', 'VECTOR', 'HNSW', '6',
                 'TYPE', 'FLOAT32',
                 'DIM', '1024',
                 'DISTANCE_METRIC', 'COSINE',
-            'indication_key', 'TAG', 'SEPARATOR', ','
+            'indication_key', 'TAG', 'SEPARATOR', ',',
+            'family_key', 'TAG', 'SEPARATOR', '|', 'SORTABLE', 'UNF'  # GROUPBY key, original case ('|': keys may contain commas)
         )
         print(f"   ✅ Index created successfully")
     except Exception as e:
@@ -306,6 +355,31 @@ def build_indication_key(drug: Dict[str, Any]) -> str:
     else:
         return f"gcn:{drug.get('gcn_seqno', 0)}"
 
+def build_family_fields(drug: Dict[str, Any], drug_class_normalized: str) -> Dict[str, str]:
+    """
+    Precompute the result-grouping fields (drug_lexicon's build_family_key /
+    build_family_display_name / build_strength_label, as used by search_handler
+    on indexes without them)
+    
+    Examples:
+        CRESTOR 10 MG TABLET (brand) → "brand:CRESTOR", "CRESTOR", "10 MG"
+        ROSUVASTATIN CALCIUM 5 MG TABLET (generic) →
+            "generic:ROSUVASTATIN_CALCIUM", "ROSUVASTATIN_CALCIUM", "5 MG"
+    """
+    doc = {
+        'ndc': drug.get('NDC'),
+        'drug_name': drug.get('drug_name', ''),
+        'brand_name': drug.get('brand_name', ''),
+        'generic_name': drug.get('generic_name', ''),
+        'drug_class': drug_class_normalized,
+        'is_generic': drug.get('is_generic', 'true'),
+    }
+    return {
+        'family_key': build_family_key(doc),
+        'family_display_name': build_family_display_name(doc),
+        'strength_label': build_strength_label(doc['drug_name'])
+    }
+
 def store_indications_by_family(redis_client, drugs: List[Dict[str, Any]], indication_map: Dict[int, str]):
     """
     Store indications separately by drug family (Option A)
@@ -335,6 +409,133 @@ def store_indications_by_family(redis_client, drugs: List[Dict[str, Any]], indic
     print(f"   ✅ Stored {len(family_indications)} unique family indications")
     print(f"   💾 Memory savings: ~{len(drugs) - len(family_indications)} redundant entries avoided")
 
+def store_class_membership(redis_client, drugs: List[Dict[str, Any]], generation: int):
+    """
+    Store per-class NDC sets for the 'sets' expansion engine (search_handler),
+    written under the generation this load publishes:
+        cls:<generation>:dc:<DRUG_CLASS>          drug_class as stored on the drug hash
+        cls:<generation>:tc:<THERAPEUTIC_CLASS>   therapeutic_class as stored on the drug hash
+    
+    Each set is rebuilt (DEL + SADD in the same pipeline), so an NDC that was
+    reclassified never lingers in its old class; older generations are
+    expired by publish_index_generation once the new generation is live.
+    """
+    print("\n🧩 Storing class-membership sets...")
+    
+    prefix = f"{CLASS_SET_KEY_PREFIX}{generation}:"
+    members: Dict[str, List[str]] = {}
+    for drug in drugs:
+        drug_class = normalize_drug_class(drug.get('drug_class', ''))
+        therapeutic_class = (drug.get('therapeutic_class') or '').strip()
+        if drug_class:
+            members.setdefault(f"{prefix}dc:{drug_class}", []).append(drug['NDC'])
+        if therapeutic_class:
+            members.setdefault(f"{prefix}tc:{therapeutic_class}", []).append(drug['NDC'])
+    
+    pipe = redis_client.pipeline(transaction=False)
+    for i, (key, ndcs) in enumerate(members.items(), 1):
+        pipe.delete(key)
+        pipe.sadd(key, *ndcs)
+        if i % BATCH_SIZE == 0:
+            pipe.execute()
+    pipe.execute()
+    
+    dc_count = sum(1 for key in members if key.startswith(f"{prefix}dc:"))
+    print(f"   ✅ Stored {dc_count} drug_class and {len(members) - dc_count} therapeutic_class sets under {prefix}*")
+
+def store_drug_lexicon(redis_client, drugs: List[Dict[str, Any]]):
+    """
+    Store the drug-name lexicon used by the search fast path
+    (functions/src/drug_lexicon.py): one SET of lowercase names per field,
+    plus the compressed token vocabulary for the speller (functions/src/spelling.py)
+    """
+    print("\n📖 Storing drug-name lexicon...")
+    
+    lexicon: Dict[str, Set[str]] = {field: set() for field in LEXICON_FIELDS}
+    token_counts: Dict[str, int] = {}
+    for drug in drugs:
+        drug_tokens: Set[str] = set()
+        for field in LEXICON_FIELDS:
+            value = drug.get(field) or ''
+            if field == 'drug_class':
+                value = normalize_drug_class(value)
+            value = normalize_lexicon_entry(value)
+            if value:
+                lexicon[field].add(value)
+                drug_tokens.update(value.split())
+        for token in drug_tokens:
+            token_counts[token] = token_counts.get(token, 0) + 1
+    
+    pipe = redis_client.pipeline(transaction=False)
+    for field, names in lexicon.items():
+        key = f"{LEXICON_KEY_PREFIX}{field}"
+        pipe.delete(key)
+        names = sorted(names)
+        for i in range(0, len(names), BATCH_SIZE):
+            pipe.sadd(key, *names[i:i + BATCH_SIZE])
+        print(f"   {field}: {len(names)} names")
+    
+    # Spelling vocabulary artifact (functions/src/spelling.py): token → NDC count
+    vocab_payload = json.dumps({
+        'version': datetime.now().strftime('%Y%m%d%H%M%S'),
+        'tokens': token_counts
+    }, separators=(',', ':'))
+    vocab_artifact = zlib.compress(vocab_payload.encode('utf-8'), 9)
+    pipe.set(SPELLING_VOCAB_KEY, vocab_artifact)
+    print(f"   vocab: {len(token_counts)} tokens ({len(vocab_artifact) / 1024:.1f} KB compressed)")
+    pipe.execute()
+    
+    print(f"   ✅ Stored lexicon ({sum(len(names) for names in lexicon.values())} names)")
+
+def store_therapeutic_class_map(redis_client, drugs: List[Dict[str, Any]],
+                                indication_map: Dict[int, str], generation: int):
+    """
+    Store the drug/condition token → therapeutic class map read by
+    redis_filter_only_search (one HMGET instead of a prefix FT.SEARCH per term):
+        tcmap:<generation>   HASH token → "class|class|..."
+    
+    Tokens come from brand/generic/drug class names and product names (first
+    word of drug_name), and from the FDB indication descriptions
+    (rindmgc0 → rindmma2 → rfmldx0) of each drug's GCN. Each token keeps its
+    CLASS_MAP_MAX_CLASSES most common therapeutic classes (by NDC count).
+    """
+    print("\n🗺️  Storing therapeutic class map...")
+    
+    class_counts: Dict[str, Dict[str, int]] = {}
+    for drug in drugs:
+        therapeutic_class = (drug.get('therapeutic_class') or '').strip()
+        if not therapeutic_class or is_compounding_base(drug.get('drug_class', ''), drug['drug_name']):
+            continue
+        
+        sources = [drug.get('brand_name'), drug.get('generic_name'), drug.get('drug_class')]
+        sources.append((drug.get('drug_name') or '').split(' ')[0])
+        indication = indication_map.get(drug.get('gcn_seqno'))
+        if indication:
+            sources.extend(indication.split(' | '))
+        
+        tokens: Set[str] = set()
+        for source in sources:
+            tokens.update(class_map_tokens(source))
+        for token in tokens:
+            counts = class_counts.setdefault(token, {})
+            counts[therapeutic_class] = counts.get(therapeutic_class, 0) + 1
+    
+    key = f"{CLASS_MAP_KEY_PREFIX}{generation}"
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.delete(key)
+    mapping: Dict[str, str] = {}
+    for token, counts in class_counts.items():
+        top = sorted(counts, key=lambda tc: (-counts[tc], tc))[:CLASS_MAP_MAX_CLASSES]
+        mapping[token] = '|'.join(top)
+        if len(mapping) == BATCH_SIZE:
+            pipe.hset(key, mapping=mapping)
+            mapping = {}
+    if mapping:
+        pipe.hset(key, mapping=mapping)
+    pipe.execute()
+    
+    print(f"   ✅ Stored {len(class_counts)} tokens in {key}")
+
 def load_drugs_to_redis(redis_client, drugs: List[Dict[str, Any]], indication_map: Dict[int, str]):
     """Load drugs into Redis with embeddings"""
     print(f"\n🚀 Loading {len(drugs)} drugs to Redis...")
@@ -380,12 +581,15 @@ def load_drugs_to_redis(redis_client, drugs: List[Dict[str, Any]], indication_ma
                 'therapeutic_class': drug.get('therapeutic_class', ''),
                 'dosage_form': dosage_form,
                 'strength': drug.get('strength', ''),
+                **normalize_strength(drug['drug_name'], drug.get('strength', '')),
                 'manufacturer_name': drug.get('manufacturer_name', ''),
                 'is_generic': drug.get('is_generic', 'unknown'),
                 'is_active': drug.get('is_active', 'true'),
                 'dea_schedule': drug.get('dea_schedule', ''),
+                'is_compounding_base': 'true' if is_compounding_base(drug_class_normalized, drug['drug_name']) else 'false',
                 'gcn_seqno': str(drug.get('gcn_seqno', 0)),
                 'indication_key': indication_key,
+                **build_family_fields(drug, drug_class_normalized),
                 'embedding': embedding_bytes
             })
             
@@ -498,6 +702,19 @@ def main():
         # Load drugs
         load_drugs_to_redis(redis_client, drugs, indication_map)
         
+        # Drug-name lexicon (search fast path)
+        store_drug_lexicon(redis_client, drugs)
+        
+        # Class-membership sets ('sets' expansion engine) and token → therapeutic
+        # class map, both written under the generation this load publishes;
+        # publishing also retires cached /search responses
+        def store_versioned(generation: int):
+            store_class_membership(redis_client, drugs, generation)
+            store_therapeutic_class_map(redis_client, drugs, indication_map, generation)
+        
+        generation = publish_index_generation(redis_client, store_versioned)
+        print(f"\n🔄 Index generation bumped to {generation}")
+        
         # Verify
         verify_load(redis_client)
         
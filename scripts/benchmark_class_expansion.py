@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Class Expansion Engine Benchmark
+
+Compares the two drug_class / therapeutic_class expansion engines in
+search_handler against a live Redis:
+- search: FT.SEARCH @drug_class:(...) / @therapeutic_class:{...} (pipelined)
+- sets:   SUNION of cls:<generation>:dc:/tc: member sets + pipelined HMGET
+
+Seed drugs are looked up by name, their classes expanded by both engines
+(with and without a dosage_form filter) and latency percentiles reported.
+
+Requires the class-membership sets written by
+scripts/2025-11-20_production_load_full.py (store_class_membership).
+
+Usage:
+    REDIS_HOST=... REDIS_PASSWORD=... python scripts/benchmark_class_expansion.py
+"""
+
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'packages'))
+
+from functions.src.cache.response_cache import get_index_generation  # noqa: E402
+from functions.src.config.redis_config import get_redis_client  # noqa: E402
+from functions.src.redis_reply import decode_search_reply  # noqa: E402
+from functions.src.search_handler import (  # noqa: E402
+    REDIS_INDEX_NAME,
+    THERAPEUTIC_CLASS_BLACKLIST,
+    build_filter_clause,
+    get_index_attributes,
+    run_class_expansion_search,
+    run_class_expansion_sets,
+)
+
+SEED_DRUGS = ['crestor', 'lisinopril', 'metformin', 'testosterone', 'amlodipine', 'sertraline']
+FILTER_CASES = [{}, {'dosage_form': 'tablet'}]
+RUNS = 20
+LIMIT = 100
+
+RETURN_FIELDS = [
+    'ndc', 'drug_name', 'brand_name', 'generic_name',
+    'is_generic', 'dosage_form', 'dea_schedule', 'gcn_seqno',
+    'indication', 'drug_class', 'therapeutic_class', 'manufacturer_name',
+    'indication_key'
+]
+
+
+def seed_classes(client, term: str) -> Tuple[set, set]:
+    """Find the drug_class / therapeutic_class values of a seed drug."""
+    results = client.execute_command(
+        'FT.SEARCH', REDIS_INDEX_NAME,
+        f'(@drug_name:{term}* | @brand_name:{term}* | @generic_name:{term}*)',
+        'RETURN', '2', 'drug_class', 'therapeutic_class',
+        'LIMIT', '0', '20',
+        'DIALECT', '2'
+    )
+    drug_classes, therapeutic_classes = set(), set()
+    for doc in decode_search_reply(results)[1]:
+        if doc.get('drug_class'):
+            drug_classes.add(doc['drug_class'].strip())
+        if doc.get('therapeutic_class') and doc['therapeutic_class'] not in THERAPEUTIC_CLASS_BLACKLIST:
+            therapeutic_classes.add(doc['therapeutic_class'].strip())
+    return drug_classes, therapeutic_classes
+
+
+def time_engine(client, engine: str, drug_classes: set, therapeutic_classes: set,
+                filters: Dict[str, Any]) -> Tuple[List[float], int]:
+    """Run one engine RUNS times; returns (latencies_ms, drugs added)."""
+    filter_clause, applied_filters = build_filter_clause(filters, get_index_attributes(client))
+    return_clause: List[str] = []
+    for field in RETURN_FIELDS:
+        return_clause.extend([field, field])
+
+    latencies = []
+    added = 0
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        if engine == 'search':
+            drugs, _ = run_class_expansion_search(
+                client, drug_classes, therapeutic_classes,
+                filter_clause, return_clause, LIMIT, set()
+            )
+        else:
+            drugs, _ = run_class_expansion_sets(
+                client, drug_classes, therapeutic_classes,
+                applied_filters, return_clause, LIMIT, set()
+            )
+        latencies.append((time.perf_counter() - start) * 1000)
+        added = len(drugs)
+    return latencies, added
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    print("=" * 80)
+    print("CLASS EXPANSION ENGINE BENCHMARK")
+    print("=" * 80)
+
+    client = get_redis_client()
+    set_pattern = f"cls:{get_index_generation(client)}:dc:*"
+    if next(client.scan_iter(match=set_pattern, count=1000), None) is None:
+        print(f"❌ No {set_pattern} sets found - run the production loader first")
+        sys.exit(1)
+
+    print(f"{'seed':<14}{'filters':<24}{'engine':<8}{'p50 ms':>9}{'p95 ms':>9}{'drugs':>8}")
+    totals: Dict[str, List[float]] = {'search': [], 'sets': []}
+
+    for term in SEED_DRUGS:
+        drug_classes, therapeutic_classes = seed_classes(client, term)
+        if not drug_classes and not therapeutic_classes:
+            print(f"{term:<14}(no classes found, skipped)")
+            continue
+
+        for filters in FILTER_CASES:
+            for engine in ('search', 'sets'):
+                latencies, added = time_engine(client, engine, drug_classes, therapeutic_classes, filters)
+                totals[engine].extend(latencies)
+                print(f"{term:<14}{str(filters or '-'):<24}{engine:<8}"
+                      f"{statistics.median(latencies):>9.2f}{percentile(latencies, 95):>9.2f}{added:>8}")
+
+    print("\nOverall:")
+    for engine, latencies in totals.items():
+        if latencies:
+            print(f"   {engine:<8} p50={statistics.median(latencies):.2f}ms "
+                  f"p95={percentile(latencies, 95):.2f}ms (n={len(latencies)})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Result Grouping Engine Benchmark
+
+Compares the two grouping engines of redis_hybrid_search against a live
+Redis:
+- python:    therapeutic_class expansion fetched with FT.SEARCH (every
+             document's fields) and grouped into families in the Lambda
+- aggregate: therapeutic_class expansion grouped server-side with
+             FT.AGGREGATE ... GROUPBY 1 @family_key (one row per family)
+
+For each seed drug the search uses the seed's stored embedding (no
+Bedrock call), checks that both engines return identical groups and
+reports latency percentiles and response payload size.
+
+Requires an index loaded by scripts/2025-11-20_production_load_full.py
+(family_key / is_compounding_base fields).
+
+Usage:
+    REDIS_HOST=... REDIS_PASSWORD=... python scripts/benchmark_grouping_engines.py
+"""
+
+import json
+import statistics
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'packages'))
+
+from functions.src.config.redis_config import get_redis_client  # noqa: E402
+from functions.src.redis_reply import decode_search_reply  # noqa: E402
+from functions.src.search_handler import (  # noqa: E402
+    REDIS_INDEX_NAME,
+    get_index_attributes,
+    redis_hybrid_search,
+)
+
+SEED_DRUGS = ['crestor', 'lisinopril', 'metformin', 'amlodipine', 'sertraline', 'gabapentin']
+FILTER_CASES = [{}, {'dosage_form': 'tablet'}]
+ENGINES = ('python', 'aggregate')
+RUNS = 20
+LIMIT = 60
+
+
+def seed_embedding(client, term: str) -> Optional[List[float]]:
+    """Stored embedding of the first document matching a seed drug."""
+    results = client.execute_command(
+        'FT.SEARCH', REDIS_INDEX_NAME,
+        f'(@drug_name:{term}* | @brand_name:{term}*)',
+        'RETURN', '1', 'ndc',
+        'LIMIT', '0', '1',
+        'DIALECT', '2'
+    )
+    docs = decode_search_reply(results)[1]
+    if not docs:
+        return None
+    raw = client.hget(f"drug:{docs[0]['ndc']}", 'embedding')
+    if not raw:
+        return None
+    return list(struct.unpack(f'{len(raw) // 4}f', raw))
+
+
+def time_engine(client, engine: str, embedding: List[float], term: str,
+                filters: Dict[str, Any]) -> Tuple[List[float], Dict[str, Any], int]:
+    """Run one engine RUNS times; returns (latencies_ms, last result, payload bytes)."""
+    latencies = []
+    result: Dict[str, Any] = {}
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        result = redis_hybrid_search(
+            embedding, [term], [term], filters,
+            limit=LIMIT, redis_client=client, grouping_engine=engine
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+    payload = len(json.dumps({'groups': result.get('groups'), 'raw_results': result.get('raw_results')}, default=str))
+    return latencies, result, payload
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    print("=" * 80)
+    print("RESULT GROUPING ENGINE BENCHMARK")
+    print("=" * 80)
+
+    client = get_redis_client()
+    if 'family_key' not in get_index_attributes(client):
+        print("❌ Index has no family_key field - run the production loader first")
+        sys.exit(1)
+
+    print(f"{'seed':<12}{'filters':<24}{'engine':<11}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'groups':>8}{'variants':>10}{'bytes':>10}")
+    totals: Dict[str, List[float]] = {engine: [] for engine in ENGINES}
+    mismatches = 0
+
+    for term in SEED_DRUGS:
+        embedding = seed_embedding(client, term)
+        if embedding is None:
+            print(f"{term:<12}(no embedded document found, skipped)")
+            continue
+
+        for filters in FILTER_CASES:
+            groups_by_engine = {}
+            for engine in ENGINES:
+                latencies, result, payload = time_engine(client, engine, embedding, term, filters)
+                if not result.get('success'):
+                    print(f"{term:<12}{engine}: {result.get('error')}")
+                    continue
+                used = result.get('expansion_debug', {}).get('grouping_engine', engine)
+                totals[engine].extend(latencies)
+                groups = result['groups']
+                groups_by_engine[engine] = groups
+                variants = sum(len(group['variants']) for group in groups)
+                print(f"{term:<12}{str(filters or '-'):<24}{used:<11}"
+                      f"{statistics.median(latencies):>9.2f}{percentile(latencies, 95):>9.2f}"
+                      f"{len(groups):>8}{variants:>10}{payload:>10}")
+
+            if len(groups_by_engine) == len(ENGINES) and groups_by_engine['python'] != groups_by_engine['aggregate']:
+                mismatches += 1
+                print(f"   ⚠️  groups differ between engines for {term} {filters or ''}")
+
+    print("\nOverall:")
+    for engine, latencies in totals.items():
+        if latencies:
+            print(f"   {engine:<10} p50={statistics.median(latencies):.2f}ms "
+                  f"p95={percentile(latencies, 95):.2f}ms (n={len(latencies)})")
+    print(f"   group mismatches: {mismatches}")
+
+
+if __name__ == '__main__':
+    main()
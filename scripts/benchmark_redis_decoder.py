@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+FT.SEARCH Reply Decoder Micro-Benchmark
+
+Measures the per-result cost of decoding a 300-document FT.SEARCH reply:
+- legacy:  the field-pair loop previously copy-pasted across the handlers
+- decoder: functions.src.redis_reply.decode_search_reply
+
+Replies are synthetic (no Redis needed) and cover RESP2 bytes (default
+redis-py / hiredis), RESP2 str (decode_responses=True) and RESP3 maps.
+
+Usage:
+    python scripts/benchmark_redis_decoder.py [num_docs] [iterations]
+"""
+
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'packages'))
+
+from functions.src.redis_reply import decode_search_reply  # noqa: E402
+
+NUM_DOCS = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+ITERATIONS = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+# Same RETURN fields as redis_hybrid_search
+SAMPLE_DOC = {
+    'ndc': '00310075190',
+    'drug_name': 'CRESTOR 10 MG TABLET',
+    'brand_name': 'CRESTOR',
+    'generic_name': 'rosuvastatin calcium',
+    'is_generic': 'false',
+    'dosage_form': 'TABLET',
+    'dea_schedule': '',
+    'gcn_seqno': '51784',
+    'drug_class': 'ROSUVASTATIN_CALCIUM',
+    'therapeutic_class': 'Antihyperlipidemic - HMG CoA Reductase Inhibitors (statins)',
+    'manufacturer_name': 'ASTRAZENECA',
+    'score': '0.1834',
+    'indication_key': 'brand:CRESTOR',
+}
+
+
+def build_resp2(as_bytes: bool) -> List[Any]:
+    encode = (lambda value: value.encode('utf-8')) if as_bytes else (lambda value: value)
+    reply: List[Any] = [NUM_DOCS]
+    for i in range(NUM_DOCS):
+        reply.append(encode(f"drug:{i:011d}"))
+        fields: List[Any] = []
+        for name, value in SAMPLE_DOC.items():
+            fields.extend([encode(name), encode(value if name != 'ndc' else f"{i:011d}")])
+        reply.append(fields)
+    return reply
+
+
+def build_resp3() -> Dict[bytes, Any]:
+    results = []
+    for i in range(NUM_DOCS):
+        attributes = {
+            name.encode('utf-8'): (value if name != 'ndc' else f"{i:011d}").encode('utf-8')
+            for name, value in SAMPLE_DOC.items()
+        }
+        results.append({b'id': f"drug:{i:011d}".encode('utf-8'), b'extra_attributes': attributes, b'values': []})
+    return {b'attributes': [], b'format': b'STRING', b'results': results,
+            b'total_results': NUM_DOCS, b'warning': []}
+
+
+def legacy_decode(results: List[Any]) -> List[Dict[str, Any]]:
+    """The pre-existing per-handler loop (kept here only for comparison)."""
+    drugs = []
+    for i in range(1, len(results), 2):
+        if i + 1 >= len(results):
+            break
+        fields = results[i + 1]
+        drug: Dict[str, Any] = {}
+        for j in range(0, len(fields), 2):
+            if j + 1 >= len(fields):
+                continue
+            field_name = fields[j].decode('utf-8') if isinstance(fields[j], bytes) else fields[j]
+            field_value = fields[j + 1]
+            if isinstance(field_value, bytes):
+                value = field_value.decode('utf-8')
+            else:
+                value = field_value
+            drug[field_name] = value
+        drugs.append(drug)
+    return drugs
+
+
+def bench(label: str, func, reply) -> float:
+    func(reply)  # warm up (interns field names)
+    timings = []
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        func(reply)
+        timings.append(time.perf_counter() - start)
+    per_result_us = statistics.median(timings) / NUM_DOCS * 1e6
+    print(f"   {label:<28} {statistics.median(timings) * 1000:8.3f} ms/reply   {per_result_us:6.3f} µs/result")
+    return per_result_us
+
+
+def main():
+    print("=" * 80)
+    print(f"FT.SEARCH DECODER BENCHMARK ({NUM_DOCS} docs x {len(SAMPLE_DOC)} fields, {ITERATIONS} iterations)")
+    print("=" * 80)
+
+    resp2_bytes = build_resp2(as_bytes=True)
+    resp2_str = build_resp2(as_bytes=False)
+    resp3 = build_resp3()
+
+    # Sanity check: both decoders agree
+    assert legacy_decode(resp2_bytes) == decode_search_reply(resp2_bytes)[1]
+    assert decode_search_reply(resp3)[1] == decode_search_reply(resp2_bytes)[1]
+
+    print("\nRESP2, bytes (decode_responses=False):")
+    legacy = bench('legacy loop', legacy_decode, resp2_bytes)
+    decoder = bench('decode_search_reply', lambda r: decode_search_reply(r), resp2_bytes)
+    print(f"   speedup: {legacy / decoder:.2f}x")
+
+    print("\nRESP2, str (decode_responses=True):")
+    legacy = bench('legacy loop', legacy_decode, resp2_str)
+    decoder = bench('decode_search_reply', lambda r: decode_search_reply(r), resp2_str)
+    print(f"   speedup: {legacy / decoder:.2f}x")
+
+    print("\nRESP3 map:")
+    bench('decode_search_reply', lambda r: decode_search_reply(r), resp3)
+
+
+if __name__ == '__main__':
+    main()
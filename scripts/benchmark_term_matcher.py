@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Exact-Match Check Micro-Benchmark
+
+Measures the lexical "is this an exact match" work a search does over a
+500-document expansion - hybrid search, drug expansion, grouping pass 1
+and classify_match_type each checking every document:
+- legacy:   corpus rebuilt at every stage + any(term in corpus ...)
+- matcher:  corpus memoized per document + one compiled TermMatcher
+- aho-corasick: a pure-Python automaton, for reference (match scan only)
+
+Documents are synthetic (no Redis needed).
+
+Usage:
+    python scripts/benchmark_term_matcher.py [num_docs] [iterations]
+"""
+
+import random
+import statistics
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'packages'))
+
+from functions.src.term_matcher import (  # noqa: E402
+    MATCH_CORPUS_FIELD,
+    document_corpus,
+    get_term_matcher,
+)
+
+NUM_DOCS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+ITERATIONS = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+PRODUCTS = [
+    ('CRESTOR 10 MG TABLET', 'CRESTOR', 'rosuvastatin calcium'),
+    ('ROSUVASTATIN CALCIUM 20 MG TABLET', '', 'rosuvastatin calcium'),
+    ('LIPITOR 40 MG TABLET', 'LIPITOR', 'atorvastatin calcium'),
+    ('ATORVASTATIN CALCIUM 10 MG TABLET', '', 'atorvastatin calcium'),
+    ('ZOCOR 20 MG TABLET', 'ZOCOR', 'simvastatin'),
+    ('PRAVASTATIN SODIUM 40 MG TABLET', '', 'pravastatin sodium'),
+    ('LIVALO 2 MG TABLET', 'LIVALO', 'pitavastatin calcium'),
+    ('EZETIMIBE 10 MG TABLET', '', 'ezetimibe'),
+]
+
+TERM_CASES = {
+    'single drug (1 term)': ['crestor'],
+    'condition (4 terms)': ['statin', 'atorvastatin', 'rosuvastatin', 'simvastatin'],
+    'multi-drug (12 terms)': [
+        'atorvastatin', 'rosuvastatin', 'simvastatin', 'pravastatin', 'lovastatin',
+        'fluvastatin', 'pitavastatin', 'ezetimibe', 'crestor', 'lipitor', 'zocor', 'livalo'
+    ],
+}
+
+
+def build_docs() -> List[Dict[str, Any]]:
+    random.seed(7)
+    docs = []
+    for i in range(NUM_DOCS):
+        drug_name, brand_name, generic_name = random.choice(PRODUCTS)
+        docs.append({'ndc': f"{i:011d}", 'drug_name': drug_name,
+                     'brand_name': brand_name, 'generic_name': generic_name})
+    return docs
+
+
+def legacy_corpus(drug: Dict[str, Any]) -> str:
+    return " ".join([
+        str(drug.get('drug_name', '')).lower(),
+        str(drug.get('brand_name', '')).lower(),
+        str(drug.get('generic_name', '')).lower()
+    ])
+
+
+def legacy_request(docs: List[Dict[str, Any]], terms: List[str]) -> int:
+    """The four per-stage loops as they were before term_matcher."""
+    lowered = [term.lower() for term in terms]
+    hits = 0
+    for _stage in range(3):  # hybrid search, expansion, grouping pass 1
+        for drug in docs:
+            corpus = legacy_corpus(drug)
+            hits += any(term and term.lower() in corpus for term in terms)
+    for drug in docs:  # classify_match_type
+        corpus = legacy_corpus(drug)
+        for token in lowered:
+            if token and token in corpus:
+                hits += 1
+                break
+    return hits
+
+
+def matcher_request(docs: List[Dict[str, Any]], terms: List[str]) -> int:
+    for drug in docs:  # Fresh decode per request
+        drug.pop(MATCH_CORPUS_FIELD, None)
+    hits = 0
+    for _stage in range(3):
+        matcher = get_term_matcher(terms)
+        for drug in docs:
+            hits += matcher.matches(document_corpus(drug))
+    matcher = get_term_matcher([term.lower() for term in terms])
+    for drug in docs:
+        hits += matcher.first_match(document_corpus(drug)) is not None
+    return hits
+
+
+class AhoCorasick:
+    """Textbook automaton (goto / fail / output), pure Python."""
+
+    def __init__(self, terms: List[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail = [0]
+        self.output = [False]
+        for term in terms:
+            state = 0
+            for char in term.lower():
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(False)
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state] = True
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] = self.output[child] or self.output[self.fail[child]]
+
+    def matches(self, text: str) -> bool:
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                return True
+        return False
+
+
+def aho_corasick_request(docs: List[Dict[str, Any]], terms: List[str]) -> int:
+    automaton = AhoCorasick(terms)
+    return sum(automaton.matches(document_corpus(drug)) for _stage in range(4) for drug in docs)
+
+
+def bench(label: str, func, docs, terms) -> float:
+    func(docs, terms)  # warm up
+    timings = []
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        func(docs, terms)
+        timings.append(time.perf_counter() - start)
+    median_ms = statistics.median(timings) * 1000
+    print(f"   {label:<16} {median_ms:8.3f} ms/request")
+    return median_ms
+
+
+def main():
+    print("=" * 80)
+    print(f"EXACT-MATCH CHECK BENCHMARK ({NUM_DOCS} docs x 4 stages, {ITERATIONS} iterations)")
+    print("=" * 80)
+
+    docs = build_docs()
+    for case, terms in TERM_CASES.items():
+        assert legacy_request(docs, terms) == matcher_request(docs, terms)
+        print(f"\n{case}:")
+        legacy = bench('legacy', legacy_request, docs, terms)
+        matcher = bench('matcher', matcher_request, docs, terms)
+        bench('aho-corasick', aho_corasick_request, docs, terms)
+        print(f"   speedup (matcher vs legacy): {legacy / matcher:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
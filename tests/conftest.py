@@ -0,0 +1,15 @@
+"""
+Shared pytest setup.
+
+Lambda code is imported the way the bundle ships it (functions.src...), so
+packages/ goes on sys.path, as in the scripts under scripts/.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'packages'))
+
+# search_handler builds its Bedrock client at import unless told not to
+os.environ.setdefault('BEDROCK_CLIENT_PREWARM_ENABLED', 'false')
@@ -0,0 +1,75 @@
+"""Tests for the cached AWS client registry (core/src/config/llm_config.py)."""
+
+import threading
+
+import boto3
+import pytest
+
+from core.src.config import llm_config
+
+
+class FakeSession:
+    created = []
+
+    def client(self, service, region_name=None, config=None):
+        if service == 'broken':
+            raise ValueError('Unknown service')
+        client = (service, region_name, config)
+        FakeSession.created.append(client)
+        return client
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    FakeSession.created = []
+    monkeypatch.setattr(boto3.session, 'Session', FakeSession)
+    monkeypatch.setattr(llm_config, '_CLIENTS', {})
+    monkeypatch.setattr(llm_config, '_CLIENT_STATS', {'clients_created': 0, 'construction_ms': 0.0})
+
+
+def test_client_is_built_once_per_service_and_region():
+    first, _ = llm_config.get_aws_client('bedrock-runtime')
+    again, construction_ms = llm_config.get_aws_client('bedrock-runtime')
+    other_region, _ = llm_config.get_aws_client('bedrock-runtime', 'eu-west-1')
+
+    assert again is first and construction_ms == 0.0
+    assert other_region is not first and other_region[1] == 'eu-west-1'
+    assert first[1] == llm_config.BEDROCK_REGION
+    assert llm_config.get_client_stats()['clients_cached'] == 2
+    assert llm_config.get_client_stats()['clients_created'] == 2
+
+
+def test_clients_use_the_shared_timeout_and_retry_config():
+    client, _ = llm_config.get_aws_client('bedrock-runtime')
+    config = client[2]
+
+    assert config.read_timeout == llm_config.AWS_CLIENT_CONFIG['read_timeout']
+    assert config.retries == {
+        'max_attempts': llm_config.AWS_CLIENT_CONFIG['max_attempts'],
+        'mode': llm_config.AWS_CLIENT_CONFIG['retry_mode'],
+    }
+
+
+def test_concurrent_first_calls_build_one_client():
+    barrier = threading.Barrier(8)
+    clients = []
+
+    def get_client():
+        barrier.wait()
+        clients.append(llm_config.get_bedrock_client())
+
+    threads = [threading.Thread(target=get_client) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(FakeSession.created) == 1
+    assert all(client is clients[0] for client in clients)
+
+
+def test_prewarm_reports_timings_and_skips_failures():
+    timings = llm_config.prewarm_bedrock_clients(('bedrock-runtime', 'broken'))
+
+    assert list(timings) == ['bedrock-runtime']
+    assert llm_config.prewarm_bedrock_clients(('bedrock-runtime',)) == {'bedrock-runtime': 0.0}
@@ -0,0 +1,306 @@
+"""Tests for drug_class / therapeutic_class expansion (functions/src/search_handler.py)."""
+
+import pytest
+
+from functions.src import search_handler
+
+RETURN_CLAUSE = ['ndc', 'ndc', 'drug_name', 'drug_name', 'drug_class', 'drug_class',
+                 'therapeutic_class', 'therapeutic_class']
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def execute_command(self, *args):
+        self.commands.append(args)
+
+    def execute(self, raise_on_error=True):
+        self.client.round_trips.append(self.commands)
+        return [self.client.reply_for(command) for command in self.commands]
+
+
+class SearchRedis:
+    def __init__(self, replies):
+        self.replies = replies
+        self.round_trips = []
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def reply_for(self, command):
+        field = command[2].split('@')[-1].split(':')[0]
+        return self.replies[field]
+
+
+def _search_reply(*ndcs):
+    reply = [len(ndcs)]
+    for ndc in ndcs:
+        reply.extend([f"drug:{ndc}".encode(), [b'ndc', ndc.encode(), b'drug_name', b'DRUG']])
+    return reply
+
+
+@pytest.fixture
+def search_engine(monkeypatch):
+    monkeypatch.setattr(search_handler, 'EXPANSION_ENGINE', 'search')
+
+
+def test_both_class_queries_share_one_round_trip(search_engine):
+    client = SearchRedis({'drug_class': _search_reply('1', '2'), 'therapeutic_class': _search_reply('2', '3')})
+
+    drugs, debug = search_handler.run_class_expansion(
+        client, drug_classes={'statin'}, therapeutic_classes={'HMG-CoA Reductase Inhibitors'},
+        filter_clause='@is_active:{true}', applied_filters={}, return_clause=RETURN_CLAUSE,
+        limit=10, existing_ndcs={'1'}
+    )
+
+    assert len(client.round_trips) == 1
+    queries = [command[2] for command in client.round_trips[0]]
+    assert queries == [
+        '(@is_active:{true}) @drug_class:("statin")',
+        '(@is_active:{true}) @therapeutic_class:{HMG\\-CoA\\ Reductase\\ Inhibitors}',
+    ]
+    assert all(command[command.index('SORTBY') + 1] == 'ndc' for command in client.round_trips[0])
+    assert [(drug['ndc'], drug['search_method']) for drug in drugs] == [
+        ('2', 'drug_class_filter'), ('3', 'therapeutic_class_filter'),
+    ]
+    assert debug['engine'] == 'search'
+    assert debug['drug_class']['added'] == 1 and debug['therapeutic_class']['added'] == 1
+
+
+def test_failed_class_query_keeps_the_other(search_engine):
+    client = SearchRedis({'drug_class': Exception('timeout'), 'therapeutic_class': _search_reply('3')})
+
+    drugs, debug = search_handler.run_class_expansion(
+        client, drug_classes={'statin'}, therapeutic_classes={'Lipid Agents'}, filter_clause=None,
+        applied_filters={}, return_clause=RETURN_CLAUSE, limit=10, existing_ndcs=set()
+    )
+
+    assert [drug['ndc'] for drug in drugs] == ['3']
+    assert debug['drug_class']['error'] == 'timeout' and debug['drug_class']['exhausted'] is True
+
+
+def test_stream_offsets_and_positions_are_reported(search_engine):
+    client = SearchRedis({'drug_class': _search_reply('4', '5')})
+    positions = {}
+
+    _, debug = search_handler.run_class_expansion(
+        client, drug_classes={'statin'}, therapeutic_classes=set(), filter_clause=None,
+        applied_filters={}, return_clause=RETURN_CLAUSE, limit=2, existing_ndcs=set(),
+        offsets={'drug_class': 6}, positions=positions
+    )
+
+    command = client.round_trips[0][0]
+    assert command[command.index('LIMIT') + 1:command.index('LIMIT') + 3] == ('6', '2')
+    assert positions == {'4': 6, '5': 7}
+    assert debug['drug_class']['window_end'] == 8 and debug['drug_class']['exhausted'] is False
+
+
+def test_no_classes_sends_nothing(search_engine):
+    client = SearchRedis({})
+
+    assert search_handler.run_class_expansion(
+        client, drug_classes=set(), therapeutic_classes=set(), filter_clause=None,
+        applied_filters={}, return_clause=RETURN_CLAUSE, limit=10, existing_ndcs=set()
+    ) == ([], {})
+    assert client.round_trips == []
+
+
+class SetsPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.replies = []
+
+    def sunion(self, keys):
+        self.replies.append({ndc for key in keys for ndc in self.client.sets.get(key, set())})
+
+    def exists(self, *keys):
+        self.replies.append(sum(1 for key in keys if key in self.client.sets))
+
+    def hmget(self, key, fields):
+        drug = self.client.hashes.get(key, {})
+        self.replies.append([drug.get(field) for field in fields])
+
+    def execute_command(self, *args):
+        self.client.searches.append(args)
+        self.replies.append(_search_reply('9'))
+
+    def execute(self, raise_on_error=True):
+        self.client.round_trips += 1
+        return self.replies
+
+
+class SetsRedis:
+    def __init__(self, sets, hashes=None):
+        self.sets = sets
+        self.hashes = hashes or {}
+        self.searches = []
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return SetsPipeline(self)
+
+
+@pytest.fixture
+def sets_engine(monkeypatch):
+    monkeypatch.setattr(search_handler, 'EXPANSION_ENGINE', 'sets')
+    monkeypatch.setattr(search_handler, 'get_index_generation', lambda client: 3)
+
+
+def _drug_hash(ndc, drug_class, compounding='false'):
+    return {'ndc': ndc.encode(), 'drug_name': b'DRUG', 'drug_class': drug_class.encode(),
+            'is_compounding_base': compounding.encode()}
+
+
+def test_sets_engine_reads_the_current_generation(sets_engine):
+    client = SetsRedis(
+        {'cls:3:dc:statin': {b'2', b'1', b'3'}, 'cls:2:dc:statin': {b'8'}},
+        {'drug:1': _drug_hash('1', 'statin'), 'drug:2': _drug_hash('2', 'statin', compounding='true'),
+         'drug:3': _drug_hash('3', 'fibrate')}
+    )
+
+    drugs, debug = search_handler.run_class_expansion(
+        client, drug_classes={'statin'}, therapeutic_classes=set(), filter_clause=None,
+        applied_filters={}, return_clause=RETURN_CLAUSE, limit=10, existing_ndcs=set()
+    )
+
+    # drug:2 is a compounding base and drug:3 was reclassified since the set was built
+    assert [(drug['ndc'], drug['search_method']) for drug in drugs] == [('1', 'drug_class_filter')]
+    assert debug['engine'] == 'sets' and debug['generation'] == 3
+    assert debug['drug_class']['keys'] == ['cls:3:dc:statin'] and debug['drug_class']['members'] == 3
+    assert client.searches == [] and debug['round_trips'] == 2
+
+
+def test_missing_sets_fall_back_to_search(sets_engine):
+    client = SetsRedis({'cls:2:dc:statin': {b'8'}})
+
+    drugs, debug = search_handler.run_class_expansion(
+        client, drug_classes={'statin'}, therapeutic_classes=set(), filter_clause=None,
+        applied_filters={}, return_clause=RETURN_CLAUSE, limit=10, existing_ndcs=set()
+    )
+
+    assert [drug['ndc'] for drug in drugs] == ['9']
+    assert len(client.searches) == 1 and '@drug_class:("statin")' in client.searches[0][2]
+    assert debug['engine'] == 'search'
+    assert debug['fallback_from'] == {'engine': 'sets', 'generation': 3, 'sets_missing': True}
+
+
+def test_one_existing_set_is_enough_to_skip_the_fallback(sets_engine):
+    client = SetsRedis({'cls:3:dc:statin': {b'1'}}, {'drug:1': _drug_hash('1', 'statin')})
+
+    drugs, debug = search_handler.run_class_expansion(
+        client, drug_classes={'statin', 'fibrate'}, therapeutic_classes=set(), filter_clause=None,
+        applied_filters={}, return_clause=RETURN_CLAUSE, limit=10, existing_ndcs=set()
+    )
+
+    assert [drug['ndc'] for drug in drugs] == ['1']
+    assert client.searches == [] and 'fallback_from' not in debug
+
+
+class AggregateRedis:
+    def __init__(self, reply):
+        self.reply = reply
+        self.commands = []
+
+    def execute_command(self, *args):
+        self.commands.append(args)
+        if isinstance(self.reply, Exception):
+            raise self.reply
+        return self.reply
+
+
+def _variant(ndc, name, strength):
+    return '|~|'.join([ndc, name, 'TABLET', strength, 'ACME', 'false', '(null)']).encode()
+
+
+def _family_row(family_key, display_name, *variants):
+    return [
+        b'family_key', family_key.encode(),
+        b'variant_count', str(len(variants)).encode(),
+        b'variants', list(variants),
+        b'dosage_form_count', b'1',
+        b'manufacturer_count', b'1',
+        b'first_ndc', variants[0].split(b'|~|')[0],
+        b'family_display_name', display_name.encode(),
+        b'drug_class', b'ROSUVASTATIN',
+    ]
+
+
+def test_aggregate_groups_the_class_window_by_family():
+    crestor = _family_row(
+        'brand:CRESTOR', 'CRESTOR', _variant('3', 'CRESTOR 20 MG', '20 MG'), _variant('1', 'CRESTOR 10 MG', '10 MG')
+    )
+    rosuvastatin = _family_row('generic:ROSUVASTATIN', 'ROSUVASTATIN', _variant('2', 'ROSUVASTATIN 5 MG', '5 MG'))
+    client = AggregateRedis([2, crestor, rosuvastatin])
+    positions = {}
+
+    documents, debug = search_handler.aggregate_therapeutic_class_families(
+        client, {'Lipid Agents'}, '@is_active:{true}', limit=10, existing_ndcs={'1'}, offset=4,
+        positions=positions
+    )
+
+    command = client.commands[0]
+    assert command[:3] == ('FT.AGGREGATE', search_handler.REDIS_INDEX_NAME,
+                           '(@is_active:{true}) @therapeutic_class:{Lipid\\ Agents}')
+    assert command[command.index('GROUPBY'):command.index('GROUPBY') + 3] == ('GROUPBY', '1', '@family_key')
+    assert command[command.index('LIMIT') + 1:command.index('LIMIT') + 3] == ('4', '10')
+
+    # NDC 1 is already in the results, so CRESTOR's group-level fields go on NDC 3
+    assert [(doc['ndc'], doc['family_key']) for doc in documents] == [
+        ('3', 'brand:CRESTOR'), ('2', 'generic:ROSUVASTATIN'),
+    ]
+    assert documents[0]['family_display_name'] == 'CRESTOR' and documents[0]['strength_label'] == '20 MG'
+    assert 'dea_schedule' not in documents[0]
+    assert positions == {'3': 6, '2': 5}
+    assert debug['groups'] == 2 and debug['returned'] == 3 and debug['added'] == 2
+    assert debug['window_end'] == 7 and debug['exhausted'] is True
+
+
+def test_failed_aggregation_is_an_exhausted_stream():
+    client = AggregateRedis(Exception('Unknown index'))
+
+    documents, debug = search_handler.aggregate_therapeutic_class_families(
+        client, {'Lipid Agents'}, None, limit=10, existing_ndcs=set(), offset=2
+    )
+
+    assert documents == []
+    assert debug['error'] == 'Unknown index' and debug['window_end'] == 2 and debug['exhausted'] is True
+
+
+class ClassMapRedis:
+    def __init__(self, maps):
+        self.maps = maps
+        self.requested = []
+
+    def hmget(self, key, fields):
+        self.requested.append((key, list(fields)))
+        return [self.maps.get(key, {}).get(field) for field in fields]
+
+
+def test_class_map_is_one_hmget_on_the_current_generation(monkeypatch):
+    monkeypatch.setattr(search_handler, 'get_index_generation', lambda client: 5)
+    client = ClassMapRedis({
+        'tcmap:5': {'rosuvastatin': b'HMG-CoA Reductase Inhibitors|Lipid Agents', 'hypertension': b'ACE Inhibitors'},
+        'tcmap:4': {'zzzquil': b'Sleep Aids'},
+    })
+
+    class_map = search_handler.lookup_therapeutic_class_map(client, ['Rosuvastatin', 'hypertension', 'zzzquil', ''])
+
+    assert client.requested == [('tcmap:5', ['rosuvastatin', 'hypertension', 'zzzquil'])]
+    assert class_map == {
+        'Rosuvastatin': ['HMG-CoA Reductase Inhibitors', 'Lipid Agents'],
+        'hypertension': ['ACE Inhibitors'],
+        'zzzquil': None,
+    }
+
+
+def test_failed_class_map_lookup_knows_no_terms(monkeypatch):
+    monkeypatch.setattr(search_handler, 'get_index_generation', lambda client: 5)
+
+    class BrokenRedis:
+        def hmget(self, key, fields):
+            raise ConnectionError('reset')
+
+    assert search_handler.lookup_therapeutic_class_map(BrokenRedis(), ['statin']) == {'statin': None}
+    assert search_handler.lookup_therapeutic_class_map(BrokenRedis(), []) == {}
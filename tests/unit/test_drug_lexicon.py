@@ -0,0 +1,134 @@
+"""Tests for the query fast path and load-time derivations (functions/src/drug_lexicon.py)."""
+
+import pytest
+
+from functions.src.drug_lexicon import (
+    build_family_display_name,
+    build_family_key,
+    build_strength_label,
+    classify_query,
+    is_compounding_base,
+)
+from functions.src.search_handler import document_family_key
+from functions.src.spelling import DrugSpeller
+
+LEXICON = frozenset({'crestor', 'rosuvastatin', 'lisinopril', 'insulin glargine', 'statins'})
+
+
+def test_drug_name_only():
+    result = classify_query('Crestor', LEXICON)
+
+    assert result == {
+        'search_text': 'crestor',
+        'search_terms': ['crestor'],
+        'filters': {},
+        'corrections': [],
+        'confidence': 1.0,
+    }
+
+
+def test_strength_and_dosage_form_become_filters():
+    result = classify_query('lisinopril 10 mg tablets', LEXICON)
+
+    assert result['search_text'] == 'lisinopril'
+    assert result['filters'] == {'strength': '10mg', 'dosage_form': 'tablet'}
+
+
+def test_multi_word_names():
+    result = classify_query('insulin glargine', LEXICON)
+
+    assert result['search_text'] == 'insulin glargine'
+    assert result['search_terms'] == ['insulin', 'glargine']
+
+
+@pytest.mark.parametrize('query', ['00310-0751-90', '00310075190'])
+def test_ndc(query):
+    result = classify_query(query, LEXICON)
+
+    assert result['filters'] == {'ndc': '00310075190'}
+    assert result['confidence'] == 1.0
+
+
+@pytest.mark.parametrize('query', [
+    '',
+    'drugs for high cholesterol',  # Descriptive text goes to the LLM
+    'crestor 10 mg 20 mg',         # Two strengths
+    'crestor tablet capsule',      # Two dosage forms
+    'crestor mg',                  # Dangling unit
+    '0031-075-1',                  # NDC of the wrong length
+])
+def test_falls_back_to_the_llm(query):
+    assert classify_query(query, LEXICON) is None
+
+
+def test_empty_lexicon_only_handles_ndcs():
+    assert classify_query('crestor', frozenset()) is None
+    assert classify_query('00310075190', frozenset()) is not None
+
+
+def test_spelling_correction_lowers_confidence():
+    speller = DrugSpeller.from_names(LEXICON)
+
+    assert classify_query('crester', LEXICON) is None
+    result = classify_query('crester 10mg', LEXICON, speller)
+    assert result['search_text'] == 'crestor'
+    assert result['corrections'] == ['crester → crestor']
+    assert result['confidence'] == 0.9
+
+
+@pytest.mark.parametrize('drug_class, drug_name', [
+    ('COMPOUNDING BASES', 'GEL_BASE_NO.30'),
+    ('', 'CREAM BASE NO.52'),
+    ('VEHICLE_CREAM_BASE', 'VERSABASE'),
+    (None, 'MENTHOL'),
+])
+def test_compounding_bases_are_flagged(drug_class, drug_name):
+    assert is_compounding_base(drug_class, drug_name) is True
+
+
+@pytest.mark.parametrize('drug_class, drug_name', [
+    ('ANALGESICS', 'MENTHOL-METHYL SALICYLATE CREAM'),
+    ('HMG-COA REDUCTASE INHIBITORS', 'CRESTOR 10 MG TABLET'),
+    (None, None),
+])
+def test_drugs_are_not_flagged(drug_class, drug_name):
+    assert is_compounding_base(drug_class, drug_name) is False
+
+
+def test_brand_family_groups_every_strength():
+    doc = {'is_generic': 'false', 'brand_name': 'CRESTOR ', 'drug_class': 'ROSUVASTATIN CALCIUM'}
+
+    assert build_family_key(doc) == 'brand:CRESTOR'
+    assert build_family_display_name(doc) == 'CRESTOR'
+
+
+def test_generic_family_groups_by_ingredient():
+    doc = {'is_generic': 'true', 'drug_class': 'ROSUVASTATIN CALCIUM', 'drug_name': 'ROSUVASTATIN 10 MG TABLET'}
+
+    assert build_family_key(doc) == 'generic:ROSUVASTATIN CALCIUM'
+    assert build_family_display_name(doc) == 'ROSUVASTATIN CALCIUM'
+
+
+def test_generic_without_class_falls_back_to_its_name():
+    doc = {'generic_name': '', 'drug_name': 'LISINOPRIL 20 MG TABLET', 'ndc': '1'}
+
+    assert build_family_key(doc) == 'generic:LISINOPRIL 20 MG TABLET'
+    assert build_family_display_name(doc) == 'LISINOPRIL'
+
+
+@pytest.mark.parametrize('drug_name, label', [
+    ('CRESTOR 10 MG TABLET', '10 MG'),
+    ('LOSARTAN-HCTZ 50-12.5 MG TABLET', '12.5 MG'),
+    ('HYDROCORTISONE 2.5% CREAM', '2.5%'),
+    ('VERSABASE', ''),
+    (None, ''),
+])
+def test_strength_label(drug_name, label):
+    assert build_strength_label(drug_name) == label
+
+
+def test_precomputed_family_key_wins():
+    doc = {'family_key': 'generic:ATORVASTATIN CALCIUM', 'is_generic': 'false', 'brand_name': 'LIPITOR'}
+
+    assert document_family_key(doc) == 'generic:ATORVASTATIN CALCIUM'
+    assert document_family_key({'is_generic': 'false', 'brand_name': 'LIPITOR'}) == 'brand:LIPITOR'
@@ -0,0 +1,74 @@
+"""Tests for the two-tier embedding cache (functions/src/cache/embedding_cache.py)."""
+
+import pytest
+
+from functions.src.cache import embedding_cache
+from functions.src.cache.embedding_cache import (
+    build_embedding_cache_key,
+    clear_embedding_cache,
+    configure_embedding_cache,
+    get_cached_embedding,
+    store_embedding,
+)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache():
+    clear_embedding_cache()
+    configure_embedding_cache(None)
+    yield
+    clear_embedding_cache()
+    configure_embedding_cache(None)
+
+
+def test_key_covers_model_dimensions_normalize_and_text():
+    key = build_embedding_cache_key('titan', 1024, True, 'crestor')
+    assert key.startswith('emb:')
+    assert key == build_embedding_cache_key('titan', 1024, True, 'crestor')
+    assert key != build_embedding_cache_key('titan', 512, True, 'crestor')
+    assert key != build_embedding_cache_key('titan', 1024, False, 'crestor')
+    assert key != build_embedding_cache_key('sapbert', 1024, True, 'crestor')
+    assert key != build_embedding_cache_key('titan', 1024, True, 'lipitor')
+
+
+def test_vectors_round_trip_as_float32():
+    key = build_embedding_cache_key('titan', 3, True, 'crestor')
+    store_embedding(key, [0.5, -1.25, 2.0])
+
+    assert get_cached_embedding(key) == ([0.5, -1.25, 2.0], 'memory')
+
+
+def test_redis_tier_refills_memory():
+    client = FakeRedis()
+    configure_embedding_cache(lambda: client)
+    key = build_embedding_cache_key('titan', 2, True, 'crestor')
+    store_embedding(key, [1.0, 2.0])
+    clear_embedding_cache()
+
+    assert get_cached_embedding(key) == ([1.0, 2.0], 'redis')
+    assert get_cached_embedding(key) == ([1.0, 2.0], 'memory')
+
+
+def test_miss_and_unavailable_redis_are_not_errors():
+    def broken_factory():
+        raise ConnectionError('redis down')
+
+    configure_embedding_cache(broken_factory)
+    key = build_embedding_cache_key('titan', 2, True, 'unknown')
+    before = embedding_cache.get_embedding_cache_stats()['misses']
+
+    assert get_cached_embedding(key) == (None, None)
+    store_embedding(key, [1.0, 2.0])  # Memory tier still works
+    assert get_cached_embedding(key) == ([1.0, 2.0], 'memory')
+    assert embedding_cache.get_embedding_cache_stats()['misses'] == before + 1
@@ -0,0 +1,112 @@
+"""Tests for publishing versioned index artifacts (functions/src/index_generation.py)."""
+
+from fnmatch import fnmatchcase
+
+import pytest
+
+from functions.src.cache import response_cache
+from functions.src.index_generation import (
+    VERSIONED_KEY_RETIRE_SECONDS,
+    copy_versioned_keys,
+    publish_index_generation,
+    retire_versioned_keys,
+)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.replies = []
+
+    def copy(self, source, destination, replace=False):
+        copied = source in self.client.store
+        if copied:
+            self.client.store[destination] = set(self.client.store[source])
+        self.replies.append(copied)
+
+    def expire(self, key, seconds, nx=False):
+        self.client.expiries.setdefault(key, seconds)
+        self.replies.append(True)
+
+    def execute(self):
+        replies, self.replies = self.replies, []
+        return replies
+
+
+class FakeRedis:
+    def __init__(self, store=None):
+        self.store = store or {}
+        self.expiries = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def incr(self, key):
+        self.store[key] = int(self.store.get(key) or 0) + 1
+        return self.store[key]
+
+    def exists(self, key):
+        return int(key in self.store)
+
+    def rename(self, source, destination):
+        self.store[destination] = self.store.pop(source)
+
+    def scan_iter(self, match, count=None):
+        return [key.encode() for key in list(self.store) if fnmatchcase(key, match)]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+@pytest.fixture(autouse=True)
+def fresh_generation(monkeypatch):
+    monkeypatch.setattr(response_cache, '_GENERATION', {'value': None, 'read_at': 0.0})
+
+
+def test_publish_writes_the_next_generation_before_bumping():
+    client = FakeRedis({'index:generation': b'4', 'tcmap:4': {'statin'}, 'cls:4:dc:statin': {'1'}})
+    seen = []
+
+    def write_versioned(generation):
+        seen.append((generation, client.store['index:generation']))
+        client.store[f"tcmap:{generation}"] = {'statin'}
+        client.store[f"cls:{generation}:dc:statin"] = {'1', '2'}
+
+    assert publish_index_generation(client, write_versioned) == 5
+    assert seen == [(5, b'4')]
+    assert client.store['index:generation'] == 5
+    assert client.expiries == {'tcmap:4': VERSIONED_KEY_RETIRE_SECONDS, 'cls:4:dc:statin': VERSIONED_KEY_RETIRE_SECONDS}
+
+
+def test_artifacts_follow_a_concurrent_bump():
+    client = FakeRedis({'index:generation': b'1'})
+
+    def write_versioned(generation):
+        client.store[f"tcmap:{generation}"] = {'statin'}
+        client.store[f"cls:{generation}:tc:LIPID"] = {'1'}
+        client.incr('index:generation')  # Another loader published meanwhile
+
+    assert publish_index_generation(client, write_versioned) == 3
+    assert 'tcmap:3' in client.store and 'cls:3:tc:LIPID' in client.store
+    assert 'tcmap:2' not in client.store and 'cls:2:tc:LIPID' not in client.store
+
+
+def test_copy_forward_keeps_the_previous_artifacts_live():
+    client = FakeRedis({'tcmap:2': {'statin'}, 'cls:2:dc:statin': {'1'}, 'cls:2:tc:LIPID': {'1', '2'}})
+
+    assert copy_versioned_keys(client, 2, 3) == 3
+    assert client.store['cls:3:tc:LIPID'] == {'1', '2'} and client.store['tcmap:3'] == {'statin'}
+
+
+def test_copy_from_an_empty_generation_copies_nothing():
+    client = FakeRedis()
+
+    assert copy_versioned_keys(client, 0, 1) == 0
+    assert client.store == {}
+
+
+def test_retire_spares_the_live_generation():
+    client = FakeRedis({'tcmap:7': 1, 'tcmap:6': 1, 'cls:7:dc:statin': 1, 'cls:6:dc:statin': 1, 'cls:dc:statin': 1})
+
+    assert retire_versioned_keys(client, 7) == 3
+    assert set(client.expiries) == {'tcmap:6', 'cls:6:dc:statin', 'cls:dc:statin'}
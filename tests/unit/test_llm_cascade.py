@@ -0,0 +1,214 @@
+"""Tests for model-cascade tier selection (core/src/config/llm_config.py)."""
+
+import json
+import threading
+import time
+
+import pytest
+
+from core.src.config import llm_config
+
+MICRO = llm_config.LLMModel.NOVA_MICRO.value
+HAIKU = llm_config.LLMModel.CLAUDE_HAIKU_3_5.value
+SONNET = llm_config.LLMModel.CLAUDE_SONNET_4.value
+TIERS = [MICRO, HAIKU, SONNET]
+MESSAGES = [{'role': 'user', 'content': [{'text': 'crestor 10 mg'}]}]
+
+
+def _reply(model_id, confidence=0.9, content=None, success=True):
+    if not success:
+        return {'success': False, 'error': f'{model_id} throttled', 'model': model_id, 'metadata': {}}
+    if content is None:
+        content = json.dumps({'search_text': 'crestor', 'filters': {}, 'confidence': confidence})
+    return {
+        'success': True,
+        'content': content,
+        'model': model_id,
+        'metadata': {'input_tokens': 800, 'output_tokens': 40},
+    }
+
+
+class FakeTiers:
+    """Per-model reply factories (default: a confident reply); records call order."""
+
+    def __init__(self):
+        self.behaviour = {}
+        self.calls = []
+
+    def __setitem__(self, model_id, reply_factory):
+        self.behaviour[model_id] = reply_factory
+
+    def converse(self, messages, system_prompts=None, max_tokens=None, temperature=None, model_id=None, **kwargs):
+        self.calls.append(model_id)
+        return self.behaviour.get(model_id, lambda: _reply(model_id))()
+
+    def converse_stream(self, messages, system_prompts=None, max_tokens=None, temperature=None, model_id=None,
+                        on_text=None, **kwargs):
+        response = self.converse(messages, model_id=model_id)
+        if response.get('success') and on_text is not None:
+            on_text(response['content'])
+        return response
+
+
+@pytest.fixture
+def replies(monkeypatch):
+    tiers = FakeTiers()
+    monkeypatch.setattr(llm_config, 'call_claude_converse', tiers.converse)
+    monkeypatch.setattr(llm_config, 'call_claude_converse_stream', tiers.converse_stream)
+    return tiers
+
+
+def _cascade(**kwargs):
+    kwargs.setdefault('models', TIERS)
+    kwargs.setdefault('min_confidence', 0.7)
+    kwargs.setdefault('budget_ms', 4000)
+    return llm_config.call_llm_cascade(MESSAGES, **kwargs)
+
+
+def test_first_confident_tier_answers(replies):
+    result = _cascade()
+
+    assert result['success'] and result['model'] == MICRO
+    assert result['cascade']['tier'] == 0
+    assert [attempt['outcome'] for attempt in result['cascade']['attempts']] == ['accepted']
+    assert replies.calls == [MICRO]
+
+
+def test_escalates_on_low_confidence_and_bad_json(replies):
+    replies[MICRO] = lambda: _reply(MICRO, content='not json')
+    replies[HAIKU] = lambda: _reply(HAIKU, confidence=0.4)
+
+    result = _cascade()
+
+    assert result['model'] == SONNET and result['cascade']['tier'] == 2
+    assert [attempt['outcome'] for attempt in result['cascade']['attempts']] == \
+        ['parse_error', 'low_confidence', 'accepted']
+    # Escalations are billed too
+    assert result['cascade']['cost_estimate'] == pytest.approx(
+        sum(attempt['cost'] for attempt in result['cascade']['attempts']))
+
+
+def test_highest_confidence_answers_when_no_tier_is_confident(replies):
+    replies[MICRO] = lambda: _reply(MICRO, confidence=0.3)
+    replies[HAIKU] = lambda: _reply(HAIKU, confidence=0.6)
+    replies[SONNET] = lambda: _reply(SONNET, success=False)
+
+    result = _cascade()
+
+    assert result['success'] and result['model'] == HAIKU
+    assert result['cascade']['tier'] == 1
+
+
+def test_streaming_reports_each_tier(replies):
+    replies[MICRO] = lambda: _reply(MICRO, confidence=0.2)
+    seen = []
+
+    result = _cascade(stream=True, on_text=lambda model_id, text: seen.append(model_id))
+
+    assert result['model'] == HAIKU
+    assert seen == [MICRO, HAIKU]
+
+
+def test_budget_abandons_slow_tier_when_a_reply_exists(replies):
+    release = threading.Event()
+    replies[MICRO] = lambda: _reply(MICRO, confidence=0.3)
+    replies[HAIKU] = lambda: (release.wait(5), _reply(HAIKU))[1]
+
+    try:
+        result = _cascade(budget_ms=200)
+    finally:
+        release.set()
+
+    cascade = result['cascade']
+    assert result['model'] == MICRO and cascade['budget_exhausted']
+    assert [attempt['outcome'] for attempt in cascade['attempts']] == ['low_confidence', 'timeout']
+    assert SONNET not in replies.calls
+
+
+def test_deadline_without_a_reply_is_a_typed_timeout(replies):
+    release = threading.Event()
+    replies[MICRO] = lambda: (release.wait(5), _reply(MICRO))[1]
+
+    try:
+        start = time.perf_counter()
+        result = _cascade(budget_ms=100)
+        elapsed = time.perf_counter() - start
+    finally:
+        release.set()
+
+    cascade = result['cascade']
+    assert not result['success']
+    assert result['error_type'] == llm_config.LLMDeadlineExceeded.__name__
+    assert elapsed < 1.0  # The running tier is not waited for
+    assert cascade['budget_exhausted'] and not cascade['fallback']
+    assert [attempt['outcome'] for attempt in cascade['attempts']] == ['timeout']
+
+
+def test_request_deadline_cuts_the_configured_budget(replies):
+    release = threading.Event()
+    replies[MICRO] = lambda: _reply(MICRO, confidence=0.3)
+    replies[HAIKU] = lambda: (release.wait(5), _reply(HAIKU))[1]
+
+    try:
+        result = _cascade(budget_ms=60000, deadline=time.perf_counter() + 0.2)
+    finally:
+        release.set()
+
+    cascade = result['cascade']
+    assert result['success'] and result['model'] == MICRO
+    assert cascade['budget_ms'] <= 200
+    assert cascade['budget_exhausted']
+
+
+def test_passed_deadline_calls_no_model(replies):
+    result = _cascade(deadline=time.perf_counter() - 1)
+
+    assert result['error_type'] == llm_config.LLMDeadlineExceeded.__name__
+    assert replies.calls == []
+
+
+def test_fallback_is_bounded_by_the_deadline(replies):
+    default_model = llm_config.get_llm_config()['model_id']
+    release = threading.Event()
+    replies[MICRO] = lambda: _reply(MICRO, success=False)
+    replies[default_model] = lambda: (release.wait(5), _reply(default_model))[1]
+
+    try:
+        start = time.perf_counter()
+        result = _cascade(models=[MICRO], budget_ms=200)
+        elapsed = time.perf_counter() - start
+    finally:
+        release.set()
+
+    cascade = result['cascade']
+    assert elapsed < 1.0
+    assert result['error_type'] == llm_config.LLMDeadlineExceeded.__name__
+    assert cascade['fallback'] and cascade['attempts'][-1] == {
+        **cascade['attempts'][-1], 'model': default_model, 'outcome': 'timeout', 'fallback': True
+    }
+
+
+def test_falls_back_to_configured_model_when_every_tier_fails(replies):
+    default_model = llm_config.get_llm_config()['model_id']
+    tiers = [model_id for model_id in TIERS if model_id != default_model]
+    for model_id in tiers:
+        replies[model_id] = lambda model_id=model_id: _reply(model_id, success=False)
+
+    result = _cascade(models=tiers)
+
+    cascade = result['cascade']
+    assert result['success'] and result['model'] == default_model
+    assert cascade['fallback'] and cascade['attempts'][-1]['fallback'] is True
+    assert cascade['tier'] == len(tiers)
+
+
+def test_reports_error_when_fallback_fails_too(replies):
+    default_model = llm_config.get_llm_config()['model_id']
+    replies[MICRO] = lambda: _reply(MICRO, success=False)
+    replies[default_model] = lambda: _reply(default_model, success=False)
+
+    result = _cascade(models=[MICRO])
+
+    assert not result['success']
+    assert result['error'] == f'{default_model} throttled'
+    assert result['cascade']['model'] is None
@@ -0,0 +1,165 @@
+"""Tests for hedged Converse calls (core/src/config/llm_config.py)."""
+
+import threading
+
+import pytest
+
+from core.src.config import llm_config
+
+HAIKU = llm_config.LLMModel.CLAUDE_HAIKU_3_5.value
+NOVA_LITE = llm_config.LLMModel.NOVA_LITE.value
+MESSAGES = [{'role': 'user', 'content': [{'text': 'crestor'}]}]
+
+
+def _reply(model_id, success=True):
+    if not success:
+        return {'success': False, 'error': f'{model_id} failed', 'model': model_id, 'metadata': {}}
+    return {
+        'success': True,
+        'content': '{"search_text": "crestor"}',
+        'model': model_id,
+        'metadata': {'input_tokens': 10, 'output_tokens': 5, 'client_latency_ms': 40, 'first_token_ms': 20},
+    }
+
+
+@pytest.fixture(autouse=True)
+def hedge_config(monkeypatch):
+    monkeypatch.setitem(llm_config.LLM_HEDGE_CONFIG, 'enabled', True)
+    monkeypatch.setitem(llm_config.LLM_HEDGE_CONFIG, 'cross_model', False)
+    monkeypatch.setitem(llm_config.LLM_HEDGE_CONFIG, 'model', '')
+    monkeypatch.setitem(llm_config.LLM_HEDGE_CONFIG, 'default_delay_ms', 50.0)
+    monkeypatch.setitem(llm_config.LLM_HEDGE_CONFIG, 'min_samples', 1000)
+    monkeypatch.setitem(llm_config.LLM_HEDGE_CONFIG, 'max_rate', 1.0)
+    monkeypatch.setitem(llm_config._HEDGE_STATE, 'budget', 0.0)
+    monkeypatch.setattr(llm_config, '_HEDGE_LATENCIES', {})
+
+
+class SlowFirstCall:
+    """Fake _converse_once: the first call blocks until released, later calls answer at once."""
+
+    def __init__(self, first_succeeds=True, later_succeed=True):
+        self.first_succeeds = first_succeeds
+        self.later_succeed = later_succeed
+        self.release = threading.Event()
+        self.models = []
+        self._lock = threading.Lock()
+
+    def __call__(self, messages, system_prompts, max_tokens, temperature, model_id, on_text=None):
+        with self._lock:
+            self.models.append(model_id)
+            first = len(self.models) == 1
+        if first:
+            self.release.wait(5)
+            response = _reply(model_id, self.first_succeeds)
+        else:
+            response = _reply(model_id, self.later_succeed)
+        if on_text is not None and response['success']:
+            on_text(response['content'])
+        return response
+
+
+def test_hedges_with_the_same_model_by_default(monkeypatch):
+    call = SlowFirstCall()
+    monkeypatch.setattr(llm_config, '_converse_once', call)
+
+    try:
+        result = llm_config.call_claude_converse(MESSAGES, model_id=HAIKU)
+    finally:
+        call.release.set()
+
+    assert result['success']
+    assert call.models == [HAIKU, HAIKU]
+    assert result['hedge']['sent'] and result['hedge']['winner'] == 'hedge'
+    assert result['hedge']['model'] == HAIKU
+
+
+def test_fast_primary_is_not_hedged(monkeypatch):
+    call = SlowFirstCall()
+    call.release.set()
+    monkeypatch.setattr(llm_config, '_converse_once', call)
+
+    result = llm_config.call_claude_converse(MESSAGES, model_id=HAIKU)
+
+    assert call.models == [HAIKU]
+    assert result['hedge']['sent'] is False and result['hedge']['winner'] == 'primary'
+
+
+def test_disabled_hedging_calls_once(monkeypatch):
+    monkeypatch.setitem(llm_config.LLM_HEDGE_CONFIG, 'enabled', False)
+    call = SlowFirstCall()
+    call.release.set()
+    monkeypatch.setattr(llm_config, '_converse_once', call)
+
+    result = llm_config.call_claude_converse(MESSAGES, model_id=HAIKU)
+
+    assert 'hedge' not in result and call.models == [HAIKU]
+
+
+def test_cross_model_hedge_uses_the_mapped_model(monkeypatch):
+    monkeypatch.setitem(llm_config.LLM_HEDGE_CONFIG, 'cross_model', True)
+    call = SlowFirstCall()
+    monkeypatch.setattr(llm_config, '_converse_once', call)
+
+    try:
+        result = llm_config.call_claude_converse(MESSAGES, model_id=HAIKU)
+    finally:
+        call.release.set()
+
+    assert call.models == [HAIKU, llm_config.HEDGE_MODEL_MAP[HAIKU]]
+    assert result['model'] == llm_config.HEDGE_MODEL_MAP[HAIKU]
+
+
+def test_failed_hedge_falls_back_to_primary(monkeypatch):
+    call = SlowFirstCall(later_succeed=False)
+    monkeypatch.setattr(llm_config, '_converse_once', call)
+    threading.Timer(0.2, call.release.set).start()
+
+    result = llm_config.call_claude_converse(MESSAGES, model_id=HAIKU)
+
+    assert result['success'] and result['hedge']['winner'] == 'primary'
+
+
+def test_stream_winner_that_fails_falls_back_to_the_other_call(monkeypatch):
+    # The hedge emits first (so it wins the stream) and then fails
+    release = threading.Event()
+    models = []
+
+    def flaky_stream(messages, system_prompts, max_tokens, temperature, model_id, on_text=None):
+        models.append(model_id)
+        if len(models) == 1:
+            release.wait(5)
+            return _reply(model_id)
+        on_text('{"search_text"')
+        release.set()
+        return _reply(model_id, success=False)
+
+    monkeypatch.setattr(llm_config, '_converse_stream_once', flaky_stream)
+    deltas = []
+
+    result = llm_config.call_claude_converse_stream(MESSAGES, model_id=HAIKU, on_text=deltas.append)
+
+    assert result['success']
+    assert result['hedge']['sent'] and result['hedge']['winner'] == 'primary'
+    assert deltas == ['{"search_text"']
+
+
+def test_rate_limit_caps_hedges(monkeypatch):
+    monkeypatch.setitem(llm_config.LLM_HEDGE_CONFIG, 'max_rate', 0.0)
+    call = SlowFirstCall()
+    monkeypatch.setattr(llm_config, '_converse_once', call)
+    threading.Timer(0.2, call.release.set).start()
+
+    result = llm_config.call_claude_converse(MESSAGES, model_id=HAIKU)
+
+    assert call.models == [HAIKU]
+    assert result['hedge']['rate_limited'] and not result['hedge']['sent']
+
+
+def test_route_id_names_the_cross_model_hedge(monkeypatch):
+    monkeypatch.setitem(llm_config.LLM_CASCADE_CONFIG, 'enabled', False)
+    default_model = llm_config.get_llm_config()['model_id']
+
+    assert llm_config.get_llm_route_id() == default_model
+
+    monkeypatch.setitem(llm_config.LLM_HEDGE_CONFIG, 'model', NOVA_LITE)
+    assert llm_config.get_llm_route_id() == f'{default_model}~{NOVA_LITE}'
@@ -0,0 +1,53 @@
+"""Tests for the in-container LRU cache (functions/src/cache/lru.py)."""
+
+from functions.src.cache import lru
+from functions.src.cache.lru import LRUCache
+
+
+def test_get_returns_default_on_miss():
+    cache = LRUCache(maxsize=2)
+    assert cache.get('missing') is None
+    assert cache.get('missing', 'fallback') == 'fallback'
+    assert cache.stats()['misses'] == 2
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'a' is now the most recently used
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats() == {'size': 2, 'hits': 3, 'misses': 1, 'evictions': 1}
+
+
+def test_falsy_values_are_cached():
+    cache = LRUCache(maxsize=4)
+    cache.set('empty', '')
+    assert cache.get('empty', 'default') == ''
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(lru.time, 'monotonic', lambda: now[0])
+    cache = LRUCache(maxsize=4, ttl_seconds=10)
+    cache.set('key', 'value')
+
+    now[0] += 9
+    assert cache.get('key') == 'value'
+    now[0] += 2
+    assert cache.get('key') is None
+    assert len(cache) == 0
+
+
+def test_clear_keeps_counters():
+    cache = LRUCache(maxsize=4)
+    cache.set('key', 'value')
+    cache.get('key')
+    cache.clear()
+
+    assert len(cache) == 0
+    assert cache.stats()['hits'] == 1
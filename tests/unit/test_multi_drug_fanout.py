@@ -0,0 +1,143 @@
+"""Tests for the multi-drug embedding fan-out and pipelined KNN batch (functions/src/search_handler.py)."""
+
+import threading
+import time
+
+import pytest
+
+from functions.src import search_handler
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def execute_command(self, *args):
+        self.commands.append(args)
+
+    def execute(self, raise_on_error=True):
+        self.client.pipelines.append(self.commands)
+        if self.client.delay:
+            time.sleep(self.client.delay)
+        return [self.client.reply_for(command) for command in self.commands]
+
+
+class FakeRedis:
+    def __init__(self, replies=None, delay=0.0):
+        self.replies = replies or {}
+        self.delay = delay
+        self.pipelines = []
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def reply_for(self, command):
+        for term, reply in self.replies.items():
+            if f"@drug_name:{term}*" in command[2]:
+                return reply
+        return [0]
+
+
+@pytest.fixture(autouse=True)
+def no_index_schema(monkeypatch):
+    monkeypatch.setattr(search_handler, 'get_index_attributes', lambda client: frozenset())
+
+
+def _knn_reply(*ndcs):
+    reply = [len(ndcs)]
+    for ndc in ndcs:
+        reply.extend([f"drug:{ndc}".encode(), [b'ndc', ndc.encode(), b'score', b'0.25']])
+    return reply
+
+
+def test_embeddings_run_concurrently_and_keep_term_order(monkeypatch):
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def embed(term):
+        with lock:
+            running.append(term)
+            peak.append(len(running))
+        time.sleep(0.05 if term == 'atorvastatin' else 0.01)
+        with lock:
+            running.remove(term)
+        return {'success': True, 'embedding': [0.1], 'term': term}
+
+    monkeypatch.setattr(search_handler, 'coalesced_embedding', embed)
+    terms = ['atorvastatin', 'rosuvastatin', 'simvastatin']
+
+    results = search_handler.embed_terms_concurrently(terms, deadline_ms=2000)
+
+    assert [term for term, _ in results] == terms
+    assert max(peak) > 1
+
+
+def test_terms_past_the_deadline_are_dropped(monkeypatch):
+    def embed(term):
+        time.sleep(0.5 if term == 'slow' else 0.0)
+        return {'success': True, 'embedding': [0.1]}
+
+    monkeypatch.setattr(search_handler, 'coalesced_embedding', embed)
+
+    results = search_handler.embed_terms_concurrently(['fast', 'slow', 'quick'], deadline_ms=100)
+
+    assert [term for term, _ in results] == ['fast', 'quick']
+
+
+def test_failed_embedding_is_reported_not_raised(monkeypatch):
+    def embed(term):
+        if term == 'bad':
+            raise RuntimeError('throttled')
+        return {'success': True, 'embedding': [0.1]}
+
+    monkeypatch.setattr(search_handler, 'coalesced_embedding', embed)
+
+    results = dict(search_handler.embed_terms_concurrently(['good', 'bad']))
+
+    assert results['good']['success'] is True
+    assert results['bad'] == {'success': False, 'error': 'throttled'}
+
+
+def test_knn_batch_is_one_pipeline_gated_per_term():
+    client = FakeRedis({'lipitor': _knn_reply('111'), 'crestor': _knn_reply('222', '333')})
+
+    results = search_handler.redis_vector_only_search_batch(
+        [('lipitor', [0.1, 0.2]), ('crestor', [0.3, 0.4])], filters=None, limit=20, redis_client=client
+    )
+
+    assert len(client.pipelines) == 1
+    queries = [command[2] for command in client.pipelines[0]]
+    assert '@drug_name:lipitor*' in queries[0] and '@drug_name:crestor*' in queries[1]
+    assert [[drug['ndc'] for drug in result['raw_results']] for result in results] == [['111'], ['222', '333']]
+    assert results[1]['raw_results'][0]['similarity_score'] == pytest.approx(0.75)
+
+
+def test_knn_deadline_marks_every_term_timed_out():
+    client = FakeRedis({'lipitor': _knn_reply('111')}, delay=0.3)
+
+    results = search_handler.redis_vector_only_search_batch(
+        [('lipitor', [0.1]), ('crestor', [0.2])], filters=None, redis_client=client, deadline_ms=50
+    )
+
+    assert [result['timed_out'] for result in results] == [True, True]
+    assert all(result['raw_results'] == [] for result in results)
+
+
+def test_failed_reply_only_fails_its_own_term():
+    client = FakeRedis({'lipitor': _knn_reply('111'), 'crestor': Exception('syntax error')})
+
+    results = search_handler.redis_vector_only_search_batch(
+        [('lipitor', [0.1]), ('crestor', [0.2])], filters=None, redis_client=client
+    )
+
+    assert results[0]['success'] is True and len(results[0]['raw_results']) == 1
+    assert results[1] == {'success': False, 'error': 'syntax error', 'raw_results': []}
+
+
+def test_empty_batch_sends_nothing():
+    client = FakeRedis()
+
+    assert search_handler.redis_vector_only_search_batch([], filters=None, redis_client=client) == []
+    assert client.pipelines == []
@@ -0,0 +1,106 @@
+"""Tests for /search cursor encoding and validation (functions/src/pagination.py)."""
+
+import base64
+import json
+import zlib
+
+import pytest
+
+from functions.src.pagination import (
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    first_page,
+    request_fingerprint,
+)
+
+
+FINGERPRINT = request_fingerprint('crestor', {'dosage_form': 'TABLET'}, 20)
+
+
+def _encode_raw(page):
+    return base64.urlsafe_b64encode(zlib.compress(json.dumps(page).encode('utf-8'))).decode('ascii')
+
+
+def _next_page():
+    page = first_page(FINGERPRINT, 5)
+    page['offsets'] = {'knn': 23, 'drug_class': 4, 'therapeutic_class': 0}
+    page['exhausted'] = ['therapeutic_class']
+    page['classes'] = {'drug_class': ['STATINS'], 'therapeutic_class': []}
+    page['families'] = ['ROSUVASTATIN', 'ATORVASTATIN']
+    return page
+
+
+def test_round_trip():
+    page = _next_page()
+    cursor = encode_cursor(page)
+
+    assert '=' not in cursor and '+' not in cursor and '/' not in cursor
+    assert decode_cursor(cursor, FINGERPRINT, 5) == page
+
+
+def test_fingerprint_covers_request_inputs():
+    assert FINGERPRINT == request_fingerprint('crestor', {'dosage_form': 'TABLET'}, 20)
+    assert FINGERPRINT != request_fingerprint('lipitor', {'dosage_form': 'TABLET'}, 20)
+    assert FINGERPRINT != request_fingerprint('crestor', None, 20)
+    assert FINGERPRINT != request_fingerprint('crestor', {'dosage_form': 'TABLET'}, 10)
+    assert FINGERPRINT != request_fingerprint('crestor', {'dosage_form': 'TABLET'}, 20, {'engine': 'sets'})
+
+
+def test_rejects_cursor_of_another_query():
+    cursor = encode_cursor(_next_page())
+    other = request_fingerprint('lipitor', None, 20)
+
+    with pytest.raises(InvalidCursorError, match='query'):
+        decode_cursor(cursor, other, 5)
+
+
+def test_rejects_cursor_after_index_reload():
+    cursor = encode_cursor(_next_page())
+
+    with pytest.raises(InvalidCursorError, match='expired'):
+        decode_cursor(cursor, FINGERPRINT, 6)
+
+
+@pytest.mark.parametrize('cursor', ['', 'not a cursor', '!!!!', base64.urlsafe_b64encode(b'plain').decode()])
+def test_rejects_malformed_cursor(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, FINGERPRINT, 5)
+
+
+@pytest.mark.parametrize('change', [
+    {'v': 2},
+    {'offsets': {'knn': -1, 'drug_class': 0, 'therapeutic_class': 0}},
+    {'offsets': {'knn': 0, 'drug_class': '3', 'therapeutic_class': 0}},
+    {'offsets': {'knn': 0}},
+    {'families': 'ROSUVASTATIN'},
+    {'group_offset': -20},
+    {'group_offset': '20'},
+])
+def test_rejects_tampered_state(change):
+    page = _next_page()
+    page.update(change)
+
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(_encode_raw(page), FINGERPRINT, 5)
+
+
+def test_group_offset_defaults_for_cursors_without_it():
+    page = _next_page()
+    del page['group_offset']
+
+    assert decode_cursor(_encode_raw(page), FINGERPRINT, 5)['group_offset'] == 0
+
+
+def test_multi_drug_cursor_size_does_not_grow_with_pages():
+    page = first_page(FINGERPRINT, 5)
+    sizes = []
+    for offset in (20, 40, 400):
+        page = {**page, 'group_offset': offset}
+        sizes.append(len(encode_cursor(page)))
+
+    assert max(sizes) - min(sizes) <= 2
+
+
+def test_invalid_cursor_is_a_value_error():
+    assert issubclass(InvalidCursorError, ValueError)
@@ -0,0 +1,91 @@
+"""Tests for Converse cache-point gating (core/src/config/llm_config.py)."""
+
+import pytest
+
+from core.src.config import llm_config
+from core.src.config.llm_config import CACHE_POINT
+from functions.src.prompts.medical_search import build_medical_search_prompts
+
+SONNET = llm_config.LLMModel.CLAUDE_SONNET_4.value
+HAIKU = 'us.anthropic.claude-3-5-haiku-20241022-v1:0'
+MICRO = llm_config.LLMModel.NOVA_MICRO.value
+
+
+class FakeBedrock:
+    def __init__(self):
+        self.requests = []
+
+    def converse(self, **request):
+        self.requests.append(request)
+        return {
+            'output': {'message': {'content': [{'text': '{}'}]}},
+            'usage': {'inputTokens': 10, 'outputTokens': 2, 'cacheReadInputTokens': 0},
+            'metrics': {'latencyMs': 5},
+        }
+
+
+@pytest.fixture
+def bedrock(monkeypatch):
+    client = FakeBedrock()
+    monkeypatch.setattr(llm_config, 'PROMPT_CACHE_ENABLED', True)
+    monkeypatch.setattr(llm_config, 'get_aws_client', lambda service, region=None: (client, 0.0))
+    return client
+
+
+def _system(tokens):
+    return [{'text': 'x' * (tokens * llm_config.PROMPT_CACHE_CHARS_PER_TOKEN)}, CACHE_POINT]
+
+
+def test_prefix_estimate_stops_at_the_last_cache_point():
+    messages = [{'role': 'user', 'content': [{'text': 'y' * 400}, CACHE_POINT, {'text': 'z' * 4000}]}]
+
+    assert llm_config.estimate_cache_prefix_tokens(_system(1000), messages) == 1100
+    assert llm_config.estimate_cache_prefix_tokens([{'text': 'x' * 8000}]) == 0
+
+
+@pytest.mark.parametrize('model_id, tokens, eligible', [
+    (SONNET, 1024, True),
+    (SONNET, 1023, False),
+    (HAIKU, 1500, False),
+    (HAIKU, 2048, True),
+    (MICRO, 1000, True),
+    ('anthropic.claude-3-haiku-20240307-v1:0', 5000, False),
+    ('mistral.mistral-large-2407-v1:0', 5000, False),
+])
+def test_eligibility_needs_the_model_minimum(monkeypatch, model_id, tokens, eligible):
+    monkeypatch.setattr(llm_config, 'PROMPT_CACHE_ENABLED', True)
+
+    assert llm_config.prompt_cache_eligible(model_id, _system(tokens)) is eligible
+
+
+def test_caching_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(llm_config, 'PROMPT_CACHE_ENABLED', False)
+
+    assert llm_config.prompt_cache_eligible(SONNET, _system(5000)) is False
+
+
+def test_short_prefix_is_sent_without_cache_points(bedrock):
+    messages = [{'role': 'user', 'content': [{'text': 'lipitor'}, CACHE_POINT]}]
+
+    result = llm_config.call_claude_converse(messages, _system(100), model_id=SONNET, hedge=False)
+
+    request = bedrock.requests[0]
+    assert request['system'] == [{'text': 'x' * 400}]
+    assert request['messages'][0]['content'] == [{'text': 'lipitor'}]
+    assert result['metadata']['prompt_cache_eligible'] is False
+
+
+def test_long_prefix_keeps_its_cache_point(bedrock):
+    messages = [{'role': 'user', 'content': [{'text': 'lipitor'}]}]
+
+    result = llm_config.call_claude_converse(messages, _system(2000), model_id=SONNET, hedge=False)
+
+    assert bedrock.requests[0]['system'][-1] == CACHE_POINT
+    assert result['metadata']['prompt_cache_eligible'] is True
+
+
+def test_search_prompt_marks_its_static_prefix():
+    system_messages, user_messages = build_medical_search_prompts('lipitor 20mg')
+
+    assert system_messages[-1] is CACHE_POINT
+    assert all('cachePoint' not in block for message in user_messages for block in message['content'])
@@ -0,0 +1,91 @@
+"""Tests for the query-parse cache keys and tiers (functions/src/cache/query_cache.py)."""
+
+import json
+
+import pytest
+
+from functions.src.cache import query_cache
+from functions.src.cache.query_cache import build_cache_key, hints_digest, normalize_query
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+
+    def hset(self, key, mapping):
+        self.client.hashes.setdefault(key, {}).update(mapping)
+
+    def expire(self, key, seconds):
+        pass
+
+    def execute(self):
+        return []
+
+
+@pytest.fixture(autouse=True)
+def empty_memory_cache():
+    query_cache._MEMORY_CACHE.clear()
+    yield
+    query_cache._MEMORY_CACHE.clear()
+
+
+def test_normalize_query_collapses_case_and_whitespace():
+    assert normalize_query('  Crestor   10 MG ') == 'crestor 10 mg'
+    assert normalize_query(None) == ''
+
+
+def test_key_ignores_trivial_query_differences():
+    assert build_cache_key('Crestor 10mg', 'v1', 'model') == build_cache_key(' crestor  10MG', 'v1', 'model')
+
+
+def test_key_changes_with_prompt_version_and_model():
+    base = build_cache_key('crestor', 'v1', 'model-a')
+    assert base != build_cache_key('crestor', 'v2', 'model-a')
+    assert base != build_cache_key('crestor', 'v1', 'model-b')
+
+
+def test_key_includes_spelling_hints():
+    no_hints = build_cache_key('crestr', 'v1', 'model')
+    hinted = build_cache_key('crestr', 'v1', 'model', {'crestr': 'crestor'})
+
+    assert no_hints != hinted
+    assert hints_digest(None) == hints_digest({}) == query_cache.NO_HINTS_DIGEST
+    assert hints_digest({'a': 'b', 'c': 'd'}) == hints_digest({'c': 'd', 'a': 'b'})
+    assert hints_digest({'crestr': 'crestor'}) != hints_digest({'crestr': 'crest'})
+
+
+def test_store_then_get_from_memory_and_redis():
+    client = FakeRedis()
+    response = {'success': True, 'structured': {'search_text': 'crestor'}}
+    hints = {'crestr': 'crestor'}
+    query_cache.store_cached_parse('crestr', 'v1', 'model', response, client, spelling_hints=hints)
+
+    cached, info = query_cache.get_cached_parse('crestr', 'v1', 'model', client, spelling_hints=hints)
+    assert cached == response and info['tier'] == 'memory'
+
+    query_cache._MEMORY_CACHE.clear()
+    cached, info = query_cache.get_cached_parse('crestr', 'v1', 'model', client, spelling_hints=hints)
+    assert cached == response and info['tier'] == 'redis'
+
+    key = build_cache_key('crestr', 'v1', 'model', hints)
+    assert json.loads(client.hashes[key]['response']) == response
+
+
+def test_parse_cached_under_other_hints_is_not_served():
+    client = FakeRedis()
+    query_cache.store_cached_parse('crestr', 'v1', 'model', {'success': True}, client,
+                                   spelling_hints={'crestr': 'crestor'})
+
+    cached, info = query_cache.get_cached_parse('crestr', 'v1', 'model', client)
+    assert cached is None and info['hit'] is False
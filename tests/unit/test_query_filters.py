@@ -0,0 +1,96 @@
+"""Tests for FT.SEARCH filter construction (functions/src/search_handler.py)."""
+
+import pytest
+
+from functions.src import search_handler
+from functions.src.search_handler import (
+    build_filter_clause,
+    build_strength_clause,
+    build_vector_only_command,
+    parse_strength_filter,
+)
+
+STRENGTH_INDEX = frozenset({'strength_tokens'})
+
+
+@pytest.fixture(autouse=True)
+def prefilter_enabled(monkeypatch):
+    monkeypatch.setattr(search_handler, 'STRENGTH_PREFILTER_ENABLED', True)
+
+
+def _query(command):
+    return command[2]
+
+
+@pytest.mark.parametrize('strength, expected', [
+    ('200mg', [('200', 'MG')]),
+    ('10 mg', [('10', 'MG')]),
+    ('0.5%', [('0.5', '%')]),
+    ('12.5', [('12.5', None)]),
+    ('', []),
+    ('high', []),
+    ('0', []),
+])
+def test_parse_strength_filter(strength, expected):
+    assert parse_strength_filter({'strength': strength}) == expected
+
+
+def test_no_filters_means_no_strength():
+    assert parse_strength_filter(None) == []
+
+
+def test_strength_clause_uses_canonical_escaped_tokens():
+    clause, tokens = build_strength_clause([('12.50', 'MG'), ('12.5', 'MG'), ('5', None)], STRENGTH_INDEX)
+
+    assert tokens == ['12.5MG', '5']
+    assert clause == '@strength_tokens:{12\\.5MG | 5}'
+
+
+def test_strength_clause_needs_the_index_field():
+    assert build_strength_clause([('20', 'MG')], frozenset()) == (None, ['20MG'])
+
+
+def test_strength_clause_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(search_handler, 'STRENGTH_PREFILTER_ENABLED', False)
+
+    assert build_strength_clause([('20', 'MG')], STRENGTH_INDEX) == (None, ['20MG'])
+
+
+def test_vector_only_query_prefilters_strength():
+    command = build_vector_only_command(
+        [0.1, 0.2], ['lipitor'], {'strength': '20 mg', 'dosage_form': 'tablet'}, limit=5,
+        index_attributes=STRENGTH_INDEX
+    )
+
+    query = _query(command)
+    assert query.startswith('(@dosage_form:{')
+    assert '@strength_tokens:{20MG}' in query
+    assert '@drug_name:lipitor*' in query
+    assert query.endswith('=>[KNN 5 @embedding $vec AS score]')
+
+
+def test_vector_only_query_without_the_field_has_no_strength_clause():
+    command = build_vector_only_command([0.1], ['lipitor'], {'strength': '20mg'}, index_attributes=frozenset())
+
+    assert 'strength_tokens' not in _query(command)
+
+
+def test_strength_alone_is_a_valid_prefilter():
+    command = build_vector_only_command([0.1], None, {'strength': '20mg'}, index_attributes=STRENGTH_INDEX)
+
+    assert _query(command) == '@strength_tokens:{20MG}=>[KNN 20 @embedding $vec AS score]'
+
+
+def test_filter_clause_excludes_compounding_bases_once_indexed():
+    clause, applied = build_filter_clause({'dosage_form': 'tablet'}, frozenset({'is_compounding_base'}))
+
+    assert clause.endswith(' (-@is_compounding_base:{true})')
+    assert 'is_compounding_base' not in applied
+
+
+def test_unfiltered_query_still_excludes_compounding_bases():
+    assert build_filter_clause({}, frozenset({'is_compounding_base'})) == ('(-@is_compounding_base:{true})', {})
+
+
+def test_older_index_has_no_compounding_clause():
+    assert build_filter_clause({}, frozenset()) == (None, {})
@@ -0,0 +1,59 @@
+"""Tests for the process-wide Redis pool (functions/src/config/redis_config.py)."""
+
+import pytest
+
+from functions.src.config import redis_config
+from functions.src.config.redis_config import (
+    diff_pool_stats,
+    get_pool_stats,
+    get_redis_client,
+    get_redis_config,
+    get_redis_pool,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_pools(monkeypatch):
+    monkeypatch.setattr(redis_config, '_POOLS', {})
+    monkeypatch.setitem(redis_config.REDIS_CONFIG, 'password', 'secret')
+
+
+def test_clients_share_one_pool_per_decode_mode():
+    first = get_redis_client()
+    second = get_redis_client()
+    decoded = get_redis_client(decode_responses=True)
+
+    assert first.connection_pool is second.connection_pool
+    assert decoded.connection_pool is not first.connection_pool
+    assert get_redis_pool() is first.connection_pool
+    assert get_redis_pool(decode_responses=True) is decoded.connection_pool
+
+
+def test_pool_is_bounded_and_blocking():
+    pool = get_redis_pool()
+
+    assert isinstance(pool, redis_config.TrackedConnectionPool)
+    assert pool.max_connections == redis_config.REDIS_CONFIG['max_connections']
+    assert pool.connection_kwargs['password'] == 'secret'
+
+
+def test_missing_password_is_an_error(monkeypatch):
+    monkeypatch.setitem(redis_config.REDIS_CONFIG, 'password', None)
+    monkeypatch.delenv('REDIS_PASSWORD', raising=False)
+
+    with pytest.raises(RuntimeError, match='REDIS_PASSWORD'):
+        get_redis_client()
+
+
+def test_config_never_exposes_the_password():
+    assert 'password' not in get_redis_config()
+
+
+def test_diff_reports_reused_connections(monkeypatch):
+    monkeypatch.setattr(redis_config, '_STATS', {'connections_opened': 0, 'connections_checked_out': 0})
+    before = get_pool_stats()
+    for stat in ('connections_opened', 'connections_checked_out', 'connections_checked_out',
+                 'connections_checked_out'):
+        redis_config._increment(stat)
+
+    assert diff_pool_stats(before) == {'connections_opened': 1, 'connections_reused': 2, 'checkouts': 3}
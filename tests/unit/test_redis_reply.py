@@ -0,0 +1,75 @@
+"""Tests for the FT.SEARCH / FT.AGGREGATE reply decoder (functions/src/redis_reply.py)."""
+
+from functions.src.redis_reply import decode_aggregate_reply, decode_document, decode_search_reply
+
+
+RESP2_SEARCH = [
+    2,
+    b'drug:1', [b'drug_name', b'CRESTOR 10 MG', b'ndc', b'00310075190', b'__score', b'0.12'],
+    b'drug:2', [b'drug_name', b'ROSUVASTATIN 10 MG', b'ndc', b'00093757698'],
+]
+
+
+def test_decodes_resp2_search_reply():
+    total, documents = decode_search_reply(RESP2_SEARCH)
+
+    assert total == 2
+    assert documents == [
+        {'drug_name': 'CRESTOR 10 MG', 'ndc': '00310075190', '__score': '0.12'},
+        {'drug_name': 'ROSUVASTATIN 10 MG', 'ndc': '00093757698'},
+    ]
+
+
+def test_with_ids_adds_redis_key():
+    _, documents = decode_search_reply(RESP2_SEARCH, with_ids=True)
+
+    assert [document['_id'] for document in documents] == ['drug:1', 'drug:2']
+
+
+def test_decodes_str_replies_and_empty_replies():
+    total, documents = decode_search_reply([1, 'drug:1', ['drug_name', 'LIPITOR']])
+
+    assert (total, documents) == (1, [{'drug_name': 'LIPITOR'}])
+    assert decode_search_reply(None) == (0, [])
+    assert decode_search_reply([0]) == (0, [])
+
+
+def test_decodes_resp3_search_reply():
+    reply = {
+        b'total_results': 1,
+        b'results': [{b'id': b'drug:1', b'extra_attributes': {b'drug_name': b'CRESTOR'}}],
+    }
+
+    assert decode_search_reply(reply, with_ids=True) == (1, [{'drug_name': 'CRESTOR', '_id': 'drug:1'}])
+
+
+def test_values_containing_the_separator_fall_back_per_value():
+    document = decode_document([b'a', b'x\x1fy', b'b', b'z'])
+
+    assert document == {'a': 'x\x1fy', 'b': 'z'}
+
+
+def test_mixed_and_dangling_fields():
+    assert decode_document([b'a', b'1', b'b', 2]) == {'a': '1', 'b': 2}
+    assert decode_document([b'a', b'1', b'b']) == {'a': '1'}
+    assert decode_document([]) == {}
+
+
+def test_decodes_aggregate_rows_and_tolist_reducers():
+    reply = [
+        2,
+        [b'drug_class', b'STATINS', b'ndcs', [b'1', b'2']],
+        [b'drug_class', b'ACE INHIBITORS', b'ndcs', [b'3']],
+    ]
+
+    assert decode_aggregate_reply(reply) == [
+        {'drug_class': 'STATINS', 'ndcs': ['1', '2']},
+        {'drug_class': 'ACE INHIBITORS', 'ndcs': ['3']},
+    ]
+
+
+def test_decodes_resp3_aggregate_reply():
+    reply = {'results': [{'extra_attributes': {'drug_class': 'STATINS', 'count': b'4'}}]}
+
+    assert decode_aggregate_reply(reply) == [{'drug_class': 'STATINS', 'count': '4'}]
+    assert decode_aggregate_reply([]) == []
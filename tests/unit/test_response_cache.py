@@ -0,0 +1,144 @@
+"""Tests for the full-response cache (functions/src/cache/response_cache.py)."""
+
+import json
+
+import pytest
+
+from functions.src.cache import response_cache
+from functions.src.cache.response_cache import (
+    build_response_cache_key,
+    bump_index_generation,
+    get_index_generation,
+    get_or_compute_response,
+)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.gets = 0
+
+    def get(self, key):
+        self.gets += 1
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None, nx=False, px=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    def exists(self, key):
+        return int(key in self.values)
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+
+@pytest.fixture(autouse=True)
+def fresh_generation(monkeypatch):
+    monkeypatch.setitem(response_cache._GENERATION, 'value', None)
+    monkeypatch.setitem(response_cache._GENERATION, 'read_at', 0.0)
+
+
+def _key(**overrides):
+    args = dict(query='crestor 10 mg', filters={'dosage_form': 'TABLET'}, max_results=20,
+                prompt_version='v1', model_id='haiku', generation=3)
+    args.update(overrides)
+    return build_response_cache_key(**args)
+
+
+def test_key_is_canonical():
+    assert _key() == _key(query='  Crestor  10 MG')
+    assert _key(filters={'a': 1, 'b': 2}) == _key(filters={'b': 2, 'a': 1})
+    assert _key(filters=None) == _key(filters={})
+    assert _key().startswith('search:resp:3:')
+
+
+@pytest.mark.parametrize('field, value', [
+    ('query', 'lipitor'),
+    ('filters', {'dosage_form': 'CAPSULE'}),
+    ('max_results', 10),
+    ('prompt_version', 'v2'),
+    ('model_id', 'sonnet'),
+    ('generation', 4),
+    ('extra', {'expansion': 'sets'}),
+])
+def test_key_changes_with_every_input(field, value):
+    assert _key(**{field: value}) != _key()
+
+
+def test_generation_is_read_once_per_refresh_window():
+    client = FakeRedis()
+    assert get_index_generation(client) == 0
+
+    client.values['index:generation'] = b'7'
+    assert get_index_generation(client) == 0  # Still within the refresh window
+    assert client.gets == 1
+
+    response_cache._GENERATION['read_at'] -= response_cache.INDEX_GENERATION_REFRESH_SECONDS + 1
+    assert get_index_generation(client) == 7
+
+
+def test_bump_retires_older_keys():
+    client = FakeRedis()
+    before = _key(generation=get_index_generation(client))
+
+    assert bump_index_generation(client) == 1
+    assert get_index_generation(client) == 1
+    assert _key(generation=get_index_generation(client)) != before
+
+
+def test_miss_computes_and_stores_then_hits():
+    client = FakeRedis()
+    body = json.dumps({'success': True, 'results': []})
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'statusCode': 200, 'body': body}
+
+    response, info = get_or_compute_response(client, _key(), compute)
+    assert response['body'] == body and info['hit'] is False and info['bytes'] > 0
+    assert _key() + ':lock' not in client.values
+
+    response, info = get_or_compute_response(client, _key(), compute)
+    assert response['body'] == body and info['hit'] is True
+    assert len(calls) == 1
+
+
+def test_error_responses_are_not_cached():
+    client = FakeRedis()
+
+    def compute():
+        return {'statusCode': 500, 'body': json.dumps({'success': False})}
+
+    get_or_compute_response(client, _key(), compute)
+
+    assert _key() not in client.values
+
+
+class InfoRedis(FakeRedis):
+    def __init__(self):
+        super().__init__()
+        self.info_calls = 0
+
+    def info(self, section):
+        self.info_calls += 1
+        return {'evicted_keys': 5, 'expired_keys': 9}
+
+
+def test_stats_report_redis_evictions_read_at_most_once_per_interval(monkeypatch):
+    monkeypatch.setitem(response_cache._REDIS_INFO, 'value', None)
+    client = InfoRedis()
+
+    stats = response_cache.get_response_cache_stats(client)
+    response_cache.get_response_cache_stats(client)
+
+    assert stats['evicted_keys'] == 5 and stats['expired_keys'] == 9
+    assert 'bytes_stored' in stats
+    assert client.info_calls == 1
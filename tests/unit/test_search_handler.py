@@ -0,0 +1,176 @@
+"""Tests for search_handler request plumbing (functions/src/search_handler.py)."""
+
+import json
+import time
+
+import pytest
+
+from functions.src import search_handler
+
+
+class FakeContext:
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
+@pytest.fixture
+def parse_budget(monkeypatch):
+    monkeypatch.setitem(search_handler.LLM_CASCADE_CONFIG, 'budget_ms', 4000.0)
+    monkeypatch.setattr(search_handler, 'LLM_PARSE_RESERVE_MS', 5000.0)
+
+
+def _deadline_ms(context):
+    return (search_handler.parse_deadline(context) - time.perf_counter()) * 1000
+
+
+def test_parse_deadline_uses_the_cascade_budget(parse_budget):
+    assert 3900 < _deadline_ms(FakeContext(29000)) <= 4000
+    assert 3900 < _deadline_ms(None) <= 4000
+
+
+def test_parse_deadline_leaves_time_for_retrieval(parse_budget):
+    assert 900 < _deadline_ms(FakeContext(6000)) <= 1000
+    assert _deadline_ms(FakeContext(3000)) <= 0
+
+
+def test_parse_passes_the_deadline_to_the_cascade(monkeypatch):
+    seen = {}
+
+    def fake_cascade(**kwargs):
+        seen.update(kwargs)
+        return {'success': True, 'content': '{}', 'model': 'm', 'metadata': {}}
+
+    monkeypatch.setitem(search_handler.LLM_CASCADE_CONFIG, 'enabled', True)
+    monkeypatch.setattr(search_handler, 'call_llm_cascade', fake_cascade)
+
+    search_handler.call_parse_model([], [], deadline=123.0)
+
+    assert seen['deadline'] == 123.0
+
+
+class CacheRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None, nx=False, px=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    def exists(self, key):
+        return int(key in self.values)
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+    def info(self, section):
+        return {'evicted_keys': 2, 'expired_keys': 3}
+
+
+def test_response_cache_hit_reports_no_request_cost(monkeypatch):
+    client = CacheRedis()
+    monkeypatch.setattr(search_handler, 'get_redis_client', lambda: client)
+    monkeypatch.setattr(search_handler, 'get_index_generation', lambda redis_client: 1)
+    body = {
+        'success': True,
+        'results': [],
+        'metrics': {
+            'llm': {'input_tokens': 900, 'output_tokens': 80, 'cost_estimate': 0.0012,
+                    'prompt_cache': {'eligible': False, 'read_tokens': 0, 'write_tokens': 0, 'savings': 0.0}},
+            'embedding': {'latency_ms': 120.0, 'cache_hits': 0, 'cache_misses': 1}
+        }
+    }
+    monkeypatch.setattr(search_handler, 'execute_search', lambda event, context: {
+        'statusCode': 200, 'body': json.dumps(body)
+    })
+    event = {'body': json.dumps({'query': 'crestor'})}
+
+    miss = json.loads(search_handler.lambda_handler(event, None)['body'])['metrics']
+    hit = json.loads(search_handler.lambda_handler(event, None)['body'])['metrics']
+
+    assert miss['cache_hit'] is False and miss['llm']['input_tokens'] == 900
+    assert hit['cache_hit'] is True
+    assert hit['llm']['input_tokens'] == 0 and hit['llm']['output_tokens'] == 0
+    assert hit['llm']['cost_estimate'] == 0.0 and hit['llm']['path'] == 'response_cache'
+    assert hit['embedding']['latency_ms'] == 0.0
+    assert hit['response_cache']['evicted_keys'] == 2 and hit['response_cache']['bytes_stored'] > 0
+
+
+class IndicationRedis:
+    def __init__(self, values):
+        self.values = values
+        self.requested = []
+
+    def mget(self, keys):
+        self.requested.append(list(keys))
+        return [self.values.get(key) for key in keys]
+
+
+@pytest.fixture
+def indication_cache(monkeypatch):
+    cache = search_handler.LRUCache(maxsize=16, ttl_seconds=3600)
+    monkeypatch.setattr(search_handler, '_INDICATION_CACHE', cache)
+    generation = {'value': 1}
+    monkeypatch.setattr(search_handler, 'get_index_generation', lambda redis_client: generation['value'])
+    return generation
+
+
+def test_indications_are_cached_per_generation(indication_cache):
+    client = IndicationRedis({'indication:a': b'Hypertension'})
+
+    assert search_handler.fetch_indications(['a'], client) == {'a': 'Hypertension'}
+    search_handler.fetch_indications(['a'], client)
+    assert client.requested == [['indication:a']]
+
+    indication_cache['value'] = 2
+    client.values['indication:a'] = b'Heart failure'
+    assert search_handler.fetch_indications(['a'], client) == {'a': 'Heart failure'}
+
+
+def test_missing_indications_are_not_cached(indication_cache):
+    client = IndicationRedis({})
+
+    assert search_handler.fetch_indications(['b'], client) == {'b': ''}
+    client.values['indication:b'] = b'Asthma'
+    assert search_handler.fetch_indications(['b'], client) == {'b': 'Asthma'}
+
+
+def test_multi_drug_pages_cover_every_group_once():
+    groups = [{'group_id': f"generic:DRUG_{i}"} for i in range(7)]
+    page = search_handler.first_page('fp', 1)
+    returned = []
+    while page is not None:
+        page_groups, page = search_handler.slice_group_page(groups, page, 3)
+        returned.extend(group['group_id'] for group in page_groups)
+        if page is not None:
+            assert page['families'] == []
+
+    assert returned == [group['group_id'] for group in groups]
+
+
+def test_speculative_text_is_reused_when_the_parse_keeps_the_query():
+    speculative = search_handler.normalize_query('  Lipitor 20MG ')
+
+    assert search_handler.choose_embedding_text('lipitor   20mg', speculative) == speculative
+    assert search_handler.choose_embedding_text('atorvastatin 20mg', speculative) == 'atorvastatin 20mg'
+    assert search_handler.choose_embedding_text('lipitor 20mg', None) == 'lipitor 20mg'
+
+
+def test_timed_embedding_reports_its_duration(monkeypatch):
+    def embed(text):
+        time.sleep(0.02)
+        return {'success': True, 'embedding': [0.1], 'text': text}
+
+    monkeypatch.setattr(search_handler, 'coalesced_embedding', embed)
+
+    result, elapsed_ms = search_handler.timed_embedding('lipitor')
+
+    assert result['text'] == 'lipitor'
+    assert elapsed_ms >= 20
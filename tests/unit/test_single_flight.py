@@ -0,0 +1,129 @@
+"""Tests for single-flight call coalescing (functions/src/cache/single_flight.py)."""
+
+import asyncio
+import threading
+
+from functions.src.cache.single_flight import SingleFlight
+
+
+def _start_waiter(group, key, fn, results):
+    def run():
+        try:
+            results.append(group.do(key, fn))
+        except Exception as e:
+            results.append(e)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def _wait_for_waiters(group, count):
+    for _ in range(500):
+        if group.coalesced >= count:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError('waiters never joined the in-flight call')
+
+
+def test_concurrent_callers_share_one_execution():
+    group = SingleFlight('test')
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {'value': 42}
+
+    results = []
+    leader = _start_waiter(group, 'amoxicillin', compute, results)
+    while not group.stats()['in_flight']:
+        threading.Event().wait(0.01)
+    waiters = [_start_waiter(group, 'amoxicillin', compute, results) for _ in range(3)]
+    _wait_for_waiters(group, 3)
+    release.set()
+    for thread in [leader] + waiters:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert all(result is results[0][0] for result, _ in results)
+    assert group.stats() == {'executions': 1, 'coalesced': 3, 'in_flight': 0}
+
+
+def test_leader_error_reaches_waiters_and_is_not_kept():
+    group = SingleFlight('test')
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ValueError('boom')
+
+    results = []
+    leader = _start_waiter(group, 'k', fail, results)
+    while not group.stats()['in_flight']:
+        threading.Event().wait(0.01)
+    waiter = _start_waiter(group, 'k', fail, results)
+    _wait_for_waiters(group, 1)
+    release.set()
+    leader.join(5)
+    waiter.join(5)
+
+    assert len(results) == 2 and all(isinstance(r, ValueError) for r in results)
+    # Nothing is cached: the next call runs again
+    assert group.do('k', lambda: 'ok') == ('ok', False)
+
+
+def test_sequential_calls_are_not_coalesced():
+    group = SingleFlight('test')
+
+    assert group.do('k', lambda x: x + 1, 1) == (2, False)
+    assert group.do('k', lambda x: x + 1, 2) == (3, False)
+    assert group.stats()['executions'] == 2
+    assert group.stats()['coalesced'] == 0
+
+
+def test_async_callers_share_one_execution():
+    group = SingleFlight('test')
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 'vector'
+
+    async def main():
+        return await asyncio.gather(*(group.do_async('k', compute) for _ in range(4)))
+
+    results = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert [result for result, _ in results] == ['vector'] * 4
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert group.stats()['in_flight'] == 0
+
+
+def test_async_leader_error_reaches_waiters():
+    group = SingleFlight('test')
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError('boom')
+
+    async def main():
+        return await asyncio.gather(*(group.do_async('k', fail) for _ in range(3)),
+                                    return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_disabled_runs_every_call(monkeypatch):
+    from functions.src.cache import single_flight
+    monkeypatch.setattr(single_flight, 'SINGLE_FLIGHT_ENABLED', False)
+    group = SingleFlight('test')
+
+    assert group.do('k', lambda: 1) == (1, False)
+    assert group.stats()['executions'] == 0
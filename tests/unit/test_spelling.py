@@ -0,0 +1,76 @@
+"""Tests for drug-name spelling correction (functions/src/spelling.py)."""
+
+import pytest
+
+from functions.src.spelling import (
+    DrugSpeller,
+    deserialize_vocabulary,
+    edit_distance,
+    serialize_vocabulary,
+)
+
+
+@pytest.fixture
+def speller():
+    return DrugSpeller({
+        'crestor': 40,
+        'rosuvastatin': 60,
+        'atorvastatin': 90,
+        'lisinopril': 120,
+        'losartan': 80,
+        'lipitor': 50,
+    })
+
+
+@pytest.mark.parametrize('source, target, expected', [
+    ('crestor', 'crestor', 0),
+    ('crester', 'crestor', 1),
+    ('cretsor', 'crestor', 1),  # Adjacent transposition counts once
+    ('lisinoprl', 'lisinopril', 1),
+    ('abc', 'xyz', 3),
+])
+def test_edit_distance(source, target, expected):
+    assert edit_distance(source, target, 3) == expected
+
+
+def test_edit_distance_stops_past_the_limit():
+    assert edit_distance('atorvastatin', 'lisinopril', 2) == 3
+    assert edit_distance('a', 'abcdef', 2) == 3
+
+
+def test_corrects_typos(speller):
+    assert speller.correct('crester') == 'crestor'
+    assert speller.correct('lisinoprl') == 'lisinopril'
+    assert speller.correct('atorvastatn') == 'atorvastatin'
+    assert speller.correct('Crestor') == 'crestor'
+
+
+def test_does_not_correct_short_unknown_or_non_alpha_words(speller):
+    assert speller.correct('lip') is None
+    assert speller.correct('10mg') is None
+    assert speller.correct('metformin') is None
+    assert speller.correct('') is None
+
+
+def test_short_words_allow_one_edit_only(speller):
+    # 'losratn' is two edits from 'losartan'; words under 8 letters get one
+    assert speller.correct('losratn') is None
+
+
+def test_ties_prefer_the_more_common_token():
+    speller = DrugSpeller({'abcdef': 1, 'abcdeg': 5})
+
+    assert speller.correct('abcdex') == 'abcdeg'
+
+
+def test_correct_terms_returns_only_changes(speller):
+    assert speller.correct_terms(['crester', 'lipitor', 'tablet', 'crester']) == {'crester': 'crestor'}
+
+
+def test_from_names_and_vocabulary_round_trip():
+    speller = DrugSpeller.from_names(['CRESTOR 10 MG', 'Crestor 20 MG'])
+    assert 'crestor' in speller
+    assert speller.tokens['crestor'] == 2
+
+    raw = serialize_vocabulary({'crestor': 2}, version='5')
+    assert deserialize_vocabulary(raw) == {'version': '5', 'tokens': {'crestor': 2}}
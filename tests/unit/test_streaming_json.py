@@ -0,0 +1,57 @@
+"""Tests for the incremental JSON object parser (functions/src/streaming_json.py)."""
+
+import json
+
+from functions.src.streaming_json import IncrementalObjectParser
+
+
+REPLY = json.dumps({
+    'search_text': 'crestor',
+    'filters': {'dosage_form': 'TABLET', 'strength': ['10 MG', '20 MG']},
+    'corrections': [],
+    'confidence': 0.92,
+})
+
+
+def test_reports_each_field_when_its_value_completes():
+    parser = IncrementalObjectParser()
+
+    assert parser.feed('{"search_text": "cres') == {}
+    assert parser.feed('tor", "filters": {"dosage_form": "TAB') == {'search_text': 'crestor'}
+    assert parser.feed('LET"}, "confidence": 0.9') == {'filters': {'dosage_form': 'TABLET'}}
+    assert not parser.done
+    assert parser.feed('}') == {'confidence': 0.9}
+    assert parser.done
+
+
+def test_char_by_char_matches_full_parse():
+    parser = IncrementalObjectParser()
+    completed = {}
+    for char in REPLY:
+        completed.update(parser.feed(char))
+
+    assert completed == json.loads(REPLY)
+    assert parser.fields == json.loads(REPLY)
+    assert list(completed) == ['search_text', 'filters', 'corrections', 'confidence']
+
+
+def test_strings_with_delimiters_and_escapes():
+    parser = IncrementalObjectParser()
+    reply = '{"search_text": "a, b} \\"c\\" [d]", "n": 1}'
+
+    assert parser.feed(reply) == json.loads(reply)
+
+
+def test_skips_markdown_fence_and_trailing_text():
+    parser = IncrementalObjectParser()
+
+    assert parser.feed('```json\n') == {}
+    assert parser.feed('{"search_text": "lipitor"}') == {'search_text': 'lipitor'}
+    assert parser.feed('\n```') == {}
+    assert parser.done
+
+
+def test_invalid_value_is_skipped():
+    parser = IncrementalObjectParser()
+
+    assert parser.feed('{"a": tru, "b": 2}') == {'b': 2}
@@ -0,0 +1,70 @@
+"""Tests for lexical term matching (functions/src/term_matcher.py)."""
+
+from functions.src.term_matcher import (
+    MATCH_CORPUS_FIELD,
+    TermMatcher,
+    document_corpus,
+    get_term_matcher,
+    public_document,
+)
+
+
+def test_document_corpus_is_lowercase_and_memoized():
+    drug = {'drug_name': 'CRESTOR 10 MG', 'brand_name': 'Crestor', 'generic_name': 'ROSUVASTATIN'}
+
+    assert document_corpus(drug) == 'crestor 10 mg crestor rosuvastatin'
+    drug['drug_name'] = 'changed'
+    assert document_corpus(drug) == 'crestor 10 mg crestor rosuvastatin'
+
+
+def test_document_corpus_tolerates_missing_fields():
+    assert document_corpus({'drug_name': 'LIPITOR'}) == 'lipitor  '
+
+
+def test_public_document_strips_memoized_fields():
+    drug = {'drug_name': 'LIPITOR'}
+    assert public_document(drug) is drug
+
+    document_corpus(drug)
+    public = public_document(drug)
+    assert public == {'drug_name': 'LIPITOR'}
+    assert MATCH_CORPUS_FIELD in drug
+
+
+def test_matches_like_any_substring():
+    matcher = TermMatcher(['Statin', 'lisinopril'])
+    texts = ['rosuvastatin calcium', 'lisinopril 10 mg', 'metformin', 'stati']
+
+    for text in texts:
+        assert matcher.matches(text) == any(term in text for term in matcher.terms)
+
+
+def test_first_match_keeps_list_order():
+    matcher = TermMatcher(['vastatin', 'rosuvastatin', '', 'vastatin'])
+
+    assert matcher.terms == ('vastatin', 'rosuvastatin')
+    assert matcher.first_match('rosuvastatin') == 'vastatin'
+    assert matcher.first_match('metformin') is None
+
+
+def test_escapes_regex_characters():
+    matcher = TermMatcher(['0.5%', 'a+b'])
+
+    assert matcher.matches('cream 0.5% tube')
+    assert not matcher.matches('cream 015x tube')
+    assert matcher.first_match('a+b solution') == 'a+b'
+
+
+def test_empty_matcher_never_matches():
+    matcher = TermMatcher([])
+
+    assert not matcher
+    assert not matcher.matches('anything')
+    assert matcher.first_match('anything') is None
+
+
+def test_get_term_matcher_concatenates_and_caches():
+    matcher = get_term_matcher(['crestor'], None, ['lipitor'])
+
+    assert matcher.terms == ('crestor', 'lipitor')
+    assert get_term_matcher(['crestor', 'lipitor']) is matcher